@@ -1,7 +1,11 @@
 import json
+from pathlib import Path
 
+# Resolved from this file, so the app can be started from any directory
+CONFIG_PATH = Path(__file__).resolve().parent / 'config.json'
 
-def load_config(filepath: str) -> dict:
+
+def load_config(filepath: str | Path = CONFIG_PATH) -> dict:
     with open(filepath, encoding='utf-8', mode='r') as f:
         config = json.load(f)
 
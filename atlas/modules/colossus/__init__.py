@@ -0,0 +1,24 @@
+"""
+Colossus: local generation service.
+
+Exposes the models in models/ over HTTP so engineers and scripts can
+share one warm generation box:
+
+    python -m atlas.modules.colossus --port 8765 --workers 4
+
+    curl localhost:8765/models
+    curl -d '{"model": "Atlas Test Box", "params": {"width": 120}}' \
+        localhost:8765/generate
+    curl -O localhost:8765/results/<key>/step
+
+Jobs run on a bounded process pool; identical requests in flight share
+one job and finished results are served from a content-addressed cache
+(ATLAS_COLOSSUS_CACHE, default ~/.cache/atlas/colossus).
+
+See docs/blueprints/colossus_web_system_constraint_master_v1.0.md.
+"""
+from .service import GenerationService, ColossusServer, ServiceError, \
+    coerce_params, result_key, schema_json, serve
+
+__all__ = ['GenerationService', 'ColossusServer', 'ServiceError',
+           'coerce_params', 'result_key', 'schema_json', 'serve']
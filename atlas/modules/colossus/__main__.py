@@ -0,0 +1,21 @@
+import argparse
+import os
+
+from atlas.logging_setup import configure_logging
+from .service import serve, default_cache_dir
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='python -m atlas.modules.colossus',
+        description='Local Atlas generation service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int,
+                        default=max(1, (os.cpu_count() or 2) // 2),
+                        help='generation processes (default: half the CPUs)')
+    parser.add_argument('--cache', default=default_cache_dir(),
+                        help='result cache directory')
+    args = parser.parse_args()
+
+    configure_logging()
+    serve(args.host, args.port, args.workers, args.cache)
@@ -0,0 +1,147 @@
+"""
+Jobs run in the generation service's worker processes.
+
+Each job builds one model into a fresh directory next to its cache slot
+and renames it into place when complete, so readers never see half a
+result and a crashed worker leaves nothing behind but a temp directory.
+Worker processes keep imported models and the OCC runtime warm between
+jobs; a model is reimported when its source signature changes.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+RESULT = 'result.json'
+BOM = 'bom.json'
+MESH = 'mesh.npy'
+STEP = 'model.step'
+
+_registry = None
+_load_lock = threading.Lock()  # reimports unload packages process-wide
+
+
+def load_model(registry, info: dict):
+    """ registry.load(info), serialized across threads. """
+    with _load_lock:
+        return registry.load(info)[0]
+
+
+def init_worker(app_root: str, models_dir: str, pkg: str) -> None:
+    """ Pool initializer: make models importable and load OCC up front. """
+    if app_root not in sys.path:
+        sys.path.insert(0, app_root)
+    from pathlib import Path
+    from gui.model_registry import ModelRegistry
+    share_registry(ModelRegistry(Path(models_dir), pkg))
+
+
+def share_registry(registry) -> None:
+    """ Thread pool initializer: use the service's own registry. """
+    global _registry
+    _registry = registry
+    try:
+        import atlas_runtime
+        atlas_runtime.load_occ()
+    except Exception as e:
+        log.warning(f'[colossus] OCC warm-up failed in worker: {e}')
+
+
+def _build(info: dict, params: dict[str, Any]):
+    from atlas_runtime import normalize_assembly, \
+        build_compound_and_triangles
+    mod = load_model(_registry, info)
+    fn = getattr(mod, info['func'])
+    t0 = time.perf_counter()
+    result = fn(**params)
+    t_model = time.perf_counter() - t0
+    asm = normalize_assembly(result)
+    build_compound_and_triangles(asm)
+    return asm, t_model, time.perf_counter() - t0 - t_model
+
+
+def _publish(tmp: str, final: str) -> None:
+    try:
+        os.replace(tmp, final)
+    except OSError:
+        # Another service process published the same result first
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(final):
+            raise
+
+
+def generate(info: dict, params: dict[str, Any], key: str,
+             out_dir: str) -> dict[str, Any]:
+    """
+    Build a model and store its mesh (float32 (T, 9) .npy), rolled-up BOM
+    and stats in `out_dir`. Returns the stats.
+    """
+    from atlas_runtime import bom_flat, bom_rollup
+    from atlas_runtime.asm_utils import walk_instances
+
+    asm, t_model, t_geometry = _build(info, params)
+    tris = np.asarray(asm.triangles, dtype=np.float32).reshape(-1, 9)
+    if not len(tris):
+        raise ValueError('Model produced no triangles')
+
+    parts, instances = set(), 0
+    for node, qty, _xf in walk_instances(asm.root):
+        if getattr(node.ref, 'shape', None) is not None:
+            parts.add(id(node.ref))
+            instances += int(qty)
+    pts = tris.reshape(-1, 3)
+    bom = bom_rollup(bom_flat(asm))
+    stats = {
+        'key': key, 'model': info['name'], 'params': params,
+        'triangles': len(tris), 'parts': len(parts),
+        'instances': instances, 'bom_lines': len(bom),
+        'bbox_min': pts.min(axis=0).tolist(),
+        'bbox_max': pts.max(axis=0).tolist(),
+        't_model': round(t_model, 4), 't_geometry': round(t_geometry, 4),
+        'created': time.time(), 'pid': os.getpid(),
+    }
+
+    os.makedirs(os.path.dirname(out_dir), exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(out_dir), suffix='.tmp')
+    try:
+        np.save(os.path.join(tmp, MESH), tris)
+        with open(os.path.join(tmp, BOM), 'w', encoding='utf-8') as f:
+            json.dump(bom, f, default=str)
+        # Written last: its presence marks a complete result
+        with open(os.path.join(tmp, RESULT), 'w', encoding='utf-8') as f:
+            json.dump(stats, f, default=str)
+        _publish(tmp, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return stats
+
+
+def export_step(info: dict, params: dict[str, Any], out_dir: str) -> str:
+    """ Rebuild a cached model and write its STEP file next to it. """
+    from atlas_runtime import atlas_occ
+
+    asm, _t_model, _t_geometry = _build(info, params)
+    path = os.path.join(out_dir, STEP)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, suffix='.step')
+    os.close(fd)
+    try:
+        atlas_occ.export_step(asm.compound, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path
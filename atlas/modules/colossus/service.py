@@ -0,0 +1,497 @@
+"""
+Local generation service: HTTP front end, bounded process pool, request
+coalescing and a content-addressed result cache.
+
+    GET  /models                   models and their PARAMS schemas
+    GET  /models/<name>            one schema
+    POST /generate                 {"model": name, "params": {...}}
+    GET  /results/<key>            stats of a generated model
+    GET  /results/<key>/bom        rolled-up BOM (JSON)
+    GET  /results/<key>/mesh       float32 (T, 9) triangles (.npy)
+    GET  /results/<key>/mesh.stl   binary STL
+    GET  /results/<key>/step       STEP (exported on first request)
+    GET  /stats                    cache hits, misses, coalesced requests
+
+A result key is a hash of the model's source signature and its complete,
+type-coerced parameters, so {} and the explicit defaults share a result
+and editing a model invalidates its results.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import weakref
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, \
+    ThreadPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import unquote, urlsplit
+
+import numpy as np
+
+from gui.model_registry import ModelRegistry
+from . import jobs
+
+log = logging.getLogger(__name__)
+
+APP_ROOT = Path(__file__).resolve().parents[3]
+CACHE_VERSION = 1  # bump when the stored result layout changes
+JOB_TIMEOUT = 600.0  # seconds a request waits; the job itself keeps going
+MAX_BODY = 1 << 20
+
+
+def default_cache_dir() -> str:
+    env = os.getenv('ATLAS_COLOSSUS_CACHE')
+    if env:
+        return env
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'atlas', 'colossus')
+
+
+class ServiceError(Exception):
+    """ A request the service refuses, with the HTTP status to send. """
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _type_name(t: Any) -> str:
+    if t in (float, int, bool, str):
+        return t.__name__
+    return str(t or 'float').lower()
+
+
+def schema_json(schema: list[dict]) -> list[dict]:
+    """ PARAMS with Python types replaced by their names. """
+    return [{**p, 'type': _type_name(p.get('type', 'float'))}
+            for p in schema or []]
+
+
+def coerce_params(schema: list[dict],
+                  params: dict[str, Any]) -> dict[str, Any]:
+    """
+    Complete, typed keyword arguments for a model: defaults for missing
+    names, values coerced like the GUI does. Unknown names and values
+    that do not convert raise ServiceError (400).
+    """
+    params = dict(params or {})
+    out: dict[str, Any] = {}
+    for p in schema or []:
+        name = p['name']
+        t = _type_name(p.get('type', 'float'))
+        v = params.pop(name, p.get('default'))
+        try:
+            if v is None:
+                pass
+            elif t == 'float':
+                v = float(v)
+            elif t == 'int':
+                v = int(v)
+            elif t == 'bool':
+                v = v if isinstance(v, bool) else str(v).lower() in (
+                    '1', 'true', 'yes', 'on')
+            elif t == 'enum':
+                choices = [str(c) for c in p.get('choices', [])]
+                if choices and str(v) not in choices:
+                    raise ValueError(f'not one of {choices}')
+                v = str(v)
+            else:
+                v = str(v)
+        except (TypeError, ValueError) as e:
+            raise ServiceError(HTTPStatus.BAD_REQUEST,
+                               f'Parameter {name!r}: {e}') from None
+        if t in ('float', 'int') and v is not None and (
+                ('min' in p and v < p['min']) or
+                ('max' in p and v > p['max'])):
+            raise ServiceError(
+                HTTPStatus.BAD_REQUEST,
+                f'Parameter {name!r}: {v} outside '
+                f'[{p.get("min", "-inf")}, {p.get("max", "inf")}]')
+        out[name] = v
+    if params:
+        raise ServiceError(HTTPStatus.BAD_REQUEST,
+                           f'Unknown parameters: {sorted(params)}')
+    return out
+
+
+def result_key(info: dict, signature: Any, params: dict[str, Any]) -> str:
+    blob = json.dumps({'module': info['module'], 'func': info['func'],
+                       'signature': signature, 'params': params,
+                       'version': CACHE_VERSION},
+                      sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+
+def stl_bytes(tris: np.ndarray) -> bytes:
+    """ Binary STL of (T, 9) triangles. """
+    t = np.asarray(tris, dtype=np.float32).reshape(-1, 3, 3)
+    n = np.cross(t[:, 1] - t[:, 0], t[:, 2] - t[:, 0])
+    n /= np.maximum(np.linalg.norm(n, axis=1, keepdims=True), 1e-30)
+    rec = np.zeros(len(t), dtype=[('n', '<f4', 3), ('v', '<f4', 9),
+                                  ('attr', '<u2')])
+    rec['n'] = n
+    rec['v'] = t.reshape(-1, 9)
+    head = b'Atlas Protocol'.ljust(80, b' ')
+    return head + np.uint32(len(t)).tobytes() + rec.tobytes()
+
+
+class GenerationService:
+    """
+    Runs model generations on a bounded process pool. Identical requests
+    in flight share one job (coalescing); finished results are served from
+    the on-disk cache, which several service instances may share.
+    """
+
+    def __init__(self, models_dir: Optional[Path] = None,
+                 pkg: str = 'models', cache_dir: Optional[str] = None,
+                 workers: int = 2, processes: bool = True) -> None:
+        self.models_dir = Path(models_dir or APP_ROOT / 'models')
+        self.pkg = pkg
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.workers = max(1, int(workers))
+        self.processes = processes  # False: threads, for tests/debugging
+        self.registry = ModelRegistry(self.models_dir, pkg)
+        self._executor = self._make_executor()
+        self._inflight: dict[str, Future] = {}
+        # The executor each future runs on, to restart a broken pool once
+        self._pools: weakref.WeakKeyDictionary[Future, Executor] = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.RLock()
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0,
+                      'coalesced': 0, 'errors': 0}
+
+    def _make_executor(self) -> Executor:
+        if not self.processes:
+            return ThreadPoolExecutor(self.workers,
+                                      initializer=jobs.share_registry,
+                                      initargs=(self.registry,))
+        # Spawned, not forked: the server process runs threads
+        return ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=jobs.init_worker,
+            initargs=(str(APP_ROOT), str(self.models_dir), self.pkg))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---- Models ----
+
+    def models(self) -> dict[str, dict]:
+        return self.registry.scan()
+
+    def model_info(self, name: str) -> dict:
+        info = self.models().get(name)
+        if info is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f'No model {name!r}')
+        return {**info, 'name': name}
+
+    def schema(self, name: str) -> list[dict]:
+        info = self.model_info(name)
+        mod = jobs.load_model(self.registry, info)
+        return getattr(mod, 'PARAMS', [])
+
+    # ---- Results ----
+
+    def result_dir(self, key: str) -> str:
+        if len(key) != 32 or any(c not in '0123456789abcdef' for c in key):
+            raise ServiceError(HTTPStatus.NOT_FOUND, f'No result {key!r}')
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def cached(self, key: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.result_dir(key), jobs.RESULT),
+                      encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _submit(self, job_key: str, fn, *args) -> tuple[Future, bool]:
+        """ The in-flight future for `job_key`, started if needed. """
+        with self._lock:
+            fut = self._inflight.get(job_key)
+            if fut is not None:
+                self.stats['coalesced'] += 1
+                return fut, True
+            try:
+                fut = self._executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._restart(self._executor)
+                fut = self._executor.submit(fn, *args)
+            self._pools[fut] = self._executor
+            self._inflight[job_key] = fut
+        fut.add_done_callback(lambda f: self._finished(job_key, f))
+        return fut, False
+
+    def _finished(self, job_key: str, fut: Future) -> None:
+        with self._lock:
+            if self._inflight.get(job_key) is fut:
+                del self._inflight[job_key]
+
+    def _restart(self, broken: Optional[Executor]) -> None:
+        """
+        Replace the pool if it still is `broken`: every request waiting on
+        a dead pool lands here, only the first one restarts it.
+        """
+        with self._lock:
+            if broken is None or self._executor is not broken:
+                return
+            log.warning('[colossus] worker pool broken, restarting')
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._make_executor()
+
+    def _wait(self, fut: Future, timeout: float) -> Any:
+        try:
+            return fut.result(timeout)
+        except FutureTimeout:
+            raise ServiceError(HTTPStatus.GATEWAY_TIMEOUT,
+                               'Still generating, retry later') from None
+        except ServiceError:
+            raise
+        except BrokenProcessPool:
+            with self._lock:
+                self.stats['errors'] += 1
+                self._restart(self._pools.get(fut))
+            raise ServiceError(HTTPStatus.INTERNAL_SERVER_ERROR,
+                               'Worker process died') from None
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise ServiceError(HTTPStatus.UNPROCESSABLE_ENTITY,
+                               f'{type(e).__name__}: {e}') from None
+
+    def generate(self, name: str, params: Optional[dict] = None,
+                 timeout: float = JOB_TIMEOUT) -> tuple[dict, str]:
+        """
+        Stats of the model generated with `params`, and how they were
+        obtained: 'cache', 'generated' or 'coalesced'.
+        """
+        info = self.model_info(name)
+        mod = jobs.load_model(self.registry, info)
+        kwargs = coerce_params(getattr(mod, 'PARAMS', []), params or {})
+        key = result_key(info, self.registry.signature(info['folder']),
+                         kwargs)
+        with self._lock:
+            self.stats['requests'] += 1
+        hit = self.cached(key)
+        if hit is not None:
+            with self._lock:
+                self.stats['hits'] += 1
+            return hit, 'cache'
+        fut, joined = self._submit(key, jobs.generate, info, kwargs, key,
+                                   self.result_dir(key))
+        if not joined:
+            with self._lock:
+                self.stats['misses'] += 1
+        return self._wait(fut, timeout), 'coalesced' if joined \
+            else 'generated'
+
+    def path(self, key: str, name: str) -> str:
+        """ A file of a cached result (404 if there is none). """
+        if self.cached(key) is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f'No result {key!r}')
+        return os.path.join(self.result_dir(key), name)
+
+    def _current_key(self, stats: dict) -> tuple[dict, str]:
+        """
+        Model info and the key a cached result would have if generated
+        now: a STEP export rebuilds the model, so it must still be the
+        source and parameters the result was made from.
+        """
+        info = self.model_info(stats['model'])
+        mod = jobs.load_model(self.registry, info)
+        try:
+            kwargs = coerce_params(getattr(mod, 'PARAMS', []),
+                                   stats['params'])
+        except ServiceError:
+            return info, ''  # the parameters no longer fit the model
+        return info, result_key(info, self.registry.signature(
+            info['folder']), kwargs)
+
+    def step_path(self, key: str, timeout: float = JOB_TIMEOUT) -> str:
+        """
+        STEP file of a cached result, exported once on first use. 409 if
+        the model changed since the result was generated (its STEP would
+        not match the cached mesh and BOM).
+        """
+        stats = self.cached(key)
+        if stats is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f'No result {key!r}')
+        path = os.path.join(self.result_dir(key), jobs.STEP)
+        if os.path.isfile(path):
+            return path
+        stale = ServiceError(
+            HTTPStatus.CONFLICT,
+            f'Model {stats["model"]!r} changed since result {key!r} was '
+            f'generated; generate it again')
+        info, current = self._current_key(stats)
+        if current != key:
+            raise stale
+        fut, _joined = self._submit(f'{key}:step', jobs.export_step, info,
+                                    stats['params'], self.result_dir(key))
+        path = self._wait(fut, timeout)
+        if self._current_key(stats)[1] != key:
+            # Edited while exporting: the file may be of the new source
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            raise stale
+        return path
+
+    def clear_cache(self) -> None:
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'ColossusServer'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt: str, *args) -> None:
+        log.debug(f'[colossus] {self.address_string()} {fmt % args}')
+
+    def _send(self, status: HTTPStatus, body: bytes,
+              ctype: str = 'application/json',
+              filename: Optional[str] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        if filename:
+            self.send_header('Content-Disposition',
+                             f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data: Any, status: HTTPStatus = HTTPStatus.OK) -> None:
+        self._send(status, json.dumps(data, default=str).encode())
+
+    def _file(self, path: str, ctype: str, filename: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            f = open(path, 'rb')
+        except OSError:
+            raise ServiceError(HTTPStatus.NOT_FOUND,
+                               f'Missing {filename}') from None
+        with f:
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', ctype)
+            self.send_header('Content-Length', str(size))
+            self.send_header('Content-Disposition',
+                             f'attachment; filename="{filename}"')
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile)
+
+    def _dispatch(self, method: str) -> None:
+        svc = self.server.service
+        parts = [unquote(p) for p in urlsplit(self.path).path.split('/') if p]
+        try:
+            if method == 'GET' and parts == ['models']:
+                self._json([{'name': n, 'params': schema_json(svc.schema(n))}
+                            for n in sorted(svc.models())])
+            elif method == 'GET' and len(parts) == 2 and parts[0] == 'models':
+                self._json({'name': parts[1],
+                            'params': schema_json(svc.schema(parts[1]))})
+            elif method == 'POST' and parts == ['generate']:
+                req = self._body()
+                if not isinstance(req, dict) or 'model' not in req:
+                    raise ServiceError(HTTPStatus.BAD_REQUEST,
+                                       'Expected {"model": ..., "params": '
+                                       '{...}}')
+                stats, source = svc.generate(str(req['model']),
+                                             req.get('params') or {})
+                self._json({'source': source, **stats})
+            elif method == 'GET' and parts == ['stats']:
+                with svc._lock:
+                    self._json({**svc.stats, 'inflight': len(svc._inflight),
+                                'workers': svc.workers})
+            elif method == 'GET' and len(parts) >= 2 and \
+                    parts[0] == 'results':
+                self._result(svc, parts[1], parts[2:])
+            else:
+                raise ServiceError(HTTPStatus.NOT_FOUND,
+                                   f'No route {method} {self.path}')
+        except ServiceError as e:
+            self._json({'error': str(e)}, e.status)
+        except Exception as e:
+            log.exception(f'[colossus] {method} {self.path} failed: {e}')
+            self._json({'error': f'{type(e).__name__}: {e}'},
+                       HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def _result(self, svc: GenerationService, key: str,
+                rest: list[str]) -> None:
+        if not rest:
+            stats = svc.cached(key)
+            if stats is None:
+                raise ServiceError(HTTPStatus.NOT_FOUND, f'No result {key!r}')
+            self._json(stats)
+        elif rest == ['bom']:
+            self._file(svc.path(key, jobs.BOM), 'application/json',
+                       f'{key}_bom.json')
+        elif rest == ['mesh']:
+            self._file(svc.path(key, jobs.MESH), 'application/octet-stream',
+                       f'{key}.npy')
+        elif rest == ['mesh.stl']:
+            tris = np.load(svc.path(key, jobs.MESH), allow_pickle=False)
+            self._send(HTTPStatus.OK, stl_bytes(tris), 'model/stl',
+                       f'{key}.stl')
+        elif rest == ['step']:
+            self._file(svc.step_path(key), 'model/step', f'{key}.step')
+        else:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f'No route {self.path}')
+
+    def _body(self) -> Any:
+        n = int(self.headers.get('Content-Length') or 0)
+        if n > MAX_BODY:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               'Request too large')
+        try:
+            return json.loads(self.rfile.read(n) or b'{}')
+        except ValueError as e:
+            raise ServiceError(HTTPStatus.BAD_REQUEST,
+                               f'Invalid JSON: {e}') from None
+
+    def do_GET(self) -> None:
+        self._dispatch('GET')
+
+    def do_POST(self) -> None:
+        self._dispatch('POST')
+
+
+class ColossusServer(ThreadingHTTPServer):
+    """ Threaded HTTP server in front of a GenerationService. """
+    daemon_threads = True
+
+    def __init__(self, service: GenerationService, host: str = '127.0.0.1',
+                 port: int = 8765) -> None:
+        super().__init__((host, port), _Handler)
+        self.service = service
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def serve(host: str = '127.0.0.1', port: int = 8765, workers: int = 2,
+          cache_dir: Optional[str] = None) -> None:
+    """ Run the service until interrupted. """
+    service = GenerationService(cache_dir=cache_dir, workers=workers)
+    server = ColossusServer(service, host, port)
+    log.info(f'[colossus] serving {len(service.models())} models on '
+             f'{server.url} with {workers} workers, cache '
+             f'{service.cache_dir}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
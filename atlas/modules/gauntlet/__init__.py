@@ -0,0 +1,23 @@
+"""
+Gauntlet: comparative testing and benchmarking.
+
+Headless pipeline benchmarks with scaling curves and regression gates:
+
+    python -m atlas.modules.gauntlet --max-n 10000
+    python -m atlas.modules.gauntlet --update-baseline
+
+Each stage of the regeneration pipeline is timed (and its peak memory
+sampled) over decades of instance counts, a scaling exponent is fitted per
+stage, and the run fails when a stage regresses past the stored baseline
+(ATLAS_BENCH_BASELINE, default data/benchmarks/baseline.json).
+
+See docs/blueprints/gauntlet_framework_v2.0.md.
+"""
+from .bench import Sample, Regression, MODELS, STAGES, SIZES, run_case, \
+    run_suite, fit_exponent, to_series, load_baseline, save_baseline, \
+    compare, format_report, default_baseline_path
+
+__all__ = ['Sample', 'Regression', 'MODELS', 'STAGES', 'SIZES', 'run_case',
+           'run_suite', 'fit_exponent', 'to_series', 'load_baseline',
+           'save_baseline', 'compare', 'format_report',
+           'default_baseline_path']
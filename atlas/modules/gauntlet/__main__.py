@@ -0,0 +1,123 @@
+import argparse
+import json
+import logging
+import sys
+from dataclasses import asdict
+
+from atlas.logging_setup import configure_logging
+from .bench import MODELS, STAGES, SIZES, run_suite, to_series, \
+    load_baseline, save_baseline, compare, format_report, \
+    default_baseline_path, samples_json, EXPONENT_SLACK, TIME_FACTOR, \
+    MEM_FACTOR, SIZE_TOLERANCE
+from .render import LOAD_PATHS, FRAMES, run_render_suite, render_samples, \
+    format_render_report
+
+
+def _sizes(text: str) -> list[int]:
+    return [int(float(s)) for s in text.split(',') if s.strip()]
+
+
+def _window(text: str) -> tuple[int, int]:
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        prog='python -m atlas.modules.gauntlet',
+        description='Headless pipeline and render benchmarks with '
+                    'regression gates')
+    parser.add_argument('--suite', choices=('pipeline', 'render', 'all'),
+                        default='pipeline')
+    parser.add_argument('--models', default=','.join(MODELS))
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help='pipeline stages')
+    parser.add_argument('--paths', default=','.join(LOAD_PATHS),
+                        help='viewer load paths (render suite)')
+    parser.add_argument('--frames', type=int, default=FRAMES,
+                        help='orbit frames per load path (render suite)')
+    parser.add_argument('--window', type=_window, default='800x600',
+                        help='offscreen render size (render suite)')
+    parser.add_argument('--sizes', type=_sizes,
+                        default=list(SIZES), help='e.g. 10,100,1e3')
+    parser.add_argument('--max-n', type=int, default=0,
+                        help='skip sizes above this instance count')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='pipeline runs per case; the best time is kept')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='tessellation threads (0 = one per CPU)')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='also record Python-level peaks (slower)')
+    parser.add_argument('--no-isolate', action='store_true',
+                        help='run every case in this process')
+    parser.add_argument('--baseline', default=default_baseline_path())
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='store this run as the baseline')
+    parser.add_argument('--exponent-slack', type=float,
+                        default=EXPONENT_SLACK)
+    parser.add_argument('--time-factor', type=float, default=TIME_FACTOR,
+                        help='0 disables the time gate')
+    parser.add_argument('--mem-factor', type=float, default=MEM_FACTOR,
+                        help='0 disables the memory gate')
+    parser.add_argument('--size-tolerance', type=float,
+                        default=SIZE_TOLERANCE,
+                        help='relative growth allowed for buffer sizes')
+    parser.add_argument('--json', help='write the raw samples here')
+    args = parser.parse_args()
+
+    configure_logging()
+    sizes = [n for n in args.sizes if not args.max_n or n <= args.max_n]
+    models = args.models.split(',')
+    progress = lambda msg: logging.info(f'[gauntlet] {msg}')  # noqa: E731
+
+    samples, reports, raw = [], [], {}
+    failed: dict[str, list[str]] = {'pipeline': [], 'render': []}
+    if args.suite in ('pipeline', 'all'):
+        got = run_suite(
+            models, sizes, args.stages.split(','), repeat=args.repeat,
+            threads=args.threads, use_tracemalloc=args.tracemalloc,
+            isolate=not args.no_isolate, progress=progress,
+            failed=failed['pipeline'])
+        samples.extend(got)
+        raw['pipeline'] = samples_json(got)
+    if args.suite in ('render', 'all'):
+        results = run_render_suite(
+            models, sizes, args.paths.split(','), frames=args.frames,
+            size=args.window, threads=args.threads,
+            isolate=not args.no_isolate, progress=progress,
+            failed=failed['render'])
+        samples.extend(render_samples(results))
+        reports.append(format_render_report(results))
+        raw['render'] = [asdict(r) for r in results]
+    failures = [f'{suite} {label}' for suite, labels in failed.items()
+                for label in labels]
+    raw['failed'] = failures
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(raw, f, indent=1)
+
+    current = to_series(samples)
+    baseline = load_baseline(args.baseline)
+    regressions = compare(current, baseline,
+                          exponent_slack=args.exponent_slack,
+                          time_factor=args.time_factor,
+                          mem_factor=args.mem_factor, sizes=sizes,
+                          size_tolerance=args.size_tolerance)
+    for report in reports:
+        print(report, end='\n\n')
+    print(format_report(current, baseline, regressions))
+    for label in failures:
+        print(f'! {label}: failed (see the log)')
+
+    if failures:
+        # A partial run would drop the failed points from the baseline
+        if args.update_baseline:
+            print('Baseline not updated: some cases failed')
+        sys.exit(1)
+    if args.update_baseline:
+        save_baseline(args.baseline, current)
+        print(f'Baseline updated: {args.baseline}')
+    elif not baseline:
+        print(f'No baseline at {args.baseline}; '
+              f'run with --update-baseline to store one')
+    sys.exit(1 if regressions and not args.update_baseline else 0)
@@ -0,0 +1,481 @@
+"""
+Headless pipeline benchmarks with scaling curves and regression gates.
+
+Every case builds one test model at n instances and runs the regeneration
+pipeline stage by stage, recording wall time and peak memory per stage:
+
+    model        the model function itself
+    normalize    normalize_assembly (incl. shape dedupe)
+    geometry     build_compound_and_triangles
+    vtk_prep     ModelRunnable._optimize_triangles_for_vtk (vertex weld)
+    bom          bom_rollup(bom_flat(asm))
+    export_step  atlas_occ.export_step into a temp file
+
+occ_test is a single box, so n of them are placed side by side with
+distinct widths (n unique parts); occ_test_2 is one part instanced n
+times on its grid. Sizes run over decades (10 ... 10^6).
+
+Each stage's times over n give a scaling exponent k (t ~ n^k), fitted on
+the largest sizes where the constant overhead no longer dominates. A run
+is compared with a stored baseline: an exponent that grows by more than
+EXPONENT_SLACK (an O(n) stage turning O(n^2) adds 1.0), a time or memory
+peak well past the baseline's at the same n, a buffer size (deterministic
+for a given scene) past the baseline's by more than SIZE_TOLERANCE, or a
+baseline point the run no longer produces (its case failed) is a
+regression.
+"""
+from __future__ import annotations
+import importlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+import numpy as np
+import psutil
+
+log = logging.getLogger(__name__)
+
+APP_ROOT = Path(__file__).resolve().parents[3]
+BASELINE_VERSION = 1
+
+MODELS = ('occ_test', 'occ_test_2')
+STAGES = ('model', 'normalize', 'geometry', 'vtk_prep', 'bom', 'export_step')
+SIZES = tuple(10 ** k for k in range(1, 7))
+
+# Stages that must run (unrecorded) for a selected stage to have its input
+REQUIRES = {
+    'normalize': ('model',),
+    'geometry': ('model', 'normalize'),
+    'vtk_prep': ('model', 'normalize', 'geometry'),
+    'bom': ('model', 'normalize'),
+    'export_step': ('model', 'normalize', 'geometry'),
+}
+
+NOISE_FLOOR = 1e-3  # s; faster points are mostly fixed overhead
+FIT_POINTS = 3  # exponent is fitted over the largest sizes
+EXPONENT_SLACK = 0.25
+TIME_FACTOR = 2.0
+MEM_FACTOR = 1.5
+MEM_SLACK_MB = 32.0
+SIZE_TOLERANCE = 0.02  # relative; buffer sizes, not RSS, are exact
+
+
+def default_baseline_path() -> str:
+    return os.getenv('ATLAS_BENCH_BASELINE') or str(
+        APP_ROOT / 'data' / 'benchmarks' / 'baseline.json')
+
+
+@dataclass
+class Sample:
+    """ One stage of one case: best time over the repeats, peak memory. """
+    suite: str
+    case: str
+    stage: str
+    n: int
+    seconds: float
+    peak_mb: float  # RSS growth over the stage's start (see the suite)
+    py_peak_mb: Optional[float] = None  # tracemalloc peak, when enabled
+    size_mb: Optional[float] = None  # measured buffer size (size series)
+
+    @property
+    def key(self) -> str:
+        return f'{self.suite}/{self.case}/{self.stage}'
+
+
+@dataclass
+class Regression:
+    key: str
+    kind: str  # 'exponent' | 'time' | 'memory' | 'size' | 'missing'
+    baseline: float
+    current: float
+    n: Optional[int] = None
+
+    def __str__(self) -> str:
+        if self.kind == 'exponent':
+            return (f'{self.key}: scaling exponent {self.current:.2f} '
+                    f'(baseline {self.baseline:.2f})')
+        if self.kind == 'missing':
+            return (f'{self.key}: no result at n={self.n:,} (baseline '
+                    f'{self.baseline:.4g}s)')
+        unit = 's' if self.kind == 'time' else ' MB'
+        return (f'{self.key}: {self.kind} at n={self.n:,} '
+                f'{self.current:.4g}{unit} (baseline '
+                f'{self.baseline:.4g}{unit})')
+
+
+# ---- Cases ----
+
+def grid_counts(n: int) -> tuple[int, int, int]:
+    """ Split n into a near-cubic nx * ny * nz == n. """
+    nz = max(d for d in range(1, int(round(n ** (1 / 3))) + 1) if n % d == 0)
+    rest = n // nz
+    ny = max(d for d in range(1, math.isqrt(rest) + 1) if rest % d == 0)
+    return rest // ny, ny, nz
+
+
+def _load(model: str):
+    if str(APP_ROOT) not in sys.path:
+        sys.path.insert(0, str(APP_ROOT))
+    mod = importlib.import_module(f'models.{model}')
+    return mod, {p['name']: p['default'] for p in mod.PARAMS}
+
+
+def case_builder(model: str, n: int) -> Callable[[], Any]:
+    """ A zero-argument callable producing the model's result at n. """
+    mod, defaults = _load(model)
+    if model == 'occ_test_2':
+        nx, ny, nz = grid_counts(n)
+        kw = {**defaults, 'count_x': nx, 'count_y': ny, 'count_z': nz}
+        return lambda: mod.assembly(**kw)
+    if model == 'occ_test':
+        return lambda: _side_by_side(mod, defaults, n)
+    raise ValueError(f'No benchmark case for model {model!r}')
+
+
+def _side_by_side(mod, defaults: dict[str, Any], n: int):
+    from atlas_runtime import AtlasAssembly, AtlasPart, AtlasInstance
+
+    step = float(defaults['height']) * 1.1
+    children = []
+    for i in range(n):
+        single = mod.assembly(**{**defaults,
+                                 'width': float(defaults['width']) + i})
+        for inst in single.root.children:
+            children.append(AtlasInstance(ref=inst.ref,
+                                          xform=(0.0, i * step, 0.0)))
+    root = AtlasPart(def_id='_BENCH_ROOT', shape=None, part_no='ASM-BENCH')
+    return AtlasAssembly(root=AtlasInstance(ref=root, children=children),
+                         dirty=True)
+
+
+def _export_step(asm) -> None:
+    from atlas_runtime import atlas_occ
+    with tempfile.TemporaryDirectory(prefix='atlas-bench-') as tmp:
+        atlas_occ.export_step(asm.compound, os.path.join(tmp, 'bench.step'))
+
+
+def _pipeline(build: Callable[[], Any], threads: Optional[int],
+              needed: set[str]):
+    """ (stage, fn(state)) in pipeline order; state carries the assembly. """
+    from atlas_runtime.asm_utils import normalize_assembly, \
+        build_compound_and_triangles, bom_flat, bom_rollup
+    if 'vtk_prep' in needed:
+        # Imported here so the Qt import is not timed as part of the stage
+        from gui.workers import ModelRunnable
+
+    def model(s):
+        s['result'] = build()
+
+    def normalize(s):
+        s['asm'] = normalize_assembly(s.pop('result'), dedupe=True,
+                                      threads=threads)
+
+    def geometry(s):
+        build_compound_and_triangles(s['asm'], threads=threads)
+
+    def vtk_prep(s):
+        s['vtk'] = ModelRunnable._optimize_triangles_for_vtk(
+            s['asm'].triangles)
+
+    def bom(s):
+        s['bom'] = bom_rollup(bom_flat(s['asm']))
+
+    def export_step(s):
+        _export_step(s['asm'])
+
+    return [('model', model), ('normalize', normalize),
+            ('geometry', geometry), ('vtk_prep', vtk_prep), ('bom', bom),
+            ('export_step', export_step)]
+
+
+def run_case(model: str, n: int, stages: Sequence[str] = STAGES,
+             repeat: int = 1, threads: Optional[int] = None,
+             use_tracemalloc: bool = False) -> list[Sample]:
+    """
+    Run the pipeline for one model at n instances `repeat` times and
+    return one Sample per selected stage (best time, largest peak).
+    Memoization is off so every repeat does the full work.
+    """
+    from atlas_runtime import memo
+    from atlas_runtime.membudget import StageMemory
+
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f'Unknown stages: {sorted(unknown)}')
+    needed = set(stages)
+    for st in stages:
+        needed.update(REQUIRES.get(st, ()))
+
+    build = case_builder(model, n)
+    proc = psutil.Process()
+    mb = 1024 ** 2
+    best: dict[str, Sample] = {}
+    for _ in range(max(1, repeat)):
+        mem = StageMemory(use_tracemalloc=use_tracemalloc)
+        state: dict[str, Any] = {}
+        with memo.disabled():
+            for name, fn in _pipeline(build, threads, needed):
+                if name not in needed:
+                    continue
+                rss0 = proc.memory_info().rss / mb
+                t0 = time.perf_counter()
+                with mem.stage(name):
+                    fn(state)
+                dt = time.perf_counter() - t0
+                if name not in stages:
+                    continue
+                sample = Sample('pipeline', model, name, n, dt,
+                                max(0.0, mem.peaks_mb[name] - rss0),
+                                mem.py_peaks_mb.get(name))
+                prev = best.get(name)
+                if prev is not None:
+                    sample.seconds = min(sample.seconds, prev.seconds)
+                    sample.peak_mb = max(sample.peak_mb, prev.peak_mb)
+                best[name] = sample
+        del state
+    return [best[st] for st in STAGES if st in best]
+
+
+def run_cases(fn: Callable[..., list], cases: Iterable[tuple],
+              isolate: bool = True,
+              progress: Optional[Callable[[str], None]] = None,
+              failed: Optional[list[str]] = None) -> list:
+    """
+    Concatenated results of fn(model, n, *rest) for every case. With
+    isolate each case gets a fresh (spawned) process, so RSS peaks are not
+    hidden by memory a previous, larger case left in the allocator, and a
+    crash takes down only its case. A failing case is logged, its label
+    ('<model> n=<n>') appended to `failed`, and the remaining cases still
+    run.
+    """
+    out: list = []
+    ctx = multiprocessing.get_context('spawn')
+    for case in cases:
+        label = f'{case[0]} n={case[1]:,}'
+        if progress is not None:
+            progress(label)
+        try:
+            if isolate:
+                with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+                    got = pool.submit(fn, *case).result()
+            else:
+                got = fn(*case)
+        except Exception as e:
+            log.error(f'[gauntlet] {label} failed: {e}')
+            if failed is not None:
+                failed.append(label)
+            continue
+        out.extend(got)
+    return out
+
+
+def run_suite(models: Iterable[str] = MODELS,
+              sizes: Iterable[int] = SIZES,
+              stages: Sequence[str] = STAGES, repeat: int = 1,
+              threads: Optional[int] = None, use_tracemalloc: bool = False,
+              isolate: bool = True,
+              progress: Optional[Callable[[str], None]] = None,
+              failed: Optional[list[str]] = None) -> list[Sample]:
+    """ run_case for every model at every size (see run_cases). """
+    cases = [(model, n, tuple(stages), repeat, threads, use_tracemalloc)
+             for model in models for n in sorted(sizes)]
+    return run_cases(run_case, cases, isolate, progress, failed)
+
+
+# ---- Scaling curves ----
+
+def fit_exponent(ns: Sequence[float], ts: Sequence[float],
+                 floor: float = NOISE_FLOOR,
+                 points: int = FIT_POINTS) -> Optional[float]:
+    """
+    Least-squares slope of log t over log n for the largest `points` sizes
+    above the noise floor; None with fewer than two usable points.
+    """
+    pts = sorted((n, t) for n, t in zip(ns, ts) if n > 0 and t >= floor)
+    pts = pts[-points:]
+    if len(pts) < 2 or pts[0][0] == pts[-1][0]:
+        return None
+    x = np.log([p[0] for p in pts])
+    y = np.log([p[1] for p in pts])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def to_series(samples: Iterable[Sample]) -> dict[str, dict[str, Any]]:
+    """
+    Group samples by key into {'n', 't', 'mem_mb', 'exponent'} curves,
+    plus 'size_mb' for series of buffer sizes.
+    """
+    grouped: dict[str, list[Sample]] = {}
+    for s in samples:
+        grouped.setdefault(s.key, []).append(s)
+    series = {}
+    for key, group in grouped.items():
+        group.sort(key=lambda s: s.n)
+        ns = [s.n for s in group]
+        ts = [s.seconds for s in group]
+        series[key] = {'n': ns, 't': ts,
+                       'mem_mb': [round(s.peak_mb, 2) for s in group],
+                       'exponent': fit_exponent(ns, ts)}
+        if any(s.size_mb is not None for s in group):
+            series[key]['size_mb'] = [
+                None if s.size_mb is None else round(s.size_mb, 4)
+                for s in group]
+    return series
+
+
+# ---- Baselines ----
+
+def load_baseline(path: str) -> dict[str, dict[str, Any]]:
+    """ Stored series by key; empty when there is no baseline yet. """
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if data.get('version') != BASELINE_VERSION:
+        log.warning(f'[gauntlet] Ignoring baseline {path}: version '
+                    f'{data.get("version")} != {BASELINE_VERSION}')
+        return {}
+    return data.get('series', {})
+
+
+def save_baseline(path: str, series: dict[str, dict[str, Any]]) -> None:
+    """
+    Store `series` in the baseline at `path`, keeping stored series of
+    other keys (other suites, models or stages not run this time).
+    """
+    merged = load_baseline(path)
+    merged.update(series)
+    data = {'version': BASELINE_VERSION, 'created': time.time(),
+            'host': platform.node(), 'python': platform.python_version(),
+            'series': dict(sorted(merged.items()))}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                               suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def compare(current: dict[str, dict[str, Any]],
+            baseline: dict[str, dict[str, Any]],
+            exponent_slack: float = EXPONENT_SLACK,
+            time_factor: float = TIME_FACTOR,
+            mem_factor: float = MEM_FACTOR,
+            mem_slack_mb: float = MEM_SLACK_MB,
+            floor: float = NOISE_FLOOR,
+            sizes: Optional[Iterable[int]] = None,
+            size_tolerance: float = SIZE_TOLERANCE) -> list[Regression]:
+    """
+    Regressions of `current` against `baseline` for the keys both have.
+    A factor of 0 disables that gate; buffer sizes ('size_mb') are held
+    to `size_tolerance` instead of the RSS gate. Baseline points at `sizes` (the
+    sizes this run covered, default: every n it has) that a key lacks are
+    'missing': their case failed or no longer produces the series.
+    """
+    if sizes is None:
+        sizes = {n for cur in current.values() for n in cur['n']}
+    sizes = set(sizes)
+    out: list[Regression] = []
+    for key, cur in current.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        have = set(cur['n'])
+        for j, n in enumerate(base['n']):
+            if n in sizes and n not in have:
+                out.append(Regression(key, 'missing', base['t'][j],
+                                      math.nan, n))
+        k_cur, k_base = cur.get('exponent'), base.get('exponent')
+        if k_cur is not None and k_base is not None and \
+                k_cur > k_base + exponent_slack:
+            out.append(Regression(key, 'exponent', k_base, k_cur))
+
+        base_at = {n: i for i, n in enumerate(base['n'])}
+        for i, n in enumerate(cur['n']):
+            j = base_at.get(n)
+            if j is None:
+                continue
+            t_cur, t_base = cur['t'][i], base['t'][j]
+            if time_factor and t_cur >= floor and \
+                    t_cur > max(t_base, floor) * time_factor:
+                out.append(Regression(key, 'time', t_base, t_cur, n))
+            m_cur, m_base = cur['mem_mb'][i], base['mem_mb'][j]
+            if mem_factor and m_cur > m_base * mem_factor + mem_slack_mb:
+                out.append(Regression(key, 'memory', m_base, m_cur, n))
+            s_cur = cur.get('size_mb', [None] * len(cur['n']))[i]
+            s_base = base.get('size_mb', [None] * len(base['n']))[j]
+            if s_cur is not None and s_base is not None and \
+                    s_cur > s_base * (1.0 + size_tolerance):
+                out.append(Regression(key, 'size', s_base, s_cur, n))
+    return out
+
+
+def format_report(current: dict[str, dict[str, Any]],
+                  baseline: dict[str, dict[str, Any]],
+                  regressions: Sequence[Regression] = ()) -> str:
+    """ Text table: time (and peak MB) per size, exponent vs baseline. """
+    sizes = sorted({n for s in current.values() for n in s['n']})
+    bad = {r.key for r in regressions}
+    width = max([len(k) for k in current] + [10])
+    head = f'{"series":<{width}} ' + ' '.join(
+        f'{_size(n):>14}' for n in sizes) + '      k   base'
+    lines = [head, '-' * len(head)]
+    for key in sorted(current):
+        cur = current[key]
+        at = dict(zip(cur['n'], zip(cur['t'], cur['mem_mb'],
+                                    cur.get('size_mb', cur['n']))))
+        cells = []
+        for n in sizes:
+            if n not in at:
+                cells.append(f'{"-":>14}')
+                continue
+            t, m, size = at[n]
+            if 'size_mb' in cur:
+                cells.append(f'{size:>12.1f}MB' if size is not None
+                             else f'{"-":>14}')
+            else:
+                cells.append(f'{_seconds(t):>8} {m:>4.0f}MB')
+        k = cur.get('exponent')
+        k_base = baseline.get(key, {}).get('exponent')
+        lines.append(
+            f'{key:<{width}} ' + ' '.join(cells) +
+            f' {_k(k):>6} {_k(k_base):>6}' + ('  REGRESSED' if key in bad
+                                              else ''))
+    for r in regressions:
+        lines.append(f'! {r}')
+    return '\n'.join(lines)
+
+
+def _size(n: int) -> str:
+    e = math.log10(n) if n > 0 else 0
+    return f'n=10^{e:.0f}' if e.is_integer() else f'n={n:,}'
+
+
+def _seconds(t: float) -> str:
+    return f'{t * 1e3:.1f}ms' if t < 1 else f'{t:.2f}s'
+
+
+def _k(k: Optional[float]) -> str:
+    return '-' if k is None else f'{k:.2f}'
+
+
+def samples_json(samples: Iterable[Sample]) -> list[dict[str, Any]]:
+    return [asdict(s) for s in samples]
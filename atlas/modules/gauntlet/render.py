@@ -0,0 +1,271 @@
+"""
+Offscreen render benchmarks for VTKQtViewer.
+
+The viewer is created with offscreen=True (software EGL/OSMesa rendering
+is fine) and fed a scene through each of its loading paths:
+
+    monolithic   load_triangles(welded mesh), the non-streamed result
+    streamed     begin_stream / append_mesh_batch / end_stream
+
+followed by a scripted camera orbit. Per path it reports load latency,
+time to the first frame, per-frame percentiles, host (polydata) and GPU
+(vertex + index buffer) sizes and RSS growth per million triangles.
+Further paths (e.g. instanced rendering) register in LOAD_PATHS.
+
+Scenes come from the pipeline suite's cases (occ_test / occ_test_2 at n
+instances), so render and pipeline results line up. to_samples() turns
+results into Samples that share the pipeline baseline:
+
+    render/<model>/<path>/load         seconds, RSS growth (MB)
+    render/<model>/<path>/first_frame  seconds
+    render/<model>/<path>/frame_p50    seconds
+    render/<model>/<path>/frame_p95    seconds
+    render/<model>/<path>/host_mb      polydata size (MB)
+    render/<model>/<path>/gpu_mb       vertex + index buffer size (MB)
+
+Buffer sizes are exact for a scene, so compare() holds them to
+SIZE_TOLERANCE rather than the RSS gate.
+"""
+from __future__ import annotations
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+import numpy as np
+import psutil
+
+from atlas_runtime.compact_mesh import CompactMesh
+
+from .bench import Sample, MODELS, SIZES, case_builder, run_cases
+
+FRAMES = 60
+WINDOW_SIZE = (800, 600)
+IBO_INDEX_BYTES = 4  # VTK uploads triangle indices as unsigned int
+_VBO_NAMES = ('vertexMC', 'normalMC', 'tcoord', 'scalarColor')
+
+
+@dataclass
+class Scene:
+    model: str
+    n: int
+    triangles: int
+    welded: CompactMesh  # ModelRunnable._weld_triangles
+    batches: list[CompactMesh]  # exact welded batches, streaming order
+
+
+@dataclass
+class RenderResult:
+    model: str
+    path: str
+    n: int
+    triangles: int
+    load_s: float
+    first_frame_s: float
+    frame_s: list[float] = field(default_factory=list)
+    host_bytes: int = 0
+    gpu_bytes: int = 0
+    rss_mb: float = 0.0
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.frame_s, q)) if self.frame_s \
+            else 0.0
+
+    def to_samples(self) -> list[Sample]:
+        mb = 1024 ** 2
+        case = f'{self.model}/{self.path}'
+        return [
+            Sample('render', case, 'load', self.n, self.load_s, self.rss_mb),
+            Sample('render', case, 'first_frame', self.n,
+                   self.first_frame_s, 0.0),
+            Sample('render', case, 'frame_p50', self.n, self.percentile(50),
+                   0.0),
+            Sample('render', case, 'frame_p95', self.n, self.percentile(95),
+                   0.0),
+            Sample('render', case, 'host_mb', self.n, 0.0, 0.0,
+                   size_mb=self.host_bytes / mb),
+            Sample('render', case, 'gpu_mb', self.n, 0.0, 0.0,
+                   size_mb=self.gpu_bytes / mb),
+        ]
+
+
+# ---- Scenes and load paths ----
+
+def build_scene(model: str, n: int, threads: Optional[int] = None) -> Scene:
+    """ Run the pipeline up to welded meshes, outside any timing. """
+    from atlas_runtime import memo
+    from atlas_runtime.asm_utils import normalize_assembly, \
+        iter_triangle_batches
+    from gui.workers import ModelRunnable
+
+    with memo.disabled():
+        asm = normalize_assembly(case_builder(model, n)(), dedupe=True,
+                                 threads=threads)
+        batches = [ModelRunnable._weld_triangles(tris, exact=True)
+                   for tris in iter_triangle_batches(asm, threads=threads)]
+    welded = ModelRunnable._weld_triangles(asm.triangles)
+    if welded is None:
+        raise ValueError(f'{model} n={n:,} produced no triangles')
+    return Scene(model, n, len(asm.triangles), welded,
+                 [b for b in batches if b is not None])
+
+
+def _load_monolithic(viewer, scene: Scene) -> None:
+    viewer.load_triangles(scene.welded)
+
+
+def _load_streamed(viewer, scene: Scene) -> None:
+    viewer.begin_stream()
+    for batch in scene.batches:
+        viewer.append_mesh_batch(batch)
+    viewer.end_stream()
+
+
+LOAD_PATHS: dict[str, Callable[[Any, Scene], None]] = {
+    'monolithic': _load_monolithic,
+    'streamed': _load_streamed,
+}
+
+
+# ---- Measurements ----
+
+def buffer_bytes(viewer) -> tuple[int, int]:
+    """
+    (host, gpu) bytes of what is on screen: polydata memory, and the
+    mappers' vertex buffers plus an index buffer of 32-bit triangle ids.
+    """
+    host = gpu = 0
+    actors = viewer.renderer.GetActors()
+    actors.InitTraversal()
+    for _ in range(actors.GetNumberOfItems()):
+        mapper = actors.GetNextActor().GetMapper()
+        data = mapper.GetInput() if mapper is not None else None
+        if data is None:
+            continue
+        host += data.GetActualMemorySize() * 1024
+        vbos = mapper.GetVBOs() if hasattr(mapper, 'GetVBOs') else None
+        if vbos is not None:
+            for name in _VBO_NAMES:
+                vbo = vbos.GetVBO(name)
+                if vbo is not None:
+                    gpu += vbo.GetSize()
+        gpu += data.GetPolys().GetNumberOfConnectivityIds() * IBO_INDEX_BYTES
+    return host, gpu
+
+
+def orbit(viewer, frames: int = FRAMES) -> list[float]:
+    """ Render one full azimuth turn in `frames` steps; seconds per frame. """
+    window = viewer.render_window
+    camera = viewer.renderer.GetActiveCamera()
+    viewer.renderer.ResetCamera()
+    window.Render()  # warm-up: uploads anything the load left modified
+    step = 360.0 / max(1, frames)
+    times = []
+    for _ in range(frames):
+        camera.Azimuth(step)
+        viewer.renderer.ResetCameraClippingRange()
+        t0 = time.perf_counter()
+        window.Render()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def _viewer(size: tuple[int, int]):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtWidgets import QApplication
+    from gui.vtk_viewer import VTKQtViewer
+
+    app = QApplication.instance() or QApplication([])
+    if not isinstance(app, QApplication):
+        # Qt aborts the process when a widget is made without one
+        raise RuntimeError(
+            f'The render suite needs a QApplication, this process already '
+            f'runs a {type(app).__name__}')
+    viewer = VTKQtViewer(offscreen=True)
+    viewer.render_window.SetSize(*size)
+    return app, viewer
+
+
+def run_render_case(model: str, n: int,
+                    paths: Sequence[str] = tuple(LOAD_PATHS),
+                    frames: int = FRAMES,
+                    size: tuple[int, int] = WINDOW_SIZE,
+                    threads: Optional[int] = None) -> list[RenderResult]:
+    """ Load one scene through each path and orbit it. """
+    unknown = set(paths) - set(LOAD_PATHS)
+    if unknown:
+        raise ValueError(f'Unknown load paths: {sorted(unknown)}')
+    scene = build_scene(model, n, threads)
+    app, viewer = _viewer(size)
+    window = viewer.render_window
+    proc = psutil.Process()
+    results = []
+    for path in paths:
+        viewer.show_polydata(_empty(), reset_camera=False)
+        first: list[float] = []
+
+        def _frame_done(*_args) -> None:
+            if not first:
+                first.append(time.perf_counter())
+
+        tag = window.AddObserver('EndEvent', _frame_done)
+        rss0 = proc.memory_info().rss
+        t0 = time.perf_counter()
+        try:
+            LOAD_PATHS[path](viewer, scene)
+            load_s = time.perf_counter() - t0
+        finally:
+            window.RemoveObserver(tag)
+        rss_mb = (proc.memory_info().rss - rss0) / 1024 ** 2
+        frame_s = orbit(viewer, frames)
+        host, gpu = buffer_bytes(viewer)
+        results.append(RenderResult(
+            model, path, n, scene.triangles, load_s,
+            (first[0] - t0) if first else load_s, frame_s, host, gpu,
+            max(0.0, rss_mb)))
+        app.processEvents()
+    viewer.show_polydata(_empty(), reset_camera=False)
+    return results
+
+
+def _empty():
+    from vtkmodules.vtkCommonDataModel import vtkPolyData
+    return vtkPolyData()
+
+
+def run_render_suite(models: Iterable[str] = MODELS,
+                     sizes: Iterable[int] = SIZES,
+                     paths: Sequence[str] = tuple(LOAD_PATHS),
+                     frames: int = FRAMES,
+                     size: tuple[int, int] = WINDOW_SIZE,
+                     threads: Optional[int] = None, isolate: bool = True,
+                     progress: Optional[Callable[[str], None]] = None,
+                     failed: Optional[list[str]] = None
+                     ) -> list[RenderResult]:
+    """ run_render_case for every model at every size (see run_cases). """
+    cases = [(model, n, tuple(paths), frames, size, threads)
+             for model in models for n in sorted(sizes)]
+    return run_cases(run_render_case, cases, isolate, progress, failed)
+
+
+def render_samples(results: Iterable[RenderResult]) -> list[Sample]:
+    return [s for r in results for s in r.to_samples()]
+
+
+def format_render_report(results: Sequence[RenderResult]) -> str:
+    head = (f'{"model/path":<24} {"n":>9} {"triangles":>11} {"load":>9} '
+            f'{"first":>9} {"p50":>8} {"p95":>8} {"p99":>8} {"fps":>6} '
+            f'{"host MB":>8} {"GPU MB":>8} {"MB/Mtri":>8}')
+    lines = [head, '-' * len(head)]
+    mb = 1024 ** 2
+    for r in results:
+        p50 = r.percentile(50)
+        per_m = r.rss_mb / (r.triangles / 1e6) if r.triangles else 0.0
+        lines.append(
+            f'{r.model + "/" + r.path:<24} {r.n:>9,} {r.triangles:>11,} '
+            f'{r.load_s * 1e3:>7.1f}ms {r.first_frame_s * 1e3:>7.1f}ms '
+            f'{p50 * 1e3:>6.1f}ms {r.percentile(95) * 1e3:>6.1f}ms '
+            f'{r.percentile(99) * 1e3:>6.1f}ms '
+            f'{(1 / p50 if p50 else 0):>6.0f} {r.host_bytes / mb:>8.1f} '
+            f'{r.gpu_bytes / mb:>8.1f} {per_m:>8.1f}')
+    return '\n'.join(lines)
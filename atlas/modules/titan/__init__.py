@@ -0,0 +1,24 @@
+"""
+Titan: global constraint evaluation over an assembly.
+
+    from atlas.modules import titan
+
+    engine = titan.TitanEngine([
+        titan.Envelope('cooling envelope', titan.subtree('COOLING'),
+                       lo=(0, 0, 0), hi=(600, 800, 1200)),
+        titan.MassBudget('total weight', max_kg=1800),
+        titan.Interface('rail spacing', titan.part('RAIL-L'),
+                        other=titan.part('RAIL-R'), nominal=300, tol=0.5),
+    ])
+    report = engine.update(asm)  # re-run after every regeneration
+
+See docs/blueprints/titan_orchestrator_v1.0.md.
+"""
+from .constraints import Scope, GLOBAL, part, subtree, Constraint, \
+    Envelope, MassBudget, Interface, Clearance, ConstraintResult
+from .engine import TitanEngine, TitanReport
+from .table import InstanceTable
+
+__all__ = ['Scope', 'GLOBAL', 'part', 'subtree', 'Constraint', 'Envelope',
+           'MassBudget', 'Interface', 'Clearance', 'ConstraintResult',
+           'TitanEngine', 'TitanReport', 'InstanceTable']
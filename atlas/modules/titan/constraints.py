@@ -0,0 +1,116 @@
+"""
+Constraint declarations.
+
+Every constraint applies to a Scope: all instances (GLOBAL), the instances
+of one part (`part`), or everything below a node (`subtree`). Part and
+subtree references match a def_id, part_no or instance key.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .table import InstanceTable
+
+
+@dataclass(frozen=True)
+class Scope:
+    kind: str = 'global'  # global | part | subtree
+    ref: Optional[str] = None
+
+    def resolve(self, table: InstanceTable) -> np.ndarray:
+        """ Row indices of `table` the scope covers, ascending. """
+        if self.kind == 'global':
+            return np.arange(len(table))
+        if self.kind == 'part':
+            return table.rows_matching(self.ref)
+        if self.kind == 'subtree':
+            return table.subtree_rows(self.ref)
+        raise ValueError(f'Unknown scope kind {self.kind!r}')
+
+    def __str__(self) -> str:
+        return 'global' if self.kind == 'global' else f'{self.kind}:{self.ref}'
+
+
+GLOBAL = Scope()
+
+
+def part(ref: str) -> Scope:
+    return Scope('part', ref)
+
+
+def subtree(ref: str) -> Scope:
+    return Scope('subtree', ref)
+
+
+@dataclass(frozen=True)
+class Constraint:
+    name: str
+    scope: Scope = GLOBAL
+
+    kind = 'constraint'
+
+    @property
+    def scopes(self) -> tuple[Scope, ...]:
+        return (self.scope,)
+
+
+@dataclass(frozen=True)
+class Envelope(Constraint):
+    """ Every shaped instance in scope lies inside the box lo..hi (+tol). """
+    lo: tuple[float, float, float] = (0.0, 0.0, 0.0)
+    hi: tuple[float, float, float] = (0.0, 0.0, 0.0)
+    tol: float = 1e-6
+
+    kind = 'envelope'
+
+
+@dataclass(frozen=True)
+class MassBudget(Constraint):
+    """ Total mass in scope (kg) within [min_kg, max_kg]. """
+    max_kg: float = float('inf')
+    min_kg: float = 0.0
+
+    kind = 'mass'
+
+
+@dataclass(frozen=True)
+class Interface(Constraint):
+    """
+    Offset between the centroids of `scope` and `other`, measured along
+    `axis`, equals `nominal` within ±tol (e.g. mounting rail spacing).
+    """
+    other: Scope = GLOBAL
+    axis: tuple[float, float, float] = (1.0, 0.0, 0.0)
+    nominal: float = 0.0
+    tol: float = 0.1
+
+    kind = 'interface'
+
+    @property
+    def scopes(self) -> tuple[Scope, ...]:
+        return self.scope, self.other
+
+
+@dataclass(frozen=True)
+class Clearance(Constraint):
+    """ Bounding boxes of `scope` and `other` stay at least `gap` apart. """
+    other: Scope = GLOBAL
+    gap: float = 0.0
+
+    kind = 'clearance'
+
+    @property
+    def scopes(self) -> tuple[Scope, ...]:
+        return self.scope, self.other
+
+
+@dataclass(frozen=True)
+class ConstraintResult:
+    name: str
+    kind: str
+    ok: bool
+    value: float  # measured quantity (count outside, kg, mm...)
+    limit: str  # human-readable bound
+    members: int  # instances the constraint depends on
@@ -0,0 +1,275 @@
+"""
+Incremental constraint evaluation.
+
+update(asm) flattens the assembly into an InstanceTable and compares it
+with the previous one. With the same tree structure (a parameter edit),
+only rows whose geometry or quantity changed are considered and only the
+constraints that depend on them (via a row -> constraint index) are
+re-evaluated; the rest keep their last result. Structural changes
+re-resolve every scope and evaluate everything. Constraints of one kind
+are evaluated together as NumPy segment reductions.
+"""
+from __future__ import annotations
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from atlas_runtime import AtlasAssembly
+from atlas_runtime.tracing import span
+
+from .constraints import Constraint, ConstraintResult, Envelope, \
+    MassBudget, Interface, Clearance
+from .table import InstanceTable
+
+log = logging.getLogger(__name__)
+
+# Pairs per block in clearance checks
+_CLEARANCE_BLOCK = 1 << 20
+
+
+@dataclass
+class TitanReport:
+    results: list[ConstraintResult]  # declaration order
+    evaluated: int  # constraints re-evaluated by this update
+    changed_rows: int
+    instances: int
+    elapsed: float
+
+    @property
+    def violations(self) -> list[ConstraintResult]:
+        return [r for r in self.results if not r.ok]
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def summary(self) -> str:
+        bad = self.violations
+        head = (f'{len(self.results) - len(bad)}/{len(self.results)} '
+                f'constraints ok')
+        if bad:
+            head += ': ' + ', '.join(
+                f'{r.name} ({r.value:g} vs {r.limit})' for r in bad[:3])
+            if len(bad) > 3:
+                head += f' +{len(bad) - 3} more'
+        return head
+
+
+class TitanEngine:
+    def __init__(self, constraints: Iterable[Constraint] = ()) -> None:
+        self._constraints: list[Constraint] = []
+        self._results: list[Optional[ConstraintResult]] = []
+        # Per constraint, resolved rows per scope
+        self._members: list[tuple[np.ndarray, ...]] = []
+        # Dependency index: row -> constraint, as parallel arrays
+        self._dep_rows = np.zeros(0, dtype=np.int64)
+        self._dep_cids = np.zeros(0, dtype=np.int64)
+        self._table: Optional[InstanceTable] = None
+        self._lock = threading.Lock()
+        self.add(*constraints)
+
+    @property
+    def constraints(self) -> list[Constraint]:
+        return list(self._constraints)
+
+    @property
+    def table(self) -> Optional[InstanceTable]:
+        return self._table
+
+    def add(self, *constraints: Constraint) -> None:
+        with self._lock:
+            names = {c.name for c in self._constraints}
+            for c in constraints:
+                if c.name in names:
+                    raise ValueError(f'Duplicate constraint name {c.name!r}')
+                names.add(c.name)
+                self._constraints.append(c)
+                self._results.append(None)
+            # Scopes of new constraints resolve on the next update
+            self._table = None if constraints else self._table
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            keep = [i for i, c in enumerate(self._constraints)
+                    if c.name != name]
+            if len(keep) == len(self._constraints):
+                raise KeyError(name)
+            self._constraints = [self._constraints[i] for i in keep]
+            self._results = [self._results[i] for i in keep]
+            self._table = None
+
+    def update(self, source: Union[AtlasAssembly, InstanceTable]
+               ) -> TitanReport:
+        t0 = time.perf_counter()
+        with self._lock, span('titan', constraints=len(self._constraints)) \
+                as sp:
+            table = source if isinstance(source, InstanceTable) else \
+                InstanceTable.from_assembly(source)
+            prev = self._table
+            if prev is None or not table.same_structure(prev):
+                self._resolve(table)
+                changed = len(table)
+                affected = np.arange(len(self._constraints))
+            else:
+                rows = table.changed_rows(prev)
+                changed = len(rows)
+                hit = np.isin(self._dep_rows, rows)
+                stale = [i for i, r in enumerate(self._results) if r is None]
+                affected = np.union1d(np.unique(self._dep_cids[hit]),
+                                      np.asarray(stale, dtype=np.int64))
+            self._table = table
+            self._evaluate(table, affected)
+            sp['evaluated'] = len(affected)
+            sp['changed_rows'] = changed
+
+            return TitanReport(results=list(self._results),
+                               evaluated=len(affected), changed_rows=changed,
+                               instances=len(table),
+                               elapsed=time.perf_counter() - t0)
+
+    # ---- Compilation ----
+
+    def _resolve(self, table: InstanceTable) -> None:
+        cache: dict = {}
+        members = []
+        for c in self._constraints:
+            per_scope = []
+            for scope in c.scopes:
+                if scope not in cache:
+                    cache[scope] = scope.resolve(table)
+                per_scope.append(cache[scope])
+            members.append(tuple(per_scope))
+        self._members = members
+
+        rows, cids = [], []
+        for cid, per_scope in enumerate(members):
+            deps = np.unique(np.concatenate(per_scope)) if per_scope else \
+                np.zeros(0, dtype=np.int64)
+            rows.append(deps)
+            cids.append(np.full(len(deps), cid, dtype=np.int64))
+        self._dep_rows = np.concatenate(rows) if rows else \
+            np.zeros(0, dtype=np.int64)
+        self._dep_cids = np.concatenate(cids) if cids else \
+            np.zeros(0, dtype=np.int64)
+
+    # ---- Evaluation ----
+
+    def _evaluate(self, table: InstanceTable, cids: np.ndarray) -> None:
+        by_kind: dict[type, list[int]] = {}
+        for cid in cids.tolist():
+            by_kind.setdefault(type(self._constraints[cid]), []).append(cid)
+        for kind, ids in by_kind.items():
+            fn = _EVALUATORS.get(kind)
+            if fn is None:
+                raise TypeError(f'No evaluator for {kind.__name__}')
+            with span(f'titan_{kind.kind}', constraints=len(ids)):
+                results = fn(table, [self._constraints[i] for i in ids],
+                             [self._members[i] for i in ids])
+            for cid, res in zip(ids, results):
+                self._results[cid] = res
+
+
+def _segments(parts: Sequence[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """ Concatenated rows and the segment (constraint) id of each. """
+    lens = np.array([len(p) for p in parts], dtype=np.int64)
+    rows = np.concatenate(parts) if parts else np.zeros(0, np.int64)
+    return rows.astype(np.int64), np.repeat(np.arange(len(parts)), lens)
+
+
+def _eval_envelope(table: InstanceTable, cs: list[Envelope],
+                   members: list[tuple[np.ndarray, ...]]
+                   ) -> list[ConstraintResult]:
+    rows, seg = _segments([m[0] for m in members])
+    lo = np.array([c.lo for c in cs], dtype=np.float64)[seg]
+    hi = np.array([c.hi for c in cs], dtype=np.float64)[seg]
+    tol = np.array([c.tol for c in cs], dtype=np.float64)[seg, None]
+    shaped = table.has_shape[rows]
+    with np.errstate(invalid='ignore'):
+        outside = shaped & ~(np.all(table.lo[rows] >= lo - tol, axis=1) &
+                             np.all(table.hi[rows] <= hi + tol, axis=1))
+    n_out = np.bincount(seg, weights=outside, minlength=len(cs))
+    return [ConstraintResult(c.name, c.kind, n == 0, float(n),
+                             f'inside {tuple(c.lo)}..{tuple(c.hi)}',
+                             len(m[0]))
+            for c, m, n in zip(cs, members, n_out)]
+
+
+def _eval_mass(table: InstanceTable, cs: list[MassBudget],
+               members: list[tuple[np.ndarray, ...]]
+               ) -> list[ConstraintResult]:
+    rows, seg = _segments([m[0] for m in members])
+    total = np.bincount(seg, weights=table.mass[rows], minlength=len(cs))
+    return [ConstraintResult(c.name, c.kind,
+                             bool(c.min_kg <= kg <= c.max_kg), float(kg),
+                             f'{c.min_kg:g}..{c.max_kg:g} kg', len(m[0]))
+            for c, m, kg in zip(cs, members, total)]
+
+
+def _centroids(table: InstanceTable,
+               parts: Sequence[np.ndarray]) -> np.ndarray:
+    """ Volume-weighted centroid per row set, NaN for empty sets. """
+    rows, seg = _segments(parts)
+    w = np.where(table.has_shape[rows], table.volume[rows], 0.0)
+    c = np.where(table.has_shape[rows, None], table.centroid[rows], 0.0)
+    wsum = np.bincount(seg, weights=w, minlength=len(parts))
+    out = np.stack([np.bincount(seg, weights=w * c[:, k],
+                                minlength=len(parts)) for k in range(3)],
+                   axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return out / wsum[:, None]
+
+
+def _eval_interface(table: InstanceTable, cs: list[Interface],
+                    members: list[tuple[np.ndarray, ...]]
+                    ) -> list[ConstraintResult]:
+    ca = _centroids(table, [m[0] for m in members])
+    cb = _centroids(table, [m[1] for m in members])
+    axis = np.array([c.axis for c in cs], dtype=np.float64)
+    axis /= np.linalg.norm(axis, axis=1, keepdims=True)
+    dist = np.einsum('ij,ij->i', cb - ca, axis)
+    out = []
+    for c, m, d in zip(cs, members, dist):
+        ok = bool(np.isfinite(d) and abs(d - c.nominal) <= c.tol)
+        out.append(ConstraintResult(c.name, c.kind, ok, float(d),
+                                    f'{c.nominal:g}±{c.tol:g}',
+                                    len(m[0]) + len(m[1])))
+    return out
+
+
+def _min_gap(table: InstanceTable, a: np.ndarray, b: np.ndarray) -> float:
+    a = a[table.has_shape[a]]
+    b = np.setdiff1d(b[table.has_shape[b]], a)
+    if not len(a) or not len(b):
+        return float('inf')
+    lo_b, hi_b = table.lo[b], table.hi[b]
+    step = max(1, _CLEARANCE_BLOCK // len(b))
+    best = float('inf')
+    for s in range(0, len(a), step):
+        lo_a = table.lo[a[s:s + step], None]
+        hi_a = table.hi[a[s:s + step], None]
+        sep = np.maximum(0.0, np.maximum(lo_b[None] - hi_a, lo_a - hi_b[None]))
+        best = min(best, float(np.sqrt((sep * sep).sum(axis=2)).min()))
+    return best
+
+
+def _eval_clearance(table: InstanceTable, cs: list[Clearance],
+                    members: list[tuple[np.ndarray, ...]]
+                    ) -> list[ConstraintResult]:
+    out = []
+    for c, (a, b) in zip(cs, members):
+        gap = _min_gap(table, a, b)
+        out.append(ConstraintResult(c.name, c.kind, gap >= c.gap, gap,
+                                    f'>= {c.gap:g} mm', len(a) + len(b)))
+    return out
+
+
+_EVALUATORS = {
+    Envelope: _eval_envelope,
+    MassBudget: _eval_mass,
+    Interface: _eval_interface,
+    Clearance: _eval_clearance,
+}
@@ -0,0 +1,146 @@
+"""
+Flattened instance table: one row per assembly node in DFS order.
+
+The subtree of row i is the contiguous row range [i, end[i]), so scope
+resolution is range arithmetic. Geometry columns come from the cached
+AtlasPart.mass_props, moved by the accumulated instance offset.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+
+from atlas_runtime import AtlasAssembly, AtlasInstance
+
+# Columns compared to detect changed rows between regenerations
+_SIGNATURE = ('qty', 'lo', 'hi', 'centroid', 'mass', 'volume')
+
+
+@dataclass
+class InstanceTable:
+    key: np.ndarray  # (N,) str, e.g. 'ASM/FRAME#0/ISO4017-M8x40#3'
+    def_id: np.ndarray  # (N,) str
+    part_no: np.ndarray  # (N,) str
+    end: np.ndarray  # (N,) int, subtree of row i is [i, end[i])
+    qty: np.ndarray  # (N,) float, absolute quantity
+    has_shape: np.ndarray  # (N,) bool
+    lo: np.ndarray  # (N, 3) world bbox, NaN without shape
+    hi: np.ndarray  # (N, 3)
+    centroid: np.ndarray  # (N, 3)
+    mass: np.ndarray  # (N,) kg for all qty, 0 if unknown density
+    volume: np.ndarray  # (N,) mm³ for all qty
+    known_density: np.ndarray  # (N,) bool
+    # def_id / part_no / key -> rows, built on first lookup
+    _index: Optional[dict[str, np.ndarray]] = field(
+        default=None, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+    @classmethod
+    def from_assembly(cls, asm: AtlasAssembly) -> 'InstanceTable':
+        rows: list[tuple[Any, ...]] = []
+        ends: list[int] = []
+
+        def visit(inst: AtlasInstance, prefix: str, qty: int,
+                  off: np.ndarray, seen: dict[str, int]) -> None:
+            ref = inst.ref
+            name = ref.def_id or ref.part_no or '?'
+            k = seen.get(name, 0)
+            seen[name] = k + 1
+            key = f'{prefix}/{name}#{k}' if prefix else name
+            qty = qty * int(getattr(inst, 'qty', 1))
+            xf = inst.xform
+            if isinstance(xf, (tuple, list)) and len(xf) == 3:
+                off = off + np.asarray(xf, dtype=np.float64)
+
+            row = len(rows)
+            rows.append((key, ref, qty, off))
+            ends.append(row + 1)
+            child_seen: dict[str, int] = {}
+            for ch in inst.children or []:
+                visit(ch, key, qty, off, child_seen)
+            ends[row] = len(rows)
+
+        visit(asm.root, '', 1, np.zeros(3), {})
+        return cls._build(rows, ends)
+
+    @classmethod
+    def _build(cls, rows: list[tuple[Any, ...]],
+               ends: list[int]) -> 'InstanceTable':
+        n = len(rows)
+        lo = np.full((n, 3), np.nan)
+        hi = np.full((n, 3), np.nan)
+        cent = np.full((n, 3), np.nan)
+        mass = np.zeros(n)
+        volume = np.zeros(n)
+        known = np.zeros(n, dtype=bool)
+        has_shape = np.zeros(n, dtype=bool)
+        qty = np.array([r[2] for r in rows], dtype=np.float64)
+        off = np.array([r[3] for r in rows], dtype=np.float64).reshape(n, 3)
+
+        # One property lookup per distinct part
+        props: dict[int, Any] = {}
+        for i, (_key, ref, _q, _off) in enumerate(rows):
+            if getattr(ref, 'shape', None) is None:
+                continue
+            if id(ref) not in props:
+                props[id(ref)] = ref.mass_props
+            mp = props[id(ref)]
+            if mp is None:
+                continue
+            has_shape[i] = True
+            lo[i], hi[i], cent[i] = mp.bbox_min, mp.bbox_max, mp.centroid
+            volume[i] = mp.volume
+            known[i] = mp.density is not None
+            mass[i] = mp.mass or 0.0
+        lo += off
+        hi += off
+        cent += off
+        mass *= qty
+        volume *= qty
+
+        return cls(key=np.array([r[0] for r in rows], dtype=object),
+                   def_id=np.array([r[1].def_id or '' for r in rows],
+                                   dtype=object),
+                   part_no=np.array([r[1].part_no or '' for r in rows],
+                                    dtype=object),
+                   end=np.asarray(ends, dtype=np.int64), qty=qty,
+                   has_shape=has_shape, lo=lo, hi=hi, centroid=cent,
+                   mass=mass, volume=volume, known_density=known)
+
+    def same_structure(self, other: 'InstanceTable') -> bool:
+        return (len(self) == len(other) and
+                np.array_equal(self.key, other.key) and
+                np.array_equal(self.end, other.end))
+
+    def changed_rows(self, other: 'InstanceTable') -> np.ndarray:
+        """ Rows whose geometry/quantity differ (same structure assumed). """
+        changed = np.zeros(len(self), dtype=bool)
+        for name in _SIGNATURE:
+            a = getattr(self, name).reshape(len(self), -1)
+            b = getattr(other, name).reshape(len(other), -1)
+            same = (a == b) | (np.isnan(a) & np.isnan(b))
+            changed |= ~same.all(axis=1)
+        return np.flatnonzero(changed)
+
+    def rows_matching(self, ref: str) -> np.ndarray:
+        if self._index is None:
+            groups: dict[str, set[int]] = {}
+            for col in (self.def_id, self.part_no, self.key):
+                for i, name in enumerate(col.tolist()):
+                    groups.setdefault(name, set()).add(i)
+            self._index = {k: np.array(sorted(v), dtype=np.int64)
+                           for k, v in groups.items()}
+        return self._index.get(ref, np.zeros(0, dtype=np.int64))
+
+    def subtree_rows(self, ref: str) -> np.ndarray:
+        """ Rows under (and including) every node matching `ref`. """
+        heads = self.rows_matching(ref)
+        if not len(heads):
+            return heads
+        mask = np.zeros(len(self) + 1, dtype=np.int64)
+        np.add.at(mask, heads, 1)
+        np.add.at(mask, self.end[heads], -1)
+        return np.flatnonzero(np.cumsum(mask[:-1]) > 0)
@@ -0,0 +1,128 @@
+"""
+Startup profiling for `python main.py --profile-startup`.
+
+Records named phases (QApplication, stylesheet, main window, viewer, OCC
+runtime, first model scan...) against process start, plus per-module import
+times through a meta path hook. The report is logged once the first model
+is on screen.
+"""
+import importlib.abc
+import logging
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class _TimingLoader(importlib.abc.Loader):
+    def __init__(self, profiler: 'StartupProfiler', loader) -> None:
+        self._profiler = profiler
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        local = self._profiler._local
+        depth = getattr(local, 'depth', 0)
+        local.depth = depth + 1
+        t0 = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            local.depth = depth
+            self._profiler.imports.append(
+                (module.__name__, time.perf_counter() - t0, depth))
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    def __init__(self, profiler: 'StartupProfiler') -> None:
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(
+                        spec.loader, 'exec_module'):
+                    spec.loader = _TimingLoader(self._profiler, spec.loader)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.t0 = time.perf_counter()
+        self.phases: list[tuple[str, float, float]] = []  # name, start, dur
+        self.marks: list[tuple[str, float]] = []
+        self.imports: list[tuple[str, float, int]] = []  # name, dur, depth
+        self._local = threading.local()
+        self._hook = None
+        self._done = False
+
+    def enable(self, t0: float | None = None) -> None:
+        self.enabled = True
+        if t0 is not None:
+            self.t0 = t0
+        self._hook = _ImportTimer(self)
+        sys.meta_path.insert(0, self._hook)
+
+    def phase(self, name: str) -> '_Phase':
+        return _Phase(self, name)
+
+    def mark(self, name: str) -> None:
+        """ Timestamp a milestone relative to process start. """
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.t0))
+
+    def finish(self) -> None:
+        """ Log the report once, then stop timing imports. """
+        if not self.enabled or self._done:
+            return
+        self._done = True
+        if self._hook in sys.meta_path:
+            sys.meta_path.remove(self._hook)
+        for line in self.report().splitlines():
+            log.info(line)
+
+    def report(self, top: int = 15) -> str:
+        lines = ['[startup] ---- startup profile ----']
+        for name, at in self.marks:
+            lines.append(f'[startup] {at * 1000:9.1f} ms  @ {name}')
+        lines.append('[startup] phases:')
+        for name, start, dur in self.phases:
+            lines.append(f'[startup] {dur * 1000:9.1f} ms  {name} '
+                         f'(from {start * 1000:.1f} ms)')
+        lines.append(f'[startup] slowest imports (cumulative, top {top}):')
+        roots = sorted((i for i in self.imports if i[2] == 0),
+                       key=lambda i: i[1], reverse=True)[:top]
+        for name, dur, _depth in roots:
+            lines.append(f'[startup] {dur * 1000:9.1f} ms  import {name}')
+        return '\n'.join(lines)
+
+
+class _Phase:
+    def __init__(self, profiler: StartupProfiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self._t = 0.0
+
+    def __enter__(self) -> '_Phase':
+        self._t = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        p = self.profiler
+        if p.enabled:
+            p.phases.append((self.name, self._t - p.t0,
+                             time.perf_counter() - self._t))
+
+
+profiler = StartupProfiler()
@@ -1,10 +1,12 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
+from functools import cached_property
 from types import ModuleType
 from typing import Any, Optional
 import os, sys, platform, importlib
 
 __all__ = ['atlas_occ',
+           'load_occ',
            'AtlasPart',
            'AtlasAssembly',
            'AtlasInstance']
@@ -22,20 +24,58 @@ def _rt() -> str:
 
 
 _dlldir = os.path.join(os.path.dirname(__file__), 'runtime', _rt())
+_occ: Optional[ModuleType] = None
+
+
+def load_occ() -> ModuleType:
+    """
+    Import the native atlas_occ wrapper on first use. Importing
+    atlas_runtime itself stays cheap; the OCC libraries are only loaded
+    when geometry is actually touched (or warmed up in the background).
+    """
+    global _occ
+    if _occ is not None:
+        return _occ
+
+    if _dlldir not in sys.path:
+        sys.path.insert(0, _dlldir)
+
+    if platform.system() == 'Windows':
+        if hasattr(os, 'add_dll_directory'):
+            os.add_dll_directory(_dlldir)
+        else:
+            os.environ['PATH'] = _dlldir + os.pathsep + os.environ.get(
+                'PATH', '')
+    else:
+        os.environ['LD_LIBRARY_PATH'] = (
+                _dlldir + os.pathsep + os.environ.get('LD_LIBRARY_PATH', ''))
 
-if _dlldir not in sys.path:
-    sys.path.insert(0, _dlldir)
+    _occ = importlib.import_module('atlas_occ')
+    globals()['atlas_occ'] = _occ
+    return _occ
 
-if platform.system() == 'Windows':
-    if hasattr(os, 'add_dll_directory'):
-        os.add_dll_directory(_dlldir)
-    else:
-        os.environ['PATH'] = _dlldir + os.pathsep + os.environ.get('PATH', '')
-else:
-    os.environ['LD_LIBRARY_PATH'] = (
-            _dlldir + os.pathsep + os.environ.get('LD_LIBRARY_PATH', ''))
 
-atlas_occ: ModuleType = importlib.import_module('atlas_occ')
+class _LazyModule(ModuleType):
+    """ Stand-in for atlas_occ that loads the real module on first access. """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(load_occ(), name)
+
+    def __dir__(self) -> list[str]:
+        return dir(load_occ())
+
+
+# Runtime modules bind this proxy so importing them never loads OCC.
+_atlas_occ_lazy = _LazyModule('atlas_occ')
+
+
+def __getattr__(name: str) -> Any:
+    # `from atlas_runtime import atlas_occ` returns the real module (and
+    # raises ImportError right there if the native runtime is missing).
+    if name == 'atlas_occ':
+        return load_occ()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 
 TopoDS_Shape = Any
 
@@ -60,6 +100,12 @@ class AtlasPart:
     props: dict[str, Any] = field(default_factory=dict)
     bom_line: Optional[AtlasBom] = None
 
+    @cached_property
+    def mass_props(self) -> Any:
+        """ Lazily computed MassProps (see atlas_runtime.massprops). """
+        from atlas_runtime.massprops import part_mass_props
+        return part_mass_props(self)
+
 
 @dataclass(frozen=False)
 class AtlasInstance:
@@ -82,11 +128,28 @@ class AtlasAssembly:
     dirty: bool = True
 
 
+from atlas_runtime.batch import (make_boxes, make_cylinders, place_shape,
+                                  make_compound_placed)
 from atlas_runtime.asm_utils import (normalize_assembly,
+                                     dedupe_shapes,
                                      build_compound_and_triangles,
+                                     iter_triangle_batches,
                                      bom_flat, bom_rollup)
+from atlas_runtime.boolean import fuse_many, cut_many
+from atlas_runtime.massprops import assembly_mass_props
+from atlas_runtime.memo import memoize
 
 __all__ += ['normalize_assembly',
+            'dedupe_shapes',
             'build_compound_and_triangles',
+            'iter_triangle_batches',
             'bom_flat',
-            'bom_rollup']
+            'bom_rollup',
+            'make_boxes',
+            'make_cylinders',
+            'place_shape',
+            'make_compound_placed',
+            'fuse_many',
+            'cut_many',
+            'assembly_mass_props',
+            'memoize']
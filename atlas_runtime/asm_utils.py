@@ -1,9 +1,18 @@
 from __future__ import annotations
-from typing import Any, Sequence
+from typing import Any, Iterator, Optional, Sequence
 from collections import defaultdict
+from dataclasses import replace
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
 
-from . import atlas_occ, AtlasPart, AtlasAssembly, AtlasInstance, AtlasBom, \
-    TopoDS_Shape
+import numpy as np
+
+from . import _atlas_occ_lazy as atlas_occ, AtlasPart, AtlasAssembly, \
+    AtlasInstance, AtlasBom, TopoDS_Shape
+from .tracing import span, counter
+from .batch import place_shape
+from .fingerprint import geometry, same_solid, shape_fingerprint, \
+    shape_geometry, triangulate
 
 
 def _identity_xf() -> tuple[float, float, float]:
@@ -34,7 +43,8 @@ def _make_root(children: list[AtlasInstance]) -> AtlasAssembly:
     return AtlasAssembly(root=root, dirty=True)
 
 
-def normalize_assembly(result: Any) -> AtlasAssembly:
+def normalize_assembly(result: Any, dedupe: bool = False,
+                       threads: Optional[int] = None) -> AtlasAssembly:
     """
     Accepts:
       - AtlasAssembly
@@ -42,7 +52,17 @@ def normalize_assembly(result: Any) -> AtlasAssembly:
       - List[TopoDS_Shape]
       - None / empty
     Returns AtlasAssembly(root=...) with dirty=True.
+    With dedupe (opt-in: it meshes every shape up front), geometrically
+    identical shapes are shared in a rebuilt assembly (dedupe_shapes,
+    fingerprinting on `threads`).
     """
+    asm = _normalize(result)
+    if dedupe:
+        asm = dedupe_shapes(asm, threads)
+    return asm
+
+
+def _normalize(result: Any) -> AtlasAssembly:
     if isinstance(result, AtlasAssembly):
         return result
 
@@ -74,6 +94,123 @@ def normalize_assembly(result: Any) -> AtlasAssembly:
     return _make_root([])
 
 
+def _offset_xf(xf: Any) -> Optional[np.ndarray]:
+    if xf is None:
+        return np.zeros(3)
+    if isinstance(xf, (tuple, list)) and len(xf) == 3:
+        return np.asarray(xf, dtype=np.float64)
+    return None
+
+
+def dedupe_shapes(asm: AtlasAssembly,
+                  threads: Optional[int] = None) -> AtlasAssembly:
+    """
+    Make parts whose shapes are the same geometry up to a translation share
+    one shape object (the first met in walk order), folding the offset into
+    the instance transform. Part metadata (part_no, BOM...) is kept, so only
+    instancing and shape-keyed caches see the difference. A mesh
+    fingerprint match is only merged when the B-reps agree too
+    (fingerprint.same_solid), as STEP and boolean export use the shape.
+
+    Instances with non-offset transforms (or children with them) are left
+    alone. The input is never modified (its nodes may be memoized or shared
+    between runs): rewritten instances and their ancestors are copies in a
+    new assembly. Returns `asm` itself when nothing is merged.
+    """
+    shapes: dict[int, TopoDS_Shape] = {}
+    for node, _qty, _xf in walk_instances(asm.root):
+        shp = getattr(node.ref, 'shape', None)
+        if shp is not None:
+            shapes.setdefault(id(shp), shp)
+    if len(shapes) < 2:
+        return asm
+
+    with span('dedupe', shapes=len(shapes)) as sp:
+        # Meshes are shared with the later stages (fingerprint cache); only
+        # shapes whose size class has company are fingerprinted
+        classes: dict[tuple, list[TopoDS_Shape]] = {}
+        for shp in shapes.values():
+            geom = shape_geometry(shp)
+            if geom.triangles:
+                classes.setdefault(geom.size_class, []).append(shp)
+        items = [s for group in classes.values() if len(group) > 1
+                 for s in group]
+        sp['candidates'] = len(items)
+        if not items:
+            return asm
+
+        n_threads = resolve_threads(threads)
+        if n_threads > 1 and len(items) > 2:
+            with ThreadPoolExecutor(n_threads) as pool:
+                fps = list(pool.map(shape_fingerprint, items))
+        else:
+            fps = [shape_fingerprint(s) for s in items]
+
+        # shape id -> (canonical shape, offset from canonical)
+        canon: dict[str, tuple[TopoDS_Shape, np.ndarray]] = {}
+        remap: dict[int, tuple[TopoDS_Shape, np.ndarray]] = {}
+        for shp, fp in zip(items, fps):
+            if fp is None:
+                continue
+            first = canon.setdefault(fp.key, (shp, np.asarray(fp.origin)))
+            if first[0] is not shp and same_solid(shp, first[0]):
+                remap[id(shp)] = (first[0],
+                                  np.asarray(fp.origin) - first[1])
+
+        root, rewritten = _remap_shapes(asm.root, remap)
+        sp['merged'] = len(remap)
+        sp['instances'] = rewritten
+
+    if not rewritten:
+        return asm
+    counter('dedupe', shapes=len(remap), instances=rewritten)
+    return AtlasAssembly(root=root, dirty=True)
+
+
+def _remap_shapes(root: AtlasInstance,
+                  remap: dict[int, tuple[TopoDS_Shape, np.ndarray]]
+                  ) -> tuple[AtlasInstance, int]:
+    """
+    Copy-on-write rewrite of the tree under `root` for dedupe_shapes:
+    returns the new root (`root` itself if unchanged) and the number of
+    instances switched to their canonical shape.
+    """
+    parts: dict[int, AtlasPart] = {}
+    done: dict[tuple, AtlasInstance] = {}
+    rewritten = 0
+
+    def visit(node: AtlasInstance, shift: np.ndarray) -> AtlasInstance:
+        # shift: offset folded into the parent, taken back from this node
+        nonlocal rewritten
+        key = (id(node), *shift.tolist())
+        if key in done:
+            return done[key]
+        kids = node.children or []
+        hit = remap.get(id(getattr(node.ref, 'shape', None)))
+        if hit is not None and (_offset_xf(node.xform) is None or any(
+                _offset_xf(ch.xform) is None for ch in kids)):
+            hit = None
+        d = hit[1] if hit is not None else np.zeros(3)
+        children = [visit(ch, -d) for ch in kids]
+
+        out = node
+        if (hit is not None or shift.any() or
+                any(a is not b for a, b in zip(children, kids))):
+            xform, ref = node.xform, node.ref
+            if hit is not None or shift.any():
+                xform = tuple(map(float, _offset_xf(node.xform) + shift + d))
+            if hit is not None:
+                if id(ref) not in parts:
+                    parts[id(ref)] = replace(ref, shape=hit[0])
+                ref = parts[id(ref)]
+                rewritten += 1
+            out = replace(node, ref=ref, xform=xform, children=children)
+        done[key] = out
+        return out
+
+    return visit(root, np.zeros(3)), rewritten
+
+
 # ---- Walk & flatten ----
 
 def walk_instances(inst: AtlasInstance,
@@ -92,46 +229,329 @@ def walk_instances(inst: AtlasInstance,
         yield from walk_instances(ch, abs_qty, abs_xf)
 
 
+def iter_placed_shapes(asm: AtlasAssembly) -> Iterator[TopoDS_Shape]:
+    """
+    Lazily expand the tree into placed shapes (applying simple (dx,dy,dz)
+    transforms), in the same order as collect_shapes.
+    """
+    for node, qty, xf in walk_instances(asm.root):
+        shp = getattr(node.ref, 'shape', None)
+        if shp is None:
+            continue
+            # repeat by qty (later: instance-aware viewer/export)
+        for _ in range(int(qty)):
+            yield _apply_xf(shp, xf)
+
+
 def collect_shapes(asm: AtlasAssembly) -> list[TopoDS_Shape]:
     """
     Expand the tree into placed shapes (applying simple (dx,dy,dz) transforms)
+    Instances of the same shape are placed in one batch (place_shape); the
+    result keeps the order of iter_placed_shapes.
     """
-    shapes: list[TopoDS_Shape] = []
+    out: list[Any] = []
+    groups: dict[int, tuple[TopoDS_Shape, list[int], list[Any]]] = {}
     for node, qty, xf in walk_instances(asm.root):
         shp = getattr(node.ref, 'shape', None)
         if shp is None:
             continue
-            # repeat by qty (later: instance-aware viewer/export)
         for _ in range(int(qty)):
-            shapes.append(_apply_xf(shp, xf))
-    return shapes
+            if isinstance(xf, (tuple, list)) and len(xf) == 3:
+                _, idx, offsets = groups.setdefault(id(shp), (shp, [], []))
+                idx.append(len(out))
+                offsets.append(xf)
+                out.append(None)
+            else:
+                out.append(shp)
+
+    for shp, idx, offsets in groups.values():
+        # Compound members only: not worth tracking as placements
+        for i, placed in zip(idx, place_shape(shp, offsets, track=False)):
+            out[i] = placed
+    return out
+
+
+# ---- Thread-parallel tessellation ----
+
+def resolve_threads(threads: Optional[int]) -> int:
+    """ None/1 -> serial, 0 -> one per CPU, n -> n worker threads. """
+    if threads is None:
+        return 1
+    threads = int(threads)
+    return max(1, os.cpu_count() or 1) if threads <= 0 else threads
+
+
+def _all_meshed(asm: AtlasAssembly) -> bool:
+    """
+    True when every distinct part already has its mesh in the geometry
+    cache (e.g. from estimate_assembly): placing those is cheaper than
+    meshing the compound again.
+    """
+    seen: set[int] = set()
+    for node, _qty, _xf in walk_instances(asm.root):
+        shp = getattr(node.ref, 'shape', None)
+        if shp is None or id(shp) in seen:
+            continue
+        if geometry.peek(shp) is None:
+            return False
+        seen.add(id(shp))
+    return bool(seen)
+
+
+class _InstancedTessellation:
+    """
+    Tessellate every distinct part shape once on a thread pool and place
+    the per-instance copies with NumPy offsets.
+
+    Each part is meshed on a copy with its own faces (fingerprint.
+    triangulate), so the workers run in parallel even when parts share
+    faces. Placed copies share their part's triangulation and are never
+    meshed themselves.
+    """
+
+    def __init__(self, asm: AtlasAssembly, threads: int) -> None:
+        uniq: dict[int, int] = {}
+        self.shapes: list[TopoDS_Shape] = []
+        group: list[int] = []
+        offsets: list[tuple[float, float, float]] = []
+        for node, qty, xf in walk_instances(asm.root):
+            shp = getattr(node.ref, 'shape', None)
+            if shp is None:
+                continue
+            g = uniq.setdefault(id(shp), len(self.shapes))
+            if g == len(self.shapes):
+                self.shapes.append(shp)
+            off = (tuple(map(float, xf)) if isinstance(xf, (tuple, list))
+                   and len(xf) == 3 else (0.0, 0.0, 0.0))
+            group.extend([g] * int(qty))
+            offsets.extend([off] * int(qty))
+
+        self.group = np.asarray(group, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.float32).reshape(-1, 3)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, min(threads, len(self.shapes))),
+            thread_name_prefix='atlas-tess')
+        self._futures: list[Future] = [
+            self._pool.submit(self._mesh, s) for s in self.shapes]
+
+    def __len__(self) -> int:
+        return len(self.group)
+
+    @staticmethod
+    def _mesh(shape: TopoDS_Shape) -> np.ndarray:
+        return shape_geometry(shape).mesh.astype(np.float32).reshape(-1, 9)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def triangles(self, start: int = 0, stop: Optional[int] = None
+                  ) -> np.ndarray:
+        """ (T, 9) float32 triangles of instances [start, stop). """
+        group = self.group[start:stop]
+        offsets = self.offsets[start:stop]
+        parts, inv = np.unique(group, return_inverse=True)
+        inv = inv.reshape(-1)
+        base = [self._futures[g].result() for g in parts]
+        lens = np.array([len(b) for b in base], dtype=np.int64)
+        if not lens.sum():
+            return np.empty((0, 9), dtype=np.float32)
+
+        # Output rows instance by instance, each a run of its part's mesh
+        counts = lens[inv]
+        starts = np.cumsum(counts) - counts
+        first = np.cumsum(lens) - lens
+        inst = np.repeat(np.arange(len(group)), counts)
+        src = np.arange(len(inst)) + np.repeat(
+            first[inv] - starts, counts)
+        out = np.concatenate(base)[src]
+        out.reshape(-1, 3, 3)[:] += offsets[inst][:, None, :]
+        return out
 
 
 # ---- Cache builder ----
 
-def build_compound_and_triangles(asm: AtlasAssembly) -> None:
+def build_compound(asm: AtlasAssembly) -> Optional[TopoDS_Shape]:
+    """
+    Compound of all placed shapes without tessellating it (export only).
+    Returns None for an empty assembly.
+    """
+    with span('collect_shapes') as sp:
+        shapes = collect_shapes(asm)
+        sp['instances'] = len(shapes)
+    if not shapes:
+        return None
+    with span('make_compound', shapes=len(shapes)):
+        return atlas_occ.make_compound(shapes)
+
+
+def ensure_compound(asm: AtlasAssembly) -> Optional[TopoDS_Shape]:
+    """
+    asm.compound, built on first use for assemblies that skipped it (the
+    bbox LOD only draws boxes, so its compound waits for an export).
+    """
+    if asm.compound is None:
+        asm.compound = build_compound(asm)
+    return asm.compound
+
+
+def build_compound_and_triangles(asm: AtlasAssembly,
+                                 threads: Optional[int] = None) -> None:
     """
     Build and cache compound + triangles on the assembly.
     Mutates asm (requires AtlasAssembly NOT frozen).
+
+    threads selects the tessellation mode: None/1 meshes the compound in one
+    call; 0 (one per CPU) or n > 1 meshes each distinct part on n threads
+    and places instance triangles with NumPy (asm.triangles is then a
+    float32 (T, 9) array). Parts that are all meshed already (the memory
+    estimate) are placed the same way whatever the thread count.
     """
     if ((not asm.dirty) and asm.compound is not None and
             asm.triangles is not None):
         return
 
-    shapes = collect_shapes(asm)
+    n_threads = resolve_threads(threads)
+    if n_threads > 1 or _all_meshed(asm):
+        _build_parallel(asm, n_threads)
+        return
+
+    with span('collect_shapes') as sp:
+        shapes = collect_shapes(asm)
+        sp['instances'] = len(shapes)
     if not shapes:
         asm.compound = None
         asm.triangles = []
         asm.dirty = False
         return
 
-    comp = atlas_occ.make_compound(shapes)
-    tris = atlas_occ.get_triangles(comp)
+    with span('make_compound', shapes=len(shapes)):
+        comp = atlas_occ.make_compound(shapes)
+    with span('get_triangles') as sp:
+        tris = triangulate(comp)
+        sp['triangles'] = len(tris)
+    counter('geometry', instances=len(shapes), triangles=len(tris))
+    asm.compound = comp
+    asm.triangles = tris
+    asm.dirty = False
+
+
+def _build_parallel(asm: AtlasAssembly, threads: int) -> None:
+    tess = _InstancedTessellation(asm, threads)
+    try:
+        with span('collect_shapes') as sp:
+            shapes = collect_shapes(asm)
+            sp['instances'] = len(shapes)
+        if not shapes:
+            asm.compound = None
+            asm.triangles = []
+            asm.dirty = False
+            return
+
+        # The compound is only needed for export; built while meshing runs
+        with span('make_compound', shapes=len(shapes)):
+            comp = atlas_occ.make_compound(shapes)
+        with span('get_triangles', threads=threads,
+                  parts=len(tess.shapes)) as sp:
+            tris = tess.triangles()
+            sp['triangles'] = len(tris)
+    finally:
+        tess.close()
+    counter('geometry', instances=len(shapes), triangles=len(tris))
     asm.compound = comp
     asm.triangles = tris
     asm.dirty = False
 
 
+def iter_triangle_batches(asm: AtlasAssembly,
+                          first_batch: int = 16,
+                          max_batch: int = 4096,
+                          threads: Optional[int] = None
+                          ) -> Iterator[list[list[float]]]:
+    """
+    Streaming variant of build_compound_and_triangles.
+    Tessellates the placed shapes in chunks and yields each chunk's triangles
+    as soon as it is ready. Chunk size starts at first_batch and doubles up to
+    max_batch, so the first batch costs the same whatever the assembly size.
+    Once exhausted, asm.compound / asm.triangles are filled as usual.
+    With threads (see build_compound_and_triangles) the distinct parts are
+    meshed on a thread pool and each batch waits only for its own parts;
+    already meshed parts are placed from the geometry cache.
+    """
+    if ((not asm.dirty) and asm.compound is not None and
+            asm.triangles is not None):
+        if len(asm.triangles):
+            yield asm.triangles
+        return
+
+    n_threads = resolve_threads(threads)
+    if n_threads > 1 or _all_meshed(asm):
+        yield from _iter_batches_parallel(asm, first_batch, max_batch,
+                                          n_threads)
+        return
+
+    shapes: list[TopoDS_Shape] = []
+    triangles: list[list[float]] = []
+    batch: list[TopoDS_Shape] = []
+    size = max(1, int(first_batch))
+
+    def _tessellate(chunk: list[TopoDS_Shape]) -> list[list[float]]:
+        with span('tessellate_batch', shapes=len(chunk)) as sp:
+            comp = atlas_occ.make_compound(chunk)
+            tris = triangulate(comp)
+            sp['triangles'] = len(tris)
+        triangles.extend(tris)
+        return tris
+
+    for shp in iter_placed_shapes(asm):
+        shapes.append(shp)
+        batch.append(shp)
+        if len(batch) >= size:
+            yield _tessellate(batch)
+            batch = []
+            size = min(size * 2, max(int(max_batch), size))
+
+    if batch:
+        yield _tessellate(batch)
+
+    with span('make_compound', shapes=len(shapes)):
+        asm.compound = atlas_occ.make_compound(shapes) if shapes else None
+    counter('geometry', instances=len(shapes), triangles=len(triangles))
+    asm.triangles = triangles
+    asm.dirty = False
+
+
+def _iter_batches_parallel(asm: AtlasAssembly, first_batch: int,
+                           max_batch: int, threads: int
+                           ) -> Iterator[np.ndarray]:
+    tess = _InstancedTessellation(asm, threads)
+    try:
+        chunks: list[np.ndarray] = []
+        start, size = 0, max(1, int(first_batch))
+        while start < len(tess):
+            stop = min(start + size, len(tess))
+            with span('tessellate_batch', shapes=stop - start,
+                      threads=threads) as sp:
+                tris = tess.triangles(start, stop)
+                sp['triangles'] = len(tris)
+            chunks.append(tris)
+            yield tris
+            start = stop
+            size = min(size * 2, max(int(max_batch), size))
+
+        with span('collect_shapes') as sp:
+            shapes = collect_shapes(asm)
+            sp['instances'] = len(shapes)
+        with span('make_compound', shapes=len(shapes)):
+            asm.compound = atlas_occ.make_compound(shapes) if shapes else None
+    finally:
+        tess.close()
+    triangles = (np.concatenate(chunks) if chunks
+                 else np.empty((0, 9), dtype=np.float32))
+    counter('geometry', instances=len(tess), triangles=len(triangles))
+    asm.triangles = triangles
+    asm.dirty = False
+
+
 # ---- BOM helpers ----
 
 def bom_flat(asm: AtlasAssembly) -> list[dict[str, Any]]:
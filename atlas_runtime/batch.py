@@ -0,0 +1,215 @@
+"""
+Batched geometry construction and placement.
+
+Each entry point takes a NumPy array for the whole batch. When the native
+wrapper exports the matching batch function (see _NATIVE) the batch costs a
+single call into atlas_occ; otherwise a pure-Python fallback runs over the
+per-object bindings, building each distinct parameter row only once.
+"""
+from __future__ import annotations
+from typing import Any
+
+import numpy as np
+
+from . import _atlas_occ_lazy as atlas_occ, TopoDS_Shape
+from .fingerprint import register_bounds, register_placement
+from .tracing import span
+
+# Native batch bindings picked up when the loaded atlas_occ provides them
+_NATIVE = {
+    'boxes': 'make_boxes',  # (N, 3) dims -> list[shape]
+    'cylinders': 'make_cylinders',  # (N, 2) radius, height -> list[shape]
+    'move': 'xform_move_many',  # shape, (N, 3) offsets -> list[shape]
+    'transform': 'xform_transform_many',  # shape, (N, 4, 4) -> list[shape]
+    'compound': 'make_compound_placed',  # shape, (N, 3|4, 4) -> compound
+}
+
+_EPS = 1e-9
+
+
+def _native(op: str) -> Any:
+    return getattr(atlas_occ, _NATIVE[op], None)
+
+
+def _as_rows(params: Any, widths: tuple[int, ...], what: str) -> np.ndarray:
+    arr = np.asarray(params, dtype=np.float64)
+    if arr.ndim == 1 and arr.shape[0] in widths:
+        arr = arr[None, :]
+    if arr.ndim != 2 or arr.shape[1] not in widths:
+        raise ValueError(
+            f'{what}: expected an (N, {"|".join(map(str, widths))}) array, '
+            f'got shape {arr.shape}')
+    return arr
+
+
+def _as_transforms(transforms: Any) -> np.ndarray:
+    """ (N, 3) offsets or (N, 4, 4) matrices as a float64 array. """
+    arr = np.asarray(transforms, dtype=np.float64)
+    if arr.ndim == 1 and arr.shape[0] == 3:
+        arr = arr[None, :]
+    elif arr.shape == (4, 4):
+        arr = arr[None, :, :]
+    if not ((arr.ndim == 2 and arr.shape[1] == 3) or
+            (arr.ndim == 3 and arr.shape[1:] == (4, 4))):
+        raise ValueError(f'transforms: expected (N, 3) or (N, 4, 4), '
+                         f'got shape {arr.shape}')
+    return arr
+
+
+def rigid_parts(mats: np.ndarray) -> tuple[np.ndarray, np.ndarray,
+                                            np.ndarray]:
+    """
+    Split (N, 4, 4) rigid transforms (column vectors, translation in
+    [:3, 3]) into rotation angle in degrees (N,), unit axis (N, 3) and
+    translation (N, 3). Raises ValueError for scaling, shear or mirroring,
+    which the placement bindings cannot express.
+    """
+    mats = np.asarray(mats, dtype=np.float64)
+    rot = mats[:, :3, :3]
+    t = mats[:, :3, 3].copy()
+
+    ortho = np.einsum('nji,njk->nik', rot, rot)
+    bad = (~np.all(np.abs(ortho - np.eye(3)) < 1e-6, axis=(1, 2)) |
+           (np.linalg.det(rot) < 0) |
+           ~np.all(np.abs(mats[:, 3] - (0, 0, 0, 1)) < 1e-9, axis=1))
+    if bad.any():
+        raise ValueError(f'transform {int(np.flatnonzero(bad)[0])} is not a '
+                         f'rigid motion (rotation + translation)')
+
+    cos = np.clip((np.trace(rot, axis1=1, axis2=2) - 1.0) / 2.0, -1.0, 1.0)
+    angle = np.arccos(cos)
+    axis = np.stack([rot[:, 2, 1] - rot[:, 1, 2],
+                     rot[:, 0, 2] - rot[:, 2, 0],
+                     rot[:, 1, 0] - rot[:, 0, 1]], axis=1)
+
+    # Near 180° the antisymmetric part vanishes; take the axis from the
+    # diagonal (R = 2aa^T - I) instead
+    flip = np.pi - angle < 1e-6
+    if flip.any():
+        rf = rot[flip]
+        diag = np.sqrt(np.clip((np.diagonal(rf, axis1=1, axis2=2) + 1) / 2,
+                               0.0, None))
+        k = np.argmax(diag, axis=1)
+        rows = rf[np.arange(len(rf)), k]  # row k = 2 a_k a - e_k
+        ax = rows / (2 * diag[np.arange(len(rf)), k])[:, None]
+        ax[np.arange(len(rf)), k] = diag[np.arange(len(rf)), k]
+        axis[flip] = ax
+
+    norm = np.linalg.norm(axis, axis=1)
+    none = (angle < _EPS) | (norm < _EPS)
+    axis[none] = (0.0, 0.0, 1.0)
+    angle[none] = 0.0
+    axis[~none] /= norm[~none, None]
+    return np.degrees(angle), axis, t
+
+
+def _build_unique(params: np.ndarray, make) -> list[TopoDS_Shape]:
+    """ Call `make(*row)` once per distinct row, share the result. """
+    uniq, inverse = np.unique(params, axis=0, return_inverse=True)
+    built = [make(*map(float, row)) for row in uniq]
+    return [built[i] for i in inverse.reshape(-1)]
+
+
+def _make_many(params: np.ndarray, n_dims: int, op: str, make,
+               extent) -> list[TopoDS_Shape]:
+    dims, origins = params[:, :n_dims], params[:, n_dims:]
+    native = _native(op)
+    with span(f'make_{op}', count=len(params), native=native is not None):
+        if native is not None:
+            shapes = list(native(np.ascontiguousarray(dims)))
+        else:
+            shapes = _build_unique(dims, make)
+    # Exact boxes from the dimensions, so bounds never mesh a primitive
+    seen: set[int] = set()
+    for shape, row in zip(shapes, dims):
+        if id(shape) not in seen:
+            seen.add(id(shape))
+            register_bounds(shape, extent(*row))
+    if origins.shape[1]:
+        shapes = _move_each(shapes, origins)
+    return shapes
+
+
+def _move_each(shapes: list[TopoDS_Shape],
+               origins: np.ndarray) -> list[TopoDS_Shape]:
+    # Group by shape object so each distinct solid is placed in one call
+    out: list[Any] = [None] * len(shapes)
+    groups: dict[int, list[int]] = {}
+    for i, s in enumerate(shapes):
+        groups.setdefault(id(s), []).append(i)
+    for idx in groups.values():
+        placed = place_shape(shapes[idx[0]], origins[idx])
+        for i, p in zip(idx, placed):
+            out[i] = p
+    return out
+
+
+def make_boxes(params: Any) -> list[TopoDS_Shape]:
+    """
+    Boxes from an (N, 3) array of (x, y, z) sizes, or (N, 6) with an
+    (ox, oy, oz) origin per box. Identical sizes share one solid.
+    """
+    arr = _as_rows(params, (3, 6), 'make_boxes')
+    return _make_many(arr, 3, 'boxes', atlas_occ.make_box,
+                      lambda x, y, z: (0.0, 0.0, 0.0, x, y, z))
+
+
+def make_cylinders(params: Any) -> list[TopoDS_Shape]:
+    """
+    Z-axis cylinders from an (N, 2) array of (radius, height), or (N, 5)
+    with an (ox, oy, oz) origin per cylinder.
+    """
+    arr = _as_rows(params, (2, 5), 'make_cylinders')
+    return _make_many(arr, 2, 'cylinders', atlas_occ.make_cylinder,
+                      lambda r, h: (-r, -r, 0.0, r, r, h))
+
+
+def place_shape(shape: TopoDS_Shape, transforms: Any,
+                track: bool = True) -> list[TopoDS_Shape]:
+    """
+    Copies of `shape` (sharing its geometry) placed at each of an (N, 3)
+    array of offsets or an (N, 4, 4) array of rigid transforms. With
+    `track`, offset copies are registered (fingerprint.register_placement)
+    so their bounds and meshes are derived from `shape`.
+    """
+    # No span here: collect_shapes calls this once per distinct shape
+    xf = _as_transforms(transforms)
+    if xf.ndim == 2:
+        native = _native('move')
+        if native is not None:
+            out = list(native(shape, np.ascontiguousarray(xf)))
+        else:
+            move = atlas_occ.xform_move
+            out = [move(shape, x, y, z) for x, y, z in xf.tolist()]
+        if track:
+            for copy, offset in zip(out, xf):
+                register_placement(copy, shape, offset)
+        return out
+
+    native = _native('transform')
+    if native is not None:
+        return list(native(shape, np.ascontiguousarray(xf)))
+    angle, axis, t = rigid_parts(xf)
+    move, rotate = atlas_occ.xform_move, atlas_occ.xform_rotate
+    out = []
+    for a, (ax, ay, az), (x, y, z) in zip(angle.tolist(), axis.tolist(),
+                                          t.tolist()):
+        s = rotate(shape, a, ax, ay, az) if a else shape
+        out.append(move(s, x, y, z))
+    return out
+
+
+def make_compound_placed(shape: TopoDS_Shape,
+                         transforms: Any) -> TopoDS_Shape:
+    """ Compound of `shape` placed at every transform (see place_shape). """
+    xf = _as_transforms(transforms)
+    if not len(xf):
+        raise ValueError('make_compound_placed requires at least one '
+                         'transform')
+    native = _native('compound')
+    if native is not None:
+        with span('make_compound_placed', count=len(xf), native=True):
+            return native(shape, np.ascontiguousarray(xf))
+    placed = place_shape(shape, xf)
+    with span('make_compound', shapes=len(placed)):
+        return atlas_occ.make_compound(placed)
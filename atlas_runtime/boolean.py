@@ -0,0 +1,241 @@
+"""
+Many-operand boolean operations.
+
+fuse_many / cut_many replace a left fold over bool_fuse / bool_cut, whose
+cost grows with the complexity of the accumulated shape. Operands are first
+split into clusters of overlapping bounding boxes: disjoint clusters never
+interact, so they are only combined into a compound. Inside a cluster the
+operands are reduced pairwise in a balanced tree whose independent pairs
+run on a thread pool (the boolean bindings release the GIL). When the
+loaded atlas_occ exports a multi-argument boolean (see _NATIVE) a cluster
+costs a single call instead.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+from . import _atlas_occ_lazy as atlas_occ, TopoDS_Shape
+from .asm_utils import resolve_threads
+from .fingerprint import bounds_of, shape_geometry
+from .tracing import span
+
+# Native bindings picked up when the loaded atlas_occ provides them
+_NATIVE = {
+    'fuse': 'bool_fuse_many',  # list[shape] -> shape
+    'cut': 'bool_cut_many',  # shape, list[shape] -> shape
+    'bounds': 'shape_bounds',  # shape -> (xmin, ymin, zmin, xmax, ymax, zmax)
+}
+
+# Mesh-derived boxes sit inside curved surfaces by up to the mesh
+# deflection; pad them by this fraction of their size
+_MESH_PAD = 0.01
+_TOL = 1e-6
+_BLOCK = 512  # rows per block of the pairwise overlap test
+
+
+def _native(op: str) -> Any:
+    return getattr(atlas_occ, _NATIVE[op], None)
+
+
+def _pool(threads: Optional[int]) -> Optional[ThreadPoolExecutor]:
+    n = resolve_threads(threads)
+    return ThreadPoolExecutor(n, thread_name_prefix='atlas-bool') \
+        if n > 1 else None
+
+
+def _map(pool: Optional[ThreadPoolExecutor], fn: Callable,
+         items: Sequence) -> list:
+    if pool is None or len(items) < 2:
+        return [fn(x) for x in items]
+    return list(pool.map(fn, items))
+
+
+def shape_bounds(shape: TopoDS_Shape) -> np.ndarray:
+    """
+    Axis-aligned bounds (xmin, ymin, zmin, xmax, ymax, zmax), from the
+    cheapest source available: the native binding, the exact box of a
+    batch-built primitive (fingerprint.bounds_of), else the padded bounds
+    of the shape's cached mesh. Placed copies reuse their source's box or
+    mesh, so each source is meshed at most once; the wrapper has no
+    coarser mesher, and the tessellation reuses that mesh anyway.
+    """
+    native = _native('bounds')
+    if native is not None:
+        return np.asarray(native(shape), dtype=np.float64).reshape(6)
+    known = bounds_of(shape)
+    if known is not None:
+        return known
+    return _padded(shape_geometry(shape).bounds)
+
+
+def _padded(bounds: np.ndarray) -> np.ndarray:
+    if np.isnan(bounds).any():
+        return bounds
+    lo, hi = bounds[:3], bounds[3:]
+    pad = (hi - lo).max() * _MESH_PAD + _TOL
+    return np.concatenate([lo - pad, hi + pad])
+
+
+def _bounds(shapes: Sequence[TopoDS_Shape],
+            pool: Optional[ThreadPoolExecutor]) -> np.ndarray:
+    return np.asarray(_map(pool, shape_bounds, shapes),
+                      dtype=np.float64).reshape(-1, 6)
+
+
+def overlap_groups(bounds: Any, tol: float = _TOL) -> list[np.ndarray]:
+    """
+    Indices of an (N, 6) bounds array grouped into connected clusters of
+    overlapping (or touching, within tol) boxes, in order of first member.
+    Boxes with NaN bounds (empty shapes) form their own groups.
+    """
+    b = np.asarray(bounds, dtype=np.float64).reshape(-1, 6)
+    n = len(b)
+    lo, hi = b[:, :3] - tol, b[:, 3:] + tol
+
+    pairs_i, pairs_j = [], []
+    for s in range(0, n, _BLOCK):
+        e = min(s + _BLOCK, n)
+        hit = np.all((lo[s:e, None] <= hi[None]) &
+                     (lo[None] <= hi[s:e, None]), axis=2)
+        i, j = np.nonzero(hit)
+        i += s
+        keep = i < j
+        pairs_i.append(i[keep])
+        pairs_j.append(j[keep])
+    i = np.concatenate(pairs_i) if pairs_i else np.zeros(0, np.int64)
+    j = np.concatenate(pairs_j) if pairs_j else np.zeros(0, np.int64)
+
+    # Min-label propagation with pointer jumping: every label converges
+    # to the smallest index of its component
+    label = np.arange(n)
+    while len(i):
+        m = np.minimum(label[i], label[j])
+        new = label.copy()
+        np.minimum.at(new, i, m)
+        np.minimum.at(new, j, m)
+        new = new[new]
+        if np.array_equal(new, label):
+            break
+        label = new
+
+    order = np.argsort(label, kind='stable')
+    cuts = np.flatnonzero(np.diff(label[order])) + 1
+    return sorted(np.split(order, cuts), key=lambda g: int(g[0]))
+
+
+def _spatial_order(bounds: np.ndarray) -> np.ndarray:
+    """ Sort along the longest axis so tree neighbours are near in space. """
+    centre = (bounds[:, :3] + bounds[:, 3:]) / 2
+    axis = int(np.argmax(np.ptp(np.nan_to_num(centre), axis=0)))
+    return np.argsort(centre[:, axis], kind='stable')
+
+
+def _reduce_balanced(groups: list[list[TopoDS_Shape]], op: Callable,
+                     pool: Optional[ThreadPoolExecutor]
+                     ) -> list[TopoDS_Shape]:
+    """
+    Pairwise reduction of every group at once, level by level, so pairs
+    from all groups share the pool. Returns one shape per group.
+    """
+    groups = [list(g) for g in groups]
+    while any(len(g) > 1 for g in groups):
+        pairs, slots = [], []
+        for gi, g in enumerate(groups):
+            for k in range(0, len(g) - 1, 2):
+                pairs.append((g[k], g[k + 1]))
+                slots.append(gi)
+        merged = _map(pool, lambda ab: op(*ab), pairs)
+        nxt: list[list[TopoDS_Shape]] = [[] for _ in groups]
+        for gi, shape in zip(slots, merged):
+            nxt[gi].append(shape)
+        for gi, g in enumerate(groups):
+            if len(g) % 2:
+                nxt[gi].append(g[-1])
+        groups = nxt
+    return [g[0] for g in groups]
+
+
+def _fuse_clusters(shapes: Sequence[TopoDS_Shape], bounds: np.ndarray,
+                   pool: Optional[ThreadPoolExecutor]
+                   ) -> list[TopoDS_Shape]:
+    groups = []
+    for idx in overlap_groups(bounds):
+        idx = idx[_spatial_order(bounds[idx])]
+        groups.append([shapes[i] for i in idx])
+
+    native = _native('fuse')
+    with span('fuse_clusters', operands=len(shapes), groups=len(groups),
+              native=native is not None):
+        if native is not None:
+            return _map(pool, lambda g: g[0] if len(g) == 1
+                        else native(list(g)), groups)
+        return _reduce_balanced(groups, atlas_occ.bool_fuse, pool)
+
+
+def fuse_many(shapes: Sequence[TopoDS_Shape],
+              threads: Optional[int] = 0) -> TopoDS_Shape:
+    """
+    Union of all `shapes`. Disjoint clusters are returned as a compound of
+    their fused solids, which is what bool_fuse yields for them anyway.
+    threads: 0 = one per CPU, 1 = serial, n = n threads.
+    """
+    shapes = list(shapes)
+    if not shapes:
+        raise ValueError('fuse_many requires at least one shape')
+    if len(shapes) == 1:
+        return shapes[0]
+
+    pool = _pool(threads)
+    try:
+        with span('fuse_many', operands=len(shapes)):
+            with span('bounds', shapes=len(shapes)):
+                bounds = _bounds(shapes, pool)
+            parts = _fuse_clusters(shapes, bounds, pool)
+            if len(parts) == 1:
+                return parts[0]
+            return atlas_occ.make_compound(parts)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def cut_many(base: TopoDS_Shape, tools: Sequence[TopoDS_Shape],
+             threads: Optional[int] = 0) -> TopoDS_Shape:
+    """
+    `base` minus every tool. Tools whose bounds miss the base's are
+    dropped (both from shape_bounds, computed together); the rest are
+    fused into disjoint clusters (see fuse_many) and removed in a single
+    cut.
+    """
+    tools = list(tools)
+    if not tools:
+        return base
+
+    pool = _pool(threads)
+    try:
+        with span('cut_many', tools=len(tools)) as sp:
+            with span('bounds', shapes=len(tools) + 1):
+                bounds = _bounds([base] + tools, pool)
+            box, bounds = bounds[0], bounds[1:]
+            # NaN boxes (empty shapes) compare False: nothing is kept
+            hit = np.flatnonzero(np.all(
+                (bounds[:, :3] - _TOL <= box[3:]) &
+                (box[:3] <= bounds[:, 3:] + _TOL), axis=1))
+            sp['kept'] = len(hit)
+            if not len(hit):
+                return base
+            kept = [tools[i] for i in hit]
+
+            native = _native('cut')
+            if native is not None:
+                return native(base, kept)
+            parts = _fuse_clusters(kept, bounds[hit], pool)
+            tool = parts[0] if len(parts) == 1 else \
+                atlas_occ.make_compound(parts)
+            with span('bool_cut'):
+                return atlas_occ.bool_cut(base, tool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,101 @@
+"""
+Minimal AutoCAD R12 (AC1009) ASCII DXF writer for drawing exports.
+
+    w = DxfWriter()
+    w.layer('HIDDEN', color=8, linetype='HIDDEN')
+    w.lines('VISIBLE', segments)  # (N, 2, 2)
+    w.polyline('SECTION_10', xy, closed=True)
+    w.save('drawing.dxf')
+
+Layers used without being declared get colour 7 and a continuous line.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+# name -> (description, dash pattern in drawing units; negative = gap)
+LINETYPES = {
+    'CONTINUOUS': ('Solid line', ()),
+    'HIDDEN': ('__ __ __ __', (6.35, -3.175)),
+    'CENTER': ('____ _ ____ _', (31.75, -6.35, 6.35, -6.35)),
+}
+
+
+def fmt(x: float) -> str:
+    return f'{x:.6f}'.rstrip('0').rstrip('.') or '0'
+
+
+def _pairs(pairs: list[tuple[int, object]]) -> str:
+    return ''.join(f'{code}\n{value}\n' for code, value in pairs)
+
+
+class DxfWriter:
+    def __init__(self) -> None:
+        self._layers: dict[str, tuple[int, str]] = {'0': (7, 'CONTINUOUS')}
+        self._entities: list[str] = []
+
+    def layer(self, name: str, color: int = 7,
+              linetype: str = 'CONTINUOUS') -> str:
+        if linetype not in LINETYPES:
+            raise ValueError(f'Unknown linetype {linetype!r}')
+        self._layers[name] = (int(color), linetype)
+        return name
+
+    def _use(self, name: str) -> None:
+        self._layers.setdefault(name, (7, 'CONTINUOUS'))
+
+    def polyline(self, layer: str, xy: np.ndarray,
+                 closed: bool = False) -> None:
+        self._use(layer)
+        out = [_pairs([(0, 'POLYLINE'), (8, layer), (66, 1), (10, 0),
+                       (20, 0), (30, 0), (70, 1 if closed else 0)])]
+        out += [f'0\nVERTEX\n8\n{layer}\n10\n{fmt(x)}\n20\n{fmt(y)}\n30\n0\n'
+                for x, y in np.asarray(xy, dtype=np.float64).tolist()]
+        out.append(_pairs([(0, 'SEQEND'), (8, layer)]))
+        self._entities.append(''.join(out))
+
+    def lines(self, layer: str, segments: np.ndarray) -> None:
+        """ One LINE per (2, 2) segment. """
+        self._use(layer)
+        segs = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+        self._entities.append(''.join(
+            f'0\nLINE\n8\n{layer}\n10\n{fmt(x0)}\n20\n{fmt(y0)}\n30\n0\n'
+            f'11\n{fmt(x1)}\n21\n{fmt(y1)}\n31\n0\n'
+            for x0, y0, x1, y1 in segs.tolist()))
+
+    def text(self, layer: str, x: float, y: float, height: float,
+             value: str) -> None:
+        self._use(layer)
+        self._entities.append(_pairs(
+            [(0, 'TEXT'), (8, layer), (10, fmt(x)), (20, fmt(y)), (30, 0),
+             (40, fmt(height)), (1, value)]))
+
+    def tostring(self) -> str:
+        ltypes = []
+        for name, (desc, dashes) in LINETYPES.items():
+            ltypes += [(0, 'LTYPE'), (2, name), (70, 0), (3, desc),
+                       (72, 65), (73, len(dashes)),
+                       (40, fmt(sum(abs(d) for d in dashes)))]
+            ltypes += [(49, fmt(d)) for d in dashes]
+        layers = []
+        for name, (color, ltype) in self._layers.items():
+            layers += [(0, 'LAYER'), (2, name), (70, 0), (62, color),
+                       (6, ltype)]
+        head = _pairs(
+            [(0, 'SECTION'), (2, 'HEADER'), (9, '$ACADVER'), (1, 'AC1009'),
+             (9, '$INSUNITS'), (70, 4), (0, 'ENDSEC'),
+             (0, 'SECTION'), (2, 'TABLES'),
+             (0, 'TABLE'), (2, 'LTYPE'), (70, len(LINETYPES))] + ltypes +
+            [(0, 'ENDTAB'),
+             (0, 'TABLE'), (2, 'LAYER'), (70, len(self._layers))] + layers +
+            [(0, 'ENDTAB'), (0, 'ENDSEC'),
+             (0, 'SECTION'), (2, 'ENTITIES')])
+        return head + ''.join(self._entities) + \
+            _pairs([(0, 'ENDSEC'), (0, 'EOF')])
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.write_text(self.tostring(), encoding='ascii')
+        return path
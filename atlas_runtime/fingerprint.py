@@ -0,0 +1,467 @@
+"""
+Translation-invariant geometric fingerprints.
+
+Two shapes with the same fingerprint key are the same geometry up to a
+translation (the difference of their `origin`s), so one can stand in for
+the other with the offset folded into the instance transform.
+
+Meshes are fetched once per shape: shape_geometry() keeps the mesh of
+each shape object (translated to its bounding box minimum) in a byte
+budgeted LRU, and the fingerprint is derived from it on first use. The
+budget estimate, dedupe, tessellation, drawings, edges, mass properties
+and the similarity index all read it, so a part is triangulated once per
+run however many of them look at it:
+
+    geom = shape_geometry(shape)
+    geom.local, geom.origin, geom.fingerprint.key
+"""
+from __future__ import annotations
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from functools import cached_property
+from typing import Optional
+
+import numpy as np
+
+from . import _atlas_occ_lazy as atlas_occ, TopoDS_Shape
+
+# Vertex coordinates are compared on this grid (model units)
+QUANTUM = 1e-6
+
+_HASH_MUL = np.uint64(0x9E3779B97F4A7C15)
+
+DEFAULT_GEOMETRY_MB = 256
+
+
+@dataclass(frozen=True)
+class ShapeFingerprint:
+    key: str  # hex digest, equal for translated copies
+    origin: tuple[float, float, float]  # bbox min in shape coordinates
+    size: tuple[float, float, float]  # bbox extents
+    triangles: int
+    volume: Optional[float] = None  # None if the wrapper lacks shape_volume
+    # Mesh vertices, edges and shells (connected components) after welding
+    topology: tuple[int, int, int] = (0, 0, 0)
+
+
+def _canonical_triangles(q: np.ndarray) -> np.ndarray:
+    """
+    (T, 3, 3) integer triangles in a canonical order: each triangle is
+    rotated (keeping its winding) to start at its smallest vertex, then
+    rows are sorted lexicographically.
+    """
+    # Lexicographic rank of the three vertices within each triangle
+    v = q.reshape(-1, 3)
+    rank = np.lexsort(v.T[::-1])
+    pos = np.empty(len(v), dtype=np.int64)
+    pos[rank] = np.arange(len(v))
+    start = np.argmin(pos.reshape(-1, 3), axis=1)
+    roll = (start[:, None] + np.arange(3)[None, :]) % 3
+    q = np.take_along_axis(q, roll[:, :, None], axis=1)
+
+    flat = q.reshape(len(q), 9)
+    return flat[np.lexsort(flat.T[::-1])]
+
+
+def _mesh_topology(q: np.ndarray) -> tuple[int, int, int]:
+    """
+    (vertices, edges, shells) of (T, 3, 3) integer triangles: shared
+    corners are welded, shells are the connected components.
+    """
+    ids, verts = weld_points(q.reshape(-1, 3).astype(np.float64))
+    tri = ids.reshape(-1, 3)
+    a = tri.ravel()
+    b = tri[:, [1, 2, 0]].ravel()
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    edges = np.unique(lo * len(verts) + hi)
+    i, j = edges // len(verts), edges % len(verts)
+
+    # Min-label propagation with pointer jumping, as boolean.overlap_groups
+    label = np.arange(len(verts))
+    while True:
+        m = np.minimum(label[i], label[j])
+        new = label.copy()
+        np.minimum.at(new, i, m)
+        np.minimum.at(new, j, m)
+        new = new[new]
+        if np.array_equal(new, label):
+            break
+        label = new
+    shells = int(np.count_nonzero(label == np.arange(len(verts))))
+    return len(verts), len(edges), shells
+
+
+def weld_points(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exact welding of (N, K) float64 rows: returns the id of every row and
+    the distinct rows. Rows are joined through a 64-bit hash of their bits,
+    verified exactly (a collision falls back to a byte-wise unique).
+    """
+    rows = np.ascontiguousarray(rows, dtype=np.float64) + 0.0  # -0.0 -> 0.0
+    bits = rows.view(np.uint64)
+    h = np.zeros(len(rows), dtype=np.uint64)
+    for k in range(rows.shape[1]):
+        h = (h ^ bits[:, k]) * _HASH_MUL
+        h ^= h >> np.uint64(29)
+    _, first, inverse = np.unique(h, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    if not np.array_equal(rows[first][inverse], rows):
+        keys = rows.view(np.dtype((np.void, 8 * rows.shape[1]))).ravel()
+        _, first, inverse = np.unique(keys, return_index=True,
+                                      return_inverse=True)
+        inverse = inverse.reshape(-1)
+    return inverse, rows[first]
+
+
+def triangulate(shape: TopoDS_Shape) -> list[list[float]]:
+    """
+    get_triangles of `shape`, run on a copy with its own faces.
+
+    get_triangles stores the triangulation on the faces it meshes, which
+    placed copies (xform_move) and compounds share with their original.
+    xform_copy bakes a new TShape, so concurrent meshings of related
+    shapes never write the same faces and need no lock.
+    """
+    return atlas_occ.get_triangles(atlas_occ.xform_copy(shape))
+
+# id(shape) -> (shape, (T, 3, 3) mesh) for shapes meshed ahead of time
+_premeshed: dict[int, tuple[TopoDS_Shape, np.ndarray]] = {}
+
+
+def register_mesh(shape: TopoDS_Shape, tris: np.ndarray) -> None:
+    """
+    Use `tris` as the mesh of `shape` from now on (e.g. loaded from a
+    persistent cache). The shape is kept alive by the registry.
+    """
+    _premeshed[id(shape)] = (shape, np.asarray(tris).reshape(-1, 3, 3))
+    geometry.discard(shape)
+
+
+# id(copy) -> (copy, source, offset) for shapes placed by translation
+PLACEMENTS_KEPT = 65536
+_placements: OrderedDict[int, tuple[TopoDS_Shape, TopoDS_Shape,
+                                    np.ndarray]] = OrderedDict()
+_placements_lock = threading.Lock()
+
+
+def register_placement(copy: TopoDS_Shape, source: TopoDS_Shape,
+                       offset: np.ndarray) -> None:
+    """
+    Record that `copy` is `source` moved by `offset`, so its geometry can
+    be derived from the source's instead of meshing the copy. The most
+    recent PLACEMENTS_KEPT placements are kept (with their shapes).
+    """
+    offset = np.asarray(offset, dtype=np.float64).reshape(3)
+    root = placement_of(source)
+    if root is not None:
+        source, offset = root[0], root[1] + offset
+    with _placements_lock:
+        _placements[id(copy)] = (copy, source, offset)
+        _placements.move_to_end(id(copy))
+        while len(_placements) > PLACEMENTS_KEPT:
+            _placements.popitem(last=False)
+
+
+def placement_of(shape: TopoDS_Shape
+                 ) -> Optional[tuple[TopoDS_Shape, np.ndarray]]:
+    """ (source, offset) if `shape` was placed through register_placement. """
+    with _placements_lock:
+        hit = _placements.get(id(shape))
+    if hit is None or hit[0] is not shape:
+        return None
+    return hit[1], hit[2]
+
+
+# id(shape) -> (shape, (6,) bounds) for shapes built with known extents
+_extents: OrderedDict[int, tuple[TopoDS_Shape, np.ndarray]] = OrderedDict()
+
+
+def register_bounds(shape: TopoDS_Shape, bounds: np.ndarray) -> None:
+    """
+    Record the exact (xmin, ymin, zmin, xmax, ymax, zmax) of `shape`, e.g.
+    a primitive built from its dimensions, so its box needs no mesh. Kept
+    like placements (the most recent PLACEMENTS_KEPT).
+    """
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(6)
+    with _placements_lock:
+        _extents[id(shape)] = (shape, bounds)
+        _extents.move_to_end(id(shape))
+        while len(_extents) > PLACEMENTS_KEPT:
+            _extents.popitem(last=False)
+
+
+def bounds_of(shape: TopoDS_Shape) -> Optional[np.ndarray]:
+    """
+    Registered bounds of `shape`, or of the source it was placed from
+    moved by the placement offset. None if neither was registered.
+    """
+    placed = placement_of(shape)
+    source, offset = placed if placed is not None else (shape, np.zeros(3))
+    with _placements_lock:
+        hit = _extents.get(id(source))
+    if hit is None or hit[0] is not source:
+        return None
+    return hit[1] + np.tile(offset, 2)
+
+
+def _registered(shape: TopoDS_Shape) -> bool:
+    """ Whether `shape` (or its placement source) is a registered mesh. """
+    placed = placement_of(shape)
+    if placed is not None:
+        shape = placed[0]
+    hit = _premeshed.get(id(shape))
+    return hit is not None and hit[0] is shape
+
+
+def same_solid(a: TopoDS_Shape, b: TopoDS_Shape,
+               rel_tol: float = 1e-7) -> bool:
+    """
+    Whether the B-reps of `a` and `b` have the same volume and area (as
+    far as the wrapper exports shape_volume/shape_area), confirming a
+    fingerprint match made on their meshes, which cannot see differences
+    below the mesh resolution. Registered meshes are their own geometry
+    and always agree; False when the B-reps cannot be measured.
+    """
+    reg_a, reg_b = _registered(a), _registered(b)
+    if reg_a or reg_b:
+        return reg_a and reg_b
+    measures = [fn for fn in (getattr(atlas_occ, 'shape_volume', None),
+                              getattr(atlas_occ, 'shape_area', None))
+                if fn is not None]
+    return bool(measures) and all(
+        math.isclose(float(fn(a)), float(fn(b)), rel_tol=rel_tol,
+                     abs_tol=1e-12) for fn in measures)
+
+
+def shape_mesh(shape: TopoDS_Shape) -> np.ndarray:
+    """ (T, 3, 3) float64 triangles of `shape`. """
+    hit = _premeshed.get(id(shape))
+    if hit is not None and hit[0] is shape:
+        return hit[1].astype(np.float64, copy=False)
+    tris = triangulate(shape)
+    return np.asarray(tris, dtype=np.float64).reshape(-1, 3, 3)
+
+
+@dataclass(frozen=True, eq=False)
+class ShapeGeometry:
+    """ Mesh of one shape, translated to its bounding box minimum. """
+    local: np.ndarray  # (T, 3, 3) float64, read-only, bbox minimum at 0
+    origin: np.ndarray  # (3,) bbox minimum in shape coordinates
+    volume: Optional[float] = None
+
+    @property
+    def triangles(self) -> int:
+        return len(self.local)
+
+    @property
+    def size(self) -> np.ndarray:
+        if not len(self.local):
+            return np.zeros(3)
+        return self.local.reshape(-1, 3).max(axis=0)
+
+    @property
+    def mesh(self) -> np.ndarray:
+        """ (T, 3, 3) float64 triangles in shape coordinates (a copy). """
+        return self.local + self.origin
+
+    @property
+    def nbytes(self) -> int:
+        return self.local.nbytes
+
+    @property
+    def bounds(self) -> np.ndarray:
+        """ (xmin, ymin, zmin, xmax, ymax, zmax), NaN without a mesh. """
+        if not len(self.local):
+            return np.full(6, np.nan)
+        return np.concatenate([self.origin, self.origin + self.size])
+
+    @property
+    def size_class(self) -> tuple[int, int, int, int]:
+        """
+        Triangle count and snapped extents: shapes with equal fingerprints
+        share it, so dedupe only fingerprints classes with several members.
+        """
+        snapped = np.round(self.size / QUANTUM).astype(np.int64)
+        return (self.triangles, *map(int, snapped))
+
+    @cached_property
+    def fingerprint(self) -> Optional[ShapeFingerprint]:
+        if not len(self.local):
+            return None
+        return _local_fingerprint(self.local, self.origin, self.volume)
+
+    def moved(self, offset: np.ndarray) -> ShapeGeometry:
+        """ The same mesh translated by `offset` (shares `local`). """
+        out = ShapeGeometry(self.local, self.origin + offset, self.volume)
+        fp = self.__dict__.get('fingerprint')
+        if fp is not None:
+            out.__dict__['fingerprint'] = replace(
+                fp, origin=tuple(map(float, out.origin)))
+        return out
+
+
+def _geometry(shape: TopoDS_Shape) -> ShapeGeometry:
+    placed = placement_of(shape)
+    if placed is not None:
+        return geometry.get(placed[0]).moved(placed[1])
+    tris = shape_mesh(shape)
+    volume = None
+    if id(shape) not in _premeshed:  # registered meshes stand alone
+        volume_fn = getattr(atlas_occ, 'shape_volume', None)
+        if volume_fn is not None:
+            volume = float(volume_fn(shape))
+    if not len(tris):
+        return ShapeGeometry(np.empty((0, 3, 3)), np.zeros(3), volume)
+    lo = tris.reshape(-1, 3).min(axis=0)
+    local = tris - lo
+    local.flags.writeable = False
+    return ShapeGeometry(local, lo, volume)
+
+
+class GeometryCache:
+    """
+    Thread-safe LRU of ShapeGeometry by shape object, bounded by mesh
+    bytes. Entries hold their shape so its id stays valid; concurrent
+    requests for one shape wait for a single meshing.
+    """
+
+    def __init__(self, budget_bytes: int) -> None:
+        self.budget_bytes = int(budget_bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, tuple[TopoDS_Shape,
+                                              ShapeGeometry]] = OrderedDict()
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, shape: TopoDS_Shape) -> Optional[ShapeGeometry]:
+        """ The cached geometry of `shape`, without meshing it. """
+        with self._lock:
+            hit = self._entries.get(id(shape))
+            return hit[1] if hit is not None and hit[0] is shape else None
+
+    def get(self, shape: TopoDS_Shape) -> ShapeGeometry:
+        key = id(shape)
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[0] is shape:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return hit[1]
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                self.misses += 1
+                pending = self._pending[key] = Future()
+        if not owner:
+            return pending.result()
+
+        try:
+            geom = _geometry(shape)
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        self._put(shape, geom)
+        pending.set_result(geom)
+        return geom
+
+    def _put(self, shape: TopoDS_Shape, geom: ShapeGeometry) -> None:
+        if geom.nbytes > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(id(shape), None)
+            if old is not None:
+                self.bytes -= old[1].nbytes
+            self._entries[id(shape)] = (shape, geom)
+            self.bytes += geom.nbytes
+            self._enforce()
+
+    def _enforce(self) -> None:
+        while self.bytes > self.budget_bytes and self._entries:
+            _key, (_shape, geom) = self._entries.popitem(last=False)
+            self.bytes -= geom.nbytes
+
+    def discard(self, shape: TopoDS_Shape) -> None:
+        with self._lock:
+            hit = self._entries.get(id(shape))
+            if hit is not None and hit[0] is shape:
+                del self._entries[id(shape)]
+                self.bytes -= hit[1].nbytes
+
+    def set_budget(self, budget_bytes: int) -> None:
+        with self._lock:
+            self.budget_bytes = int(budget_bytes)
+            self._enforce()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+
+geometry = GeometryCache(DEFAULT_GEOMETRY_MB * 1024 ** 2)
+
+
+def configure(budget_mb: float) -> None:
+    """ Set the geometry cache budget (0 keeps nothing between calls). """
+    geometry.set_budget(int(max(0.0, budget_mb) * 1024 ** 2))
+
+
+def shape_geometry(shape: TopoDS_Shape) -> ShapeGeometry:
+    """ Cached mesh (and fingerprint) of `shape`, see GeometryCache. """
+    return geometry.get(shape)
+
+
+def shape_fingerprint(shape: TopoDS_Shape,
+                      quantum: float = QUANTUM
+                      ) -> Optional[ShapeFingerprint]:
+    """
+    Fingerprint from the shape's mesh (translated to its bbox minimum and
+    snapped to `quantum`) and, when available, its volume. Returns None
+    for shapes without a mesh (wires, empty compounds).
+    """
+    geom = shape_geometry(shape)
+    if quantum == QUANTUM:
+        return geom.fingerprint
+    if not geom.triangles:
+        return None
+    return _local_fingerprint(geom.local, geom.origin, geom.volume, quantum)
+
+
+def mesh_fingerprint(tris: np.ndarray, volume: Optional[float] = None,
+                     quantum: float = QUANTUM) -> ShapeFingerprint:
+    """ shape_fingerprint for an already fetched (T, 3, 3) mesh. """
+    lo = tris.reshape(-1, 3).min(axis=0)
+    return _local_fingerprint(tris - lo, lo, volume, quantum)
+
+
+def _local_fingerprint(local: np.ndarray, lo: np.ndarray,
+                       volume: Optional[float] = None,
+                       quantum: float = QUANTUM) -> ShapeFingerprint:
+    hi = local.reshape(-1, 3).max(axis=0)
+    q = np.round(local / quantum).astype(np.int64)
+
+    topology = _mesh_topology(q)
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.round(hi / quantum).astype(np.int64).tobytes())
+    h.update(np.asarray(topology, dtype=np.int64).tobytes())
+    h.update(_canonical_triangles(q).tobytes())
+    if volume is not None:
+        h.update(f'{volume:.6g}'.encode())
+    return ShapeFingerprint(key=h.hexdigest(),
+                            origin=tuple(map(float, lo)),
+                            size=tuple(map(float, hi)),
+                            triangles=len(local), volume=volume,
+                            topology=topology)
@@ -0,0 +1,216 @@
+"""
+Mass properties of parts and assemblies.
+
+Part properties come from the closed mesh (divergence theorem), with the
+volume taken from shape_volume when the wrapper provides it. They are
+computed once per geometric fingerprint (in a cache of their own, kept
+whether or not memoization is on), so translated copies and deduplicated
+parts share the work; the mesh and fingerprint of each shape come from the
+shared geometry cache. Assembly totals are one NumPy pass over the
+flattened instances.
+
+Lengths are model units (mm); densities are kg/m³ and masses kg.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from . import AtlasPart, AtlasAssembly
+from .asm_utils import walk_instances
+from .fingerprint import shape_geometry
+from .memo import MemoCache, MISS
+from .tracing import span
+
+# kg/m³ by lower-case material name; part.props['density'] overrides
+MATERIAL_DENSITY = {
+    'steel': 7850.0,
+    'stainless': 8000.0,
+    'aluminium': 2700.0,
+    'aluminum': 2700.0,
+    'brass': 8500.0,
+    'copper': 8960.0,
+    'titanium': 4500.0,
+    'abs': 1050.0,
+    'pla': 1240.0,
+    'nylon': 1150.0,
+    'wood': 600.0,
+}
+
+_MM3_TO_M3 = 1e-9
+
+# Unit-density properties by fingerprint key (a few hundred bytes each)
+_cache = MemoCache(16 * 1024 ** 2)
+
+
+@dataclass(frozen=True)
+class _Geometry:
+    """ Unit-density properties relative to the fingerprint origin. """
+    volume: float
+    area: float
+    lo: np.ndarray
+    hi: np.ndarray
+    centroid: np.ndarray
+    inertia: np.ndarray  # (3, 3) about the centroid, per unit density
+
+
+@dataclass(frozen=True)
+class MassProps:
+    volume: float  # mm³
+    area: float  # mm²
+    bbox_min: np.ndarray  # (3,)
+    bbox_max: np.ndarray  # (3,)
+    centroid: np.ndarray  # (3,)
+    inertia: np.ndarray  # (3, 3) about the centroid, kg·mm², if density
+    density: Optional[float]  # kg/m³, None if unknown
+
+    @property
+    def mass(self) -> Optional[float]:
+        if self.density is None:
+            return None
+        return self.volume * _MM3_TO_M3 * self.density
+
+
+@dataclass(frozen=True)
+class AssemblyMassProps:
+    mass: float  # kg, parts with unknown density count as 0
+    volume: float
+    area: float
+    bbox_min: np.ndarray
+    bbox_max: np.ndarray
+    centroid: np.ndarray  # centre of gravity (volume centroid if massless)
+    inertia: np.ndarray  # (3, 3) about `centroid`, kg·mm²
+    instances: int
+    unknown_density: int  # instances without a density
+
+
+def density_of(part: AtlasPart) -> Optional[float]:
+    rho = (part.props or {}).get('density')
+    if rho is None and part.material:
+        rho = MATERIAL_DENSITY.get(str(part.material).strip().lower())
+    return None if rho is None else float(rho)
+
+
+def mesh_geometry(tris: np.ndarray,
+                  volume: Optional[float] = None) -> '_Geometry':
+    """
+    Unit-density properties of a closed (T, 3, 3) mesh. With an exact
+    `volume` the mesh moments are scaled to it.
+    """
+    lo = tris.reshape(-1, 3).min(axis=0)
+    hi = tris.reshape(-1, 3).max(axis=0)
+    t = tris - lo  # well-conditioned moments
+    a, b, c = t[:, 0], t[:, 1], t[:, 2]
+
+    area = 0.5 * float(np.linalg.norm(np.cross(b - a, c - a), axis=1).sum())
+    det = np.einsum('ij,ij->i', a, np.cross(b, c))  # 6 x signed tet volume
+    v = det.sum() / 6.0
+    if abs(v) < 1e-300:
+        zero = np.zeros((3, 3))
+        return _Geometry(0.0, area, np.zeros(3), hi - lo,
+                         (hi - lo) / 2.0, zero)
+
+    s = a + b + c
+    first = (det[:, None] * s).sum(axis=0) / 24.0  # ∫x dV
+    second = np.einsum('t,tij->ij', det / 120.0,
+                       np.einsum('ti,tj->tij', a, a) +
+                       np.einsum('ti,tj->tij', b, b) +
+                       np.einsum('ti,tj->tij', c, c) +
+                       np.einsum('ti,tj->tij', s, s))  # ∫x xᵀ dV
+    if v < 0:  # inward-facing mesh
+        v, first, second = -v, -first, -second
+    if volume is not None and volume > 0:
+        k = volume / v
+        v, first, second = volume, first * k, second * k
+
+    g = first / v
+    cov = second - v * np.outer(g, g)
+    inertia = np.trace(cov) * np.eye(3) - cov
+    return _Geometry(float(v), area, np.zeros(3), hi - lo, g, inertia)
+
+
+def part_mass_props(part: AtlasPart) -> Optional[MassProps]:
+    """ Mass properties of `part` (None for shapeless/meshless parts). """
+    if part.shape is None:
+        return None
+    geom = shape_geometry(part.shape)
+    fp = geom.fingerprint
+    if fp is None:
+        return None
+
+    geo = _cache.get(fp.key)
+    if geo is MISS:
+        with span('mass_props', triangles=geom.triangles):
+            geo = mesh_geometry(geom.local, geom.volume)
+        _cache.put(fp.key, geo)
+
+    origin = np.asarray(fp.origin)
+    rho = density_of(part)
+    scale = rho * _MM3_TO_M3 if rho is not None else 1.0
+    return MassProps(volume=geo.volume, area=geo.area,
+                     bbox_min=geo.lo + origin, bbox_max=geo.hi + origin,
+                     centroid=geo.centroid + origin,
+                     inertia=geo.inertia * scale, density=rho)
+
+
+def assembly_mass_props(asm: AtlasAssembly) -> Optional[AssemblyMassProps]:
+    """
+    Totals over every placed instance (quantities included). Instance
+    transforms other than (dx, dy, dz) offsets are treated as identity.
+    Returns None if no instance has a mesh.
+    """
+    index: dict[int, int] = {}
+    props: list[MassProps] = []
+    rows: list[int] = []
+    qty: list[int] = []
+    offsets: list[tuple[float, float, float]] = []
+    for node, q, xf in walk_instances(asm.root):
+        part = node.ref
+        if getattr(part, 'shape', None) is None:
+            continue
+        i = index.get(id(part))
+        if i is None:
+            mp = part.mass_props
+            i = index[id(part)] = len(props) if mp is not None else -1
+            if mp is not None:
+                props.append(mp)
+        if i < 0:
+            continue
+        rows.append(i)
+        qty.append(int(q))
+        offsets.append(tuple(map(float, xf))
+                       if isinstance(xf, (tuple, list)) and len(xf) == 3
+                       else (0.0, 0.0, 0.0))
+    if not rows:
+        return None
+
+    with span('assembly_mass_props', instances=len(rows), parts=len(props)):
+        idx = np.asarray(rows)
+        n = np.asarray(qty, dtype=np.float64)
+        off = np.asarray(offsets, dtype=np.float64)
+        vol = np.array([p.volume for p in props])[idx] * n
+        known = np.array([p.density is not None for p in props])[idx]
+        mass = np.array([p.mass or 0.0 for p in props])[idx] * n
+        cent = np.stack([p.centroid for p in props])[idx] + off
+        lo = np.stack([p.bbox_min for p in props])[idx] + off
+        hi = np.stack([p.bbox_max for p in props])[idx] + off
+        own = np.stack([p.inertia if p.density is not None
+                        else np.zeros((3, 3)) for p in props])[idx]
+
+        total = float(mass.sum())
+        w = mass if total > 0 else vol
+        cog = (w[:, None] * cent).sum(axis=0) / max(float(w.sum()), 1e-300)
+
+        # Parallel axis theorem: I = Σ n·I_c + m·(|r|²E - r rᵀ)
+        r = cent - cog
+        shift = (np.einsum('i,ij->i', mass, r * r)[:, None, None] * np.eye(3)
+                 - mass[:, None, None] * np.einsum('ti,tj->tij', r, r))
+        inertia = (n[:, None, None] * own + shift).sum(axis=0)
+
+        return AssemblyMassProps(
+            mass=total, volume=float(vol.sum()),
+            area=float((np.array([p.area for p in props])[idx] * n).sum()),
+            bbox_min=lo.min(axis=0), bbox_max=hi.max(axis=0),
+            centroid=cog, inertia=inertia, instances=int(n.sum()),
+            unknown_density=int(n[~known].sum()))
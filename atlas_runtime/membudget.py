@@ -0,0 +1,347 @@
+"""
+Memory budget for the regeneration pipeline.
+
+A pre-pass tessellates every unique part once (into the shared geometry
+cache, which the geometry stage then places from) and multiplies by the
+instance count to estimate what the full pipeline will allocate. With a
+budget configured the run is planned against it before anything big is
+built, richest first:
+
+    full       every instance welded into one mesh
+    instanced  each unique part's mesh once, drawn per instance offset
+    bbox       one 12-triangle box per instance
+
+or refused outright when not even the boxes fit.
+
+StageMemory samples RSS (and optionally tracemalloc) while a stage runs so
+the per-stage peaks end up in the pipeline stats.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Optional
+import threading, tracemalloc
+
+import numpy as np
+import psutil
+
+from . import AtlasAssembly
+from .compact_mesh import CompactMesh, weld
+
+__all__ = ['MemoryBudgetError',
+           'MemoryEstimate',
+           'MeshGroup',
+           'StageMemory',
+           'estimate_assembly',
+           'resolve_budget',
+           'plan_run',
+           'build_instanced_lod',
+           'build_bbox_lod']
+
+# Rough resident cost per triangle of the full pipeline: the Python list of
+# 9 floats from get_triangles (~344 B), the float32 copy and np.unique
+# temporaries of the weld and the VTK connectivity.
+FULL_TRI_BYTES = 500
+# Placed shape handle + compound entry per instance.
+INSTANCE_BYTES = 256
+# Instanced LOD: per unique triangle its float32 (T, 9) copy, the exactly
+# welded mesh and its VTK cells; per instance an offset and the glyph
+# mapper's instance matrix and colour.
+UNIQUE_TRI_BYTES = 200
+INSTANCED_BYTES = 128
+# Bounding-box LOD: 12 float32 triangles per instance, welded + VTK ids.
+LOD_INSTANCE_BYTES = 1024
+
+# 12 triangles of the unit cube; each vertex coordinate selects lo (0) or hi (1)
+_BOX_TRIS = np.array([
+    [0, 0, 0, 1, 1, 0, 1, 0, 0], [0, 0, 0, 0, 1, 0, 1, 1, 0],
+    [0, 0, 1, 1, 0, 1, 1, 1, 1], [0, 0, 1, 1, 1, 1, 0, 1, 1],
+    [0, 0, 0, 1, 0, 0, 1, 0, 1], [0, 0, 0, 1, 0, 1, 0, 0, 1],
+    [1, 0, 0, 1, 1, 0, 1, 1, 1], [1, 0, 0, 1, 1, 1, 1, 0, 1],
+    [1, 1, 0, 0, 1, 0, 0, 1, 1], [1, 1, 0, 0, 1, 1, 1, 1, 1],
+    [0, 1, 0, 0, 0, 0, 0, 0, 1], [0, 1, 0, 0, 0, 1, 0, 1, 1],
+], dtype=np.float32)
+
+
+class MemoryBudgetError(MemoryError):
+    """ Raised when a run would exceed the memory budget. """
+
+
+@dataclass
+class MeshGroup:
+    mesh: CompactMesh  # part-local (bbox minimum at 0), welded exactly
+    offsets: np.ndarray  # (I, 3) float32 bbox minimum of each instance
+
+    @property
+    def n_triangles(self) -> int:
+        return self.mesh.n_triangles * len(self.offsets)
+
+    @property
+    def nbytes(self) -> int:
+        return self.mesh.nbytes + self.offsets.nbytes
+
+    def triangles(self) -> np.ndarray:
+        """ (n_triangles, 9) float32 placed triangles. """
+        local = self.mesh.triangles().reshape(-1, 3, 3)
+        return (local[None] + self.offsets[:, None, None, :]).reshape(-1, 9)
+
+
+@dataclass
+class MemoryEstimate:
+    instances: int = 0
+    unique_parts: int = 0
+    triangles: int = 0  # full-resolution triangles over all instances
+    unique_triangles: int = 0  # each unique part counted once
+    bytes_full: int = 0
+    bytes_instanced: int = 0
+    bytes_lod: int = 0
+    # id(shape) -> (lo, hi) bounding box of the un-placed part
+    part_bboxes: dict[int, tuple[np.ndarray, np.ndarray]] = field(
+        default_factory=dict)
+
+    @property
+    def smallest_part(self) -> float:
+        """ Largest extent of the smallest part (0.0 without parts). """
+        sizes = [float((hi - lo).max()) for lo, hi in
+                 self.part_bboxes.values()]
+        sizes = [v for v in sizes if v > 0]
+        return min(sizes) if sizes else 0.0
+
+    def as_stats(self) -> dict[str, Any]:
+        return {'est_instances': self.instances,
+                'est_unique_parts': self.unique_parts,
+                'est_tris': self.triangles,
+                'est_full_mb': self.bytes_full / (1024 ** 2),
+                'est_instanced_mb': self.bytes_instanced / (1024 ** 2),
+                'est_lod_mb': self.bytes_lod / (1024 ** 2)}
+
+
+def _offset(xf: Any) -> tuple[float, float, float]:
+    if isinstance(xf, (tuple, list)) and len(xf) == 3:
+        return float(xf[0]), float(xf[1]), float(xf[2])
+    return 0.0, 0.0, 0.0
+
+
+def estimate_assembly(asm: AtlasAssembly) -> MemoryEstimate:
+    """
+    Pre-pass: instances x triangles per unique part. Each unique shape is
+    tessellated once, so the cost scales with the number of part
+    definitions, not with the number of instances. The meshes stay in the
+    shared geometry cache: the geometry stage places them instead of
+    meshing the assembly again (see build_compound_and_triangles).
+    """
+    from .asm_utils import walk_instances
+    from .fingerprint import shape_geometry
+
+    qty_by_shape: dict[int, int] = {}
+    shapes: dict[int, Any] = {}
+    for node, qty, _xf in walk_instances(asm.root):
+        shp = getattr(node.ref, 'shape', None)
+        if shp is None:
+            continue
+        key = id(shp)
+        shapes[key] = shp
+        qty_by_shape[key] = qty_by_shape.get(key, 0) + int(qty)
+
+    est = MemoryEstimate()
+    for key, shp in shapes.items():
+        geom = shape_geometry(shp)
+        n = int(qty_by_shape[key])
+        est.instances += n
+        est.triangles += n * geom.triangles
+        est.unique_triangles += geom.triangles
+        lo = geom.origin.astype(np.float32)
+        est.part_bboxes[key] = (lo, lo + geom.size.astype(np.float32))
+
+    est.unique_parts = len(shapes)
+    est.bytes_full = (est.triangles * FULL_TRI_BYTES +
+                      est.instances * INSTANCE_BYTES)
+    est.bytes_instanced = (est.unique_triangles * UNIQUE_TRI_BYTES +
+                           est.instances * (INSTANCED_BYTES + INSTANCE_BYTES))
+    est.bytes_lod = est.instances * (LOD_INSTANCE_BYTES + INSTANCE_BYTES)
+    return est
+
+
+def resolve_budget(budget_mb: float = 0.0) -> Optional[int]:
+    """
+    Budget in bytes for one run; None (no budget) for 0, the default.
+    """
+    if budget_mb and budget_mb > 0:
+        return int(budget_mb * 1024 ** 2)
+    return None
+
+
+def plan_run(est: MemoryEstimate, budget: Optional[int],
+             policy: str = 'downgrade') -> str:
+    """
+    Decide how to run against the budget: 'full', or the richest LOD that
+    fits, 'instanced' then 'bbox'. Without a budget the run is 'full'.
+    Raises MemoryBudgetError when nothing fits or policy is 'refuse'.
+    """
+    if budget is None or est.bytes_full <= budget:
+        return 'full'
+
+    mb = 1024 ** 2
+    msg = (f'Estimated {est.bytes_full / mb:,.0f} MB for '
+           f'{est.instances:,} instances / {est.triangles:,} triangles '
+           f'exceeds the memory budget of {budget / mb:,.0f} MB')
+    if policy == 'downgrade':
+        for lod, need in (('instanced', est.bytes_instanced),
+                          ('bbox', est.bytes_lod)):
+            if need <= budget:
+                return lod
+    raise MemoryBudgetError(msg)
+
+
+def build_instanced_lod(asm: AtlasAssembly) -> list[MeshGroup]:
+    """
+    Instanced LOD: one group per unique part, its cached mesh welded once
+    in part-local coordinates plus the offsets of all its instances. The
+    viewer draws each group with GPU instancing, so the resident cost
+    follows the unique triangles, not the placed ones.
+    """
+    from .asm_utils import walk_instances
+    from .fingerprint import shape_geometry
+
+    shapes: dict[int, Any] = {}
+    offsets: dict[int, list[tuple[float, float, float]]] = {}
+    for node, qty, xf in walk_instances(asm.root):
+        shp = getattr(node.ref, 'shape', None)
+        if shp is None:
+            continue
+        shapes.setdefault(id(shp), shp)
+        offsets.setdefault(id(shp), []).extend([_offset(xf)] * int(qty))
+
+    groups: list[MeshGroup] = []
+    for key, shp in shapes.items():
+        geom = shape_geometry(shp)
+        # Exact: the viewer places instances through the glyph offsets,
+        # which an actor-level dequantization would scale as well
+        mesh = weld(geom.local.reshape(-1, 9), exact=True)
+        if mesh is None:
+            continue
+        placed = np.asarray(offsets[key], dtype=np.float64) + geom.origin
+        groups.append(MeshGroup(mesh, placed.astype(np.float32)))
+    return groups
+
+
+def build_bbox_lod(asm: AtlasAssembly, est: MemoryEstimate) -> np.ndarray:
+    """
+    Coarse LOD: one 12-triangle box per instance, built in a single
+    vectorized pass. Returns an (N, 9) float32 triangle array.
+    """
+    from .asm_utils import walk_instances
+
+    keys: dict[int, int] = {}
+    part_idx: list[int] = []
+    offsets: list[tuple[float, float, float]] = []
+    qtys: list[int] = []
+    for node, qty, xf in walk_instances(asm.root):
+        shp = getattr(node.ref, 'shape', None)
+        if shp is None:
+            continue
+        part_idx.append(keys.setdefault(id(shp), len(keys)))
+        offsets.append(_offset(xf))
+        qtys.append(int(qty))
+
+    if not part_idx:
+        return np.empty((0, 9), dtype=np.float32)
+
+    boxes = [est.part_bboxes[k] for k in keys]
+    part_lo = np.array([b[0] for b in boxes], dtype=np.float32)
+    part_hi = np.array([b[1] for b in boxes], dtype=np.float32)
+
+    reps = np.asarray(qtys, dtype=np.int64)
+    idx = np.repeat(np.asarray(part_idx, dtype=np.int64), reps)
+    off = np.repeat(np.asarray(offsets, dtype=np.float32), reps, axis=0)
+
+    lo = np.tile(part_lo[idx] + off, 3)[:, None, :]  # (N, 1, 9)
+    size = np.tile(part_hi[idx] - part_lo[idx], 3)[:, None, :]
+    return (lo + _BOX_TRIS[None, :, :] * size).reshape(-1, 9)
+
+
+class StageMemory:
+    """
+    Track peak memory per pipeline stage.
+
+        mem = StageMemory(budget)
+        with mem.stage('geometry'):
+            ...
+        stats['mem'] = mem.peaks_mb
+
+    A sampler thread polls RSS every `interval` seconds while a stage runs.
+    If tracemalloc is enabled its per-stage peak is recorded as well.
+    over_budget is set as soon as RSS growth passes the budget, so
+    chunked stages can stop at their next checkpoint.
+    """
+
+    def __init__(self, budget: Optional[int] = None,
+                 use_tracemalloc: bool = False,
+                 interval: float = 0.02) -> None:
+        self.budget = budget
+        self.interval = interval
+        self.use_tracemalloc = use_tracemalloc
+        self.peaks_mb: dict[str, float] = {}
+        self.py_peaks_mb: dict[str, float] = {}
+        self.over_budget = False
+        self._proc = psutil.Process()
+        self._base = self._proc.memory_info().rss
+        self._peak = self._base
+        self._stop = threading.Event()
+
+    def _sample(self) -> None:
+        rss = self._proc.memory_info().rss
+        if rss > self._peak:
+            self._peak = rss
+        if self.budget is not None and rss - self._base > self.budget:
+            self.over_budget = True
+
+    def _sampler(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def check(self) -> None:
+        """ Checkpoint for chunked stages; raises once over budget. """
+        self._sample()
+        if self.over_budget:
+            mb = 1024 ** 2
+            raise MemoryBudgetError(
+                f'RSS grew by {(self._peak - self._base) / mb:,.0f} MB, '
+                f'over the memory budget of {self.budget / mb:,.0f} MB')
+
+    def stage(self, name: str) -> '_Stage':
+        return _Stage(self, name)
+
+
+class _Stage:
+    def __init__(self, mem: StageMemory, name: str) -> None:
+        self.mem = mem
+        self.name = name
+        self._thread: Optional[threading.Thread] = None
+        self._started_tm = False
+
+    def __enter__(self) -> '_Stage':
+        mem = self.mem
+        mem._peak = mem._proc.memory_info().rss
+        mem._stop.clear()
+        if mem.use_tracemalloc:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tm = True
+            tracemalloc.reset_peak()
+        self._thread = threading.Thread(
+            target=mem._sampler, name=f'mem-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        mem = self.mem
+        mem._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        mem._sample()
+        mem.peaks_mb[self.name] = mem._peak / (1024 ** 2)
+        if mem.use_tracemalloc and tracemalloc.is_tracing():
+            mem.py_peaks_mb[self.name] = (
+                    tracemalloc.get_traced_memory()[1] / (1024 ** 2))
+            if self._started_tm:
+                tracemalloc.stop()
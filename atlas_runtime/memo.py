@@ -0,0 +1,283 @@
+"""
+Memoization for model-building code.
+
+    from atlas_runtime.memo import memoize, occ
+
+    @memoize
+    def flange(d: float, holes: int) -> AtlasPart: ...
+
+    plate = occ.make_box(w, h, t)  # atlas_occ call, cached by its args
+
+Results are cached in one process-wide LRU (`cache`) with a byte budget,
+keyed by (function, normalized arguments). Shapes returned by cached calls
+can be passed to other cached calls: they are keyed by the entry holding
+them, so changing one dimension recomputes only the calls downstream of
+it. Arguments that cannot be keyed (shapes built outside the cache,
+arbitrary objects) make the call run uncached.
+
+Cached results are shared between callers and must not be mutated.
+"""
+from __future__ import annotations
+import dataclasses
+import functools
+import hashlib
+import inspect
+import itertools
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+import numpy as np
+
+from . import load_occ
+from .tracing import counter
+
+DEFAULT_BUDGET_MB = 256
+SHAPE_BYTES = 64 * 1024  # flat charge per shape; BREP size is not exposed
+
+MISS = object()
+_serial = itertools.count()
+_local = threading.local()
+_enabled = os.getenv('ATLAS_MEMO', '1') != '0'
+
+
+class _Unkeyable(Exception):
+    pass
+
+
+def value_nbytes(value: Any) -> int:
+    """ Rough resident size of a cached value. """
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return 64 + sum(value_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return 64 + sum(value_nbytes(v) for v in value.values())
+    if dataclasses.is_dataclass(value):  # AtlasPart etc.
+        return 64 + sum(value_nbytes(getattr(value, f.name))
+                        for f in dataclasses.fields(value))
+    return SHAPE_BYTES
+
+
+class MemoCache:
+    """
+    Thread-safe LRU of memoized results bounded by an estimated byte size.
+    Objects held by an entry get a token (a serial number) so they can be
+    used as arguments of other memoized calls while the entry lives.
+    """
+
+    def __init__(self, budget_bytes: int) -> None:
+        self.budget_bytes = int(budget_bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int, int]] = \
+            OrderedDict()
+        self._tokens: dict[int, tuple[int, int]] = {}
+        self._serial = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def token(self, obj: Any) -> Optional[tuple[int, int]]:
+        return self._tokens.get(id(obj))
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return hit[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        nbytes = value_nbytes(value)
+        if nbytes > self.budget_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            tok = next(self._serial)
+            self._entries[key] = (value, nbytes, tok)
+            self.bytes += nbytes
+            for i, obj in enumerate(_tokenized(value)):
+                self._tokens.setdefault(id(obj), (tok, i))
+            self._enforce()
+
+    def _enforce(self) -> None:
+        while self.bytes > self.budget_bytes and self._entries:
+            _key, entry = self._entries.popitem(last=False)
+            self._forget(*entry)
+
+    def _forget(self, value: Any, nbytes: int, tok: int) -> None:
+        self.bytes -= nbytes
+        for i, obj in enumerate(_tokenized(value)):
+            if self._tokens.get(id(obj)) == (tok, i):
+                del self._tokens[id(obj)]
+
+    def set_budget(self, budget_bytes: int) -> None:
+        with self._lock:
+            self.budget_bytes = int(budget_bytes)
+            self._enforce()
+
+    def drop_module(self, module: str) -> int:
+        """ Drop entries of functions defined in `module` (or below). """
+        with self._lock:
+            gone = [k for k in self._entries
+                    if k[0] == module or k[0].startswith(module + '.')]
+            for k in gone:
+                self._forget(*self._entries.pop(k))
+            return len(gone)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens.clear()
+            self.bytes = 0
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (f'{len(self._entries)} entries, '
+                f'{self.bytes / 1024 ** 2:.1f}/'
+                f'{self.budget_bytes / 1024 ** 2:.0f} MB, '
+                f'hit rate {rate:.0%}')
+
+
+def _tokenized(value: Any) -> list[Any]:
+    """ Objects inside `value` that are keyed by identity. """
+    items = value if isinstance(value, (list, tuple)) else (value,)
+    return [v for v in items if not isinstance(
+        v, (type(None), bool, int, float, str, bytes, np.ndarray, dict))]
+
+
+cache = MemoCache(DEFAULT_BUDGET_MB * 1024 ** 2)
+
+
+def _norm(value: Any) -> Hashable:
+    if value is None or isinstance(value, (bool, int, str, bytes)):
+        return value
+    if isinstance(value, float):
+        # 0.1 + 0.2 and 0.3 should share an entry
+        return round(value, 9) + 0.0
+    if isinstance(value, np.generic):
+        return _norm(value.item())
+    if isinstance(value, (tuple, list)):
+        return type(value).__name__, tuple(_norm(v) for v in value)
+    if isinstance(value, dict):
+        return 'dict', tuple(sorted((str(k), _norm(v))
+                                    for k, v in value.items()))
+    if isinstance(value, np.ndarray):
+        digest = hashlib.blake2b(np.ascontiguousarray(value).tobytes(),
+                                 digest_size=16).hexdigest()
+        return 'ndarray', value.dtype.str, value.shape, digest
+    token = cache.token(value)
+    if token is None:
+        raise _Unkeyable(type(value).__name__)
+    return 'ref', token
+
+
+def enabled() -> bool:
+    return _enabled and not getattr(_local, 'off', 0)
+
+
+def set_enabled(on: bool) -> None:
+    """ Process-wide switch; disabling also frees the cache. """
+    global _enabled
+    _enabled = bool(on)
+    if not on:
+        cache.clear()
+
+
+def configure(budget_mb: float) -> None:
+    """ Set the cache budget; 0 disables memoization. """
+    set_enabled(budget_mb > 0)
+    if budget_mb > 0:
+        cache.set_budget(int(budget_mb * 1024 ** 2))
+
+
+@contextmanager
+def disabled() -> Iterator[None]:
+    """ Run the block (on this thread) without reading or filling the cache. """
+    _local.off = getattr(_local, 'off', 0) + 1
+    try:
+        yield
+    finally:
+        _local.off -= 1
+
+
+def memoize(fn: Optional[Callable] = None, *,
+            name: Optional[str] = None) -> Any:
+    """
+    Cache `fn` results by its normalized arguments. Usable as @memoize or
+    @memoize(name=...). Each decoration gets its own key space, so a
+    reloaded model never sees results of its previous version.
+    """
+    if fn is None:
+        return functools.partial(memoize, name=name)
+
+    label = (fn.__module__ or '', name or fn.__qualname__, next(_serial))
+    try:
+        sig: Optional[inspect.Signature] = inspect.signature(fn)
+    except (TypeError, ValueError):  # some native functions
+        sig = None
+
+    def _key(args: tuple, kwargs: dict) -> Hashable:
+        if sig is not None:
+            # f(1, b=2) and f(a=1) with default b=2 share an entry
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return label + (_norm(tuple(bound.arguments.items())),)
+        return label + (_norm(args), _norm(kwargs))
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not enabled():
+            return fn(*args, **kwargs)
+        try:
+            key = _key(args, kwargs)
+        except (_Unkeyable, TypeError):  # TypeError: let fn report it
+            counter('memo', unkeyed=1)
+            return fn(*args, **kwargs)
+
+        value = cache.get(key)
+        if value is not MISS:
+            counter('memo', hits=1)
+            return value
+        counter('memo', misses=1)
+        value = fn(*args, **kwargs)
+        cache.put(key, value)
+        return value
+
+    wrapper.uncached = fn
+    return wrapper
+
+
+# atlas_occ functions without side effects, safe to cache by arguments
+_PURE_PREFIXES = ('make_', 'xform_', 'bool_', 'extrude_', 'shape_')
+
+
+class _MemoOcc(ModuleType):
+    """ atlas_occ with its pure constructors/operations memoized. """
+
+    def __getattr__(self, attr: str) -> Any:
+        fn = getattr(load_occ(), attr)
+        if callable(fn) and attr.startswith(_PURE_PREFIXES):
+            fn = memoize(fn, name=f'atlas_occ.{attr}')
+        setattr(self, attr, fn)
+        return fn
+
+    def __dir__(self) -> list[str]:
+        return dir(load_occ())
+
+
+occ = _MemoOcc('atlas_occ')
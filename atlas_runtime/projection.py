@@ -0,0 +1,565 @@
+"""
+Orthographic drawing views with hidden lines.
+
+    from atlas_runtime.projection import project_assembly
+
+    views = project_assembly(asm, ('front', 'top', 'right', 'iso'),
+                             occlude=True, threads=0)
+    views['front'].visible  # (N, 2, 2) view-plane segments
+    export_views_dxf(views.values(), 'frame_views.dxf')
+
+Each distinct part is projected once per view: its feature edges (creases
+sharper than FEATURE_ANGLE, open boundaries) and silhouette edges are cut
+into pieces and every piece is tested against the part's own faces,
+giving visible and hidden segments. Results live in the memo cache keyed
+by geometric fingerprint and view, so after an edit only changed parts are
+projected again; instances are composed with NumPy offsets. With
+`occlude` each instance's visible lines are checked once more against
+the instances in front of it, so parts also hide each other; that pass
+is cached per instance and set of occluders.
+"""
+from __future__ import annotations
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from . import AtlasAssembly, AtlasPart
+from . import memo
+from .asm_utils import walk_instances, resolve_threads
+from .dxf import DxfWriter
+from .fingerprint import QUANTUM, ShapeGeometry, shape_geometry, \
+    weld_points
+from .tracing import span
+
+# Dihedral angle (degrees) above which a mesh edge is drawn
+FEATURE_ANGLE = 30.0
+# Edge pieces across the largest view extent (visibility resolution)
+RESOLUTION = 400
+# Longest edge is cut into at most this many pieces
+MAX_PIECES = 64
+
+_BARY_EPS = 1e-7  # samples on a triangle's border count as covered
+_DEPTH_EPS = 1e-6  # relative to the view depth range
+_PAIR_BLOCK = 1 << 21  # sample/triangle pairs per occlusion block
+_MAX_CELLS = 256  # larger triangles go to a coarse grid
+_COARSE_CELLS = 16  # coarse grid cells per axis
+
+
+@dataclass(frozen=True)
+class View:
+    name: str
+    eye: tuple[float, float, float]  # from the model towards the viewer
+    up: tuple[float, float, float] = (0.0, 0.0, 1.0)
+
+    def basis(self) -> np.ndarray:
+        """ (3, 3) columns u (right), v (up), w (towards the viewer). """
+        w = np.asarray(self.eye, dtype=np.float64)
+        w = w / np.linalg.norm(w)
+        u = np.cross(np.asarray(self.up, dtype=np.float64), w)
+        if np.linalg.norm(u) < 1e-9:
+            raise ValueError(f'View {self.name!r}: up is parallel to eye')
+        u /= np.linalg.norm(u)
+        return np.stack([u, np.cross(w, u), w], axis=1)
+
+    @property
+    def key(self) -> tuple:
+        return tuple(np.round(self.basis(), 9).ravel().tolist())
+
+
+VIEWS = {
+    'front': View('front', (0.0, -1.0, 0.0)),
+    'top': View('top', (0.0, 0.0, 1.0), (0.0, 1.0, 0.0)),
+    'right': View('right', (1.0, 0.0, 0.0)),
+    'iso': View('iso', (1.0, -1.0, 1.0)),
+}
+
+
+def as_view(view: Union[str, View]) -> View:
+    if isinstance(view, View):
+        return view
+    try:
+        return VIEWS[view.lower()]
+    except KeyError:
+        raise ValueError(f'Unknown view {view!r}') from None
+
+
+@dataclass(frozen=True)
+class MeshEdges:
+    """ View-independent edge data of one mesh. """
+    points: np.ndarray  # (V, 3) welded vertices
+    edges: np.ndarray  # (E, 2) vertex ids
+    faces: np.ndarray  # (E, 2) adjacent triangles, -1 if none
+    feature: np.ndarray  # (E,) bool, always drawn
+    normals: np.ndarray  # (T, 3) unit triangle normals
+
+
+@dataclass(frozen=True)
+class ViewEdges:
+    visible: np.ndarray  # (N, 2, 3) float32 (u, v, depth) segments
+    hidden: np.ndarray  # (M, 2, 3)
+
+
+@dataclass
+class Drawing:
+    view: View
+    visible: np.ndarray  # (N, 2, 2) float32 view-plane segments
+    hidden: np.ndarray
+    parts: int  # distinct parts in the view
+    projected: int  # parts projected by this call (not cached)
+    occluded: int = 0  # instances tested against others by this call
+
+    def bounds(self) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        segs = np.concatenate([self.visible, self.hidden]).reshape(-1, 2)
+        if not len(segs):
+            return None
+        return segs.min(axis=0), segs.max(axis=0)
+
+
+_EMPTY = np.zeros((0, 2, 3), dtype=np.float32)
+
+
+def mesh_edges(tris: np.ndarray,
+               feature_angle: float = FEATURE_ANGLE) -> MeshEdges:
+    tris = np.asarray(tris, dtype=np.float64).reshape(-1, 3, 3)
+    n = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    length = np.linalg.norm(n, axis=1)
+    keep = length > 1e-12 * max(1.0, float(np.abs(tris).max(initial=0.0)))
+    tris, n = tris[keep], n[keep] / length[keep, None]
+
+    ids, points = weld_points(tris.reshape(-1, 3))
+    f = ids.reshape(-1, 3)
+    e = np.sort(np.stack([f[:, [0, 1]], f[:, [1, 2]], f[:, [2, 0]]],
+                         axis=1).reshape(-1, 2), axis=1)
+    tri = np.repeat(np.arange(len(f)), 3)
+
+    # Group equal (sorted) vertex pairs: one row per mesh edge
+    key = e[:, 0] * len(points) + e[:, 1]
+    order = np.argsort(key, kind='stable')
+    key = key[order]
+    start = np.flatnonzero(np.diff(key, prepend=-1))
+    count = np.diff(np.append(start, len(key)))
+    first = tri[order][start]
+    second = np.where(count >= 2,
+                      tri[order][np.minimum(start + 1, len(key) - 1)], -1)
+
+    cos = np.einsum('ij,ij->i', n[first], n[np.maximum(second, 0)])
+    feature = (count != 2) | (cos < math.cos(math.radians(feature_angle)))
+    return MeshEdges(points=points, edges=e[order][start],
+                     faces=np.stack([first, second], axis=1),
+                     feature=feature, normals=n)
+
+
+def _covered(samples: np.ndarray, tris: np.ndarray) -> np.ndarray:
+    """
+    For (S, 3) samples and (T, 3, 3) triangles in view coordinates
+    (u, v, depth towards the viewer), whether a triangle lies in front of
+    each sample. Triangles are binned on a uniform grid so each sample is
+    only tested against those overlapping its cell; triangles that would
+    span more than _MAX_CELLS cells are binned on a coarse grid instead.
+    """
+    out = np.zeros(len(samples), dtype=bool)
+    if not len(samples) or not len(tris):
+        return out
+    a, b, c = tris[:, 0], tris[:, 1], tris[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - \
+        (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    tris = tris[np.abs(area) > 1e-18]
+    if not len(tris):
+        return out
+
+    lo = np.minimum(samples[:, :2].min(axis=0), tris[:, :, :2].min((0, 1)))
+    hi = np.maximum(samples[:, :2].max(axis=0), tris[:, :, :2].max((0, 1)))
+    depth_tol = _DEPTH_EPS * max(
+        1.0, float(np.ptp(tris[:, :, 2])), float(np.ptp(samples[:, 2])))
+    # Square cells, about four triangles per cell
+    span2 = np.maximum(hi - lo, 1e-12)
+    side = math.sqrt(float(span2[0] * span2[1]) / max(1.0, len(tris) / 4.0))
+    g = np.clip(np.ceil(span2 / max(side, 1e-12)), 1, 2048).astype(np.int64)
+
+    c0, c1 = _cell_range(tris, lo, span2 / g, g)
+    large = np.prod(c1 - c0 + 1, axis=1) > _MAX_CELLS
+    if large.any():
+        coarse = np.minimum(g, _COARSE_CELLS)
+        out |= _covered_grid(samples, tris[large], lo, span2, coarse,
+                             depth_tol)
+        tris = tris[~large]
+    if len(tris):
+        out |= _covered_grid(samples, tris, lo, span2, g, depth_tol)
+    return out
+
+
+def _cell_range(tris: np.ndarray, lo: np.ndarray, cell: np.ndarray,
+                g: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ First and last grid cell of each triangle's 2D bounding box. """
+    def cell_of(xy: np.ndarray) -> np.ndarray:
+        return np.clip(((xy - lo) / cell).astype(np.int64), 0, g - 1)
+
+    return cell_of(tris[:, :, :2].min(axis=1)), \
+        cell_of(tris[:, :, :2].max(axis=1))
+
+
+def _covered_grid(samples: np.ndarray, tris: np.ndarray, lo: np.ndarray,
+                  span2: np.ndarray, g: np.ndarray,
+                  depth_tol: float) -> np.ndarray:
+    """ _covered on a (gx, gy) grid over [lo, lo + span2]. """
+    out = np.zeros(len(samples), dtype=bool)
+    cell = span2 / g
+
+    # Triangle -> every cell its 2D bbox overlaps
+    c0, c1 = _cell_range(tris, lo, cell, g)
+    nx, ny = c1[:, 0] - c0[:, 0] + 1, c1[:, 1] - c0[:, 1] + 1
+    cnt = nx * ny
+    t_id = np.repeat(np.arange(len(tris)), cnt)
+    k = np.arange(int(cnt.sum())) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+    cx = c0[t_id, 0] + k % nx[t_id]
+    cy = c0[t_id, 1] + k // nx[t_id]
+    # Within each cell, triangles nearest the viewer first: the key is
+    # cell id + normalized distance of the triangle's nearest point, so
+    # the occluders of a sample are a prefix of its cell's run
+    z_near = tris[:, :, 2].max(axis=1)
+    z_top = float(z_near.max())
+    z_span = (z_top - float(tris[:, :, 2].min()) + depth_tol) * 1.001
+    key = (cy * g[0] + cx) + (z_top - z_near[t_id]) / z_span
+    order = np.argsort(key)
+    key = key[order]
+    t_sorted = t_id[order]
+
+    sc = np.clip(((samples[:, :2] - lo) / cell).astype(np.int64), 0, g - 1)
+    s_cell = sc[:, 1] * g[0] + sc[:, 0]
+    s_start = np.searchsorted(key, s_cell)
+    s_cnt = np.searchsorted(key, s_cell + np.clip(
+        (z_top - samples[:, 2] - depth_tol) / z_span, 0.0, 1.0)) - s_start
+
+    # Blocks of samples bounded by the number of pairs they expand to
+    ends = np.cumsum(s_cnt)
+    i = 0
+    while i < len(samples):
+        j = int(np.searchsorted(ends, (ends[i - 1] if i else 0) + _PAIR_BLOCK,
+                                side='right'))
+        j = max(j, i + 1)
+        cnt_b = s_cnt[i:j]
+        s_id = np.repeat(np.arange(i, j), cnt_b)
+        off = np.arange(int(cnt_b.sum())) - \
+            np.repeat(np.cumsum(cnt_b) - cnt_b, cnt_b)
+        t = t_sorted[np.repeat(s_start[i:j], cnt_b) + off]
+
+        p = samples[s_id]
+        ta, tb, tc = tris[t, 0], tris[t, 1], tris[t, 2]
+        d = (tb[:, 0] - ta[:, 0]) * (tc[:, 1] - ta[:, 1]) - \
+            (tb[:, 1] - ta[:, 1]) * (tc[:, 0] - ta[:, 0])
+        l1 = ((p[:, 0] - ta[:, 0]) * (tc[:, 1] - ta[:, 1]) -
+              (p[:, 1] - ta[:, 1]) * (tc[:, 0] - ta[:, 0])) / d
+        l2 = ((tb[:, 0] - ta[:, 0]) * (p[:, 1] - ta[:, 1]) -
+              (tb[:, 1] - ta[:, 1]) * (p[:, 0] - ta[:, 0])) / d
+        l0 = 1.0 - l1 - l2
+        # Inclusive, so a shared border of two occluders still hides; a
+        # mesh's own edges are kept by the depth test
+        inside = (l0 >= -_BARY_EPS) & (l1 >= -_BARY_EPS) & (l2 >= -_BARY_EPS)
+        z = l0 * ta[:, 2] + l1 * tb[:, 2] + l2 * tc[:, 2]
+        hit = inside & (z > p[:, 2] + depth_tol)
+        out[i:j] |= np.bincount(s_id[hit] - i, minlength=j - i) > 0
+        i = j
+    return out
+
+
+def _split_visibility(seg: np.ndarray, occluders: np.ndarray,
+                      extent: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Cut (E, 2, 3) view-space segments into pieces, test each piece's
+    midpoint against `occluders` and merge runs back into (visible,
+    hidden) (N, 2, 3) segments.
+    """
+    length = np.linalg.norm(seg[:, 1, :2] - seg[:, 0, :2], axis=1)
+    seg = seg[length > 1e-9 * max(extent, 1.0)]  # seen end-on
+    length = length[length > 1e-9 * max(extent, 1.0)]
+    if not len(seg):
+        return _EMPTY, _EMPTY
+    step = max(extent, 1e-12) / RESOLUTION
+    pieces = np.clip(np.ceil(length / step), 1, MAX_PIECES).astype(np.int64)
+    e_id = np.repeat(np.arange(len(seg)), pieces)
+    j = np.arange(int(pieces.sum())) - np.repeat(np.cumsum(pieces) - pieces,
+                                                 pieces)
+    t0 = j / pieces[e_id]
+    t1 = (j + 1) / pieces[e_id]
+    p0, p1 = seg[e_id, 0], seg[e_id, 1]
+    mid = p0 + (p1 - p0) * ((t0 + t1) / 2.0)[:, None]
+    hidden = _covered(mid, occluders)
+
+    # Runs of equal state along each edge
+    brk = np.ones(len(e_id), dtype=bool)
+    brk[1:] = (e_id[1:] != e_id[:-1]) | (hidden[1:] != hidden[:-1])
+    first = np.flatnonzero(brk)
+    last = np.append(first[1:], len(e_id)) - 1
+    a = p0[first] + (p1[first] - p0[first]) * t0[first, None]
+    b = p0[last] + (p1[last] - p0[last]) * t1[last, None]
+    runs = np.stack([a, b], axis=1).astype(np.float32)
+    state = hidden[first]
+    visible, hidden = runs[~state], runs[state]
+    return visible, hidden[~_coincident(hidden, visible, extent)]
+
+
+def _coincident(seg: np.ndarray, ref: np.ndarray,
+                extent: float) -> np.ndarray:
+    """
+    Which (N, 2, 3) segments have the same 2D end points (either way
+    round) as one of `ref`, e.g. a box's back edges behind its front
+    edges: the visible line wins, as in drafting.
+    """
+    if not len(seg) or not len(ref):
+        return np.zeros(len(seg), dtype=bool)
+    q = max(extent, 1e-12) * 1e-6
+
+    def keys(s: np.ndarray) -> np.ndarray:
+        ends = np.round(s[:, :, :2] / q).astype(np.int64)  # (N, 2, 2)
+        swap = (ends[:, 0, 0] > ends[:, 1, 0]) | (
+            (ends[:, 0, 0] == ends[:, 1, 0]) & (ends[:, 0, 1] > ends[:, 1, 1]))
+        ends[swap] = ends[swap, ::-1]
+        return np.ascontiguousarray(ends.reshape(-1, 4)).view(
+            np.dtype((np.void, 32))).ravel()
+
+    return np.isin(keys(seg), keys(ref))
+
+
+def project_mesh(tris: np.ndarray, view: Union[str, View],
+                 edges: Optional[MeshEdges] = None) -> ViewEdges:
+    """ Visible and hidden edges of one mesh seen from `view`. """
+    view = as_view(view)
+    tris = np.asarray(tris, dtype=np.float64).reshape(-1, 3, 3)
+    if edges is None:
+        edges = mesh_edges(tris)
+    if not len(edges.edges):
+        return ViewEdges(_EMPTY, _EMPTY)
+    m = view.basis()
+    w = m[:, 2]
+
+    facing = edges.normals @ w > 0.0
+    f0, f1 = edges.faces[:, 0], edges.faces[:, 1]
+    silhouette = (f1 >= 0) & (facing[f0] != facing[np.maximum(f1, 0)])
+    draw = edges.feature | silhouette
+
+    seg = (edges.points @ m)[edges.edges[draw]]  # (E, 2, 3)
+    occluders = tris @ m
+    extent = float(np.ptp(occluders[:, :, :2].reshape(-1, 2), axis=0).max())
+    visible, hidden = _split_visibility(seg, occluders, extent)
+    return ViewEdges(visible, hidden)
+
+
+def _part_view(tris: np.ndarray, view: View, key: str) -> ViewEdges:
+    """ project_mesh through the memo cache (keyed by fingerprint). """
+    if not memo.enabled():
+        return project_mesh(tris, view)
+    vkey = (__name__, 'project_mesh', 0, key, view.key)
+    hit = memo.cache.get(vkey)
+    if hit is not memo.MISS:
+        return hit
+    out = project_mesh(tris, view, part_edges(tris, key))
+    memo.cache.put(vkey, out)
+    return out
+
+
+def part_edges(tris: np.ndarray, key: str,
+               feature_angle: float = FEATURE_ANGLE) -> MeshEdges:
+    """ mesh_edges through the memo cache (keyed by fingerprint). """
+    if not memo.enabled():
+        return mesh_edges(tris, feature_angle)
+    ekey = (__name__, 'mesh_edges', 0, key)
+    if feature_angle != FEATURE_ANGLE:
+        ekey += (feature_angle,)
+    edges = memo.cache.get(ekey)
+    if edges is memo.MISS:
+        edges = mesh_edges(tris, feature_angle)
+        memo.cache.put(ekey, edges)
+    return edges
+
+
+def project_assembly(asm: AtlasAssembly,
+                     views: Iterable[Union[str, View]] = tuple(VIEWS),
+                     occlude: bool = False,
+                     threads: Optional[int] = 0) -> dict[str, Drawing]:
+    """
+    Drawings of every placed instance, one per view. Instance transforms
+    other than (dx, dy, dz) offsets are treated as identity. With
+    `occlude`, lines behind other parts are hidden too.
+    """
+    views = [as_view(v) for v in views]
+    parts: dict[int, AtlasPart] = {}
+    offsets: dict[int, set[tuple[float, float, float]]] = {}
+    for node, _qty, xf in walk_instances(asm.root):
+        part = node.ref
+        if getattr(part, 'shape', None) is None:
+            continue
+        parts.setdefault(id(part), part)
+        offsets.setdefault(id(part), set()).add(
+            tuple(map(float, xf)) if isinstance(xf, (tuple, list))
+            and len(xf) == 3 else (0.0, 0.0, 0.0))
+
+    with span('projection', parts=len(parts), views=len(views)) as sp:
+        # Local (origin-relative) mesh and fingerprint per distinct part
+        local: dict[int, ShapeGeometry] = {}
+        for pid, part in parts.items():
+            geom = shape_geometry(part.shape)
+            if geom.triangles:
+                local[pid] = geom
+
+        cached = {(pid, v.name) for pid, geom in local.items()
+                  for v in views if memo.enabled() and memo.cache.get(
+                      (__name__, 'project_mesh', 0, geom.fingerprint.key,
+                       v.key)) is not memo.MISS}
+        jobs = [(pid, v) for pid in local for v in views]
+        n_threads = min(resolve_threads(threads), max(1, len(jobs)))
+        if n_threads > 1:
+            with ThreadPoolExecutor(n_threads) as ex:
+                results = list(ex.map(
+                    lambda job: _part_view(local[job[0]].local, job[1],
+                                           local[job[0]].fingerprint.key),
+                    jobs))
+        else:
+            results = [_part_view(local[pid].local, v,
+                                  local[pid].fingerprint.key)
+                       for pid, v in jobs]
+        per = dict(zip(((pid, v.name) for pid, v in jobs), results))
+
+        projected = len({pid for pid, name in per if (pid, name)
+                         not in cached})
+        sp['projected'] = projected
+        # One row per placed instance: part and absolute origin
+        inst = [(pid, np.asarray(off) + geom.origin)
+                for pid, geom in local.items()
+                for off in sorted(offsets[pid])]
+        out = {}
+        for view in views:
+            m = view.basis()
+            vis, hid = [], []
+            for pid, origin in inst:
+                ve = per[(pid, view.name)]
+                shift = (origin @ m)[None, None, :]
+                vis.append(ve.visible + shift)
+                hid.append(ve.hidden + shift)
+            occluded = 0
+            if occlude and len(inst) > 1:
+                # Lines hidden by other parts, per instance
+                with span('projection_occlusion', instances=len(inst)) \
+                        as osp:
+                    behind, occluded = _occlude(local, inst, vis, view)
+                    osp['occluded'] = occluded
+                hid = [np.concatenate([h, b]) for h, b in zip(hid, behind)]
+            visible = np.concatenate(vis) if vis else _EMPTY
+            hidden = np.concatenate(hid) if hid else _EMPTY
+            out[view.name] = Drawing(
+                view, visible[:, :, :2].astype(np.float32),
+                hidden[:, :, :2].astype(np.float32), len(local), projected,
+                occluded)
+    return out
+
+
+def _occlude(local: dict[int, ShapeGeometry],
+             inst: list[tuple[int, np.ndarray]], vis: list[np.ndarray],
+             view: View) -> tuple[list[np.ndarray], int]:
+    """
+    Split each instance's visible lines (`vis`, updated in place) against
+    the instances whose view-space boxes overlap it and reach in front of
+    it. Results are memoized by the instance's part and its occluders'
+    parts and relative placements, so an edit only re-tests the instances
+    whose occluders changed. Returns the lines moved to hidden per
+    instance and the number of instances tested.
+    """
+    m = view.basis()
+    origins = np.array([origin for _pid, origin in inst])
+    half = np.array([local[pid].size for pid, _o in inst]) / 2.0
+    centre = (origins + half) @ m
+    reach = half @ np.abs(m)
+    lo, hi = centre - reach, centre + reach
+    keys = [local[pid].fingerprint.key for pid, _o in inst]
+
+    behind: list[np.ndarray] = []
+    tested = 0
+    for n, origin in enumerate(origins):
+        front = np.flatnonzero(
+            np.all(lo[:, :2] <= hi[n, :2], axis=1) &
+            np.all(lo[n, :2] <= hi[:, :2], axis=1) & (hi[:, 2] > lo[n, 2]))
+        front = front[front != n]
+        if not len(vis[n]) or not len(front):
+            behind.append(_EMPTY)
+            continue
+        rel = np.round((origins[front] - origin) / QUANTUM).astype(np.int64)
+        key = (__name__, 'occlude', 0, view.key, keys[n], frozenset(
+            zip((keys[k] for k in front), map(tuple, rel.tolist()))))
+        hit = memo.cache.get(key) if memo.enabled() else memo.MISS
+        # Lines relative to the instance's placement, as cached
+        shift = (origin @ m)[None, None, :]
+        if hit is memo.MISS:
+            occluders = np.concatenate([
+                local[inst[k][0]].local + (origins[k] - origin)
+                for k in front]) @ m
+            seg = vis[n] - shift
+            extent = float(np.ptp(seg[:, :, :2].reshape(-1, 2),
+                                  axis=0).max())
+            hit = _split_visibility(seg, occluders, extent)
+            if memo.enabled():
+                memo.cache.put(key, hit)
+            tested += 1
+        vis[n] = hit[0] + shift
+        behind.append(hit[1] + shift)
+    return behind, tested
+
+
+# ---- DXF ----
+
+# Third-angle layout: (column, row) of the standard views
+_LAYOUT = {'front': (0, 0), 'top': (0, 1), 'right': (1, 0), 'iso': (1, 1)}
+
+
+def views_dxf_writer(drawings: Sequence[Drawing],
+                     labels: bool = True) -> DxfWriter:
+    """
+    R12 DXF with visible lines on layer VISIBLE and hidden lines on layer
+    HIDDEN (dashed). Standard views are placed third-angle (top above
+    front, right beside it, iso diagonal), others in a row to the right.
+    """
+    w = DxfWriter()
+    w.layer('VISIBLE', color=7)
+    w.layer('HIDDEN', color=8, linetype='HIDDEN')
+    w.layer('LABELS', color=3)
+
+    drawn = [(d, d.bounds()) for d in drawings if d.bounds() is not None]
+    if not drawn:
+        return w
+    cell_of: dict[int, tuple[int, int]] = {}
+    extra = 2
+    for d, _b in drawn:
+        pos = _LAYOUT.get(d.view.name)
+        if pos is None or pos in cell_of.values():
+            pos, extra = (extra, 0), extra + 1
+        cell_of[id(d)] = pos
+
+    # Shared extents per column / row keep projected features aligned
+    size = np.max([hi - lo for _d, (lo, hi) in drawn], axis=0)
+    gap = 0.15 * float(size.max()) or 1.0
+    col_lo: dict[int, float] = {}
+    row_lo: dict[int, float] = {}
+    for d, (lo, _hi) in drawn:
+        c, r = cell_of[id(d)]
+        col_lo[c] = min(col_lo.get(c, np.inf), float(lo[0]))
+        row_lo[r] = min(row_lo.get(r, np.inf), float(lo[1]))
+
+    for d, (lo, _hi) in drawn:
+        c, r = cell_of[id(d)]
+        shift = np.array([c * (size[0] + gap) - col_lo[c],
+                          r * (size[1] + gap) - row_lo[r]], dtype=np.float32)
+        w.lines('VISIBLE', d.visible + shift)
+        w.lines('HIDDEN', d.hidden + shift)
+        if labels:
+            h = 0.03 * float(size.max()) or 1.0
+            w.text('LABELS', c * (size[0] + gap),
+                   r * (size[1] + gap) - 2.0 * h, h, d.view.name.upper())
+    return w
+
+
+def export_views_dxf(drawings: Sequence[Drawing], path: Union[str, Path],
+                     labels: bool = True) -> Path:
+    with span('export_dxf', views=len(drawings)):
+        return views_dxf_writer(drawings, labels).save(path)
@@ -0,0 +1,509 @@
+"""
+Planar sections of tessellated geometry.
+
+Sections are cut from the triangle buffers the viewer already holds
+(asm.triangles), never from OCC, so a stack of parallel planes over a
+large assembly is one vectorized pass:
+
+    from atlas_runtime.section import sections_along, export_dxf
+
+    secs = sections_along(asm.triangles, axis='z', step=10.0)
+    export_dxf(secs, 'frame_sections.dxf')
+
+Every (triangle, plane) pair is found with a sorted-offset range search,
+its crossing edges are intersected in bulk, and the resulting segments
+are stitched into polylines by joining endpoints on the same mesh edge:
+each endpoint is keyed by an integer hash of (plane, sorted vertex pair
+of the cut edge), so the join is one sort of 64-bit keys. Shared edges
+are always interpolated in the same direction, so neighbouring triangles
+produce bit-identical points and no tolerance is needed.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from .dxf import DxfWriter, fmt
+from .fingerprint import weld_points
+from .tracing import span
+
+_AXES = {'x': (1.0, 0.0, 0.0), 'y': (0.0, 1.0, 0.0), 'z': (0.0, 0.0, 1.0)}
+
+# Triangle edges as (from, to) vertex indices
+_EDGES = np.array([[0, 1], [1, 2], [2, 0]])
+
+
+def _crossing_edges(to_above: bool) -> np.ndarray:
+    """ Edge crossing upwards (or downwards) per above-plane vertex mask. """
+    table = np.zeros(8, dtype=np.int64)
+    for mask in range(1, 7):
+        up = [bool(mask >> v & 1) for v in range(3)]
+        table[mask] = next(e for e, (i, j) in enumerate(_EDGES.tolist())
+                           if up[i] != up[j] and up[j] == to_above)
+    return table
+
+
+# Entering edge (below -> above) ends a segment, leaving edge starts it:
+# outer boundaries run counter-clockwise seen from +normal
+_ENTER, _LEAVE = _crossing_edges(True), _crossing_edges(False)
+
+# splitmix64 finalizer: float bits end in long runs of zeros, which a
+# plain multiply would carry straight into the key
+_MIX = (np.uint64(30), np.uint64(0xBF58476D1CE4E5B9),
+        np.uint64(27), np.uint64(0x94D049BB133111EB), np.uint64(31))
+
+
+def _mix(h: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """ Fold uint64 `x` into the running hash `h` (elementwise). """
+    s1, m1, s2, m2, s3 = _MIX
+    h = h ^ x
+    h ^= h >> s1
+    h *= m1
+    h ^= h >> s2
+    h *= m2
+    h ^= h >> s3
+    return h
+
+
+@dataclass
+class Polyline:
+    points: np.ndarray  # (K, 3) float64, closing point not repeated
+    closed: bool
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+
+@dataclass
+class Section:
+    normal: np.ndarray  # (3,) unit
+    offset: float  # plane is {p : p·normal == offset}
+    polylines: list[Polyline] = field(default_factory=list)
+
+    @property
+    def closed(self) -> list[Polyline]:
+        return [p for p in self.polylines if p.closed]
+
+    def basis(self) -> tuple[np.ndarray, np.ndarray]:
+        return plane_basis(self.normal)
+
+    def paths2d(self) -> list[tuple[np.ndarray, bool]]:
+        """ (K, 2) in-plane coordinates and closed flag per polyline. """
+        u, v = self.basis()
+        return [(p.points @ np.stack([u, v], axis=1), p.closed)
+                for p in self.polylines]
+
+    def bounds2d(self) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        paths = [xy for xy, _ in self.paths2d() if len(xy)]
+        if not paths:
+            return None
+        pts = np.concatenate(paths)
+        return pts.min(axis=0), pts.max(axis=0)
+
+
+def as_normal(normal: Union[str, Sequence[float]]) -> np.ndarray:
+    if isinstance(normal, str):
+        try:
+            normal = _AXES[normal.lower()]
+        except KeyError:
+            raise ValueError(f'Unknown axis {normal!r}') from None
+    n = np.asarray(normal, dtype=np.float64).reshape(3)
+    length = np.linalg.norm(n)
+    if not length:
+        raise ValueError('Section normal must be non-zero')
+    return n / length
+
+
+def plane_basis(normal: Union[str, Sequence[float]]
+                ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    In-plane axes (u, v) with u × v = normal, i.e. the plane seen from the
+    +normal side. Axis normals give x-y, y-z and -x-z views.
+    """
+    n = as_normal(normal)
+    ref = np.array([0.0, 0.0, 1.0]) if abs(n[2]) < 0.9 else \
+        np.array([0.0, 1.0, 0.0])
+    u = np.cross(ref, n)
+    u /= np.linalg.norm(u)
+    return u, np.cross(n, u)
+
+
+def _as_triangles(tris) -> np.ndarray:
+    t = np.asarray(tris)
+    if t.dtype not in (np.float32, np.float64):
+        t = t.astype(np.float64)
+    return t.reshape(-1, 3, 3)
+
+
+def _heights(tris: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """ (T, 3) float64 vertex heights along n. """
+    axis = np.flatnonzero(n)
+    if len(axis) == 1:  # axis-aligned: a strided view, no matmul
+        return tris[:, :, axis[0]].astype(np.float64) * n[axis[0]]
+    t = tris.astype(np.float64, copy=False)
+    return t[:, :, 0] * n[0] + t[:, :, 1] * n[1] + t[:, :, 2] * n[2]
+
+
+def slice_segments(tris, normal: Union[str, Sequence[float]],
+                   offsets: Iterable[float]
+                   ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Cut segments of a triangle soup with every plane p·normal = offset.
+
+    Returns (plane, a, b): the index into `offsets` of each segment and
+    its (M, 3) endpoints. On outward-wound meshes the segments run
+    counter-clockwise round outer boundaries and clockwise round holes.
+    """
+    tris = _as_triangles(tris)
+    n = as_normal(normal)
+    return _slice(tris, _heights(tris, n), offsets)[:3]
+
+
+def _slice(tris: np.ndarray, d: np.ndarray, offsets: Iterable[float]
+           ) -> tuple[np.ndarray, ...]:
+    """ slice_segments plus the edge key of every endpoint (see stitch). """
+    offsets = np.asarray(list(offsets), dtype=np.float64).reshape(-1)
+    empty = (np.zeros(0, dtype=np.int64), np.zeros((0, 3)), np.zeros((0, 3)),
+             np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint64))
+    if not len(tris) or not len(offsets):
+        return empty
+
+    order = np.argsort(offsets, kind='stable')
+    sorted_off = offsets[order]
+
+    # Plane range each triangle spans: lo < offset <= hi (vertices on the
+    # plane count as above it, so each crossing is seen exactly once)
+    d0, d1, d2 = d[:, 0], d[:, 1], d[:, 2]
+    first = np.searchsorted(sorted_off, np.minimum(np.minimum(d0, d1), d2),
+                            side='right')
+    last = np.searchsorted(sorted_off, np.maximum(np.maximum(d0, d1), d2),
+                           side='right')
+    count = np.maximum(last - first, 0)
+    total = int(count.sum())
+    if not total:
+        return empty
+
+    # Only triangles crossing some plane are read again
+    hit = np.flatnonzero(count)
+    tri = np.repeat(np.arange(len(hit)), count[hit])
+    # Position within each triangle's run -> sorted plane index
+    run_start = np.cumsum(count[hit]) - count[hit]
+    k = np.arange(total) - np.repeat(run_start, count[hit]) + \
+        np.repeat(first[hit], count[hit])
+    plane = order[k]
+
+    dh = d[hit]
+    off = sorted_off[k]
+    # np.take: row gathers of this size run several times faster than [idx]
+    above = (np.take(dh, tri, axis=0) >= off[:, None]).view(np.uint8)
+    mask = above[:, 0] | above[:, 1] << 1 | above[:, 2] << 2
+    e_in, e_out = _ENTER[mask], _LEAVE[mask]
+    ea, eb = _EDGES[:, 0], _EDGES[:, 1]
+
+    # Flat vertex arrays of the crossing triangles; vertex identity is a
+    # hash of the coordinate bits (-0.0 folded into 0.0)
+    verts = tris[hit].reshape(-1, 3).astype(np.float64)  # exact for float32
+    bits = (verts + 0.0).view(np.uint64)
+    vh = _mix(_mix(_mix(np.zeros(len(verts), dtype=np.uint64),
+                        bits[:, 0]), bits[:, 1]), bits[:, 2])
+    dv = dh.reshape(-1)
+    base = tri * 3
+    plane_h = _mix(np.zeros(len(offsets), dtype=np.uint64),
+                   np.arange(len(offsets), dtype=np.uint64))[plane]
+
+    def cut(edge: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        i, j = base + ea[edge], base + eb[edge]
+        # Orient every edge from its lower to its upper vertex so both
+        # triangles sharing it produce the same bits
+        d_i, d_j = dv[i], dv[j]
+        swap = d_i > d_j
+        lo, hi = np.where(swap, j, i), np.where(swap, i, j)
+        s_lo = np.where(swap, d_j, d_i) - off
+        s_hi = np.where(swap, d_i, d_j) - off
+        lo_v = np.take(verts, lo, axis=0)
+        hi_v = np.take(verts, hi, axis=0)
+        p = lo_v + (hi_v - lo_v) * (s_lo / (s_lo - s_hi))[:, None]
+        on = s_hi == 0.0
+        p[on] = hi_v[on]
+        # Key: plane and the cut edge's vertex pair, (v, v) for a vertex
+        # on the plane, which every triangle round it cuts the same way
+        h_hi = vh[hi]
+        h_lo = np.where(on, h_hi, vh[lo])
+        key = _mix(_mix(plane_h, np.minimum(h_lo, h_hi)),
+                   np.maximum(h_lo, h_hi))
+        return p, key
+
+    (a, ka), (b, kb) = cut(e_out), cut(e_in)
+    # Drop touches at a single vertex; a point merely rounding onto a
+    # vertex keeps its segment, or the loop would fall apart
+    keep = ka != kb
+    same = np.flatnonzero(~keep)
+    keep[same] = np.any(a[same] != b[same], axis=1)
+    return plane[keep], a[keep], b[keep], ka[keep], kb[keep]
+
+
+def _node_ids(keys: np.ndarray, plane: np.ndarray, pts: np.ndarray
+              ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Shared node id per endpoint key; returns ids and the plane and point
+    of every node. Equal keys are checked to be equal nodes; on a key
+    collision the endpoints are welded by exact coordinates instead.
+    """
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    head = np.empty(len(keys), dtype=bool)
+    head[:1] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=head[1:])
+    ids = np.empty(len(keys), dtype=np.int64)
+    ids[order] = np.cumsum(head) - 1
+    first = order[head]
+    if np.array_equal(plane[first][ids], plane) and \
+            np.array_equal(pts[first][ids], pts):
+        return ids, plane[first], pts[first]
+    ids, nodes = weld_points(np.column_stack([plane, pts]))
+    return ids, nodes[:, 0].astype(np.int64), nodes[:, 1:]
+
+
+def _successors(plane: np.ndarray, a: np.ndarray, b: np.ndarray,
+                ka: np.ndarray, kb: np.ndarray) -> np.ndarray:
+    """
+    The segment starting where each segment ends, or -1 unless that node
+    has exactly one segment in and one out (every node of a watertight,
+    consistently wound mesh). Matches are checked to share plane and
+    point, so a key collision only sends its segments to the walk.
+    """
+    m = len(ka)
+    by_start = np.argsort(ka)
+    starts = ka[by_start]
+    pos = np.minimum(np.searchsorted(starts, kb), m - 1)
+    single = np.ones(m, dtype=bool)
+    dup = starts[1:] == starts[:-1]
+    single[1:] &= ~dup
+    single[:-1] &= ~dup
+    found = (starts[pos] == kb) & single[pos]
+    found &= np.bincount(pos[found], minlength=m)[pos] == 1
+    nxt = np.where(found, by_start[pos], -1)
+    j = np.flatnonzero(found)
+    bad = (plane[nxt[j]] != plane[j]) | \
+        np.any(np.take(a, nxt[j], axis=0) != np.take(b, j, axis=0), axis=1)
+    nxt[j[bad]] = -1
+    return nxt
+
+
+def _cycles(nxt: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Closed loops of the successor links, by pointer jumping. Returns
+    (segments in loop order, loop start offsets); segments left out need
+    the general walk.
+    """
+    m = len(nxt)
+
+    # Smallest segment id on each loop; chains run into -1. Done once no
+    # label changes and no chain end is reached within the doubled span.
+    label = np.arange(m)
+    jump = nxt.copy()
+    live = np.flatnonzero(jump >= 0)
+    while len(live):
+        ahead = jump[live]
+        own = label[live]
+        lo = np.minimum(own, label[ahead])
+        changed = bool((lo != own).any())
+        label[live] = lo
+        ahead = jump[ahead]
+        jump[live] = ahead
+        going = ahead >= 0
+        if not changed and going.all():
+            break
+        live = live[going]
+    on_loop = np.flatnonzero(jump >= 0)
+    if not len(on_loop):
+        return on_loop, np.zeros(1, dtype=np.int64)
+
+    # Cut every loop before its head and count the steps to the cut: the
+    # head is one short of the loop length, and head minus own distance
+    # is the position along the loop
+    cut = np.where(nxt == label, -1, nxt)
+    dist = (cut >= 0).astype(np.int64)
+    jump = cut.copy()
+    live = np.flatnonzero(jump >= 0)
+    while len(live):
+        ahead = jump[live]
+        dist[live] += dist[ahead]
+        ahead = jump[ahead]
+        jump[live] = ahead
+        live = live[ahead >= 0]
+    heads = on_loop[label[on_loop] == on_loop]
+    bounds = np.zeros(len(heads) + 1, dtype=np.int64)
+    np.cumsum(dist[heads] + 1, out=bounds[1:])
+    loop_of = np.empty(m, dtype=np.int64)
+    loop_of[heads] = np.arange(len(heads))
+    lab = label[on_loop]
+    order = np.empty(len(on_loop), dtype=np.int64)
+    order[bounds[loop_of[lab]] + dist[lab] - dist[on_loop]] = on_loop
+    return order, bounds
+
+
+def _walk(u: list[int], w: list[int], n_nodes: int) -> list[list[int]]:
+    """ Node chains of arbitrary segment graphs (open, branching). """
+    m = len(u)
+    ends = np.concatenate([u, w]).astype(np.int64)
+    order = np.argsort(ends, kind='stable')
+    start = np.searchsorted(ends[order], np.arange(n_nodes + 1)).tolist()
+    adj = (order % m).tolist()
+    used = bytearray(m)
+
+    def extend(chain: list[int]) -> None:
+        node = chain[-1]
+        while True:
+            for j in range(start[node], start[node + 1]):
+                seg = adj[j]
+                if not used[seg]:
+                    break
+            else:
+                return
+            used[seg] = 1
+            node = w[seg] if u[seg] == node else u[seg]
+            chain.append(node)
+            if node == chain[0]:
+                return
+
+    chains = []
+    for s0 in range(m):
+        if used[s0]:
+            continue
+        used[s0] = 1
+        chain = [u[s0], w[s0]]
+        extend(chain)
+        if chain[-1] != chain[0]:
+            chain.reverse()
+            extend(chain)
+        chains.append(chain)
+    return chains
+
+
+def stitch(plane: np.ndarray, a: np.ndarray, b: np.ndarray,
+           ka: np.ndarray, kb: np.ndarray) -> list[tuple[int, Polyline]]:
+    """
+    Join segments sharing endpoints into (plane, Polyline) chains; ka/kb
+    are the endpoint keys from the slice (equal on the same cut edge).
+    """
+    m = len(plane)
+    if not m:
+        return []
+    order, bounds = _cycles(_successors(plane, a, b, ka, kb))
+    # A loop runs through the start points of its segments
+    loop_pts = np.take(a, order, axis=0)
+    out = [(k, Polyline(loop_pts[s:e], True)) for k, s, e in zip(
+        plane[order[bounds[:-1]]].tolist(), bounds[:-1].tolist(),
+        bounds[1:].tolist())]
+
+    rest = np.ones(m, dtype=bool)
+    rest[order] = False
+    if rest.any():
+        # Loop nodes have one segment in and one out, both on the loop,
+        # so the rest only ever meet among themselves
+        r = int(rest.sum())
+        ids, node_plane, node_pts = _node_ids(
+            np.concatenate([ka[rest], kb[rest]]),
+            np.concatenate([plane[rest], plane[rest]]),
+            np.concatenate([a[rest], b[rest]]))
+        u, w = ids[:r], ids[r:]
+        for chain in _walk(u.tolist(), w.tolist(), len(node_plane)):
+            closed = chain[-1] == chain[0]
+            idx = np.asarray(chain[:-1] if closed else chain, dtype=np.int64)
+            out.append((int(node_plane[idx[0]]),
+                        Polyline(node_pts[idx], closed)))
+    return out
+
+
+def section_planes(tris, normal: Union[str, Sequence[float]],
+                   offsets: Iterable[float]) -> list[Section]:
+    """ One Section per offset (in the given order), all cut in one pass. """
+    tris = _as_triangles(tris)
+    n = as_normal(normal)
+    return _sections(tris, n, _heights(tris, n), offsets)
+
+
+def _sections(tris: np.ndarray, n: np.ndarray, d: np.ndarray,
+              offsets: Iterable[float]) -> list[Section]:
+    offsets = [float(o) for o in offsets]
+    with span('section', planes=len(offsets)) as sp:
+        plane, a, b, ka, kb = _slice(tris, d, offsets)
+        sections = [Section(n, o) for o in offsets]
+        for k, poly in stitch(plane, a, b, ka, kb):
+            sections[k].polylines.append(poly)
+        sp['segments'] = len(plane)
+    return sections
+
+
+def sections_along(tris, axis: Union[str, Sequence[float]] = 'z',
+                   step: float = 10.0, start: Optional[float] = None,
+                   stop: Optional[float] = None) -> list[Section]:
+    """
+    Parallel sections every `step` along `axis` across the mesh extent
+    (or start..stop), e.g. every 10 mm through an assembly.
+    """
+    if step <= 0:
+        raise ValueError('step must be positive')
+    tris = _as_triangles(tris)
+    n = as_normal(axis)
+    if not len(tris):
+        return []
+    d = _heights(tris, n)
+    if start is None:  # first multiple of step above the lowest point
+        start = step * (np.floor(d.min() / step) + 1)
+    if stop is None:
+        stop = d.max()
+    n_planes = int(np.floor((stop - start) / step + 1e-9)) + 1
+    offsets = start + step * np.arange(max(n_planes, 0))
+    return _sections(tris, n, d, offsets)
+
+
+# ---- DXF ----
+
+def _layer_name(sec: Section) -> str:
+    return 'SECTION_' + fmt(sec.offset).replace('-', 'M').replace('.', '_')
+
+
+def dxf_writer(sections: Sequence[Section], arrange: bool = True,
+               labels: bool = True) -> DxfWriter:
+    """
+    R12 DXF of the sections, one layer per plane. With `arrange` the
+    sections are laid out side by side in a grid; otherwise they overlay
+    in their own plane coordinates.
+    """
+    drawn = [(s, s.paths2d(), s.bounds2d()) for s in sections if s.polylines]
+    extents = [hi - lo for _s, _p, (lo, hi) in drawn]
+    cell = np.max(extents, axis=0) if extents else np.ones(2)
+    gap = 0.1 * float(cell.max()) or 1.0
+    cols = max(1, int(np.ceil(np.sqrt(len(drawn)))))
+
+    w = DxfWriter()
+    for i, (sec, paths, (lo, _hi)) in enumerate(drawn):
+        layer = _layer_name(sec)
+        if arrange:
+            r, c = divmod(i, cols)
+            shift = np.array([c * (cell[0] + gap),
+                              -r * (cell[1] + 2 * gap)]) - lo
+        else:
+            shift = np.zeros(2)
+        for xy, closed in paths:
+            w.polyline(layer, xy + shift, closed)
+        if labels and arrange:
+            h = 0.04 * float(cell.max()) or 1.0
+            w.text(layer, shift[0] + lo[0], shift[1] + lo[1] - 1.5 * h, h,
+                   f'{fmt(sec.offset)} mm')
+    return w
+
+
+def dxf_text(sections: Sequence[Section], arrange: bool = True,
+             labels: bool = True) -> str:
+    return dxf_writer(sections, arrange, labels).tostring()
+
+
+def export_dxf(sections: Sequence[Section], path: Union[str, Path],
+               arrange: bool = True, labels: bool = True) -> Path:
+    with span('export_dxf', sections=len(sections)):
+        return dxf_writer(sections, arrange, labels).save(path)
@@ -0,0 +1,464 @@
+"""
+Geometric similarity index for part standardization.
+
+Every part is reduced to a small descriptor: its bbox extents (sorted,
+so 90° turns match), the edge of the cube of equal volume, the edge of
+the square of equal area (all as logs, so differences are relative) and
+a D2 shape distribution (histogram of distances between random surface
+points, scaled by the bbox diagonal). Descriptors live in one float32
+array, keyed by '<model>/<def_id>', and are persisted as a single .npz.
+
+    index = SimilarityIndex.load()
+    index.update_model('Frame', asm)   # re-describes changed parts only
+    index.within('Frame/RAIL-1', 0.02)  # parts within 2 % in size
+    index.save()
+
+Rows are kept sorted by the largest extent, so a tolerance query only
+scans the band of parts of about the same size.
+"""
+from __future__ import annotations
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Optional, Union
+
+import numpy as np
+
+from . import AtlasPart, AtlasAssembly
+from .asm_utils import walk_instances
+from .fingerprint import shape_geometry
+from . import memo
+from .tracing import span
+
+log = logging.getLogger(__name__)
+
+VERSION = 1  # bump when descriptors change; older index files are dropped
+D2_BINS = 16
+D2_PAIRS = 2048
+SIZE_DIMS = 5  # log extents (3, descending), log ∛volume, log √area
+DIMS = SIZE_DIMS + D2_BINS
+TOLERANCE = 0.02
+D2_TOLERANCE = 0.25  # L1 distance of the histograms (0..2)
+D2_WEIGHT = 0.5  # of the histogram distance in nearest() ranking
+_TINY = 1e-9
+
+
+def default_path() -> str:
+    env = os.getenv('ATLAS_SIMILARITY_INDEX')
+    if env:
+        return env
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'atlas', 'similarity', 'index.npz')
+
+
+def describe(tris: np.ndarray, seed: int = 0) -> np.ndarray:
+    """ (DIMS,) float32 descriptor of a (T, 3, 3) mesh. """
+    tris = np.asarray(tris, dtype=np.float64).reshape(-1, 3, 3)
+    out = np.zeros(DIMS, dtype=np.float32)
+    if not len(tris):
+        return out
+    pts = tris.reshape(-1, 3)
+    lo, hi = pts.min(axis=0), pts.max(axis=0)
+    t = tris - lo
+    a, b, c = t[:, 0], t[:, 1], t[:, 2]
+    cross = np.cross(b - a, c - a)
+    tri_area = 0.5 * np.linalg.norm(cross, axis=1)
+    area = float(tri_area.sum())
+    volume = abs(float(np.einsum('ij,ij->i', a, np.cross(b, c)).sum()) / 6.0)
+
+    extents = np.sort(hi - lo)[::-1]
+    out[:3] = np.log(np.maximum(extents, _TINY))
+    out[3] = math.log(max(volume, _TINY ** 3)) / 3.0
+    out[4] = math.log(max(area, _TINY ** 2)) / 2.0
+
+    diag = float(np.linalg.norm(hi - lo))
+    if area <= 0.0 or diag <= 0.0:
+        return out
+    # Area-weighted surface samples; a fixed seed keeps descriptors (and
+    # so the persisted index) reproducible
+    rng = np.random.default_rng(seed)
+    cdf = np.cumsum(tri_area)
+    pick = np.searchsorted(cdf, rng.random(2 * D2_PAIRS) * cdf[-1],
+                           side='right')
+    pick = np.minimum(pick, len(tris) - 1)
+    r1 = np.sqrt(rng.random(2 * D2_PAIRS))
+    r2 = rng.random(2 * D2_PAIRS)
+    p = (a[pick] * (1.0 - r1)[:, None]
+         + b[pick] * (r1 * (1.0 - r2))[:, None]
+         + c[pick] * (r1 * r2)[:, None])
+    d = np.linalg.norm(p[:D2_PAIRS] - p[D2_PAIRS:], axis=1) / diag
+    hist = np.bincount(np.minimum((d * D2_BINS).astype(np.int64),
+                                  D2_BINS - 1), minlength=D2_BINS)
+    out[SIZE_DIMS:] = hist / D2_PAIRS
+    return out
+
+
+def part_descriptor(part: AtlasPart) -> Optional[tuple[str, np.ndarray]]:
+    """
+    (fingerprint key, descriptor) of a part, None for shapeless or
+    meshless parts. Cached per fingerprint in the shared memo cache.
+    """
+    if part.shape is None:
+        return None
+    geom = shape_geometry(part.shape)
+    fp = geom.fingerprint
+    if fp is None:
+        return None
+    key = (__name__, 'describe', VERSION, fp.key)
+    vec = memo.cache.get(key) if memo.enabled() else memo.MISS
+    if vec is memo.MISS:
+        vec = describe(geom.local)
+        if memo.enabled():
+            memo.cache.put(key, vec)
+    return fp.key, vec
+
+
+@dataclass(frozen=True)
+class Match:
+    key: str  # '<model>/<def_id>'
+    part_no: str
+    model: str
+    size_diff: float  # largest relative size difference (0.01 = 1 %)
+    shape_diff: float  # L1 distance of the D2 distributions (0..2)
+
+
+class SimilarityIndex:
+    """
+    Array-backed descriptor index. Rows are added, replaced and removed in
+    place (removed rows are reused by compact() on save); queries are
+    NumPy passes over the band of similarly sized rows. Thread-safe.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or default_path()
+        self._vec = np.zeros((0, DIMS), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._keys: list[str] = []
+        self._fps: list[str] = []
+        self._meta: list[dict[str, str]] = []
+        self._row: dict[str, int] = {}
+        self._by_fp: dict[str, int] = {}
+        self._n = 0
+        # Alive rows sorted by the largest extent, rebuilt lazily
+        self._order: Optional[np.ndarray] = None
+        self._band: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # one writer of the file
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._row
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            return list(self._row)
+
+    def meta(self, key: str) -> dict[str, str]:
+        with self._lock:
+            return dict(self._meta[self._row[key]])
+
+    def vector(self, key: str) -> np.ndarray:
+        with self._lock:
+            return self._vec[self._row[key]].copy()
+
+    def find(self, part_no: str, model: Optional[str] = None) -> list[str]:
+        """ Keys of the rows with this part number (optionally one model). """
+        with self._lock:
+            return [k for k, i in self._row.items()
+                    if self._meta[i].get('part_no') == part_no
+                    and (model is None or self._meta[i].get('model') == model)]
+
+    # ---- Updates ----
+
+    def add(self, key: str, vec: np.ndarray, fp: str = '',
+            **meta: str) -> None:
+        """ Insert or replace the row `key`. """
+        vec = np.asarray(vec, dtype=np.float32).reshape(DIMS)
+        with self._lock:
+            i = self._row.get(key)
+            if i is None:
+                i = self._append()
+                self._keys[i] = key
+                self._row[key] = i
+            elif self._by_fp.get(self._fps[i]) == i:
+                del self._by_fp[self._fps[i]]
+            self._vec[i] = vec
+            self._alive[i] = True
+            self._fps[i] = fp
+            self._meta[i] = {k: str(v) for k, v in meta.items()}
+            if fp:
+                self._by_fp.setdefault(fp, i)
+            self._order = None
+            self.dirty = True
+
+    def remove(self, key: str) -> bool:
+        with self._lock:
+            i = self._row.pop(key, None)
+            if i is None:
+                return False
+            self._alive[i] = False
+            if self._by_fp.get(self._fps[i]) == i:
+                # Other rows of the same geometry are found again by
+                # compact(); until then it is just described once more
+                del self._by_fp[self._fps[i]]
+            self._order = None
+            self.dirty = True
+            return True
+
+    def _append(self) -> int:
+        if self._n == len(self._vec):
+            cap = max(64, 2 * len(self._vec))
+            vec = np.zeros((cap, DIMS), dtype=np.float32)
+            vec[:self._n] = self._vec[:self._n]
+            alive = np.zeros(cap, dtype=bool)
+            alive[:self._n] = self._alive[:self._n]
+            self._vec, self._alive = vec, alive
+        self._keys.append('')
+        self._fps.append('')
+        self._meta.append({})
+        self._n += 1
+        return self._n - 1
+
+    def update_model(self, model: str, asm: AtlasAssembly) -> int:
+        """
+        Index every distinct part of `asm` as '<model>/<def_id>' and drop
+        rows of `model` it no longer has. Parts whose geometry is already
+        indexed (same fingerprint) are not described again. Returns the
+        number of parts described.
+        """
+        parts: dict[int, AtlasPart] = {}
+        for node, _qty, _xf in walk_instances(asm.root):
+            part = node.ref
+            if getattr(part, 'shape', None) is not None:
+                parts.setdefault(id(part), part)
+
+        described = 0
+        seen: set[str] = set()
+        with span('similarity_index', model=model, parts=len(parts)) as sp:
+            for part in parts.values():
+                key = f'{model}/{part.def_id}'
+                if key in seen:
+                    continue
+                seen.add(key)
+                fp = shape_geometry(part.shape).fingerprint
+                if fp is None:
+                    continue
+                fp = fp.key
+                with self._lock:
+                    i = self._by_fp.get(fp)
+                    vec = self._vec[i].copy() if i is not None else None
+                if vec is None:
+                    vec = part_descriptor(part)[1]
+                    described += 1
+                self.add(key, vec, fp, part_no=part.part_no, model=model,
+                         def_id=part.def_id, desc=part.desc)
+            with self._lock:
+                stale = [k for k, i in self._row.items()
+                         if self._meta[i].get('model') == model
+                         and k not in seen]
+                for k in stale:
+                    self.remove(k)
+            sp['described'] = described
+        return described
+
+    # ---- Queries ----
+
+    def _sorted(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._order is None:
+            rows = np.flatnonzero(self._alive[:self._n])
+            band = self._vec[rows, 0]
+            order = np.argsort(band, kind='stable')
+            self._order, self._band = rows[order], band[order]
+        return self._order, self._band
+
+    def _query_vec(self, query: Union[str, np.ndarray]) -> np.ndarray:
+        if isinstance(query, str):
+            return self._vec[self._row[query]].copy()
+        return np.asarray(query, dtype=np.float32).reshape(DIMS)
+
+    def _matches(self, rows: np.ndarray, size: np.ndarray,
+                 shape: np.ndarray, exclude: Optional[str]) -> list[Match]:
+        out = []
+        for i, s, d in zip(rows.tolist(), size.tolist(), shape.tolist()):
+            key = self._keys[i]
+            if key == exclude:
+                continue
+            meta = self._meta[i]
+            out.append(Match(key, meta.get('part_no', ''),
+                             meta.get('model', ''), math.expm1(s), d))
+        return out
+
+    def within(self, query: Union[str, np.ndarray],
+               tol: float = TOLERANCE,
+               shape_tol: float = D2_TOLERANCE) -> list[Match]:
+        """
+        Parts whose extents, volume and area all lie within `tol`
+        (relative) of the query and whose shape distributions differ by at
+        most `shape_tol`, closest first. A key query excludes itself.
+        """
+        with self._lock:
+            q = self._query_vec(query)
+            order, band = self._sorted()
+            r = math.log1p(tol)
+            lo = np.searchsorted(band, q[0] - r, side='left')
+            hi = np.searchsorted(band, q[0] + r, side='right')
+            rows = order[lo:hi]
+            vec = self._vec[rows]
+            size = np.abs(vec[:, :SIZE_DIMS] - q[:SIZE_DIMS]).max(axis=1)
+            shape = np.abs(vec[:, SIZE_DIMS:] - q[SIZE_DIMS:]).sum(axis=1)
+            keep = (size <= r + 1e-6) & (shape <= shape_tol + 1e-6)
+            rows, size, shape = rows[keep], size[keep], shape[keep]
+            rank = np.lexsort((shape, size))
+            return self._matches(rows[rank], size[rank], shape[rank],
+                                 query if isinstance(query, str) else None)
+
+    def nearest(self, query: Union[str, np.ndarray],
+                k: int = 10) -> list[Match]:
+        """
+        The `k` most similar parts (size and shape), closest first. Exact:
+        the distance is at least the difference of the largest extents,
+        so only the band within the k-th distance found so far is scanned.
+        """
+        with self._lock:
+            q = self._query_vec(query)
+            order, band = self._sorted()
+            exclude = query if isinstance(query, str) else None
+            want = k + (exclude is not None)  # room for the query itself
+            if not len(order) or want <= 0:
+                return []
+            at = int(np.searchsorted(band, q[0]))
+            lo, hi = max(0, at - 2 * want), min(len(order), at + 2 * want)
+            while True:
+                rows = order[lo:hi]
+                vec = self._vec[rows]
+                size = np.abs(vec[:, :SIZE_DIMS] - q[:SIZE_DIMS]).max(axis=1)
+                shape = np.abs(vec[:, SIZE_DIMS:] - q[SIZE_DIMS:]).sum(axis=1)
+                dist = size + D2_WEIGHT * shape
+                n = min(want, len(rows))
+                reach = float(np.partition(dist, n - 1)[n - 1]) \
+                    if n == want else np.inf
+                lo2 = int(np.searchsorted(band, q[0] - reach, side='left'))
+                hi2 = int(np.searchsorted(band, q[0] + reach, side='right'))
+                if lo2 >= lo and hi2 <= hi:
+                    break
+                # Widen geometrically: a far k-th candidate of a narrow
+                # window would otherwise pull in most of the index
+                grow = hi - lo
+                lo = max(min(lo, lo2), lo - grow)
+                hi = min(max(hi, hi2), hi + grow)
+            top = np.argpartition(dist, n - 1)[:n] if n < len(rows) \
+                else np.arange(len(rows))
+            top = top[np.argsort(dist[top], kind='stable')]
+            return self._matches(rows[top], size[top], shape[top],
+                                 exclude)[:k]
+
+    # ---- Persistence ----
+
+    def compact(self) -> None:
+        """ Drop removed rows from the arrays. """
+        with self._lock:
+            rows = sorted(self._row.values())
+            self._vec = self._vec[rows].copy()
+            self._alive = np.ones(len(rows), dtype=bool)
+            self._keys = [self._keys[i] for i in rows]
+            self._fps = [self._fps[i] for i in rows]
+            self._meta = [self._meta[i] for i in rows]
+            self._n = len(rows)
+            self._row = {k: i for i, k in enumerate(self._keys)}
+            self._by_fp = {}
+            for i, fp in enumerate(self._fps):
+                if fp:
+                    self._by_fp.setdefault(fp, i)
+            self._order = None
+
+    def save(self, path: Optional[str] = None) -> str:
+        """
+        Write the index atomically (as .npz, no pickles). The arrays are
+        copied under the index lock and written outside it, so queries
+        are not held up by the disk.
+        """
+        path = path or self.path
+        with self._save_lock:
+            with self._lock:
+                self.compact()
+                arrays = {
+                    'version': np.array(VERSION),
+                    'vectors': self._vec.copy(),
+                    'keys': np.array(self._keys, dtype=str),
+                    'fps': np.array(self._fps, dtype=str),
+                    'meta': np.array(json.dumps(self._meta)),
+                }
+                self.dirty = False
+            os.makedirs(os.path.dirname(os.path.abspath(path)),
+                        exist_ok=True)
+            fd, tmp = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, **arrays)
+                os.replace(tmp, path)
+            except BaseException:
+                self.dirty = True
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'SimilarityIndex':
+        """ The index saved at `path`, empty if missing or outdated. """
+        index = cls(path)
+        try:
+            with np.load(index.path, allow_pickle=False) as z:
+                if int(z['version']) != VERSION:
+                    log.info(f'[similarity] dropping index v{z["version"]} '
+                             f'({index.path})')
+                    return index
+                vec = z['vectors'].astype(np.float32).reshape(-1, DIMS)
+                keys = z['keys'].tolist()
+                fps = z['fps'].tolist()
+                meta = json.loads(str(z['meta']))
+        except FileNotFoundError:
+            return index
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f'[similarity] ignoring unreadable index '
+                        f'{index.path}: {e}')
+            return index
+        if not len(keys) == len(fps) == len(meta) == len(vec):
+            log.warning(f'[similarity] ignoring malformed index {index.path}')
+            return index
+        index._vec = vec
+        index._alive = np.ones(len(vec), dtype=bool)
+        index._keys, index._fps, index._meta = keys, fps, meta
+        index._n = len(vec)
+        index._row = {k: i for i, k in enumerate(keys)}
+        for i, fp in enumerate(fps):
+            if fp:
+                index._by_fp.setdefault(fp, i)
+        return index
+
+
+_shared: Optional[SimilarityIndex] = None
+_shared_lock = threading.Lock()
+
+
+def shared_index() -> SimilarityIndex:
+    """ The process-wide index, loaded from default_path() on first use. """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            with span('similarity_load'):
+                _shared = SimilarityIndex.load()
+            log.info(f'[similarity] {len(_shared):,} parts indexed '
+                     f'({_shared.path})')
+        return _shared
@@ -0,0 +1,41 @@
+"""
+Standard part library: fasteners and structural profiles.
+
+    from atlas_runtime import stdparts
+
+    bolt = stdparts.part('ISO 4017', 'M8', 40)   # AtlasPart, BOM line set
+    nut = stdparts.part('ISO 4032', 'M8')
+    rail = stdparts.part('EN 10219', 'SHS40x3', 1200)
+    stdparts.find(standard='ISO 4017', size='M8')  # preferred lengths
+
+Each catalog row is built once per process and its mesh is persisted in a
+content-addressed cache (ATLAS_STDPARTS_CACHE, default
+~/.cache/atlas/stdparts), so placing thousands of fasteners costs one
+definition per size and no meshing on later runs.
+"""
+from __future__ import annotations
+from typing import Optional
+
+from .. import AtlasPart
+from .catalog import Catalog, Standard, StdSpec
+from .store import MeshStore
+from . import fasteners, profiles
+
+__all__ = ['Catalog', 'Standard', 'StdSpec', 'MeshStore', 'catalog',
+           'part', 'find']
+
+catalog = Catalog()
+for _std in fasteners.STANDARDS + profiles.STANDARDS:
+    catalog.register(_std)
+
+
+def part(standard: str, size: str, length: Optional[float] = None,
+         material: str = 'steel') -> AtlasPart:
+    """ Shared AtlasPart for a catalog row (see Catalog.part). """
+    return catalog.part(standard, size, length, material)
+
+
+def find(standard: Optional[str] = None, size: Optional[str] = None,
+         length: Optional[float] = None,
+         kind: Optional[str] = None) -> list[StdSpec]:
+    return catalog.find(standard, size, length, kind)
@@ -0,0 +1,246 @@
+"""
+Catalog of parametric standard parts.
+
+A Standard is a size table plus a generator building the shape for one
+(size, length) row. The Catalog indexes standards by code, size and
+length, builds each shape once per process and persists its mesh in a
+MeshStore, so later runs (and the viewer) skip OCC meshing entirely.
+"""
+from __future__ import annotations
+import bisect
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+from .. import AtlasPart, AtlasBom, TopoDS_Shape
+from ..fingerprint import register_mesh, shape_mesh
+from ..tracing import span
+from .store import MeshStore, spec_key
+
+log = logging.getLogger(__name__)
+
+
+def norm_code(code: str) -> str:
+    """ 'ISO 4017', 'iso4017' and 'ISO-4017' are the same standard. """
+    return ''.join(ch for ch in str(code).upper() if ch.isalnum())
+
+
+def _norm_length(length: Optional[float]) -> Optional[float]:
+    return None if length is None else round(float(length), 3)
+
+
+@dataclass(frozen=True)
+class Standard:
+    code: str  # 'ISO 4017'
+    kind: str  # 'bolt', 'nut', 'washer', 'profile'...
+    title: str  # 'Hex bolt'
+    sizes: dict[str, dict[str, float]]  # size -> dimensions
+    build: Callable[[dict[str, float], Optional[float]], TopoDS_Shape]
+    # Preferred lengths per size; empty = no length, None = any length
+    lengths: Optional[dict[str, Sequence[float]]] = field(
+        default_factory=dict)
+    unit: str = 'pcs'  # 'm' for stock sold by length
+    version: int = 1  # bump when the generator output changes
+
+    @property
+    def has_length(self) -> bool:
+        return self.lengths is None or bool(self.lengths)
+
+
+@dataclass(frozen=True)
+class StdSpec:
+    """ One catalog row: a standard at a size (and length). """
+    standard: Standard
+    size: str
+    length: Optional[float] = None
+
+    @property
+    def dims(self) -> dict[str, float]:
+        return self.standard.sizes[self.size]
+
+    @property
+    def designation(self) -> str:
+        """ 'M8x40', 'L50x5x1200' or 'M8'. """
+        if self.length is None:
+            return self.size
+        return f'{self.size}x{self.length:g}'
+
+    @property
+    def key(self) -> str:
+        """ Content address of the generated geometry. """
+        return spec_key(self.as_dict())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {'standard': norm_code(self.standard.code), 'size': self.size,
+                'length': self.length, 'version': self.standard.version,
+                'dims': self.dims}
+
+
+class Catalog:
+    """
+    Index of standards with build-once shapes and persisted meshes.
+
+        cat.find('ISO 4017', 'M8')    -> specs for every preferred length
+        cat.part('ISO 4017', 'M8', 40) -> AtlasPart (same object each call)
+    """
+
+    def __init__(self, store: Optional[MeshStore] = None) -> None:
+        self.store = store if store is not None else MeshStore()
+        self._standards: dict[str, Standard] = {}
+        self._shapes: dict[str, TopoDS_Shape] = {}
+        self._parts: dict[tuple, AtlasPart] = {}
+        self._lock = threading.RLock()
+
+    # ---- Index ----
+
+    def register(self, std: Standard) -> Standard:
+        self._standards[norm_code(std.code)] = std
+        return std
+
+    def standard(self, code: str) -> Standard:
+        std = self._standards.get(norm_code(code))
+        if std is None:
+            raise KeyError(f'Unknown standard {code!r}; known: '
+                           f'{", ".join(self.standards())}')
+        return std
+
+    def standards(self, kind: Optional[str] = None) -> list[str]:
+        return sorted(s.code for s in self._standards.values()
+                      if kind is None or s.kind == kind)
+
+    def sizes(self, code: str) -> list[str]:
+        return list(self.standard(code).sizes)
+
+    def lengths(self, code: str, size: str) -> list[float]:
+        """ Preferred lengths (empty for parts without, or any length). """
+        std = self.standard(code)
+        self._check_size(std, size)
+        return sorted((std.lengths or {}).get(size, ()))
+
+    def find(self, standard: Optional[str] = None, size: Optional[str] = None,
+             length: Optional[float] = None,
+             kind: Optional[str] = None) -> list[StdSpec]:
+        """
+        Catalog rows matching every given field. For standards with
+        preferred lengths and no `length`, one row per preferred length.
+        """
+        stds = ([self.standard(standard)] if standard is not None
+                else list(self._standards.values()))
+        out = []
+        for std in stds:
+            if kind is not None and std.kind != kind:
+                continue
+            for sz in ([size] if size is not None else std.sizes):
+                if sz not in std.sizes:
+                    continue
+                if not std.has_length:
+                    if length is None:
+                        out.append(StdSpec(std, sz))
+                    continue
+                pref = sorted((std.lengths or {}).get(sz, ()))
+                if length is not None:
+                    if std.lengths is None or _norm_length(length) in pref:
+                        out.append(StdSpec(std, sz, _norm_length(length)))
+                else:
+                    out.extend(StdSpec(std, sz, ln) for ln in pref)
+        return out
+
+    def spec(self, code: str, size: str,
+             length: Optional[float] = None) -> StdSpec:
+        std = self.standard(code)
+        self._check_size(std, size)
+        if not std.has_length:
+            if length is not None:
+                raise ValueError(f'{std.code} {size} takes no length')
+            return StdSpec(std, size)
+        if length is None or float(length) <= 0:
+            raise ValueError(f'{std.code} {size} needs a positive length')
+        length = _norm_length(length)
+        if std.lengths is not None:
+            pref = sorted(std.lengths.get(size, ()))
+            if length not in pref:
+                i = bisect.bisect_left(pref, length)
+                near = ', '.join(f'{v:g}' for v in pref[max(0, i - 1):i + 1])
+                raise ValueError(f'{std.code} {size}: no preferred length '
+                                 f'{length:g} (nearest: {near})')
+        return StdSpec(std, size, length)
+
+    @staticmethod
+    def _check_size(std: Standard, size: str) -> None:
+        if size not in std.sizes:
+            raise KeyError(f'{std.code} has no size {size!r}; sizes: '
+                           f'{", ".join(std.sizes)}')
+
+    # ---- Geometry ----
+
+    def shape(self, spec: StdSpec) -> TopoDS_Shape:
+        """ Shape for `spec`, built once per process, mesh from the store. """
+        key = spec.key
+        shp = self._shapes.get(key)
+        if shp is not None:
+            return shp
+        with self._lock:
+            shp = self._shapes.get(key)
+            if shp is not None:
+                return shp
+            with span('stdpart_build', standard=spec.standard.code,
+                      size=spec.designation):
+                shp = spec.standard.build(spec.dims, spec.length)
+            tris = self.store.load(key)
+            if tris is None:
+                with span('stdpart_mesh', size=spec.designation):
+                    tris = shape_mesh(shp).astype(np.float32)
+                self.store.save(key, tris.reshape(-1, 9), spec.as_dict())
+            register_mesh(shp, tris)
+            self._shapes[key] = shp
+            return shp
+
+    def part(self, code: str, size: str, length: Optional[float] = None,
+             material: str = 'steel') -> AtlasPart:
+        """
+        AtlasPart for a catalog row; repeated calls return the same object
+        so every use shares one definition (and one mesh).
+        """
+        pkey = (norm_code(code), size, _norm_length(length), material)
+        part = self._parts.get(pkey)
+        if part is not None:
+            return part
+
+        spec = self.spec(code, size, length)
+        shp = self.shape(spec)
+        std = spec.standard
+        code_id = norm_code(std.code)
+        props = {'standard': std.code, 'size': spec.size, 'kind': std.kind,
+                 'material': material, **spec.dims}
+        desc = f'{std.title} {std.code} {spec.designation}'
+        if std.unit == 'pcs':
+            part_no = f'{code_id}-{spec.designation}'
+            bom = AtlasBom(part_no=part_no, qty=1.0, unit='pcs', desc=desc,
+                           props=props)
+        else:
+            # Stock by length: one BOM line per section, qty in metres
+            part_no = f'{code_id}-{spec.designation}'
+            props['length'] = spec.length
+            bom = AtlasBom(part_no=f'{code_id}-{spec.size}',
+                           qty=spec.length / 1000.0, unit=std.unit,
+                           desc=f'{std.title} {std.code} {spec.size}',
+                           props=props)
+        if material != 'steel':
+            part_no = f'{part_no}-{material}'
+            bom = AtlasBom(part_no=f'{bom.part_no}-{material}', qty=bom.qty,
+                           unit=bom.unit, desc=f'{bom.desc} {material}',
+                           props=props)
+        part = AtlasPart(def_id=f'STD/{code_id}/{spec.designation}/{material}',
+                         shape=shp, part_no=part_no, desc=desc,
+                         material=material, props=props, bom_line=bom)
+        with self._lock:
+            return self._parts.setdefault(pkey, part)
+
+    def clear(self) -> None:
+        """ Forget built shapes and parts (the persisted meshes stay). """
+        with self._lock:
+            self._shapes.clear()
+            self._parts.clear()
@@ -0,0 +1,97 @@
+"""
+Metric fasteners. Nominal dimensions, threads are not modelled.
+
+Axis is +Z. Bolts stand on the bearing face of the head at z = 0 with the
+shank along -Z; nuts and washers sit on z = 0 and extend along +Z.
+"""
+from __future__ import annotations
+import math
+from typing import Optional
+
+from .. import _atlas_occ_lazy as atlas_occ, TopoDS_Shape
+from .catalog import Standard
+
+# size: thread d, width across flats s, head height k (ISO 4017)
+HEX_BOLT = {
+    'M3': {'d': 3.0, 's': 5.5, 'k': 2.0},
+    'M4': {'d': 4.0, 's': 7.0, 'k': 2.8},
+    'M5': {'d': 5.0, 's': 8.0, 'k': 3.5},
+    'M6': {'d': 6.0, 's': 10.0, 'k': 4.0},
+    'M8': {'d': 8.0, 's': 13.0, 'k': 5.3},
+    'M10': {'d': 10.0, 's': 16.0, 'k': 6.4},
+    'M12': {'d': 12.0, 's': 18.0, 'k': 7.5},
+    'M16': {'d': 16.0, 's': 24.0, 'k': 10.0},
+    'M20': {'d': 20.0, 's': 30.0, 'k': 12.5},
+    'M24': {'d': 24.0, 's': 36.0, 'k': 15.0},
+}
+
+# Nut height m (ISO 4032), same widths across flats as the bolts
+HEX_NUT = {size: {'d': v['d'], 's': v['s'], 'm': m} for (size, v), m in zip(
+    HEX_BOLT.items(), (2.4, 3.2, 4.7, 5.2, 6.8, 8.4, 10.8, 14.8, 18.0, 21.5))}
+
+# Plain washer: hole d1, outer d2, thickness h (ISO 7089)
+WASHER = {
+    'M3': {'d1': 3.2, 'd2': 7.0, 'h': 0.5},
+    'M4': {'d1': 4.3, 'd2': 9.0, 'h': 0.8},
+    'M5': {'d1': 5.3, 'd2': 10.0, 'h': 1.0},
+    'M6': {'d1': 6.4, 'd2': 12.0, 'h': 1.6},
+    'M8': {'d1': 8.4, 'd2': 16.0, 'h': 1.6},
+    'M10': {'d1': 10.5, 'd2': 20.0, 'h': 2.0},
+    'M12': {'d1': 13.0, 'd2': 24.0, 'h': 2.5},
+    'M16': {'d1': 17.0, 'd2': 30.0, 'h': 3.0},
+    'M20': {'d1': 21.0, 'd2': 37.0, 'h': 3.0},
+    'M24': {'d1': 25.0, 'd2': 44.0, 'h': 4.0},
+}
+
+# Preferred nominal lengths, offered from 2d to 10d (capped at 200 mm)
+_LENGTH_SERIES = (6, 8, 10, 12, 16, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65,
+                  70, 80, 90, 100, 110, 120, 130, 140, 150, 160, 180, 200)
+BOLT_LENGTHS = {size: tuple(float(n) for n in _LENGTH_SERIES
+                            if 2 * v['d'] <= n <= min(10 * v['d'], 200))
+                for size, v in HEX_BOLT.items()}
+
+
+def hex_prism(s: float, height: float) -> TopoDS_Shape:
+    """ Hexagonal prism, width across flats `s`, on z = 0 along +Z. """
+    r = s / math.sqrt(3.0)  # circumradius
+    pts = [[r * math.cos(math.radians(30 + 60 * i)),
+            r * math.sin(math.radians(30 + 60 * i)), 0.0] for i in range(6)]
+    face = atlas_occ.make_wire_face(pts, True, True)
+    return atlas_occ.extrude_shape(face, 0.0, 0.0, height)
+
+
+def _bore(d: float, height: float) -> TopoDS_Shape:
+    # Overshoots both faces so the cut leaves no skin
+    return atlas_occ.xform_move(atlas_occ.make_cylinder(d / 2, height + 2),
+                                0.0, 0.0, -1.0)
+
+
+def build_hex_bolt(dims: dict[str, float],
+                   length: Optional[float]) -> TopoDS_Shape:
+    head = hex_prism(dims['s'], dims['k'])
+    shank = atlas_occ.xform_move(
+        atlas_occ.make_cylinder(dims['d'] / 2, float(length)),
+        0.0, 0.0, -float(length))
+    return atlas_occ.bool_fuse(head, shank)
+
+
+def build_hex_nut(dims: dict[str, float],
+                  _length: Optional[float]) -> TopoDS_Shape:
+    return atlas_occ.bool_cut(hex_prism(dims['s'], dims['m']),
+                              _bore(dims['d'], dims['m']))
+
+
+def build_washer(dims: dict[str, float],
+                 _length: Optional[float]) -> TopoDS_Shape:
+    disc = atlas_occ.make_cylinder(dims['d2'] / 2, dims['h'])
+    return atlas_occ.bool_cut(disc, _bore(dims['d1'], dims['h']))
+
+
+STANDARDS = (
+    Standard(code='ISO 4017', kind='bolt', title='Hex bolt', sizes=HEX_BOLT,
+             build=build_hex_bolt, lengths=BOLT_LENGTHS),
+    Standard(code='ISO 4032', kind='nut', title='Hex nut', sizes=HEX_NUT,
+             build=build_hex_nut),
+    Standard(code='ISO 7089', kind='washer', title='Plain washer',
+             sizes=WASHER, build=build_washer),
+)
@@ -0,0 +1,51 @@
+"""
+Structural steel sections, cut to any length. Root and corner radii are
+not modelled.
+
+The section lies in the XY plane and is extruded along +Z from z = 0.
+"""
+from __future__ import annotations
+from typing import Optional
+
+from .. import _atlas_occ_lazy as atlas_occ, TopoDS_Shape
+from .catalog import Standard
+
+# Equal leg angle: leg a, thickness t (EN 10056-1)
+ANGLE = {f'L{a}x{t}': {'a': float(a), 't': float(t)} for a, t in (
+    (20, 3), (25, 3), (30, 3), (40, 4), (50, 5), (60, 6), (80, 8),
+    (100, 10))}
+
+# Square hollow section: outside a, wall t (EN 10219)
+SHS = {f'SHS{a}x{t}': {'a': float(a), 't': float(t)} for a, t in (
+    (20, 2), (30, 3), (40, 3), (50, 3), (60, 4), (80, 4), (100, 5))}
+
+
+def _prism(points: list[tuple[float, float]], length: float) -> TopoDS_Shape:
+    face = atlas_occ.make_wire_face([[x, y, 0.0] for x, y in points],
+                                    True, True)
+    return atlas_occ.extrude_shape(face, 0.0, 0.0, length)
+
+
+def build_angle(dims: dict[str, float],
+                length: Optional[float]) -> TopoDS_Shape:
+    a, t = dims['a'], dims['t']
+    return _prism([(0, 0), (a, 0), (a, t), (t, t), (t, a), (0, a)],
+                  float(length))
+
+
+def build_shs(dims: dict[str, float],
+              length: Optional[float]) -> TopoDS_Shape:
+    a, t, n = dims['a'], dims['t'], float(length)
+    outer = _prism([(0, 0), (a, 0), (a, a), (0, a)], n)
+    inner = atlas_occ.xform_move(
+        _prism([(t, t), (a - t, t), (a - t, a - t), (t, a - t)], n + 2),
+        0.0, 0.0, -1.0)
+    return atlas_occ.bool_cut(outer, inner)
+
+
+STANDARDS = (
+    Standard(code='EN 10056-1', kind='profile', title='Equal angle',
+             sizes=ANGLE, build=build_angle, lengths=None, unit='m'),
+    Standard(code='EN 10219', kind='profile', title='Square hollow section',
+             sizes=SHS, build=build_shs, lengths=None, unit='m'),
+)
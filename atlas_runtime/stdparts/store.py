@@ -0,0 +1,103 @@
+"""
+Content-addressed on-disk cache of standard-part meshes.
+
+Each mesh is stored as <root>/<key[:2]>/<key>.npy, where key is a hash of
+the generator spec (standard, size, length, generator version). index.json
+maps keys back to their spec for inspection and cleanup.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def default_root() -> str:
+    env = os.getenv('ATLAS_STDPARTS_CACHE')
+    if env:
+        return env
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'atlas', 'stdparts')
+
+
+def spec_key(spec: dict[str, Any]) -> str:
+    blob = json.dumps(spec, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+
+class MeshStore:
+    """
+    Persistent (T, 9) float32 meshes by content key. Failures to write
+    (read-only home, full disk) are logged once and the store keeps
+    working in memory.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self.root = root or default_root()
+        self._index: Optional[dict[str, Any]] = None
+        self._writable = True
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f'{key}.npy')
+
+    @property
+    def index(self) -> dict[str, Any]:
+        if self._index is None:
+            try:
+                with open(os.path.join(self.root, 'index.json'),
+                          encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def load(self, key: str) -> Optional[np.ndarray]:
+        try:
+            tris = np.load(self._path(key), allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        if tris.dtype != np.float32 or tris.ndim != 2 or tris.shape[1] != 9:
+            log.warning(f'[stdparts] ignoring malformed cache entry {key}')
+            return None
+        return tris
+
+    def save(self, key: str, tris: np.ndarray, spec: dict[str, Any]) -> None:
+        if not self._writable:
+            return
+        tris = np.ascontiguousarray(tris, dtype=np.float32).reshape(-1, 9)
+        with self._lock:
+            try:
+                self._write_atomic(self._path(key),
+                                   lambda f: np.save(f, tris))
+                self.index[key] = spec
+                blob = json.dumps(self.index, sort_keys=True, indent=1)
+                self._write_atomic(os.path.join(self.root, 'index.json'),
+                                   lambda f: f.write(blob.encode()))
+            except OSError as e:
+                self._writable = False
+                log.warning(f'[stdparts] mesh cache not writable '
+                            f'({self.root}): {e}')
+
+    @staticmethod
+    def _write_atomic(path: str, write) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
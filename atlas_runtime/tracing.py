@@ -0,0 +1,215 @@
+"""
+Lightweight pipeline tracing.
+
+Spans nest per thread and are recorded into the TraceRun bound to the
+calling thread (one regeneration, one export...). A run started on the GUI
+thread is handed to its worker, which attaches it, so both halves of a job
+land in the same run. Closed runs are kept in a ring buffer and can be
+exported as Chrome trace / Perfetto JSON (chrome://tracing, ui.perfetto.dev).
+
+    with tracer.run('regen'):
+        with span('model'):
+            ...
+        counter('triangles', 12_000)
+"""
+from __future__ import annotations
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+import json, os, threading, time
+
+__all__ = ['TraceEvent',
+           'TraceRun',
+           'Tracer',
+           'tracer',
+           'span',
+           'counter']
+
+
+@dataclass
+class TraceEvent:
+    name: str
+    ph: str  # 'X' complete span | 'C' counter
+    ts: float  # perf_counter seconds
+    dur: float = 0.0
+    tid: int = 0
+    depth: int = 0
+    args: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class TraceRun:
+    label: str
+    t0: float
+    wall: float
+    t1: Optional[float] = None
+    events: list[TraceEvent] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        end = self.t1 if self.t1 is not None else time.perf_counter()
+        return end - self.t0
+
+    def stage_times(self) -> dict[str, float]:
+        """ Total seconds per top-level (depth 0) span name. """
+        out: dict[str, float] = {}
+        for ev in self.events:
+            if ev.ph == 'X' and ev.depth == 0:
+                out[ev.name] = out.get(ev.name, 0.0) + ev.dur
+        return out
+
+    def counters(self) -> dict[str, float]:
+        """ Last value recorded per counter series. """
+        out: dict[str, float] = {}
+        for ev in self.events:
+            if ev.ph == 'C':
+                for k, v in ev.args.items():
+                    out[f'{ev.name}.{k}' if k != 'value' else ev.name] = v
+        return out
+
+
+class Tracer:
+    def __init__(self, max_runs: int = 32, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.runs: deque[TraceRun] = deque(maxlen=max_runs)
+        self._epoch = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_names: dict[int, str] = {}
+
+    # ---- Runs ----
+
+    @staticmethod
+    def begin_run(label: str) -> TraceRun:
+        return TraceRun(label=label, t0=time.perf_counter(), wall=time.time())
+
+    def end_run(self, run: TraceRun) -> None:
+        if run.t1 is not None:
+            return
+        run.t1 = time.perf_counter()
+        with self._lock:
+            self.runs.append(run)
+
+    @contextmanager
+    def run(self, label: str) -> Iterator[TraceRun]:
+        """ Open a run, bound to the calling thread for the block. """
+        r = self.begin_run(label)
+        try:
+            with self.attach(r):
+                yield r
+        finally:
+            self.end_run(r)
+
+    @contextmanager
+    def attach(self, run: Optional[TraceRun]) -> Iterator[None]:
+        """
+        Bind a run to the calling thread, so a worker records into the run
+        its job was started under even if other runs open meanwhile.
+        """
+        prev = getattr(self._local, 'run', None)
+        self._local.run = run
+        try:
+            yield
+        finally:
+            self._local.run = prev
+
+    @property
+    def current(self) -> Optional[TraceRun]:
+        return getattr(self._local, 'run', None)
+
+    def last_runs(self, n: int) -> list[TraceRun]:
+        with self._lock:
+            return list(self.runs)[-n:]
+
+    # ---- Recording ----
+
+    def _record(self, ev: TraceEvent) -> None:
+        run = self.current
+        if run is None:
+            return
+        with self._lock:
+            run.events.append(ev)
+            tid = ev.tid
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+
+    @contextmanager
+    def span(self, name: str, **args) -> Iterator[dict[str, Any]]:
+        """
+        Time a block. Yields the args dict so counters discovered inside the
+        block (triangles, instances...) can be attached to the span.
+        """
+        if not self.enabled:
+            yield args
+            return
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        t0 = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self._local.depth = depth
+            self._record(TraceEvent(
+                name=name, ph='X', ts=t0, dur=time.perf_counter() - t0,
+                tid=threading.get_ident(), depth=depth, args=args))
+
+    def counter(self, name: str, value: float | None = None,
+                **series: float) -> None:
+        if not self.enabled:
+            return
+        if value is not None:
+            series['value'] = value
+        self._record(TraceEvent(
+            name=name, ph='C', ts=time.perf_counter(),
+            tid=threading.get_ident(), args=series))
+
+    # ---- Export ----
+
+    def chrome_trace(self, runs: Optional[list[TraceRun]] = None
+                     ) -> dict[str, Any]:
+        """ Build a Chrome trace event dict (timestamps in microseconds). """
+        pid = os.getpid()
+        runs = list(self.runs) if runs is None else runs
+        events: list[dict[str, Any]] = []
+        tids: set[int] = set()
+
+        for r in runs:
+            events.append({
+                'name': r.label, 'ph': 'X', 'pid': pid, 'tid': 0,
+                'ts': (r.t0 - self._epoch) * 1e6, 'dur': r.duration * 1e6,
+                'args': {'wall': r.wall}})
+            for ev in r.events:
+                tids.add(ev.tid)
+                out = {'name': ev.name, 'ph': ev.ph, 'pid': pid,
+                       'tid': ev.tid, 'ts': (ev.ts - self._epoch) * 1e6,
+                       'args': dict(ev.args)}
+                if ev.ph == 'X':
+                    out['dur'] = ev.dur * 1e6
+                events.append(out)
+
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                       'tid': 0, 'args': {'name': 'runs'}})
+        for tid in sorted(tids):
+            events.append({
+                'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                'args': {'name': self._thread_names.get(tid, str(tid))}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path: str,
+                            runs: Optional[list[TraceRun]] = None) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(runs), f)
+
+
+tracer = Tracer(max_runs=int(os.getenv('ATLAS_TRACE_RUNS', '32')),
+                enabled=os.getenv('ATLAS_TRACE', '1') != '0')
+
+
+def span(name: str, **args):
+    return tracer.span(name, **args)
+
+
+def counter(name: str, value: float | None = None, **series: float) -> None:
+    tracer.counter(name, value, **series)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+import logging
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+import numpy as np
+
+from PySide6.QtCore import Qt, QObject, Signal, QRunnable, QThreadPool, \
+    QAbstractTableModel, QModelIndex
+
+log = logging.getLogger(__name__)
+
+# (field, header) in display order
+COLUMNS = (('part_no', 'Part No'), ('desc', 'Description'),
+           ('qty', 'Qty'), ('unit', 'Unit'))
+TEXT_FIELDS = ('part_no', 'desc')  # searched by the filter
+
+# Views over more rows than this are sorted/filtered in the thread pool
+ASYNC_ROWS = 20_000
+
+
+@dataclass
+class BomColumns:
+    """ Rolled-up BOM stored column-wise, one array per field. """
+    part_no: np.ndarray  # str
+    desc: np.ndarray  # str
+    qty: np.ndarray  # float64
+    unit: np.ndarray  # str
+
+    def __len__(self) -> int:
+        return len(self.part_no)
+
+    @classmethod
+    def from_lines(cls, lines: Sequence[dict[str, Any]]) -> 'BomColumns':
+        def _col(name: str, default: str) -> np.ndarray:
+            return np.array([str(ln.get(name) or default) for ln in lines],
+                            dtype=str)
+
+        return cls(part_no=_col('part_no', ''), desc=_col('desc', ''),
+                   qty=np.array([float(ln.get('qty', 0.0)) for ln in lines],
+                                dtype=np.float64),
+                   unit=_col('unit', 'pcs'))
+
+    def same_keys(self, other: 'BomColumns') -> bool:
+        """ True if both hold the same (part_no, unit) rows in order. """
+        return (len(self) == len(other) and
+                np.array_equal(self.part_no, other.part_no) and
+                np.array_equal(self.unit, other.unit))
+
+
+def compute_view(cols: BomColumns, sort_field: str | None = None,
+                 descending: bool = False, text: str = '') -> np.ndarray:
+    """
+    Row indices of `cols` to display: rows whose part_no/desc contain
+    `text` (case-insensitive), stably sorted by `sort_field`.
+    """
+    rows = np.arange(len(cols))
+    needle = text.strip().lower()
+    if needle and len(rows):
+        hit = np.zeros(len(rows), dtype=bool)
+        for name in TEXT_FIELDS:
+            hit |= np.char.find(np.char.lower(getattr(cols, name)),
+                                needle) >= 0
+        rows = rows[hit]
+
+    if sort_field is not None and len(rows):
+        keys = getattr(cols, sort_field)[rows]
+        order = np.argsort(keys, kind='stable')
+        if descending:
+            order = _stable_reverse(keys, order)
+        rows = rows[order]
+    return rows
+
+
+def _stable_reverse(keys: np.ndarray, asc: np.ndarray) -> np.ndarray:
+    """ Descending order of `keys` with ties kept in ascending index order. """
+    desc = asc[::-1]
+    sorted_keys = keys[desc]
+    # Group boundaries of equal keys, then restore index order inside groups
+    change = np.ones(len(desc), dtype=bool)
+    change[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    group = np.cumsum(change)
+    return desc[np.lexsort((desc, group))]
+
+
+class _ViewSignals(QObject):
+    ready = Signal(object, object, int)  # (columns, rows, generation)
+
+
+class _ViewTask(QRunnable):
+    def __init__(self, cols: BomColumns, sort_field: str | None,
+                 descending: bool, text: str, gen: int) -> None:
+        super().__init__()
+        self.cols = cols
+        self.args = (cols, sort_field, descending, text)
+        self.gen = gen
+        self.signals = _ViewSignals()
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        try:
+            rows = compute_view(*self.args)
+        except Exception as e:
+            log.exception(f'[bom] view computation failed: {e}')
+            return
+        self.signals.ready.emit(self.cols, rows, self.gen)
+
+
+class BomTableModel(QAbstractTableModel):
+    """
+    Virtualized table over BomColumns. Qt only asks for visible cells, so
+    cost per frame is independent of the BOM size.
+
+    Sorting and filtering produce a row index array (`rows`) computed with
+    NumPy, in the thread pool for large BOMs; results from superseded
+    requests are dropped. set_columns() diffs against the current BOM: when
+    only quantities/descriptions changed, the affected visible rows are
+    updated in place instead of resetting the model.
+    """
+
+    viewChanged = Signal()
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._cols = BomColumns.from_lines([])  # shown
+        self._latest = self._cols  # newest BOM, may still await its view
+        self._rows = np.arange(0)
+        self._sort_field: str | None = None
+        self._descending = False
+        self._filter = ''
+        self._gen = 0
+        self._pool = QThreadPool.globalInstance()
+
+    # ---- Qt model interface ----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        name = COLUMNS[index.column()][0]
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = getattr(self._cols, name)[self._rows[index.row()]]
+            if name == 'qty':
+                return f'{value:g}'
+            return str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and name == 'qty':
+            return int(Qt.AlignmentFlag.AlignRight |
+                       Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(self, section: int, orientation,
+                   role=Qt.ItemDataRole.DisplayRole):
+        if (role == Qt.ItemDataRole.DisplayRole and
+                orientation == Qt.Orientation.Horizontal):
+            return COLUMNS[section][1]
+        return None
+
+    def sort(self, column: int,
+             order=Qt.SortOrder.AscendingOrder) -> None:
+        self._sort_field = COLUMNS[column][0] if 0 <= column < len(
+            COLUMNS) else None
+        self._descending = order == Qt.SortOrder.DescendingOrder
+        self._request_view()
+
+    # ---- BOM updates ----
+
+    @property
+    def columns(self) -> BomColumns:
+        return self._cols
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._rows
+
+    def set_filter(self, text: str) -> None:
+        if text != self._filter:
+            self._filter = text
+            self._request_view()
+
+    def set_columns(self, cols: BomColumns) -> None:
+        old = self._cols
+        if len(old) and self._latest is old and old.same_keys(cols):
+            changed = np.flatnonzero((old.qty != cols.qty) |
+                                     (old.desc != cols.desc))
+            self._cols = self._latest = cols
+            if changed.size == 0:
+                return
+            if self._sort_field in ('qty', 'desc') or self._filter:
+                # Changed values may move or hide rows
+                self._request_view()
+                return
+            self._emit_rows_changed(changed)
+            return
+
+        self._latest = cols
+        self._request_view()
+
+    def _emit_rows_changed(self, source_rows: np.ndarray) -> None:
+        pos = np.full(len(self._cols), -1, dtype=np.int64)
+        pos[self._rows] = np.arange(len(self._rows))
+        view_rows = pos[source_rows]
+        view_rows = view_rows[view_rows >= 0]
+        if view_rows.size:
+            self.dataChanged.emit(
+                self.index(int(view_rows.min()), 0),
+                self.index(int(view_rows.max()), len(COLUMNS) - 1))
+
+    def _request_view(self) -> None:
+        self._gen += 1
+        cols = self._latest
+        args = (cols, self._sort_field, self._descending, self._filter)
+        if len(cols) <= ASYNC_ROWS:
+            self._apply_view(cols, compute_view(*args), self._gen)
+            return
+        task = _ViewTask(*args, self._gen)
+        task.signals.ready.connect(
+            self._apply_view, Qt.ConnectionType.QueuedConnection)
+        self._pool.start(task)
+
+    def _apply_view(self, cols: BomColumns, rows: np.ndarray,
+                    gen: int) -> None:
+        if gen != self._gen:
+            return  # superseded by a newer sort/filter/BOM
+        if cols is self._cols and len(rows) == len(self._rows):
+            # Same BOM, new order
+            self.layoutAboutToBeChanged.emit()
+            self._rows = rows
+            self.layoutChanged.emit()
+        else:
+            self.beginResetModel()
+            self._cols = cols
+            self._rows = rows
+            self.endResetModel()
+        self.viewChanged.emit()
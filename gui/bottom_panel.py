@@ -1,13 +1,349 @@
-from PySide6.QtWidgets import QWidget, QHBoxLayout, QLabel
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, \
+    QComboBox, QDoubleSpinBox, QSlider, QPushButton, QFileDialog, \
+    QMessageBox
+from PySide6.QtGui import QPainter, QPainterPath, QColor, QPen, QBrush
+from PySide6.QtCore import Qt, QThreadPool, QPointF, QLineF
 from PySide6 import QtCore
 
+from atlas_runtime.section import Section, export_dxf
+from atlas_runtime.projection import Drawing, VIEWS, export_views_dxf
+from gui.workers import SectionWorker, ProjectionWorker
+
+AXES = ('x', 'y', 'z')
+MODES = ('sections',) + tuple(VIEWS)
+FILL_COLOR = QColor(0, 255, 200, 60)
+LINE_COLOR = QColor('#00ffc8')
+HIDDEN_COLOR = QColor('#5a7f78')
+
+
+def _fit(lo: np.ndarray, hi: np.ndarray, w: int, h: int,
+         pad: int = 10) -> tuple[float, float, float]:
+    """ Scale and screen origin fitting the box lo..hi into w x h. """
+    size = np.maximum(hi - lo, 1e-9)
+    scale = min((w - 2 * pad) / size[0], (h - 2 * pad) / size[1])
+    return scale, (w - size[0] * scale) / 2, (h + size[1] * scale) / 2
+
+
+class _SectionView(QWidget):
+    """
+    One section (closed loops filled even-odd) or one drawing view
+    (hidden lines dashed) fitted to the widget.
+    """
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.section: Section | None = None
+        self.drawing: Drawing | None = None
+        self.message = 'No model'
+        self.setMinimumSize(200, 120)
+
+    def set_section(self, section: Section | None, message: str = '') -> None:
+        self.section, self.drawing = section, None
+        self.message = message
+        self.update()
+
+    def set_drawing(self, drawing: Drawing | None, message: str = '') -> None:
+        self.section, self.drawing = None, drawing
+        self.message = message
+        self.update()
+
+    def paintEvent(self, event) -> None:
+        p = QPainter(self)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        p.fillRect(self.rect(), QColor(30, 30, 30))
+
+        if self.drawing is not None:
+            bounds = self.drawing.bounds()
+        else:
+            bounds = self.section.bounds2d() if self.section else None
+        if bounds is None:
+            p.setPen(QColor('#888'))
+            p.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter,
+                       self.message or 'Empty section')
+            return
+
+        lo, _hi = bounds
+        scale, ox, oy = _fit(*bounds, self.width(), self.height())
+        if self.drawing is not None:
+            self._paint_drawing(p, lo, scale, ox, oy)
+            return
+
+        fill, lines = QPainterPath(), QPainterPath()
+        fill.setFillRule(Qt.FillRule.OddEvenFill)
+        for xy, closed in self.section.paths2d():
+            # Model y up, screen y down
+            sx = ox + (xy[:, 0] - lo[0]) * scale
+            sy = oy - (xy[:, 1] - lo[1]) * scale
+            path = fill if closed else lines
+            path.moveTo(QPointF(sx[0], sy[0]))
+            for x, y in zip(sx[1:].tolist(), sy[1:].tolist()):
+                path.lineTo(x, y)
+            if closed:
+                path.closeSubpath()
+
+        p.setPen(QPen(LINE_COLOR, 1))
+        p.setBrush(QBrush(FILL_COLOR))
+        p.drawPath(fill)
+        p.setBrush(Qt.BrushStyle.NoBrush)
+        p.drawPath(lines)
+
+    def _paint_drawing(self, p: QPainter, lo: np.ndarray, scale: float,
+                       ox: float, oy: float) -> None:
+        def screen(segs: np.ndarray) -> list[QLineF]:
+            s = segs.astype(np.float64).reshape(-1, 4)
+            s[:, 0::2] = ox + (s[:, 0::2] - lo[0]) * scale
+            s[:, 1::2] = oy - (s[:, 1::2] - lo[1]) * scale
+            return [QLineF(*r) for r in s.tolist()]
+
+        p.setPen(QPen(HIDDEN_COLOR, 1, Qt.PenStyle.DashLine))
+        p.drawLines(screen(self.drawing.hidden))
+        p.setPen(QPen(LINE_COLOR, 1))
+        p.drawLines(screen(self.drawing.visible))
+
+
 class BottomPanel(QWidget):
-    def __init__(self):
+    """
+    Drawing / export previews of the shown model, computed off the GUI
+    thread:
+     - Sections: a stack of parallel sections cut from the cached
+       triangles, with a slider through the planes
+     - Front / Top / Right / Iso: hidden-line drawing views, projected per
+       distinct part and cached, so a changed model only re-projects the
+       parts that changed
+    Each mode exports to DXF; views are only projected once shown.
+    """
+
+    def __init__(self, axis: str = 'z', step: float = 10.0):
         super().__init__()
         self.setObjectName('Panel')
         # noinspection PyUnresolvedReferences
         self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
 
+        self.pool = QThreadPool.globalInstance()
+        self.export_name = 'atlas_model'
+        self._asm = None
+        self._tris = None
+        self._sections: list[Section] | None = None
+        self._drawings: dict[str, Drawing] | None = None
+        self._gen = 0
+        self._view_gen = 0
+        self._view_pending = False
+
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems([m.capitalize() for m in MODES])
+        self.axis_combo = QComboBox()
+        self.axis_combo.addItems([a.upper() for a in AXES])
+        self.axis_combo.setCurrentIndex(
+            AXES.index(axis.lower()) if axis.lower() in AXES else 2)
+        self.step_spin = QDoubleSpinBox()
+        self.step_spin.setRange(0.1, 100000.0)
+        self.step_spin.setDecimals(1)
+        self.step_spin.setSuffix(' mm')
+        self.step_spin.setValue(step)
+        self.step_spin.setKeyboardTracking(False)
+        self.slider = QSlider(Qt.Orientation.Horizontal)
+        self.slider.setEnabled(False)
+        self.info = QLabel('')
+        self.export_btn = QPushButton('Export DXF…')
+        self.export_btn.setEnabled(False)
+        self.view = _SectionView(self)
+
+        row = QHBoxLayout()
+        row.addWidget(self.mode_combo)
+        row.addWidget(self.axis_combo)
+        row.addWidget(self.step_spin)
+        controls = QVBoxLayout()
+        controls.addWidget(QLabel('Drawing / Export Previews'))
+        controls.addLayout(row)
+        controls.addWidget(self.slider)
+        controls.addWidget(self.info)
+        controls.addStretch()
+        controls.addWidget(self.export_btn)
+
         layout = QHBoxLayout(self)
-        layout.addWidget(QLabel('Drawing / Export Previews'))
-        layout.addStretch()
+        layout.addLayout(controls)
+        layout.addWidget(self.view, 1)
+
+        self.mode_combo.currentIndexChanged.connect(self._refresh)
+        self.axis_combo.currentIndexChanged.connect(self._recompute)
+        self.step_spin.valueChanged.connect(self._recompute)
+        self.slider.valueChanged.connect(self._show_section)
+        self.export_btn.clicked.connect(self._export_dxf)
+
+    @property
+    def axis(self) -> str:
+        return AXES[self.axis_combo.currentIndex()]
+
+    @property
+    def mode(self) -> str:
+        return MODES[self.mode_combo.currentIndex()]
+
+    def set_model(self, asm, tris) -> None:
+        """
+        Preview an assembly and its placed triangles (None clears the
+        panel). Only the shown mode is computed now, the other on demand.
+        """
+        self._asm = asm
+        self._tris = tris if tris is not None and len(tris) else None
+        self._sections = None
+        self._drawings = None
+        self._gen += 1
+        self._view_gen += 1
+        self._view_pending = False
+        self._refresh()
+
+    def _refresh(self, *_) -> None:
+        sections = self.mode == 'sections'
+        for w in (self.axis_combo, self.step_spin, self.slider):
+            w.setVisible(sections)
+        if sections:
+            if self._sections is None:
+                self._recompute()
+            else:
+                self._set_sections(self._sections,
+                                   'Model does not cross any plane')
+        elif self._drawings is not None:
+            self._show_drawing()
+        else:
+            self._project()
+
+    # ---- Sections ----
+
+    def _recompute(self, *_) -> None:
+        self._gen += 1
+        if self._tris is None:
+            self._set_sections([], 'No model')
+            return
+        self._sections = None
+        if self.mode != 'sections':
+            return  # cut when shown
+        self.info.setText('Sectioning…')
+        worker = SectionWorker(self._gen, self._tris, self.axis,
+                               self.step_spin.value())
+        worker.signals.finished.connect(
+            self._on_sections, Qt.ConnectionType.QueuedConnection)
+        worker.signals.error.connect(
+            self._on_error, Qt.ConnectionType.QueuedConnection)
+        self.pool.start(worker)
+
+    def _on_sections(self, gen: int, sections: list, dt: float) -> None:
+        if gen != self._gen:
+            return  # superseded by a newer model or setting
+        logging.info(f'[section] {len(sections)} planes along {self.axis} '
+                     f'in {dt:.3f}s')
+        self._set_sections(sections, 'Model does not cross any plane')
+
+    def _on_error(self, gen: int, msg: str) -> None:
+        if gen == self._gen:
+            self._set_sections([], f'Sectioning failed: {msg}')
+
+    def _set_sections(self, sections: list[Section], empty: str) -> None:
+        self._sections = sections
+        if self.mode != 'sections':
+            return
+        self.export_btn.setEnabled(any(s.polylines for s in sections))
+        self.slider.blockSignals(True)
+        self.slider.setRange(0, max(0, len(sections) - 1))
+        self.slider.setValue(len(sections) // 2)
+        self.slider.setEnabled(len(sections) > 1)
+        self.slider.blockSignals(False)
+        if sections:
+            self._show_section(self.slider.value())
+        else:
+            self.info.setText('')
+            self.view.set_section(None, empty)
+
+    def _show_section(self, i: int) -> None:
+        if not self._sections or not 0 <= i < len(self._sections):
+            return
+        sec = self._sections[i]
+        loops = len(sec.closed)
+        open_ = len(sec.polylines) - loops
+        self.info.setText(
+            f'{self.axis} = {sec.offset:g} mm  ({i + 1}/{len(self._sections)})'
+            f'  {loops} loop{"s" if loops != 1 else ""}'
+            + (f', {open_} open' if open_ else ''))
+        self.view.set_section(sec, 'Empty section')
+
+    # ---- Drawing views ----
+
+    def _project(self) -> None:
+        self.export_btn.setEnabled(False)
+        if self._asm is None:
+            self.info.setText('')
+            self.view.set_drawing(None, 'No model')
+            return
+        self.info.setText('Projecting views…')
+        self.view.set_drawing(None, 'Projecting views…')
+        if self._view_pending:
+            return  # all views come back together
+        self._view_pending = True
+        worker = ProjectionWorker(self._view_gen, self._asm, self._tris,
+                                  VIEWS)
+        worker.signals.finished.connect(
+            self._on_drawings, Qt.ConnectionType.QueuedConnection)
+        worker.signals.error.connect(
+            self._on_drawings_error, Qt.ConnectionType.QueuedConnection)
+        self.pool.start(worker)
+
+    def _on_drawings(self, gen: int, drawings: dict, dt: float) -> None:
+        if gen != self._view_gen:
+            return
+        self._view_pending = False
+        self._drawings = drawings
+        d = next(iter(drawings.values()), None)
+        if d is not None:
+            logging.info(f'[projection] {len(drawings)} views in {dt:.3f}s, '
+                         f'{d.projected}/{d.parts} parts projected')
+        if self.mode != 'sections':
+            self._show_drawing()
+
+    def _on_drawings_error(self, gen: int, msg: str) -> None:
+        if gen != self._view_gen:
+            return
+        self._view_pending = False
+        self._drawings = {}
+        if self.mode != 'sections':
+            self.info.setText('')
+            self.view.set_drawing(None, f'Projection failed: {msg}')
+
+    def _show_drawing(self) -> None:
+        self.export_btn.setEnabled(any(
+            d.bounds() is not None for d in self._drawings.values()))
+        d = self._drawings.get(self.mode)
+        if d is None:
+            self.info.setText('')
+            self.view.set_drawing(None, 'Empty view')
+            return
+        self.info.setText(f'{self.mode.capitalize()}  {len(d.visible):,} '
+                          f'visible, {len(d.hidden):,} hidden lines')
+        self.view.set_drawing(d, 'Empty view')
+
+    # ---- Export ----
+
+    def _export_dxf(self) -> None:
+        what = 'sections' if self.mode == 'sections' else 'views'
+        start = str(Path.home() / f'{self.export_name}_{what}.dxf')
+        path, _ = QFileDialog.getSaveFileName(
+            self, f'Export DXF {what}', start, 'DXF (*.dxf)')
+        if not path:
+            return
+        p = Path(path)
+        if p.suffix.lower() != '.dxf':
+            p = p.with_suffix('.dxf')
+        try:
+            t0 = time.perf_counter()
+            if what == 'sections':
+                export_dxf(self._sections, p)
+            else:
+                export_views_dxf(list(self._drawings.values()), p)
+            logging.info(f'[drawing] exported {what} in '
+                         f'{time.perf_counter() - t0:.3f}s -> {p}')
+        except Exception as e:
+            logging.exception(f'[drawing] DXF export failed: {e}')
+            QMessageBox.critical(self, 'DXF export failed', str(e))
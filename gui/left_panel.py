@@ -8,6 +8,7 @@ from PySide6 import QtCore
 class LeftPanel(QWidget):
     regenerateRequested = Signal()
     exportStepRequested = Signal()
+    editStarted = Signal(str)  # parameter name, as soon as a value changes
 
     def __init__(self):
         super().__init__()
@@ -40,6 +41,8 @@ class LeftPanel(QWidget):
         self.scroll.setWidget(self._controls_host)
 
         self._editors = {}
+        self._steps = {}  # name -> (step, min, max, decimals) of spin boxes
+        self.last_edited = None
         self._debounce = QTimer(self)
         self._debounce.setSingleShot(True)
         self._debounce.setInterval(150)
@@ -53,9 +56,13 @@ class LeftPanel(QWidget):
             if w:
                 w.setParent(None)
         self._editors.clear()
+        self._steps.clear()
+        self.last_edited = None
 
         for p in schema or []:
             t = p.get("type", "float")
+            if t in (float, int, bool, str):
+                t = t.__name__  # PARAMS may use the Python type itself
             name = p["name"]
             label = p.get("label", name)
             default = p.get("default")
@@ -65,18 +72,23 @@ class LeftPanel(QWidget):
                 w.setRange(p.get("min", -1e9), p.get("max", 1e9))
                 w.setSingleStep(p.get("step", 1.0))
                 w.setValue(float(default or 0.0))
-                w.editingFinished.connect(self.regenerateRequested.emit)
+                self._steps[name] = (w.singleStep(), w.minimum(), w.maximum(),
+                                     w.decimals())
+                self._connect_spin(w, name)
             elif t == "int":
                 w = QSpinBox()
                 w.setRange(int(p.get("min", -10 ** 9)),
                            int(p.get("max", 10 ** 9)))
                 w.setSingleStep(int(p.get("step", 1)))
                 w.setValue(int(default or 0))
-                w.editingFinished.connect(self.regenerateRequested.emit)
+                self._steps[name] = (w.singleStep(), w.minimum(), w.maximum(),
+                                     0)
+                self._connect_spin(w, name)
             elif t == "bool":
                 w = QCheckBox()
                 w.setChecked(bool(default))
-                w.stateChanged.connect(self.regenerateRequested.emit)
+                w.stateChanged.connect(
+                    lambda *_, n=name: self._edited(n, now=True))
             elif t == "enum":
                 from PySide6.QtWidgets import QComboBox
                 w = QComboBox()
@@ -85,10 +97,11 @@ class LeftPanel(QWidget):
                 if default is not None:
                     w.setCurrentText(str(default))
                 w.currentTextChanged.connect(
-                    lambda *_: self.regenerateRequested.emit())
+                    lambda *_, n=name: self._edited(n, now=True))
             else:
                 w = QLineEdit()
                 w.setText("" if default is None else str(default))
+                w.textEdited.connect(lambda *_, n=name: self.editStarted.emit(n))
                 w.editingFinished.connect(self.regenerateRequested.emit)
 
             self._editors[name] = w
@@ -99,6 +112,31 @@ class LeftPanel(QWidget):
             ph.setStyleSheet("color:#888;")
             self._form.addRow(ph)
 
+    def _connect_spin(self, w, name: str) -> None:
+        # Arrow/wheel steps regenerate after the debounce, typed values on
+        # Enter / focus out
+        w.setKeyboardTracking(False)
+        w.valueChanged.connect(lambda *_: self._edited(name))
+        w.editingFinished.connect(self._flush_edit)
+
+    def _edited(self, name: str, now: bool = False) -> None:
+        self.last_edited = name
+        self.editStarted.emit(name)
+        if now:
+            self._debounce.stop()
+            self.regenerateRequested.emit()
+        else:
+            self._debounce.start()
+
+    def _flush_edit(self) -> None:
+        if self._debounce.isActive():
+            self._debounce.stop()
+            self.regenerateRequested.emit()
+
+    def step_info(self, name: str | None) -> tuple | None:
+        """ (step, min, max, decimals) of a numeric parameter, else None. """
+        return self._steps.get(name)
+
     def values(self) -> dict:
         from PySide6.QtWidgets import QDoubleSpinBox, QSpinBox, QCheckBox, \
             QComboBox, QLineEdit
@@ -1,32 +1,44 @@
-import importlib
 import logging
-import json
 import sys
 import os
-import gc
 import time
 from pathlib import Path
-from types import ModuleType
+from typing import TYPE_CHECKING
 
 from PySide6.QtWidgets import QMainWindow, QWidget, QGridLayout, QMessageBox, \
-    QFileDialog, QApplication
-from PySide6.QtCore import Qt, QThreadPool, QTimer
-from vtkmodules.vtkCommonDataModel import vtkPolyData
+    QFileDialog, QApplication, QLabel
+from PySide6.QtCore import Qt, QThreadPool, QTimer, QFileSystemWatcher, \
+    QRunnable
+from PySide6.QtGui import QKeySequence, QShortcut
 
 from atlas_runtime import build_compound_and_triangles, AtlasAssembly, \
     AtlasInstance
 from gui.left_panel import LeftPanel
 from gui.right_panel import RightPanel
 from gui.bottom_panel import BottomPanel
-from gui.workers import ModelRunnable, ExportWorker
-from gui.vtk_viewer import VTKQtViewer
+from gui.workers import ModelRunnable, ExportWorker, BomWorker, \
+    SimilarityWorker, SimilaritySaveWorker
+from gui.perf_panel import PerfPanel
+from gui.model_registry import ModelRegistry
+from gui.model_host import ModelHost, RemoteModel, RemoteCompound
+from gui.workspace import Workspace
+from gui.speculation import Speculator, neighbour_values
 from atlas.config_loader import load_config
+from atlas.startup_profile import profiler
+from atlas_runtime.tracing import tracer
+from atlas_runtime.asm_utils import walk_instances
+from atlas_runtime import memo, fingerprint
+from atlas.modules.titan import TitanEngine
+from atlas_runtime.similarity import shared_index
+
+if TYPE_CHECKING:
+    from vtkmodules.vtkCommonDataModel import vtkPolyData
 
 PROGRAM_NAME = 'Atlas Protocol'
 PROGRAM_VERSION = '0.2'
 
 # Config
-config = load_config('atlas/config.json')
+config = load_config()
 
 window_width = config['window_width']
 window_height = config['window_height']
@@ -34,6 +46,31 @@ panel_control_width = config['panel_control_width']
 panel_bom_width = config['panel_bom_width']
 panel_drawing_height = config['panel_drawing_height']
 panel_top_height = config['panel_top_height']
+stream_batches = bool(config.get('stream_batches', True))
+perf_panel_visible = bool(config.get('perf_panel', False))
+perf_panel_runs = int(config.get('perf_panel_runs', 20))
+memory_budget_mb = float(config.get('memory_budget_mb', 0))  # 0 = none
+memory_policy = config.get('memory_policy', 'downgrade')  # | refuse
+memory_tracemalloc = bool(config.get('memory_tracemalloc', False))
+watch_models = bool(config.get('watch_models', True))
+workspace_budget_mb = float(config.get('workspace_budget_mb', 1024))  # 0=off
+workspace_max_models = int(config.get('workspace_max_models', 8))
+speculate_steps = int(config.get('speculate_steps', 2))  # 0 = off
+tessellation_threads = int(config.get('tessellation_threads', 0))  # 0 = CPUs
+dedupe_shapes = bool(config.get('dedupe_shapes', False))
+memo_budget_mb = float(config.get('memo_budget_mb', 256))  # 0 = off
+geometry_cache_mb = float(config.get('geometry_cache_mb', 256))  # 0 = off
+section_axis = config.get('section_axis', 'z')
+section_step_mm = float(config.get('section_step_mm', 10.0))
+similarity_index = bool(config.get('similarity_index', True))
+similarity_tolerance = float(config.get('similarity_tolerance', 0.02))
+similarity_save_delay_ms = int(config.get('similarity_save_delay_ms', 5000))
+model_process = bool(config.get('model_process', False))
+model_process_recycle_mb = float(
+    config.get('model_process_recycle_mb', 4096))  # 0 = off
+model_process_max_jobs = int(config.get('model_process_max_jobs', 0))  # 0=off
+edge_overlay = bool(config.get('edge_overlay', True))
+edge_angle = float(config.get('edge_angle', 30.0))  # degrees
 
 APP_ROOT = Path(__file__).resolve().parents[1]
 MODELS_DIR = APP_ROOT / 'models'
@@ -41,6 +78,21 @@ MODELS_PKG = 'models'
 
 log = logging.getLogger(__name__)
 
+
+class _OccWarmup(QRunnable):
+    """ Load the native OCC runtime off the GUI thread. """
+
+    def run(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            import atlas_runtime
+            atlas_runtime.load_occ()
+            profiler.mark('OCC runtime loaded (background)')
+            log.info(f'[startup] OCC runtime loaded in '
+                     f'{time.perf_counter() - t0:.3f}s')
+        except Exception as e:
+            log.exception(f'[startup] OCC runtime failed to load: {e}')
+
 if str(APP_ROOT) not in sys.path:
     sys.path.insert(0, str(APP_ROOT))
 
@@ -80,6 +132,7 @@ class MainWindow(QMainWindow):
         self.pool.setMaxThreadCount(max(2, os.cpu_count() - 2))
         self._job_running = False
         self._pending_job = None
+        self._bom_gen = 0
 
         grid = QGridLayout(central)
         grid.setSpacing(8)
@@ -89,20 +142,30 @@ class MainWindow(QMainWindow):
         self.left_panel.setFixedWidth(panel_control_width)
         self.left_panel.export_btn.setEnabled(False)
 
-        self.vtk_panel = VTKQtViewer()
-        self.vtk_panel.setMinimumHeight(400)
-        self.vtk_panel.setMinimumWidth(600)
+        # The VTK viewer is built after the window is shown (_init_viewer)
+        self.vtk_panel = None
+        self._viewer_placeholder = QLabel('Loading viewer…')
+        self._viewer_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self._viewer_placeholder.setMinimumHeight(400)
+        self._viewer_placeholder.setMinimumWidth(600)
 
         self.right_panel = RightPanel()
         self.right_panel.setFixedWidth(panel_bom_width)
         self.right_panel.setMinimumWidth(panel_bom_width)
+        self.right_panel.similarRequested.connect(self._find_similar)
 
-        self.bottom_panel = BottomPanel()
+        self.bottom_panel = BottomPanel(section_axis, section_step_mm)
         self.bottom_panel.setFixedHeight(panel_drawing_height)
         self.bottom_panel.setMinimumHeight(panel_drawing_height)
 
+        # Optional profiling window (F12)
+        self.perf_panel = PerfPanel(tracer, perf_panel_runs, self)
+        QShortcut(QKeySequence('F12'), self, self._toggle_perf_panel)
+        if perf_panel_visible:
+            QTimer.singleShot(0, self._toggle_perf_panel)
+
         grid.addWidget(self.left_panel, 0, 0, 1, 1)
-        grid.addWidget(self.vtk_panel, 0, 1, 1, 1)
+        grid.addWidget(self._viewer_placeholder, 0, 1, 1, 1)
         grid.addWidget(self.right_panel, 0, 2, 1, 1)
         grid.addWidget(self.bottom_panel, 1, 0, 1, 3)
         grid.setRowStretch(0, 1)
@@ -111,21 +174,91 @@ class MainWindow(QMainWindow):
 
         self._models = {}
         self._current_mod = None
+        self._current_info = None
+        self._titan: TitanEngine | None = None
+        self._current_display_name = None
         self._current_fn_name = None
         self._current_schema = []
         self.current_model_name = 'atlas_model'
         self.current_assembly = None
         self._busy = False
 
+        # Sub-feature cache for @memoize'd model code
+        memo.configure(memo_budget_mb)
+        # Part meshes shared by estimate, dedupe, tessellation, drawings...
+        fingerprint.configure(geometry_cache_mb)
+        # Recently shown models, kept resident for instant switching
+        self._workspace = Workspace(
+            int(workspace_budget_mb * 1024 ** 2), workspace_max_models)
+        self._shown_key = None
+        # Neighbouring values of the last edited parameter, while idle
+        self._speculator = Speculator(
+            self._workspace, self.pool,
+            dict(mem_budget_mb=memory_budget_mb, mem_policy=memory_policy,
+                 tess_threads=tessellation_threads, dedupe=dedupe_shapes,
+                 edge_angle=edge_angle if edge_overlay else None),
+            self)
+
         self.left_panel.exportStepRequested.connect(self._export_step_async)
         self.left_panel.regenerateRequested.connect(
             self._regenerate_current_model)
+        self.left_panel.editStarted.connect(
+            lambda *_: self._speculator.cancel())
         self.left_panel.rescan_btn.clicked.connect(
             self._scan_and_update_models)
         self.left_panel.model_combo.currentIndexChanged.connect(
             self._load_selected_model)
 
-        QTimer.singleShot(0, self._scan_and_update_models)
+        # Model discovery / hot reload driven by file changes
+        self._registry = ModelRegistry(MODELS_DIR, MODELS_PKG)
+        # Model code in a worker process instead of the thread pool
+        self._host = self._spec_host = None
+        if model_process:
+            self._host = ModelHost(MODELS_DIR, MODELS_PKG,
+                                   model_process_recycle_mb,
+                                   model_process_max_jobs)
+            self._host.start()
+            # A host runs one job at a time: speculation gets its own
+            # (started on first use), so an edit never waits for it
+            self._spec_host = ModelHost(MODELS_DIR, MODELS_PKG,
+                                        model_process_recycle_mb,
+                                        model_process_max_jobs)
+        self._watcher = None
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setSingleShot(True)
+        self._watch_timer.setInterval(300)
+        self._watch_timer.timeout.connect(self._scan_and_update_models)
+        if watch_models:
+            self._watcher = QFileSystemWatcher(self)
+            self._watcher.directoryChanged.connect(self._on_models_changed)
+            self._watcher.fileChanged.connect(self._on_models_changed)
+
+        # The similarity index is written once edits settle and on close,
+        # not after every regeneration
+        self._similarity_save = QTimer(self)
+        self._similarity_save.setSingleShot(True)
+        self._similarity_save.setInterval(similarity_save_delay_ms)
+        self._similarity_save.timeout.connect(self._save_similarity)
+
+        self._grid = grid
+        self._first_result = True
+        self.pool.start(_OccWarmup())
+        QTimer.singleShot(0, self._init_viewer)
+
+    def _init_viewer(self) -> None:
+        """ Build the VTK viewer once the shell is on screen. """
+        with profiler.phase('import gui.vtk_viewer'):
+            from gui.vtk_viewer import VTKQtViewer
+        with profiler.phase('VTKQtViewer()'):
+            self.vtk_panel = VTKQtViewer()
+            self.vtk_panel.setMinimumHeight(400)
+            self.vtk_panel.setMinimumWidth(600)
+            self._grid.replaceWidget(self._viewer_placeholder, self.vtk_panel)
+            self._viewer_placeholder.deleteLater()
+            self._viewer_placeholder = None
+        profiler.mark('viewer ready')
+        with profiler.phase('first model scan'):
+            self._scan_and_update_models()
 
     @staticmethod
     def _count_solid_instances(inst: AtlasInstance) -> int:
@@ -142,74 +275,55 @@ class MainWindow(QMainWindow):
         return total
 
     def _scan_and_update_models(self) -> None:
-        self._models.clear()
-        MODELS_DIR.mkdir(parents=True, exist_ok=True)
-
-        for entry in MODELS_DIR.iterdir():
-            if not entry.is_dir():
-                continue
-
-            init_path = entry / '__init__.py'
-            if not init_path.is_file():
-                if entry.name != '__pycache__':
-                    log.info(f'Skipping "{entry.name}" - Must be a package')
-                continue
-
-            display_name = entry.name
-            func_name = 'assembly'
-
-            cfg_path = entry / 'config.json'
-            if cfg_path.is_file():
-                try:
-                    data = json.loads(cfg_path.read_text(encoding='utf-8'))
-                    display_name = data.get('name', display_name)
-                    func_name = data.get('entry', func_name)
-                except Exception as e:
-                    log.error(f'[models] Failed reading {cfg_path}: {e}')
-
-            # Build a **package** name, not a path
-            mod_qualname = f'{MODELS_PKG}.{entry.name}'
-            self._models[display_name] = {
-                'module': mod_qualname,
-                'folder': entry.name,
-                'func': func_name}
+        if self.vtk_panel is None:
+            return  # _init_viewer scans once the viewer exists
+        models = self._registry.scan()
+        combo = self.left_panel.model_combo
+        listing_changed = (sorted(models) != sorted(self._models) or
+                           not self._models)
+        self._models = models
 
         # Populate combo…
-        self.left_panel.model_combo.blockSignals(True)
-        self.left_panel.model_combo.clear()
-        if self._models:
-            self.left_panel.model_combo.addItems(sorted(self._models.keys()))
-        else:
-            logging.info('No models found')
-            self.left_panel.model_combo.addItem('No models found')
-        self.left_panel.model_combo.blockSignals(False)
+        if listing_changed:
+            previous = combo.currentText()
+            combo.blockSignals(True)
+            combo.clear()
+            if self._models:
+                combo.addItems(sorted(self._models.keys()))
+                if previous in self._models:
+                    combo.setCurrentText(previous)
+            else:
+                logging.info('No models found')
+                combo.addItem('No models found')
+            combo.blockSignals(False)
+
+        self._update_model_watch()
 
         if self._models:
-            current_text = self.left_panel.model_combo.currentText()
-            if current_text in self._models:
+            current_text = combo.currentText()
+            if current_text not in self._models:
+                current_text = combo.itemText(0)
+                combo.setCurrentIndex(0)
+            info = self._models[current_text]
+            # Unchanged packages that are already showing are left alone
+            if (self._current_mod is None or
+                    current_text != self._current_display_name or
+                    self._registry.is_stale(info)):
                 self._load_selected_model(current_text)
             else:
-                first = self.left_panel.model_combo.itemText(0)
-                self.left_panel.model_combo.setCurrentIndex(0)
-                self._load_selected_model(first)
+                logging.info(f'[models] {current_text} unchanged, reused')
 
-    @staticmethod
-    def _unload_package(pkg_name: str) -> None:
-        """ Remove a package and all its submodules from sys.modules. """
-        killed = []
-        prefix = pkg_name + '.'
-        for name in list(sys.modules.keys()):
-            if name == pkg_name or name.startswith(prefix):
-                killed.append(name)
-                del sys.modules[name]
-        logging.debug(f'[reload] dropped modules: {killed}')
-
-    def _force_import_package(self, pkg_name: str) -> ModuleType:
-        """ Invalidate caches, unload package tree, then import clean. """
-        importlib.invalidate_caches()
-        self._unload_package(pkg_name)
-        gc.collect()
-        return importlib.import_module(pkg_name)
+    def _update_model_watch(self) -> None:
+        if self._watcher is None:
+            return
+        old = self._watcher.files() + self._watcher.directories()
+        if old:
+            self._watcher.removePaths(old)
+        self._watcher.addPaths(self._registry.watch_paths())
+
+    def _on_models_changed(self, path: str) -> None:
+        logging.debug(f'[models] change detected: {path}')
+        self._watch_timer.start()
 
     def _load_selected_model(self, arg: str | int) -> None:
         """
@@ -229,7 +343,10 @@ class MainWindow(QMainWindow):
         func_name = info['func']
 
         try:
-            mod = self._force_import_package(mod_name)
+            mod, reloaded = self._registry.load(info)
+            if reloaded:
+                self._workspace.drop_module(mod_name)
+                memo.cache.drop_module(mod_name)
 
             if not hasattr(mod, func_name):
                 raise AttributeError(
@@ -240,41 +357,57 @@ class MainWindow(QMainWindow):
             self.left_panel.build_controls(schema)
 
             # 2) store current
+            if mod is not self._current_mod or reloaded:
+                constraints = getattr(mod, 'CONSTRAINTS', None)
+                self._titan = TitanEngine(constraints) if constraints \
+                    else None
             self._current_mod = mod
+            self._current_info = info
+            self._current_display_name = display_name
             self._current_fn_name = func_name
             self._current_schema = schema
 
             # 3) first render using current UI values (defaults) via the pipeline
-            fn = getattr(mod, func_name)
+            fn = self._model_fn()
             kwargs = self._coerce_kwargs(self.left_panel.values())
+            key = self._workspace.key(mod_name, kwargs)
 
-            self._start_model_job(fn, kwargs, display_name)
+            if not self._show_from_workspace(key, display_name):
+                self._start_model_job(fn, kwargs, display_name, key)
             logging.info(
-                f"[reload] {mod_name} id={id(mod)} file={getattr(
+                f"[reload] {mod_name} id={id(mod)} "
+                f"{'reimported' if reloaded else 'reused'} file={getattr(
                     mod, '__file__', None)}")
 
         except Exception as e:
             logging.exception(f'[models] Failed to load {display_name}: {e}')
 
     def _regenerate_current_model(self) -> None:
-        if self._job_running:
-            logging.info('[regen] Suppressed during busy operation')
-            return
-
         if not self._current_mod or not self._current_fn_name:
             return
 
         try:
-            fn = getattr(self._current_mod, self._current_fn_name)
+            fn = self._model_fn()
             kwargs = self._coerce_kwargs(self.left_panel.values())
+            key = self._workspace.key(self._current_mod.__name__, kwargs)
+            if key == self._shown_key and not self._job_running:
+                return  # e.g. focus left an unchanged spin box
 
-            self._start_model_job(fn, kwargs)
-
+            # While busy this replaces the pending job, so the latest edit wins
+            if not self._show_from_workspace(key):
+                self._start_model_job(fn, kwargs, cache_key=key)
 
         except Exception as e:
             logging.exception(
                 f'[models] Failed to regenerate current model: {e}')
 
+    def _model_fn(self, speculative: bool = False):
+        """ The current model function, or its model process stand-in. """
+        if self._host is not None:
+            host = self._spec_host if speculative else self._host
+            return RemoteModel(host, self._current_info)
+        return getattr(self._current_mod, self._current_fn_name)
+
     def _coerce_kwargs(self, kwargs: dict) -> dict:
         out = dict(kwargs)
 
@@ -305,11 +438,107 @@ class MainWindow(QMainWindow):
                     f'[models] Failed to coerce "{name}" ({v!r}) to {t}: {e}')
         return out
 
+    def _show_from_workspace(
+            self, key: tuple, display_name: str | None = None) -> bool:
+        """
+        Show a resident model without regenerating it. Depending on what
+        survived eviction this re-shows the polydata, re-uploads the mesh or
+        re-tessellates the kept assembly. Returns False on a miss.
+        """
+        entry = self._workspace.get(key)
+        if entry is None or entry.assembly is None or self._job_running:
+            return False
+
+        tier = entry.tier
+        if tier == 'assembly':
+            # Skip the model call, the worker only rebuilds the geometry
+            asm = entry.assembly
+            self._workspace.discard(key)
+            self._start_model_job(lambda: asm, {}, display_name, key)
+            return True
+
+        t0 = time.perf_counter()
+        try:
+            if tier == 'vtk':
+                # Keep the camera while stepping through parameter values
+                self.vtk_panel.show_polydata(
+                    entry.polydata, reset_camera=display_name is not None)
+            else:
+                self.vtk_panel.load_triangles(entry.mesh)
+            self.vtk_panel.show_edges(entry.edges)
+        except Exception as e:
+            logging.exception(f'[workspace] restore failed: {e}')
+            self._workspace.discard(key)
+            return False
+        self._workspace.update(key, self.vtk_panel.polydata)
+        self._workspace.pin(key)
+        self._shown_key = key
+        vtk_time = time.perf_counter() - t0
+
+        self.current_assembly = entry.assembly
+        if display_name:
+            self.current_model_name = display_name
+        self.bottom_panel.export_name = self.current_model_name
+        self.bottom_panel.set_model(entry.assembly, entry.assembly.triangles)
+        if hasattr(self.right_panel, 'set_bom'):
+            QTimer.singleShot(10, lambda: self._update_bom(entry.assembly))
+        self.left_panel.export_btn.setEnabled(True)
+        self._show_perf_in_status(entry.stats, vtk_time, display_name)
+
+        if entry.constraints is None and self._titan is not None:
+            # Stored before the model had constraints, or by an older job
+            try:
+                entry.constraints = self._titan.update(entry.assembly)
+            except Exception as e:
+                logging.exception(f'[titan] constraint check failed: {e}')
+        self._report_constraints(entry.constraints)
+        logging.info(
+            f'[workspace] {display_name or self.current_model_name} from '
+            f'{tier} cache in {vtk_time:.3f}s; {self._workspace.summary()}')
+        if display_name is None:
+            QTimer.singleShot(0, self._speculate)
+        return True
+
+    def _report_constraints(self, report) -> None:
+        """ Log a TitanReport, and show it in the status bar if violated. """
+        if report is None:
+            return
+        logging.info(
+            f'[titan] {report.summary()} '
+            f'({report.evaluated} evaluated, '
+            f'{report.elapsed * 1000:.1f} ms)')
+        if not report.ok:
+            self.statusBar().showMessage(f'Constraints: {report.summary()}')
+
+    def _speculate(self) -> None:
+        """
+        Queue ±1..k steps of the last edited parameter for background
+        precomputation, keyed exactly like _regenerate_current_model.
+        """
+        name = self.left_panel.last_edited
+        info = self.left_panel.step_info(name)
+        if (speculate_steps <= 0 or info is None or self._pending_job or
+                not self._current_mod or not self._current_fn_name):
+            return
+
+        step, lo, hi, decimals = info
+        values = self.left_panel.values()
+        fn = self._model_fn(speculative=True)
+        jobs = []
+        for v in neighbour_values(values[name], step, lo, hi,
+                                  speculate_steps, decimals):
+            kwargs = self._coerce_kwargs({**values, name: v})
+            jobs.append((self._workspace.key(self._current_mod.__name__,
+                                             kwargs), fn, kwargs))
+        self._speculator.submit(jobs, self._titan)
+
     def _start_model_job(
-            self, fn, kwargs: dict, display_name: str | None = None) -> None:
+            self, fn, kwargs: dict, display_name: str | None = None,
+            cache_key: tuple | None = None) -> None:
 
+        self._speculator.cancel()
         if self._job_running:
-            self._pending_job = (fn, kwargs, display_name)
+            self._pending_job = (fn, kwargs, display_name, cache_key)
             logging.info('[model] queued pending job')
             return
 
@@ -318,8 +547,29 @@ class MainWindow(QMainWindow):
 
         self.setCursor(Qt.CursorShape.WaitCursor)
 
-        job = ModelRunnable(fn, kwargs)
+        run = tracer.begin_run(
+            f'regen {display_name or self.current_model_name}')
+        job = ModelRunnable(fn, kwargs, stream=stream_batches, trace_run=run,
+                            mem_budget_mb=memory_budget_mb,
+                            mem_policy=memory_policy,
+                            mem_tracemalloc=memory_tracemalloc,
+                            tess_threads=tessellation_threads,
+                            dedupe=dedupe_shapes,
+                            edge_angle=edge_angle if edge_overlay else None,
+                            titan=self._titan)
         self._last_job = job
+        streamed_batches = 0
+
+        def _on_partial(batch: dict) -> None:
+            nonlocal streamed_batches
+            try:
+                if streamed_batches == 0:
+                    self.vtk_panel.begin_stream()
+                streamed_batches += 1
+                with tracer.attach(run):
+                    self.vtk_panel.append_mesh_batch(batch)
+            except Exception as e:
+                logging.exception(f'[model] partial handler failed: {e}')
 
         def _on_result(processed_data, stats: dict) -> None:
             try:
@@ -328,22 +578,65 @@ class MainWindow(QMainWindow):
                 asm = processed_data['assembly']
                 optimized_triangles = processed_data['triangles']
 
-                logging.info(
-                    f'[main] Loading pre-processed triangles into VTK...')
                 vtk_start = time.perf_counter()
 
-                self.vtk_panel.load_triangles(optimized_triangles)
+                with tracer.attach(run):
+                    if processed_data.get('instanced') is not None:
+                        self.vtk_panel.show_instanced(
+                            processed_data['instanced'])
+                    elif processed_data.get('streamed'):
+                        # Nothing was sent whole: keep the mesh the viewer
+                        # assembled from the batches for the workspace
+                        optimized_triangles = self.vtk_panel.end_stream(
+                            processed_data.get('max_error'))
+                    else:
+                        logging.info(
+                            f'[main] Loading pre-processed triangles into '
+                            f'VTK...')
+                        self.vtk_panel.load_triangles(optimized_triangles)
+                    self.vtk_panel.show_edges(processed_data.get('edges'))
 
                 vtk_time = time.perf_counter() - vtk_start
                 logging.info(f'[main] VTK load time: {vtk_time:.3f}s')
+                if self._first_result:
+                    self._first_result = False
+                    profiler.mark('first model on screen')
+                    profiler.finish()
 
                 self.current_assembly = asm
                 if display_name:
                     self.current_model_name = display_name
+                self.bottom_panel.export_name = self.current_model_name
+                # LODs hold no placed triangles to draw or section
+                full = stats.get('lod', 'full') == 'full'
+                if full:
+                    self.bottom_panel.set_model(asm, asm.triangles)
+                else:
+                    self.bottom_panel.set_model(None, None)
+
+                # Keep it resident for switching back (LODs are not)
+                if cache_key is not None and full:
+                    self._workspace.put(
+                        cache_key, asm, optimized_triangles,
+                        self.vtk_panel.polydata, stats,
+                        edges=processed_data.get('edges'),
+                        constraints=processed_data.get('constraints'))
+                    logging.info(
+                        f'[workspace] {self._workspace.summary()}')
+                    QTimer.singleShot(0, self._speculate)
+                else:
+                    self._workspace.pin(None)
+                self._shown_key = cache_key
 
                 # Update BOM
                 if hasattr(self.right_panel, 'set_bom'):
                     QTimer.singleShot(10, lambda: self._update_bom(asm))
+                if similarity_index and stats.get('lod') != 'bbox':
+                    # The name of this result, not of whatever is shown
+                    # when the timer fires
+                    model = self.current_model_name
+                    QTimer.singleShot(
+                        50, lambda: self._update_similarity(model, asm))
 
                 # Log performance and stats
                 logging.info(
@@ -351,11 +644,14 @@ class MainWindow(QMainWindow):
                     f"model={stats['t_model']:.3f}s norm={stats['t_norm']:.3f}s "
                     f"cache={stats['t_cache']:.3f}s prep={stats['t_vtk_prep']:.3f}s "
                     f"vtk={vtk_time:.3f}s total={stats['t_total']:.3f}s "
-                    f"inst={stats['t_inst']:,} tris={stats['tris']:,}")
+                    f"inst={stats['t_inst']:,} tris={stats['tris']:,} "
+                    f"first={stats.get('t_first', 0.0):.3f}s")
 
                 self.left_panel.export_btn.setEnabled(True)
                 self._show_perf_in_status(stats, vtk_time, display_name)
 
+                self._report_constraints(processed_data.get('constraints'))
+
             except Exception as e:
                 self.unsetCursor()
                 logging.exception(f'[model] result handler failed: {e}')
@@ -363,6 +659,8 @@ class MainWindow(QMainWindow):
         def _on_error(msg: str) -> None:
             try:
                 self.unsetCursor()
+                if streamed_batches:
+                    self.vtk_panel.end_stream()
                 logging.exception(f'[model] failed: {msg}')
                 QMessageBox.critical(self, 'Model failed', msg)
                 self.left_panel.export_btn.setEnabled(True)
@@ -373,12 +671,16 @@ class MainWindow(QMainWindow):
         def _on_finished() -> None:
             try:
                 self.unsetCursor()
+                tracer.end_run(run)
+                if self.perf_panel.isVisible():
+                    self.perf_panel.refresh()
                 self._job_running = False
                 if self._pending_job:
-                    fn2, kw2, name2 = self._pending_job
+                    fn2, kw2, name2, key2 = self._pending_job
                     self._pending_job = None
                     QTimer.singleShot(
-                        0, lambda: self._start_model_job(fn2, kw2, name2))
+                        0, lambda: self._start_model_job(
+                            fn2, kw2, name2, key2))
 
             except Exception as e:
                 logging.exception(f'[model] finished handler failed: {e}')
@@ -391,6 +693,8 @@ class MainWindow(QMainWindow):
                 logging.exception(f'[model] progress handler failed: {e}')
 
         # Connect signals
+        job.signals.partial.connect(
+            _on_partial, Qt.ConnectionType.QueuedConnection)
         job.signals.result.connect(
             _on_result, Qt.ConnectionType.QueuedConnection)
         job.signals.error.connect(
@@ -403,18 +707,88 @@ class MainWindow(QMainWindow):
         # Start the job
         self.pool.start(job)
 
+    def _toggle_perf_panel(self) -> None:
+        if self.perf_panel.isVisible():
+            self.perf_panel.hide()
+            return
+        self.perf_panel.refresh()
+        self.perf_panel.show()
+
     def _update_bom(self, asm: AtlasAssembly) -> None:
         """
-        Update BOM in a separate method to avoid blocking main result handler
+        Build the BOM in the thread pool; only the newest result is applied
         """
-        try:
-            from atlas_runtime.asm_utils import bom_flat, bom_rollup
-            bom_start = time.perf_counter()
-            self.right_panel.set_bom(bom_rollup(bom_flat(asm)))
-            bom_time = time.perf_counter() - bom_start
-            logging.info(f'[main] BOM update took {bom_time:.3f}s')
-        except Exception as e:
-            logging.exception(f'[model] BOM update failed: {e}')
+        self._bom_gen += 1
+        gen = self._bom_gen
+
+        def _on_bom(cols, dt: float) -> None:
+            if gen != self._bom_gen:
+                return  # a newer assembly is on its way
+            t0 = time.perf_counter()
+            self.right_panel.set_bom(cols)
+            logging.info(f'[main] BOM {len(cols):,} lines built in {dt:.3f}s, '
+                         f'applied in {time.perf_counter() - t0:.3f}s')
+
+        worker = BomWorker(asm)
+        worker.signals.finished.connect(
+            _on_bom, Qt.ConnectionType.QueuedConnection)
+        self.pool.start(worker)
+
+    def _update_similarity(self, model: str, asm: AtlasAssembly) -> None:
+        """ Index the model's parts in the background (see similarity). """
+
+        def _on_indexed(described: int, dt: float) -> None:
+            logging.info(f'[similarity] {model}: {described} parts '
+                         f'described, indexed in {dt:.3f}s')
+            if shared_index().dirty:
+                self._similarity_save.start()
+
+        worker = SimilarityWorker(model, asm)
+        worker.signals.finished.connect(
+            _on_indexed, Qt.ConnectionType.QueuedConnection)
+        self.pool.start(worker)
+
+    def _save_similarity(self) -> None:
+        """ Persist the index once edits have settled (debounced). """
+        self.pool.start(SimilaritySaveWorker())
+
+    def _find_similar(self, part_no: str) -> None:
+        """ Parts of all generated models that are close to `part_no`. """
+        index = shared_index()
+        keys = index.find(part_no, self.current_model_name) or \
+            index.find(part_no)
+        if not keys:
+            QMessageBox.information(
+                self, 'Similar parts',
+                f'{part_no} is not indexed yet (shapeless part, or the '
+                f'model is still being indexed).')
+            return
+        t0 = time.perf_counter()
+        matches = index.within(keys[0], similarity_tolerance)
+        title = f'within {similarity_tolerance:.0%} of {part_no}'
+        if not matches:
+            matches = index.nearest(keys[0], 10)
+            title = f'nothing within {similarity_tolerance:.0%}, ' \
+                    f'closest to {part_no}'
+        logging.info(f'[similarity] {len(matches)} matches for {part_no} '
+                     f'among {len(index):,} parts in '
+                     f'{time.perf_counter() - t0:.4f}s')
+        lines = [f'{m.part_no}  ({m.model})  size {m.size_diff:.1%} '
+                 f'shape {m.shape_diff:.2f}' for m in matches[:30]]
+        if len(matches) > 30:
+            lines.append(f'… {len(matches) - 30} more')
+        QMessageBox.information(self, 'Similar parts',
+                                f'Parts {title}:\n\n' +
+                                ('\n'.join(lines) or 'none'))
+
+    def closeEvent(self, event) -> None:
+        if self._similarity_save.isActive():
+            self._similarity_save.stop()
+            try:
+                shared_index().save()
+            except Exception as e:
+                logging.exception(f'[similarity] saving failed: {e}')
+        super().closeEvent(event)
 
     def _export_step_async(self) -> None:
         """ Async version of STEP export using worker thread """
@@ -424,7 +798,10 @@ class MainWindow(QMainWindow):
             return
 
         asm = getattr(self, 'current_assembly', None)
-        if not asm or asm.compound is None:
+        # LODs build the compound on export, from the shapes
+        if not asm or asm.compound is None and not any(
+                getattr(node.ref, 'shape', None) is not None
+                for node, _qty, _xf in walk_instances(asm.root)):
             QMessageBox.information(self, 'Export', 'Nothing to export.')
             return
 
@@ -447,10 +824,15 @@ class MainWindow(QMainWindow):
         self.left_panel.export_btn.setEnabled(False)
         self.setCursor(Qt.CursorShape.WaitCursor)
 
-        # Import atlas_occ here to avoid any import issues
-        from atlas_runtime import atlas_occ
+        if isinstance(asm.compound, RemoteCompound):
+            # Built in the model process, which still holds the shapes
+            exporter = asm.compound.host
+        else:
+            # Import atlas_occ here to avoid any import issues
+            from atlas_runtime import atlas_occ
+            exporter = atlas_occ
 
-        export_worker = ExportWorker(atlas_occ, asm.compound, path)
+        export_worker = ExportWorker(exporter, asm, path)
 
         def _on_export_finished(dt: float, out_path: str) -> None:
             try:
@@ -567,7 +949,7 @@ class MainWindow(QMainWindow):
         stats = self._current_stats
         display_name = self._current_display_name
 
-        if not asm.triangles:
+        if asm.triangles is None or len(asm.triangles) == 0:
             raise TypeError('Model produced no triangles')
 
         # Count instances
@@ -577,7 +959,7 @@ class MainWindow(QMainWindow):
             logging.exception(f'[perf] instance count failed: {e}')
             stats['t_inst'] = 0
 
-        stats['tris'] = len(asm.triangles or [])
+        stats['tris'] = len(asm.triangles)
 
         # If we have a lot of triangles, process VTK in chunks
         if len(asm.triangles) > 10000:
@@ -634,7 +1016,7 @@ class MainWindow(QMainWindow):
         # Update status periodically during VTK operations
         original_render_mesh = self.vtk_panel.render_mesh
 
-        def render_mesh_with_progress(tris: list[list[float]]) -> vtkPolyData:
+        def render_mesh_with_progress(tris: list[list[float]]) -> 'vtkPolyData':
             # Process events every so often during mesh building
             for i in range(0, len(tris), 10000):
                 if i > 0:
@@ -708,6 +1090,12 @@ class MainWindow(QMainWindow):
             f'vtk={vtk_time:.3f}s  total={stats['t_total']:.3f}s  '
             f'inst={stats.get('t_inst', 0):,}  tris={stats.get('tris', 0):,}'
         )
+        if stats.get('lod', 'full') != 'full':
+            msg += (f'  LOD={stats['lod']} (est. '
+                    f'{stats.get('est_full_mb', 0.0):,.0f} MB over budget)')
+        if stats.get('mem'):
+            msg += f'  peak={max(stats['mem'].values()):,.0f} MB'
+
         try:
             self.statusBar().showMessage(msg)
         except Exception as e:
@@ -0,0 +1,624 @@
+"""
+Out-of-process model execution.
+
+With `model_process` enabled, model code (assembly(**kw)), normalization
+and tessellation run in a persistent worker subprocess instead of on a
+QThreadPool thread of the GUI. A model that holds the GIL, leaks or
+crashes the OCC runtime then cannot freeze or take down the GUI. The
+worker keeps imported models, memo caches and OCC warm between jobs and
+is recycled (lazily, before the next job) once its RSS or job count
+passes a limit.
+
+Meshes come back through multiprocessing.shared_memory: the worker packs
+a result's arrays into one block, the GUI maps it and hands out views,
+which keep the mapping alive for as long as the viewer or workspace uses
+them. The GUI unlinks each block as it maps it. The worker unlinks the
+blocks it sent that were never mapped (a handler raised) when the next
+request or stop arrives; those of a worker that died first are removed
+by the resource tracker it shares with the GUI. The assembly comes back as a mirror: the instance tree packed into
+arrays plus a pickled parts table, with shape=None on every part and
+asm.compound a RemoteCompound that exports STEP through the worker.
+Drawing views and similarity descriptors need B-rep shapes, so they stay
+empty for remote results.
+"""
+from __future__ import annotations
+import dataclasses
+import logging
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from atlas_runtime import AtlasAssembly, AtlasInstance
+from atlas_runtime.compact_mesh import CompactMesh
+from atlas_runtime.membudget import MeshGroup
+
+log = logging.getLogger(__name__)
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+KEEP_ASSEMBLIES = 8  # recent jobs whose shapes the worker keeps for export
+_ALIGN = 64
+
+
+class ModelProcessError(RuntimeError):
+    """ The model failed in, or took down, the model process. """
+
+
+# ---- Shared memory ----
+
+class _Mapped(np.ndarray):
+    """ Byte view of a shared memory block; keeps the block mapped. """
+    _shm: Optional[SharedMemory] = None
+
+
+def share_arrays(arrays: dict[str, np.ndarray]
+                 ) -> tuple[Optional[str], list, Optional[SharedMemory]]:
+    """
+    Copy `arrays` into one new shared memory block. Returns (name, spec,
+    block) for attach_arrays; the caller closes `block` once the other
+    side has attached (on Windows the block dies with its last handle).
+    The block stays registered with the resource tracker until unlinked,
+    so it cannot outlive the process tree if nobody attaches it.
+    """
+    arrays = {k: np.ascontiguousarray(a) for k, a in arrays.items()}
+    spec, size = [], 0
+    for key, a in arrays.items():
+        size = -(-size // _ALIGN) * _ALIGN
+        spec.append((key, a.dtype.str, a.shape, size))
+        size += a.nbytes
+    if not spec:
+        return None, [], None
+    shm = SharedMemory(create=True, size=max(size, 1))
+    for (key, dtype, shape, off), a in zip(spec, arrays.values()):
+        if a.nbytes:
+            np.ndarray(shape, dtype, buffer=shm.buf, offset=off)[...] = a
+    return shm.name, spec, shm
+
+
+def attach_arrays(name: Optional[str], spec: list) -> dict[str, np.ndarray]:
+    """ Map a share_arrays block (and unlink it: it is ours now). """
+    if name is None:
+        return {}
+    shm = SharedMemory(name)
+    try:
+        shm.unlink()  # the mapping stays valid until the views are gone
+    except FileNotFoundError:
+        pass
+    raw = np.ndarray((shm.size,), np.uint8, buffer=shm.buf).view(_Mapped)
+    raw._shm = shm
+    out = {}
+    for key, dtype, shape, off in spec:
+        dt = np.dtype(dtype)
+        n = int(np.prod(shape, dtype=np.int64)) * dt.itemsize
+        out[key] = np.asarray(raw[off:off + n].view(dt).reshape(shape))
+    return out
+
+
+# ---- Assembly mirror ----
+
+def _picklable(obj: Any) -> bool:
+    try:
+        pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+        return True
+    except Exception:
+        return False
+
+
+def _bare_part(part):
+    """ `part` without its shape (and with repr()'d props if needed). """
+    bare = dataclasses.replace(part, shape=None)
+    if not _picklable(bare):
+        bare = dataclasses.replace(
+            bare, props={k: repr(v) for k, v in part.props.items()},
+            bom_line=None)
+    return bare
+
+
+def pack_assembly(asm: AtlasAssembly) -> tuple[list, dict, dict]:
+    """
+    (parts, arrays, extra) describing the instance tree in DFS pre-order:
+    per instance its part index, parent index (-1 for the root), qty and
+    (dx, dy, dz) xform (NaN for None and non-tuple xforms, which go to
+    extra['xforms'] when picklable). Shapes are dropped.
+    """
+    parts: list = []
+    index: dict[int, int] = {}
+    part_i, parent_i, qty, xform = [], [], [], []
+    extra: dict[str, dict] = {'xforms': {}, 'roles': {}, 'overrides': {}}
+    nan = (np.nan, np.nan, np.nan)
+    stack = [(asm.root, -1)]
+    while stack:
+        node, parent = stack.pop()
+        i = len(part_i)
+        j = index.get(id(node.ref))
+        if j is None:
+            j = index[id(node.ref)] = len(parts)
+            parts.append(_bare_part(node.ref))
+        part_i.append(j)
+        parent_i.append(parent)
+        qty.append(int(node.qty))
+        xf = node.xform
+        if isinstance(xf, (tuple, list)) and len(xf) == 3:
+            xform.append(xf)
+        else:
+            xform.append(nan)
+            if xf is not None and _picklable(xf):
+                extra['xforms'][i] = xf
+        if node.bom_role != 'normal':
+            extra['roles'][i] = node.bom_role
+        if node.overrides and _picklable(node.overrides):
+            extra['overrides'][i] = node.overrides
+        stack.extend((ch, i) for ch in reversed(node.children or []))
+    arrays = {
+        'part': np.asarray(part_i, dtype=np.int32),
+        'parent': np.asarray(parent_i, dtype=np.int32),
+        'qty': np.asarray(qty, dtype=np.int64),
+        'xform': np.asarray(xform, dtype=np.float64).reshape(-1, 3),
+    }
+    return parts, arrays, extra
+
+
+def unpack_assembly(parts: list, arrays: dict, extra: dict,
+                    **fields) -> AtlasAssembly:
+    """ Rebuild a pack_assembly tree; `fields` go to AtlasAssembly. """
+    part_i = arrays['part'].tolist()
+    parent_i = arrays['parent'].tolist()
+    qty = arrays['qty'].tolist()
+    xform = arrays['xform'].tolist()
+    missing = np.isnan(arrays['xform'][:, 0]).tolist()
+    xforms, roles = extra['xforms'], extra['roles']
+    overrides = extra['overrides']
+    nodes: list[AtlasInstance] = []
+    for i, j in enumerate(part_i):
+        node = AtlasInstance(
+            ref=parts[j],
+            xform=xforms.get(i) if missing[i] else tuple(xform[i]),
+            qty=qty[i], children=[], bom_role=roles.get(i, 'normal'),
+            overrides=overrides.get(i, {}))
+        nodes.append(node)
+        if parent_i[i] >= 0:
+            nodes[parent_i[i]].children.append(node)
+    return AtlasAssembly(root=nodes[0], **fields)
+
+
+def _mesh_parts(mesh: CompactMesh) -> tuple[dict, dict]:
+    """ (arrays, meta) of a CompactMesh; the arrays go to shared memory. """
+    return ({'qpoints': mesh.qpoints, 'indices': mesh.indices},
+            {'origin': mesh.origin, 'step': mesh.step,
+             'original_count': mesh.original_count})
+
+
+def _mesh(arrays: dict, meta: dict) -> CompactMesh:
+    return CompactMesh(qpoints=arrays['qpoints'], indices=arrays['indices'],
+                       **meta)
+
+
+def _instanced_parts(groups: list[MeshGroup]) -> tuple[dict, list]:
+    """ (arrays, meta) of the instanced LOD: all groups concatenated. """
+    if not groups:
+        return {}, []
+    arrays = {
+        'inst_points': np.concatenate([g.mesh.qpoints for g in groups]),
+        'inst_indices': np.concatenate([g.mesh.indices for g in groups]),
+        'inst_offsets': np.concatenate([g.offsets for g in groups]),
+    }
+    meta = [(g.mesh.n_points, len(g.mesh.indices), len(g.offsets),
+             g.mesh.original_count) for g in groups]
+    return arrays, meta
+
+
+def _instanced(arrays: dict, meta: list) -> list[MeshGroup]:
+    groups, p, i, o = [], 0, 0, 0
+    for n_points, n_ids, n_offsets, original_count in meta:
+        mesh = CompactMesh(arrays['inst_points'][p:p + n_points],
+                           np.zeros(3), np.ones(3),
+                           arrays['inst_indices'][i:i + n_ids],
+                           original_count)
+        groups.append(
+            MeshGroup(mesh, arrays['inst_offsets'][o:o + n_offsets]))
+        p, i, o = p + n_points, i + n_ids, o + n_offsets
+    return groups
+
+
+# ---- GUI side ----
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class RemoteModel:
+    """
+    Stand-in for a model function that runs in `host`; ModelRunnable
+    dispatches on it. `info` is the ModelRegistry entry of the model.
+    """
+    host: 'ModelHost'
+    info: dict
+
+    def __call__(self, **kwargs):
+        raise TypeError(f'{self.info["func"]} runs in the model process')
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class RemoteCompound:
+    """ asm.compound of a mirror: the shapes live in the model process. """
+    host: 'ModelHost'
+    generation: int  # worker (re)start it was built in
+    job: int
+
+
+class ModelHost:
+    """
+    One persistent model worker process (spawned; started by start() or
+    the first run()). Jobs and exports are serialized; cancel() stops the
+    running job at its next stage boundary.
+    """
+
+    def __init__(self, models_dir: Path, pkg: str = 'models',
+                 recycle_mb: float = 0.0, max_jobs: int = 0) -> None:
+        self.models_dir = Path(models_dir)
+        self.pkg = pkg
+        self.recycle_mb = recycle_mb  # 0 = no RSS limit
+        self.max_jobs = max_jobs  # 0 = no job limit
+        self._ctx = multiprocessing.get_context('spawn')
+        self._cancel = self._ctx.Event()
+        self._lock = threading.Lock()  # one job or export at a time
+        self._state = threading.Lock()
+        self._proc = None
+        self._conn = None
+        self._owner = None
+        self._retire = False
+        self._jobs = 0
+        self._next_job = 0
+        self.generation = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.is_alive()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self.alive else None
+
+    def start(self) -> None:
+        """ Start the worker (returns at once; it warms up on its own). """
+        with self._state:
+            if self.alive:
+                return
+            parent, child = self._ctx.Pipe()
+            proc = self._ctx.Process(
+                target=_serve, name='atlas-model-process', daemon=True,
+                args=(child, self._cancel, str(APP_ROOT),
+                      str(self.models_dir), self.pkg))
+            proc.start()
+            child.close()
+            self._proc, self._conn = proc, parent
+            self._jobs = 0
+            self._retire = False
+            self.generation += 1
+            log.info(f'[model process] started pid={proc.pid}')
+
+    def close(self, timeout: float = 5.0) -> None:
+        """ Stop the worker (after its current job). """
+        with self._lock:
+            self._stop(timeout)
+
+    def _stop(self, timeout: float) -> None:
+        proc, conn = self._proc, self._conn
+        self._proc = self._conn = None
+        if proc is None:
+            return
+        try:
+            conn.send(('stop',))
+        except (OSError, ValueError):
+            pass
+        proc.join(timeout)
+        if proc.is_alive():
+            proc.terminate()
+            proc.join(timeout)
+        conn.close()
+        log.info(f'[model process] stopped pid={proc.pid}')
+
+    def cancel(self, owner: Any) -> None:
+        """ Cancel the running job if it was started by `owner`. """
+        with self._state:
+            if self._owner is owner:
+                self._cancel.set()
+
+    def _recv(self):
+        try:
+            return self._conn.recv()
+        except (EOFError, OSError):
+            proc, conn = self._proc, self._conn
+            self._proc = self._conn = None
+            conn.close()
+            if proc is not None:
+                proc.join(1.0)
+            code = proc.exitcode if proc is not None else None
+            raise ModelProcessError(
+                f'The model process exited unexpectedly (exit code {code}); '
+                f'it restarts with the next job') from None
+
+    def run(self, owner: Any, info: dict, kwargs: dict, options: dict,
+            progress: Optional[Callable[[str], None]] = None,
+            partial: Optional[Callable[[dict], None]] = None
+            ) -> Optional[tuple[dict, dict]]:
+        """
+        Run a model through ModelRunnable's stages in the worker.
+        Returns (processed_data, stats) like ModelRunnable.signals.result,
+        or None if the job was cancelled. `options` are ModelRunnable
+        keyword arguments.
+        """
+        with self._lock:
+            if self._retire:
+                self._stop(5.0)
+            self.start()
+            with self._state:
+                self._next_job += 1
+                job = self._next_job
+                self._cancel.clear()
+                self._owner = owner
+            try:
+                self._conn.send(('run', job, info, kwargs, options))
+                while True:
+                    msg = self._recv()
+                    if msg[0] == 'progress':
+                        if progress is not None:
+                            progress(msg[1])
+                    elif msg[0] == 'partial':
+                        batch = _mesh(attach_arrays(msg[1], msg[2]), msg[3])
+                        if partial is not None:
+                            partial(batch)
+                    else:
+                        break
+            finally:
+                with self._state:
+                    self._owner = None
+            if msg[0] == 'error':
+                raise ModelProcessError(msg[1])
+            if msg[0] == 'cancelled':
+                return None
+            return self._result(job, msg[1])
+
+    def _result(self, job: int, res: dict) -> tuple[dict, dict]:
+        t0 = time.perf_counter()
+        mesh = attach_arrays(*res['mesh'])
+        asm = unpack_assembly(
+            res['parts'], attach_arrays(*res['tree']), res['extra'],
+            triangles=mesh['triangles'],
+            compound=RemoteCompound(self, self.generation, job), dirty=False)
+        triangles = None if res['welded'] is None else _mesh(
+            mesh, res['welded'])
+        instanced = None if res['instanced'] is None else _instanced(
+            mesh, res['instanced'])
+        processed_data = {
+            'assembly': asm,
+            'triangles': triangles,
+            'original_triangles': res['original_triangles'],
+            'streamed': res['streamed'],
+            'instanced': instanced,
+            'constraints': res['constraints'],
+            'edges': res['edges'],
+            'max_error': res['max_error'],
+        }
+        stats = res['stats']
+        stats['t_handoff'] = time.perf_counter() - t0
+
+        self._jobs += 1
+        rss = stats.get('worker_rss_mb', 0.0)
+        if self.recycle_mb and rss > self.recycle_mb or \
+                self.max_jobs and self._jobs >= self.max_jobs:
+            # Lazily, so the model just built can still be exported
+            log.info(f'[model process] recycling before the next job '
+                     f'(rss={rss:,.0f} MB, jobs={self._jobs})')
+            self._retire = True
+        return processed_data, stats
+
+    def export_step(self, compound: RemoteCompound, path: str) -> None:
+        """ Write a mirror's STEP file from the shapes in the worker. """
+        with self._lock:
+            if compound.generation != self.generation or not self.alive:
+                raise ModelProcessError(
+                    'The model process that built this model has been '
+                    'restarted; regenerate the model to export it')
+            self._conn.send(('export', compound.job, path))
+            msg = self._recv()
+            if msg[0] == 'error':
+                raise ModelProcessError(msg[1])
+
+
+# ---- Worker side ----
+
+def _serve(conn, cancel, app_root: str, models_dir: str, pkg: str) -> None:
+    """ Worker process entry point. """
+    # The models package lives in models_dir's parent
+    for path in (app_root, str(Path(models_dir).parent)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    from atlas.logging_setup import DEFAULT_LEVEL
+    logging.basicConfig(
+        level=DEFAULT_LEVEL,
+        format='[%(levelname)s] model process %(name)s: %(message)s')
+    from gui.model_registry import ModelRegistry
+    _Server(conn, cancel, ModelRegistry(Path(models_dir), pkg)).serve()
+
+
+class _Server:
+    def __init__(self, conn, cancel, registry) -> None:
+        self.conn = conn
+        self.cancel = cancel
+        self.registry = registry
+        self.job = None  # running ModelRunnable
+        self._job_lock = threading.Lock()  # job vs. cancel hand-off
+        self._started = threading.Event()  # set while a job runs
+        self.titan: dict[str, tuple[Any, Any]] = {}  # module -> (mod, engine)
+        self.assemblies: OrderedDict[int, Any] = OrderedDict()
+        self.blocks: list[SharedMemory] = []  # sent, maybe not yet attached
+        threading.Thread(target=self._watch_cancel, daemon=True).start()
+
+    def serve(self) -> None:
+        try:
+            import atlas_runtime
+            atlas_runtime.load_occ()
+        except Exception as e:
+            log.warning(f'OCC warm-up failed: {e}')
+        try:
+            while True:
+                try:
+                    msg = self.conn.recv()
+                except (EOFError, OSError):
+                    return
+                # The GUI is done with everything we sent before it asked
+                # again: what it did not attach by now it never will
+                self._release()
+                if msg[0] == 'stop':
+                    return
+                try:
+                    if msg[0] == 'run':
+                        self._run(*msg[1:])
+                    elif msg[0] == 'export':
+                        self._export(*msg[1:])
+                except Exception:
+                    self.conn.send(('error', traceback.format_exc()))
+        finally:
+            self._release()
+
+    def _watch_cancel(self) -> None:
+        while True:
+            self.cancel.wait()
+            with self._job_lock:
+                job = self.job
+                if job is not None:
+                    job.cancel()
+                    self.cancel.clear()
+                    continue
+            # Sent before the job started: keep it set, _run cancels the
+            # job as soon as it is assigned
+            self._started.wait()
+
+    def _share(self, arrays: dict) -> tuple[Optional[str], list]:
+        name, spec, shm = share_arrays(arrays)
+        if shm is not None:
+            if os.name != 'nt':
+                shm.close()  # the name is all _release needs
+            self.blocks.append(shm)
+        return name, spec
+
+    def _release(self) -> None:
+        """ Drop the blocks sent so far, unlinking any never attached. """
+        for shm in self.blocks:
+            if os.name == 'nt':
+                shm.close()
+                continue
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass  # attached, and so unlinked, by the GUI
+        self.blocks.clear()
+
+    def _engine(self, mod):
+        name = mod.__name__
+        cached = self.titan.get(name)
+        if cached is None or cached[0] is not mod:
+            from atlas.modules.titan import TitanEngine
+            constraints = getattr(mod, 'CONSTRAINTS', None)
+            cached = self.titan[name] = (
+                mod, TitanEngine(constraints) if constraints else None)
+        return cached[1]
+
+    def _send_partial(self, batch: CompactMesh) -> None:
+        arrays, meta = _mesh_parts(batch)
+        self.conn.send(('partial', *self._share(arrays), meta))
+
+    def _run(self, job_id: int, info: dict, kwargs: dict,
+             options: dict) -> None:
+        from atlas_runtime import memo
+        from gui.workers import ModelRunnable
+
+        mod, reloaded = self.registry.load(info)
+        if reloaded:
+            memo.cache.drop_module(info['module'])
+        fn = getattr(mod, info['func'])
+        job = ModelRunnable(fn, kwargs, titan=self._engine(mod), **options)
+        out: dict[str, Any] = {}
+        job.signals.progress.connect(
+            lambda m: self.conn.send(('progress', m)))
+        job.signals.partial.connect(self._send_partial)
+        job.signals.result.connect(
+            lambda data, stats: out.update(data=data, stats=stats))
+        job.signals.error.connect(lambda m: out.update(error=m))
+        with self._job_lock:
+            self.job = job
+            if self.cancel.is_set():
+                job.cancel()
+                self.cancel.clear()
+            self._started.set()
+        try:
+            job.run()
+        finally:
+            with self._job_lock:
+                self.job = None
+                self._started.clear()
+
+        if 'error' in out:
+            self.conn.send(('error', out['error']))
+            return
+        if 'data' not in out:
+            self.conn.send(('cancelled',))
+            return
+
+        data, stats = out['data'], out['stats']
+        asm = data['assembly']
+        arrays = {'triangles': np.asarray(
+            asm.triangles, dtype=np.float32).reshape(-1, 9)}
+        welded = None
+        if data['triangles'] is not None:
+            mesh_arrays, welded = _mesh_parts(data['triangles'])
+            arrays.update(mesh_arrays)
+        instanced = None
+        if data.get('instanced') is not None:
+            inst_arrays, instanced = _instanced_parts(data['instanced'])
+            arrays.update(inst_arrays)
+        parts, tree, extra = pack_assembly(asm)
+        report = data['constraints']
+
+        # The compound may not be built yet (LODs): kept by assembly
+        self.assemblies[job_id] = asm
+        while len(self.assemblies) > KEEP_ASSEMBLIES:
+            self.assemblies.popitem(last=False)
+        import psutil
+        stats.update(
+            model_process=os.getpid(),
+            worker_rss_mb=psutil.Process().memory_info().rss / 1024 ** 2)
+        self.conn.send(('result', {
+            'mesh': self._share(arrays),
+            'tree': self._share(tree),
+            'parts': parts,
+            'extra': extra,
+            'welded': welded,
+            'original_triangles': data['original_triangles'],
+            'streamed': data['streamed'],
+            'instanced': instanced,
+            'constraints': report if _picklable(report) else None,
+            # One group per distinct part: small enough to pickle
+            'edges': data['edges'],
+            'max_error': data['max_error'],
+            'stats': stats,
+        }))
+
+    def _export(self, job_id: int, path: str) -> None:
+        from atlas_runtime import atlas_occ
+        from atlas_runtime.asm_utils import ensure_compound
+
+        asm = self.assemblies.get(job_id)
+        if asm is None:
+            raise ModelProcessError(
+                'The model process no longer holds this model; regenerate '
+                'it to export')
+        atlas_occ.export_step(ensure_compound(asm), path)
+        self.conn.send(('done',))
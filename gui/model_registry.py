@@ -0,0 +1,187 @@
+import gc
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+
+log = logging.getLogger(__name__)
+
+# (relative path, content hash) per source file of a model package
+Signature = tuple[tuple[str, str], ...]
+
+
+@dataclass
+class _ConfigEntry:
+    stat: tuple[int, int] | None  # (mtime_ns, size) of config.json
+    display_name: str
+    func_name: str
+
+
+@dataclass
+class _LoadedModule:
+    signature: Signature
+    module: ModuleType
+
+
+class ModelRegistry:
+    """
+    Change-aware model discovery and import for the models/ directory.
+
+    - scan() only re-reads a package's config.json when its mtime/size
+      changed, so rescans of large model directories are a stat() per entry.
+    - load() reuses the already imported package while none of its source
+      files changed. Files are compared by (mtime, size) first and by content
+      hash when those moved, so touching a file does not force a reimport.
+    """
+
+    def __init__(self, models_dir: Path, pkg: str) -> None:
+        self.models_dir = models_dir
+        self.pkg = pkg
+        self._configs: dict[str, _ConfigEntry] = {}
+        self._modules: dict[str, _LoadedModule] = {}
+        self._hashes: dict[str, tuple[int, int, str]] = {}  # path -> stat+hash
+
+    # ---- Discovery ----
+
+    def scan(self) -> dict[str, dict]:
+        """ Return {display_name: {'module', 'folder', 'func'}}. """
+        models: dict[str, dict] = {}
+        self.models_dir.mkdir(parents=True, exist_ok=True)
+        seen: set[str] = set()
+
+        with os.scandir(self.models_dir) as it:
+            for entry in it:
+                if not entry.is_dir():
+                    continue
+
+                init_path = os.path.join(entry.path, '__init__.py')
+                if not os.path.isfile(init_path):
+                    if entry.name != '__pycache__':
+                        log.info(
+                            f'Skipping "{entry.name}" - Must be a package')
+                    continue
+
+                seen.add(entry.name)
+                cfg = self._read_config(Path(entry.path))
+
+                # Build a **package** name, not a path
+                models[cfg.display_name] = {
+                    'module': f'{self.pkg}.{entry.name}',
+                    'folder': entry.name,
+                    'func': cfg.func_name}
+
+        for gone in set(self._configs) - seen:
+            del self._configs[gone]
+        return models
+
+    def _read_config(self, folder: Path) -> _ConfigEntry:
+        cfg_path = folder / 'config.json'
+        try:
+            st = cfg_path.stat()
+            stat = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stat = None
+
+        cached = self._configs.get(folder.name)
+        if cached is not None and cached.stat == stat:
+            return cached
+
+        display_name = folder.name
+        func_name = 'assembly'
+        if stat is not None:
+            try:
+                data = json.loads(cfg_path.read_text(encoding='utf-8'))
+                display_name = data.get('name', display_name)
+                func_name = data.get('entry', func_name)
+            except Exception as e:
+                log.error(f'[models] Failed reading {cfg_path}: {e}')
+
+        entry = _ConfigEntry(stat, display_name, func_name)
+        self._configs[folder.name] = entry
+        return entry
+
+    # ---- Change detection ----
+
+    def _file_hash(self, path: str, st: os.stat_result) -> str:
+        cached = self._hashes.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        self._hashes[path] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def signature(self, folder: str) -> Signature:
+        """ Content signature of every source/config file in a package. """
+        root = self.models_dir / folder
+        out: list[tuple[str, str]] = []
+        stack = [str(root)]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        if entry.name != '__pycache__':
+                            stack.append(entry.path)
+                    elif entry.name.endswith(('.py', '.json')):
+                        rel = os.path.relpath(entry.path, root)
+                        out.append((rel, self._file_hash(
+                            entry.path, entry.stat())))
+        return tuple(sorted(out))
+
+    def watch_paths(self) -> list[str]:
+        """ Directories and files a filesystem watcher should observe. """
+        paths = [str(self.models_dir)]
+        for folder in self._configs:
+            root = self.models_dir / folder
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if d != '__pycache__']
+                paths.append(dirpath)
+                paths.extend(os.path.join(dirpath, f) for f in filenames
+                             if f.endswith(('.py', '.json')))
+        return paths
+
+    def is_stale(self, info: dict) -> bool:
+        loaded = self._modules.get(info['module'])
+        return loaded is None or loaded.signature != self.signature(
+            info['folder'])
+
+    # ---- Import ----
+
+    @staticmethod
+    def _unload_package(pkg_name: str) -> None:
+        """ Remove a package and all its submodules from sys.modules. """
+        killed = []
+        prefix = pkg_name + '.'
+        for name in list(sys.modules.keys()):
+            if name == pkg_name or name.startswith(prefix):
+                killed.append(name)
+                del sys.modules[name]
+        log.debug(f'[reload] dropped modules: {killed}')
+
+    def _force_import_package(self, pkg_name: str) -> ModuleType:
+        """ Invalidate caches, unload package tree, then import clean. """
+        importlib.invalidate_caches()
+        self._unload_package(pkg_name)
+        gc.collect()
+        return importlib.import_module(pkg_name)
+
+    def load(self, info: dict) -> tuple[ModuleType, bool]:
+        """
+        Import a model package, reimporting only if it changed on disk.
+        Returns (module, reloaded).
+        """
+        mod_name = info['module']
+        sig = self.signature(info['folder'])
+        loaded = self._modules.get(mod_name)
+        if (loaded is not None and loaded.signature == sig and
+                sys.modules.get(mod_name) is loaded.module):
+            return loaded.module, False
+
+        mod = self._force_import_package(mod_name)
+        self._modules[mod_name] = _LoadedModule(sig, mod)
+        return mod, True
@@ -0,0 +1,147 @@
+import logging
+from pathlib import Path
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, \
+    QPushButton, QFileDialog
+from PySide6.QtGui import QPainter, QColor, QPen
+from PySide6.QtCore import Qt, QPointF, QRectF
+from PySide6 import QtCore
+
+from atlas_runtime.tracing import Tracer, TraceRun
+
+# Stage colours, in pipeline order; unknown stages fall back to grey
+STAGE_COLORS = {
+    'model': '#4e79a7',
+    'normalize': '#f28e2b',
+    'estimate': '#9c755f',
+    'geometry': '#e15759',
+    'vtk_prep': '#76b7b2',
+    'count_instances': '#59a14f',
+    'vtk_load': '#edc948',
+    'vtk_flush': '#b07aa1',
+}
+RSS_COLOR = '#00ffc8'
+
+
+class _StageChart(QWidget):
+    """ Stacked bar per run (stage seconds) with an RSS line on top. """
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.runs: list[TraceRun] = []
+        self.setMinimumSize(420, 180)
+
+    def set_runs(self, runs: list[TraceRun]) -> None:
+        self.runs = runs
+        self.update()
+
+    def paintEvent(self, event) -> None:
+        p = QPainter(self)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        p.fillRect(self.rect(), QColor(30, 30, 30))
+
+        if not self.runs:
+            p.setPen(QColor('#888'))
+            p.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter,
+                       'No traced runs yet')
+            return
+
+        pad = 24
+        area = QRectF(pad, 8, self.width() - 2 * pad, self.height() - 16 - pad)
+        stages = [r.stage_times() for r in self.runs]
+        t_max = max((sum(st.values()) for st in stages), default=0.0) or 1.0
+        rss = [r.counters().get('rss_mb') for r in self.runs]
+        rss_max = max((v for v in rss if v is not None), default=0.0) or 1.0
+
+        slot = area.width() / len(self.runs)
+        bar_w = max(2.0, slot * 0.7)
+
+        for i, st in enumerate(stages):
+            x = area.left() + i * slot + (slot - bar_w) / 2
+            y = area.bottom()
+            for name, dt in st.items():
+                h = area.height() * dt / t_max
+                y -= h
+                p.fillRect(QRectF(x, y, bar_w, h),
+                           QColor(STAGE_COLORS.get(name, '#888888')))
+
+        pts = [QPointF(area.left() + (i + 0.5) * slot,
+                       area.bottom() - area.height() * v / rss_max)
+               for i, v in enumerate(rss) if v is not None]
+        if len(pts) > 1:
+            p.setPen(QPen(QColor(RSS_COLOR), 2))
+            p.drawPolyline(pts)
+
+        p.setPen(QColor('#ccc'))
+        p.drawText(QRectF(0, area.bottom() + 4, self.width(), pad),
+                   Qt.AlignmentFlag.AlignCenter,
+                   f'max {t_max:.3f}s   RSS max {rss_max:.0f} MB')
+
+
+class PerfPanel(QWidget):
+    """
+    Optional profiling window: stage times and RSS over the last N traced
+    regenerations, plus Chrome trace / Perfetto export of the ring buffer.
+    """
+
+    def __init__(self, tracer: Tracer, max_runs: int = 20,
+                 parent=None) -> None:
+        super().__init__(parent)
+        self.setObjectName('Panel')
+        # noinspection PyUnresolvedReferences
+        self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
+        self.setWindowTitle('Pipeline Performance')
+        self.setWindowFlag(Qt.WindowType.Tool, True)
+
+        self.tracer = tracer
+        self.max_runs = max_runs
+
+        self.chart = _StageChart(self)
+        self.summary = QLabel('')
+        self.summary.setWordWrap(True)
+        self.legend = QLabel('  '.join(
+            f'<span style="color:{c}">■</span> {n}'
+            for n, c in STAGE_COLORS.items()) +
+            f'  <span style="color:{RSS_COLOR}">━</span> RSS')
+
+        self.export_btn = QPushButton('Export Chrome trace…')
+        self.export_btn.clicked.connect(self._export_trace)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.chart, 1)
+        layout.addWidget(self.legend)
+        layout.addWidget(self.summary)
+        row = QHBoxLayout()
+        row.addStretch()
+        row.addWidget(self.export_btn)
+        layout.addLayout(row)
+
+    def refresh(self) -> None:
+        runs = [r for r in self.tracer.last_runs(self.max_runs * 2)
+                if r.label.startswith('regen')][-self.max_runs:]
+        self.chart.set_runs(runs)
+        if not runs:
+            self.summary.setText('')
+            return
+
+        last = runs[-1]
+        parts = [f'{n}={dt:.3f}s' for n, dt in last.stage_times().items()]
+        ctr = last.counters()
+        self.summary.setText(
+            f'{last.label}: {"  ".join(parts)}  '
+            f'total={last.duration:.3f}s  '
+            f'inst={int(ctr.get("pipeline.instances", 0)):,}  '
+            f'tris={int(ctr.get("pipeline.triangles", 0)):,}')
+
+    def _export_trace(self) -> None:
+        start = str(Path.home() / 'atlas_trace.json')
+        path, _ = QFileDialog.getSaveFileName(
+            self, 'Export Chrome trace', start, 'Trace JSON (*.json)')
+        if not path:
+            return
+        try:
+            self.tracer.export_chrome_trace(path)
+            logging.info(f'[trace] exported {len(self.tracer.runs)} runs '
+                         f'-> {path}')
+        except Exception as e:
+            logging.exception(f'[trace] export failed: {e}')
@@ -1,16 +1,87 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
+import numpy as np
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, \
+    QTableView, QHeaderView, QAbstractItemView, QMenu
+from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6 import QtCore
 
+from gui.bom_model import BomTableModel, BomColumns
+
+
 class RightPanel(QWidget):
+    similarRequested = Signal(str)  # part_no
+
     def __init__(self):
         super().__init__()
         self.setObjectName('Panel')
         # noinspection PyUnresolvedReferences
         self.setAttribute(QtCore.Qt.WA_StyledBackground, True)
 
+        self.summary = QLabel('')
+        self.bom_model = BomTableModel(self)
+        self.bom_model.viewChanged.connect(self._update_summary)
+        self.bom_model.dataChanged.connect(self._update_summary)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText('Filter part no / description…')
+        self.filter_edit.setClearButtonEnabled(True)
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(120)
+        self._filter_timer.timeout.connect(
+            lambda: self.bom_model.set_filter(self.filter_edit.text()))
+        self.filter_edit.textChanged.connect(self._filter_timer.start)
+
+        # Fixed row heights keep the view O(visible rows) for big BOMs
+        self.table = QTableView()
+        self.table.setModel(self.bom_model)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(
+            -1, Qt.SortOrder.AscendingOrder)
+        self.table.setSelectionBehavior(
+            QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(
+            QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setWordWrap(False)
+        vh = self.table.verticalHeader()
+        vh.setVisible(False)
+        vh.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vh.setDefaultSectionSize(22)
+        hh = self.table.horizontalHeader()
+        hh.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        hh.setStretchLastSection(True)
+        self.table.setContextMenuPolicy(
+            Qt.ContextMenuPolicy.CustomContextMenu)
+        self.table.customContextMenuRequested.connect(self._context_menu)
+
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel('BOM / Details'))
-        layout.addStretch()
+        layout.addWidget(self.filter_edit)
+        layout.addWidget(self.table, 1)
+        layout.addWidget(self.summary)
 
     def set_bom(self, bom) -> None:
-        pass # TODO: Implement
+        """ Show a rolled-up BOM (BomColumns or bom_rollup() lines). """
+        if not isinstance(bom, BomColumns):
+            bom = BomColumns.from_lines(bom or [])
+        self.bom_model.set_columns(bom)
+
+    def _context_menu(self, pos) -> None:
+        index = self.table.indexAt(pos)
+        if not index.isValid():
+            return
+        rows = self.bom_model.rows
+        part_no = str(self.bom_model.columns.part_no[rows[index.row()]])
+        menu = QMenu(self)
+        act = menu.addAction(f'Find parts similar to {part_no}')
+        if menu.exec(self.table.viewport().mapToGlobal(pos)) is act:
+            self.similarRequested.emit(part_no)
+
+    def _update_summary(self, *_args) -> None:
+        cols = self.bom_model.columns
+        shown = len(self.bom_model.rows)
+        pcs = float(np.sum(cols.qty[cols.unit == 'pcs'])) if len(cols) else 0
+        text = f'{len(cols):,} lines, {pcs:,.0f} pcs'
+        if shown != len(cols):
+            text = f'{shown:,} of {text}'
+        self.summary.setText(text)
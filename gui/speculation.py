@@ -0,0 +1,117 @@
+import logging
+from collections import deque
+from typing import Callable, Hashable
+
+from PySide6.QtCore import QObject, QThreadPool, Qt
+
+from gui.workers import ModelRunnable
+from gui.workspace import Workspace
+
+log = logging.getLogger(__name__)
+
+# Below normal jobs in the pool queue
+SPECULATIVE_PRIORITY = -1
+
+
+def neighbour_values(value: float, step: float, lo: float, hi: float,
+                     k: int, decimals: int = 0) -> list[float]:
+    """
+    value ±1..k steps, nearest first (+1, -1, +2, -2...), clipped to the
+    editor range and rounded the way the spin box rounds its value.
+    """
+    out: list[float] = []
+    if step <= 0:
+        return out
+    for i in range(1, k + 1):
+        for sign in (1, -1):
+            v = value + sign * i * step
+            v = round(v, decimals) if decimals else type(value)(round(v))
+            if lo <= v <= hi and v != value and v not in out:
+                out.append(v)
+    return out
+
+
+class Speculator(QObject):
+    """
+    Idle-time precomputation of neighbouring parameter values.
+
+    Jobs run one at a time at low priority and land in the workspace as
+    least recently used, unpinned entries, keyed exactly like the request
+    the UI would make for that value. cancel() drops the queue and stops the
+    running job at its next stage boundary; its result is discarded.
+    """
+
+    def __init__(self, workspace: Workspace, pool: QThreadPool,
+                 job_options: dict | None = None, parent=None) -> None:
+        super().__init__(parent)
+        self.workspace = workspace
+        self.pool = pool
+        self.job_options = job_options or {}
+        self._queue: deque[tuple[Hashable, Callable, dict]] = deque()
+        self._job: ModelRunnable | None = None
+        self._retired: list[ModelRunnable] = []  # cancelled, still running
+        self._titan = None
+        self._gen = 0
+
+    @property
+    def busy(self) -> bool:
+        return self._job is not None or bool(self._queue)
+
+    def submit(self, jobs: list[tuple[Hashable, Callable, dict]],
+               titan=None) -> None:
+        """
+        Replace pending speculation with (key, fn, kwargs) jobs, checked
+        against the model's constraints with `titan` (a TitanEngine).
+        """
+        self.cancel()
+        self._titan = titan
+        self._queue.extend(j for j in jobs if j[0] not in self.workspace)
+        if self._queue:
+            log.info(f'[speculate] queued {len(self._queue)} neighbours')
+        self._next()
+
+    def cancel(self) -> None:
+        self._gen += 1
+        self._queue.clear()
+        if self._job is not None:
+            self._job.cancel()
+            if not self.pool.tryTake(self._job):
+                self._retired.append(self._job)
+            self._job = None
+
+    def _next(self) -> None:
+        if self._job is not None or not self._queue:
+            return
+        key, fn, kwargs = self._queue.popleft()
+        if key in self.workspace:
+            self._next()
+            return
+
+        gen = self._gen
+        job = ModelRunnable(fn, kwargs, stream=False, low_priority=True,
+                            titan=self._titan, **self.job_options)
+
+        def _on_result(processed_data, stats: dict) -> None:
+            if gen != self._gen or stats.get('lod', 'full') != 'full':
+                return
+            self.workspace.put(key, processed_data['assembly'],
+                               processed_data['triangles'], None, stats,
+                               pin=False, edges=processed_data.get('edges'),
+                               constraints=processed_data.get('constraints'))
+            log.info(f'[speculate] ready in {stats["t_total"]:.3f}s, '
+                     f'{len(self._queue)} left')
+
+        def _on_finished() -> None:
+            if job in self._retired:
+                self._retired.remove(job)
+            if gen != self._gen:
+                return
+            self._job = None
+            self._next()
+
+        job.signals.result.connect(
+            _on_result, Qt.ConnectionType.QueuedConnection)
+        job.signals.finished.connect(
+            _on_finished, Qt.ConnectionType.QueuedConnection)
+        self._job = job
+        self.pool.start(job, SPECULATIVE_PRIORITY)
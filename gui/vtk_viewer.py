@@ -8,17 +8,228 @@ from PySide6.QtWidgets import QLabel, QVBoxLayout, QWidget, QApplication
 from PySide6.QtCore import QTimer, Qt
 from vtkmodules.qt.QVTKRenderWindowInteractor import QVTKRenderWindowInteractor
 from vtkmodules.util.numpy_support import numpy_to_vtk, numpy_to_vtkIdTypeArray
-import vtk
+# Only the VTK modules the viewer needs; `import vtk` loads every module
+from vtkmodules.vtkCommonCore import vtkIdList, vtkIdTypeArray, vtkPoints
+from vtkmodules.vtkCommonDataModel import vtkCellArray, vtkPolyData
+from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper, \
+    vtkRenderer, vtkRenderWindow, vtkGlyph3DMapper
+# noinspection PyUnresolvedReferences
+import vtkmodules.vtkInteractionStyle  # default interactor style
+# noinspection PyUnresolvedReferences
+import vtkmodules.vtkRenderingOpenGL2  # render window/mapper overrides
 
 from atlas.config_loader import load_config
+from atlas_runtime.compact_mesh import CompactMesh, compact
+from atlas_runtime.edges import EdgeOverlay
+from atlas_runtime.membudget import MeshGroup
+from atlas_runtime.tracing import span
 
 # Config
-config = load_config('atlas/config.json')
+config = load_config()
 model_color = tuple(config['model_color'])
+stream_max_fps = float(config.get('stream_max_fps', 30))
+edge_color = tuple(config.get('edge_color', [0.15, 0.15, 0.15]))
+
+# Parts with at least this many instances draw their edges instanced
+EDGE_INSTANCE_MIN = 8
+
+# Polygon offset (factor, units) pushing model surfaces back, so feature
+# edges drawn on them are not z-fighting
+SURFACE_OFFSET = (1.0, 1.0)
+
+# Field data of quantized polydata: origin xyz, step xyz
+QUANTIZATION = 'quantization'
+
+
+def compact_polydata(mesh: CompactMesh,
+                     polydata: vtkPolyData | None = None) -> vtkPolyData:
+    """
+    Zero-copy polydata of a CompactMesh: uint16 (or float32) points,
+    fixed-size triangle cells over the 32-bit indices (no offsets array)
+    and the dequantization in field data, applied by the actor
+    (place_actor).
+    """
+    polydata = polydata if polydata is not None else vtkPolyData()
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(mesh.qpoints, deep=False))
+
+    # noinspection PyArgumentList
+    vtk_cells = vtkCellArray()
+    vtk_cells.SetData(3, numpy_to_vtk(mesh.indices, deep=False))
+
+    quant = numpy_to_vtk(np.concatenate([mesh.origin, mesh.step]), deep=True)
+    quant.SetName(QUANTIZATION)
+    polydata.GetFieldData().RemoveArray(QUANTIZATION)
+    polydata.GetFieldData().AddArray(quant)
+    polydata.SetPoints(vtk_points)
+    polydata.SetPolys(vtk_cells)
+    polydata.Modified()
+    return polydata
+
+
+def place_actor(actor: vtkActor, polydata: vtkPolyData) -> None:
+    """ Dequantize `polydata` through the actor matrix (on the GPU). """
+    quant = polydata.GetFieldData().GetArray(QUANTIZATION)
+    if quant is None:
+        actor.SetPosition(0.0, 0.0, 0.0)
+        actor.SetScale(1.0, 1.0, 1.0)
+        return
+    actor.SetPosition(*(quant.GetValue(i) for i in range(3)))
+    actor.SetScale(*(quant.GetValue(i) for i in range(3, 6)))
+
+
+def surface_mapper(polydata: vtkPolyData) -> vtkPolyDataMapper:
+    """ Model mapper, offset behind lines drawn on the same surfaces. """
+    mapper = vtkPolyDataMapper()
+    mapper.SetInputData(polydata)
+    mapper.SetRelativeCoincidentTopologyPolygonOffsetParameters(
+        *SURFACE_OFFSET)
+    return mapper
+
+
+def line_polydata(points: np.ndarray, lines: np.ndarray) -> vtkPolyData:
+    """ Zero-copy polydata of (V, 3) float32 points and (E, 2) int32 lines. """
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(
+        np.ascontiguousarray(points, dtype=np.float32), deep=False))
+
+    # noinspection PyArgumentList
+    vtk_lines = vtkCellArray()
+    vtk_lines.SetData(2, numpy_to_vtk(
+        np.ascontiguousarray(lines, dtype=np.int32).reshape(-1), deep=False))
+
+    polydata = vtkPolyData()
+    polydata.SetPoints(vtk_points)
+    polydata.SetLines(vtk_lines)
+    return polydata
+
+
+def merged_edges(groups) -> vtkPolyData:
+    """ One line polydata with every instance of `groups` placed. """
+    points, lines, base = [], [], 0
+    for g in groups:
+        n, v = len(g.offsets), len(g.points)
+        points.append((g.points[None] + g.offsets[:, None]).reshape(-1, 3))
+        lines.append((g.lines[None] + (base + v * np.arange(
+            n, dtype=np.int32))[:, None, None]).reshape(-1, 2))
+        base += n * v
+    return line_polydata(np.concatenate(points), np.concatenate(lines))
+
+
+def instanced_edges(group) -> vtkGlyph3DMapper:
+    """ Mapper drawing a group's lines once per offset (GPU instancing). """
+    anchors = vtkPolyData()
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(
+        np.ascontiguousarray(group.offsets, dtype=np.float32), deep=False))
+    anchors.SetPoints(vtk_points)
+
+    mapper = vtkGlyph3DMapper()
+    mapper.SetInputData(anchors)
+    mapper.SetSourceData(line_polydata(group.points, group.lines))
+    mapper.ScalingOff()
+    mapper.OrientOff()
+    return mapper
+
+
+def instanced_mesh(group: MeshGroup) -> vtkGlyph3DMapper:
+    """ Surface mapper drawing a group's part mesh once per offset. """
+    anchors = vtkPolyData()
+    vtk_points = vtkPoints()
+    vtk_points.SetData(numpy_to_vtk(
+        np.ascontiguousarray(group.offsets, dtype=np.float32), deep=False))
+    anchors.SetPoints(vtk_points)
+
+    mapper = vtkGlyph3DMapper()
+    mapper.SetInputData(anchors)
+    # Exact float32 points: the quantization field data is origin 0, step 1
+    mapper.SetSourceData(compact_polydata(group.mesh))
+    mapper.ScalingOff()
+    mapper.OrientOff()
+    mapper.SetRelativeCoincidentTopologyPolygonOffsetParameters(
+        *SURFACE_OFFSET)
+    return mapper
+
+
+class _MeshStream:
+    """
+    Append-only point/connectivity buffers for progressively streamed
+    triangle batches. Capacity doubles on overflow, so appending n batches
+    costs amortized O(total) copies. VTK arrays are zero-copy views of the
+    filled part of the buffers, rebuilt on each flush.
+    """
+
+    def __init__(self, id_dtype) -> None:
+        self.points = np.empty((0, 3), dtype=np.float32)
+        self.conn = np.empty(0, dtype=id_dtype)
+        self.n_points = 0
+        self.n_ids = 0
+        self.batches = 0
+        self.polydata = vtkPolyData()
+        self.mesh: CompactMesh | None = None  # after compact()
+        self._views = None  # keeps numpy views alive while VTK uses them
+
+    @staticmethod
+    def _grow(buf: np.ndarray, needed: int) -> np.ndarray:
+        if needed <= len(buf):
+            return buf
+        cap = max(needed, 2 * len(buf), 1024)
+        out = np.empty((cap,) + buf.shape[1:], dtype=buf.dtype)
+        out[:len(buf)] = buf
+        return out
+
+    def append(self, points: np.ndarray, conn: np.ndarray) -> None:
+        n_p, n_c = len(points), len(conn)
+        self.points = self._grow(self.points, self.n_points + n_p)
+        self.conn = self._grow(self.conn, self.n_ids + n_c)
+        self.points[self.n_points:self.n_points + n_p] = points
+        self.conn[self.n_ids:self.n_ids + n_c] = conn
+        self.conn[self.n_ids:self.n_ids + n_c] += self.n_points
+        self.n_points += n_p
+        self.n_ids += n_c
+        self.batches += 1
+
+    def sync(self) -> None:
+        """ Point the polydata at the current buffer contents. """
+        pts = self.points[:self.n_points]
+        conn = self.conn[:self.n_ids]
+        self._views = (pts, conn)
+
+        vtk_points = vtkPoints()
+        vtk_points.SetData(numpy_to_vtk(pts, deep=False))
+
+        # noinspection PyArgumentList
+        vtk_cells = vtkCellArray()
+        vtk_cells.SetData(3, numpy_to_vtkIdTypeArray(conn, deep=False))
+
+        self.polydata.SetPoints(vtk_points)
+        self.polydata.SetPolys(vtk_cells)
+        self.polydata.Modified()
+
+    def compact(self, max_error: float | None = None) -> None:
+        """
+        Once streaming is over, swap the growable float buffers for a
+        CompactMesh over the whole mesh (one quantization box, float32
+        past `max_error`). Batches arrive unquantized, so this is the
+        only rounding.
+        """
+        if not self.n_points:
+            return
+        self.mesh = compact(self.points[:self.n_points],
+                            self.conn[:self.n_ids], max_error=max_error)
+        self.points = np.empty((0, 3), dtype=np.float32)
+        self.conn = np.empty(0, dtype=self.conn.dtype)
+        self._views = None
+        compact_polydata(self.mesh, self.polydata)
 
 
 class VTKQtViewer(QWidget):
-    def __init__(self, parent=None) -> None:
+    def __init__(self, parent=None, offscreen: bool = False) -> None:
+        """
+        offscreen renders into an offscreen buffer (EGL/OSMesa) instead of
+        the widget's native window, so the viewer can be driven headless
+        (render benchmarks). The widget itself is then never painted.
+        """
         super().__init__(parent)
 
         layout = QVBoxLayout(self)
@@ -30,10 +241,17 @@ class VTKQtViewer(QWidget):
         self.vtkWidget.setMinimumSize(800, 600)
         layout.addWidget(self.vtkWidget)
 
-        self.renderer = vtk.vtkRenderer()
-        self.vtkWidget.GetRenderWindow().AddRenderer(self.renderer)
+        self.renderer = vtkRenderer()
+        if offscreen:
+            self.render_window = vtkRenderWindow()
+            self.render_window.SetOffScreenRendering(1)
+            self.render_window.SetSize(800, 600)
+        else:
+            self.render_window = self.vtkWidget.GetRenderWindow()
+        self.render_window.AddRenderer(self.renderer)
 
-        self.vtkWidget.Initialize()
+        if not offscreen:
+            self.vtkWidget.Initialize()
 
         # --- Memory Overlay ---
         self.memory_label = QLabel('RAM: --- MB', self.vtkWidget)
@@ -63,6 +281,21 @@ class VTKQtViewer(QWidget):
         self.memory_timer.start()
         self.update_memory_display()
 
+        # Polydata currently on screen (kept by the model workspace)
+        self.polydata = None
+        self.actor = None
+        # Feature-edge overlay (show_edges), cleared with the scene
+        self.edges = None
+        self.edge_actors: list[vtkActor] = []
+
+        # --- Progressive streaming state ---
+        self._stream = None
+        self._stream_dirty = False
+        self._last_render = 0.0
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.timeout.connect(self._flush_stream)
+
     def _on_viewer_resize(self, event) -> None:
         """ Always keeps the label top-right (with 16px padding) """
         self.memory_label.move(
@@ -84,68 +317,180 @@ class VTKQtViewer(QWidget):
             self.memory_label.setText(f'Memory: Error ({e})')
             self.memory_timer.stop()
 
-    def load_triangles_optimized(self, processed_data: dict) -> None:
+    def load_compact_mesh(self, mesh: CompactMesh) -> None:
         logging.info(
-            f'[vtk] Loading optimized data: {processed_data['optimized_points']} points, '
-            f'{processed_data['original_count']} triangles'
-        )
-        total_start = time.perf_counter()
-
-        try:
-            points_np = np.ascontiguousarray(
-                processed_data['points'])  # (N, 3) float32 OK
-
-            # ---- robust vtkIdType handling ----
-            id_n_bytes = vtk.vtkIdTypeArray().GetDataTypeSize()  # 4 or 8
-            id_dtype = np.int64 if id_n_bytes == 8 else np.int32
-
-            offsets_np = np.ascontiguousarray(
-                processed_data['offsets'].astype(id_dtype, copy=False)
-            )
-            conn_np = np.ascontiguousarray(
-                processed_data['connectivity'].astype(id_dtype, copy=False)
-            )
-
-            vtk_points = vtk.vtkPoints()
-            vtk_points.SetData(
-                numpy_to_vtk(points_np, deep=False))  # geometry floats
-
-            # noinspection PyArgumentList
-            vtk_cells = vtk.vtkCellArray()
-
-            vtk_offsets = numpy_to_vtkIdTypeArray(offsets_np, deep=True)
-            vtk_conn = numpy_to_vtkIdTypeArray(conn_np, deep=True)
-            vtk_cells.SetData(vtk_offsets, vtk_conn)
+            f'[vtk] Loading compact mesh: {mesh.n_points:,} points, '
+            f'{mesh.n_triangles:,} triangles, {mesh.nbytes / 1024 ** 2:.1f} '
+            f'MB (error <= {mesh.max_error:.2g})')
+        self.show_polydata(compact_polydata(mesh))
+
+    def begin_stream(self) -> None:
+        """ Replace the scene with an empty, growing mesh actor. """
+        id_n_bytes = vtkIdTypeArray().GetDataTypeSize()  # 4 or 8
+        id_dtype = np.int64 if id_n_bytes == 8 else np.int32
+        self._stream = _MeshStream(id_dtype)
+        self._stream_dirty = False
+        self._render_timer.stop()
+
+        mapper = surface_mapper(self._stream.polydata)
+
+        actor = vtkActor()
+        actor.SetMapper(mapper)
+        actor.GetProperty().SetColor(model_color)
 
-            polydata = vtk.vtkPolyData()
-            polydata.SetPoints(vtk_points)
-            polydata.SetPolys(vtk_cells)
+        self._clear_scene()
+        self.renderer.AddActor(actor)
+        self.actor = actor
+        self.polydata = self._stream.polydata
 
-            mapper = vtk.vtkPolyDataMapper()
-            mapper.SetInputData(polydata)
+    def show_polydata(self, polydata: vtkPolyData,
+                      reset_camera: bool = True) -> None:
+        """ Replace the scene with a single actor for `polydata`. """
+        mapper = surface_mapper(polydata)
 
-            actor = vtk.vtkActor()
-            actor.SetMapper(mapper)
-            actor.GetProperty().SetColor(model_color)
+        actor = vtkActor()
+        actor.SetMapper(mapper)
+        actor.GetProperty().SetColor(model_color)
+        place_actor(actor, polydata)
 
-            self.renderer.RemoveAllViewProps()
-            self.renderer.AddActor(actor)
+        self._stream = None
+        self._render_timer.stop()
+        self.actor = actor
+        self.polydata = polydata
+        self._clear_scene()
+        self.renderer.AddActor(actor)
+        if reset_camera:
             self.renderer.ResetCamera()
-            self.vtkWidget.GetRenderWindow().Render()
+        self.render_window.Render()
+
+    def show_instanced(self, groups: list[MeshGroup]) -> None:
+        """
+        Replace the scene with the instanced LOD: one actor per distinct
+        part. Nothing placed is resident, so self.polydata stays None.
+        """
+        self._stream = None
+        self._render_timer.stop()
+        self._clear_scene()
+        with span('vtk_instanced', parts=len(groups)):
+            for group in groups:
+                actor = vtkActor()
+                actor.SetMapper(instanced_mesh(group))
+                actor.GetProperty().SetColor(model_color)
+                self.renderer.AddActor(actor)
+        self.actor = None
+        self.polydata = None
+        logging.info(
+            f'[vtk] Instanced LOD: {len(groups):,} parts, '
+            f'{sum(g.n_triangles for g in groups):,} triangles drawn from '
+            f'{sum(g.nbytes for g in groups) / 1024 ** 2:.1f} MB')
+        self.renderer.ResetCamera()
+        self.render_window.Render()
 
+    def _clear_scene(self) -> None:
+        self.renderer.RemoveAllViewProps()
+        self.edges = None
+        self.edge_actors = []
+
+    def show_edges(self, overlay: EdgeOverlay | None) -> None:
+        """
+        Overlay feature edges on the current scene (None removes them).
+        Parts placed at least EDGE_INSTANCE_MIN times are drawn instanced,
+        one actor each; all other lines are merged into a single actor.
+        """
+        for actor in self.edge_actors:
+            self.renderer.RemoveActor(actor)
+        self.edge_actors = []
+        self.edges = overlay
+        if overlay is not None and overlay.groups:
+            with span('vtk_edges', segments=overlay.n_segments):
+                mappers = [instanced_edges(g) for g in overlay.groups
+                           if len(g.offsets) >= EDGE_INSTANCE_MIN]
+                merged = [g for g in overlay.groups
+                          if len(g.offsets) < EDGE_INSTANCE_MIN]
+                if merged:
+                    mapper = vtkPolyDataMapper()
+                    mapper.SetInputData(merged_edges(merged))
+                    mappers.append(mapper)
+                for mapper in mappers:
+                    actor = vtkActor()
+                    actor.SetMapper(mapper)
+                    prop = actor.GetProperty()
+                    prop.SetColor(edge_color)
+                    prop.LightingOff()
+                    self.renderer.AddActor(actor)
+                    self.edge_actors.append(actor)
             logging.info(
-                f'[vtk] Total optimized load time: {time.perf_counter() - total_start:.3f}s')
-
+                f'[vtk] Feature edges: {overlay.n_segments:,} segments in '
+                f'{len(self.edge_actors)} actors, '
+                f'{overlay.nbytes / 1024 ** 2:.2f} MB')
+        self.render_window.Render()
+
+    def append_mesh_batch(self, batch: CompactMesh) -> None:
+        """
+        Append one welded batch to the streamed mesh. Renders are
+        coalesced to at most stream_max_fps; the camera is only reset when
+        the first batch lands.
+        """
+        if self._stream is None:
+            self.begin_stream()
+
+        self._stream.append(batch.points(), batch.indices)
+        self._stream_dirty = True
+
+        if self._stream.batches == 1:
+            self._flush_stream()
+            return
+
+        if not self._render_timer.isActive():
+            min_dt = 1.0 / max(stream_max_fps, 1.0)
+            wait = min_dt - (time.perf_counter() - self._last_render)
+            self._render_timer.start(max(0, int(wait * 1000)))
+
+    def end_stream(self, max_error: float | None = None
+                   ) -> CompactMesh | None:
+        """
+        Flush any pending batches and stop streaming; the mesh is then
+        quantized unless that exceeds `max_error` (see compact_mesh).
+        Returns that mesh (None if nothing was streamed); the polydata
+        shown wraps its arrays.
+        """
+        self._render_timer.stop()
+        stream = self._stream
+        if stream is None:
+            return None
+        self._flush_stream()
+        self._stream = None
+        stream.compact(max_error)
+        place_actor(self.actor, stream.polydata)
+        logging.info(
+            f'[vtk] Streamed {stream.batches} batches: '
+            f'{stream.n_points:,} points, {stream.n_ids // 3:,} triangles')
+        return stream.mesh
+
+    def _flush_stream(self) -> None:
+        stream = self._stream
+        if stream is None or not self._stream_dirty:
+            return
+        try:
+            with span('vtk_flush', batches=stream.batches,
+                      triangles=stream.n_ids // 3):
+                stream.sync()
+                if stream.batches == 1:
+                    self.renderer.ResetCamera()
+                self.render_window.Render()
         except Exception as e:
-            logging.exception(f'[vtk] Error in load_triangles_optimized: {e}')
-            raise
+            logging.exception(f'[vtk] Error flushing streamed mesh: {e}')
+        finally:
+            self._stream_dirty = False
+            self._last_render = time.perf_counter()
 
     def load_triangles(self, tris: list[list[float]]) -> None:
         """ Legacy method for compatibility """
-        if isinstance(tris, dict):
-            # New optimized format
-            self.load_triangles_optimized(tris)
-        else:
+        if isinstance(tris, CompactMesh):
+            with span('vtk_load', triangles=tris.original_count):
+                self.load_compact_mesh(tris)
+            return
+        with span('vtk_load', triangles=len(tris)):
             # Legacy format - process normally but with responsiveness
             self._load_triangles_responsive(tris)
 
@@ -164,24 +509,13 @@ class VTKQtViewer(QWidget):
         else:
             polydata = self.render_mesh(tris)
 
-        # Create pipeline
-        mapper = vtk.vtkPolyDataMapper()
-        mapper.SetInputData(polydata)
-
-        actor = vtk.vtkActor()
-        actor.SetMapper(mapper)
-        actor.GetProperty().SetColor(model_color)
-
-        self.renderer.RemoveAllViewProps()
-        self.renderer.AddActor(actor)
-        self.renderer.ResetCamera()
-        self.vtkWidget.GetRenderWindow().Render()
+        self.show_polydata(polydata)
 
         total_time = time.perf_counter() - total_start
         logging.info(f'[vtk] Legacy load time: {total_time:.3f}s')
 
     @staticmethod
-    def _render_mesh_chunked(tris: list[list[float]]) -> vtk.vtkPolyData:
+    def _render_mesh_chunked(tris: list[list[float]]) -> vtkPolyData:
         """ Render mesh with periodic GUI updates """
         logging.info(f'[vtk] Chunked processing of {len(tris)} triangles')
 
@@ -217,25 +551,25 @@ class VTKQtViewer(QWidget):
         points_np = np.array(points, dtype=np.float32)
         faces_np = np.array(faces, dtype=np.int64)
 
-        vtk_points = vtk.vtkPoints()
+        vtk_points = vtkPoints()
         vtk_points.SetData(numpy_to_vtk(points_np))
 
         # noinspection PyArgumentList
-        vtk_cells = vtk.vtkCellArray()
+        vtk_cells = vtkCellArray()
         for f in faces_np:
-            id_list = vtk.vtkIdList()
+            id_list = vtkIdList()
             for pid in f:
                 id_list.InsertNextId(int(pid))
             vtk_cells.InsertNextCell(id_list)
 
-        polydata = vtk.vtkPolyData()
+        polydata = vtkPolyData()
         polydata.SetPoints(vtk_points)
         polydata.SetPolys(vtk_cells)
 
         return polydata
 
     @staticmethod
-    def render_mesh(tris: list[list[float]]) -> vtk.vtkPolyData:
+    def render_mesh(tris: list[list[float]]) -> vtkPolyData:
         """Original render_mesh method for small models"""
         tris_np = np.array(tris, dtype=np.float32).reshape(-1, 3, 3)
 
@@ -258,18 +592,18 @@ class VTKQtViewer(QWidget):
         points_np = np.array(points, dtype=np.float32)
         faces_np = np.array(faces, dtype=np.int64)
 
-        vtk_points = vtk.vtkPoints()
+        vtk_points = vtkPoints()
         vtk_points.SetData(numpy_to_vtk(points_np))
 
         # noinspection PyArgumentList
-        vtk_cells = vtk.vtkCellArray()
+        vtk_cells = vtkCellArray()
         for f in faces_np:
-            id_list = vtk.vtkIdList()
+            id_list = vtkIdList()
             for pid in f:
                 id_list.InsertNextId(int(pid))
             vtk_cells.InsertNextCell(id_list)
 
-        polydata = vtk.vtkPolyData()
+        polydata = vtkPolyData()
         polydata.SetPoints(vtk_points)
         polydata.SetPolys(vtk_cells)
 
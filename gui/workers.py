@@ -2,26 +2,63 @@ from __future__ import annotations
 import time, traceback
 import logging
 import threading
+import psutil
 import numpy as np
 
-from PySide6.QtCore import QObject, Signal, QRunnable
+from PySide6.QtCore import QObject, Signal, QRunnable, QThread
 
 from atlas_runtime.asm_utils import normalize_assembly, \
-    build_compound_and_triangles
+    build_compound_and_triangles, iter_triangle_batches, ensure_compound, \
+    bom_flat, bom_rollup
+from atlas_runtime.tracing import tracer, span, counter, TraceRun
+from atlas_runtime.membudget import StageMemory, estimate_assembly, \
+    resolve_budget, plan_run, build_instanced_lod, build_bbox_lod
+from atlas_runtime.section import sections_along
+from atlas_runtime.compact_mesh import CompactMesh, weld, error_budget
+from atlas_runtime.projection import project_assembly
+from atlas_runtime.edges import assembly_edges
+from atlas_runtime.similarity import shared_index
+from gui.bom_model import BomColumns
+from gui.model_host import RemoteModel
+
+
+class JobCancelled(Exception):
+    """ Raised inside a ModelRunnable between stages after cancel(). """
 
 
 class WorkerSignals(QObject):
     result = Signal(object, dict)  # (processed_data, stats)
+    partial = Signal(object)  # welded mesh batch (streaming mode)
     error = Signal(str)
     finished = Signal()
     progress = Signal(str)
 
 
 class ModelRunnable(QRunnable):
-    def __init__(self, fn, kwargs: dict) -> None:
+    def __init__(self, fn, kwargs: dict, stream: bool = False,
+                 trace_run: TraceRun | None = None,
+                 mem_budget_mb: float = 0.0,
+                 mem_policy: str = 'downgrade',
+                 mem_tracemalloc: bool = False,
+                 low_priority: bool = False,
+                 tess_threads: int | None = None,
+                 dedupe: bool = False,
+                 edge_angle: float | None = None,
+                 titan=None) -> None:
         super().__init__()
         self.fn = fn
         self.kwargs = kwargs
+        self.stream = stream
+        self.trace_run = trace_run
+        self.mem_budget_mb = mem_budget_mb
+        self.mem_policy = mem_policy
+        self.mem_tracemalloc = mem_tracemalloc
+        self.low_priority = low_priority
+        self.tess_threads = tess_threads
+        self.dedupe = dedupe  # share identical shapes (dedupe_shapes)
+        self.edge_angle = edge_angle  # feature-edge overlay, None = off
+        self.titan = titan  # TitanEngine of the model, if it has constraints
+        self._cancel = threading.Event()
         self.signals = WorkerSignals()
         self.setAutoDelete(True)
 
@@ -38,133 +75,275 @@ class ModelRunnable(QRunnable):
                 stack.append((ch, qty))
         return total
 
+    def cancel(self) -> None:
+        """ Stop at the next stage boundary; no result/error is emitted. """
+        self._cancel.set()
+        if isinstance(self.fn, RemoteModel):
+            self.fn.host.cancel(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _checkpoint(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
     def run(self) -> None:
         thread_id = threading.get_ident()
         logging.info(
             f"[worker] Starting full processing on thread {thread_id}")
 
+        thread = QThread.currentThread()
+        if self.low_priority:
+            thread.setPriority(QThread.Priority.LowestPriority)
         try:
-            t_all = time.perf_counter()
+            with tracer.attach(self.trace_run):
+                self._run_pipeline(thread_id)
 
-            # Step 1: Model execution
-            self.signals.progress.emit("Executing model...")
-            t0 = time.perf_counter()
-            result = self.fn(**self.kwargs)
-            t_model = time.perf_counter() - t0
-
-            # Step 2: Normalize
-            self.signals.progress.emit("Normalizing assembly...")
-            t1 = time.perf_counter()
-            asm = normalize_assembly(result)
-            t_norm = time.perf_counter() - t1
+        except JobCancelled:
+            logging.info(f'[worker] Cancelled on thread {thread_id}')
+        except Exception as e:
+            error_msg = traceback.format_exc()
+            logging.error(
+                f'[worker] Exception on thread {thread_id}: {error_msg} - {e}')
+            self.signals.error.emit(error_msg)
+        finally:
+            if self.low_priority:
+                # Pool threads are reused
+                thread.setPriority(QThread.Priority.NormalPriority)
+            self.signals.finished.emit()
 
-            # Step 3: Build triangles (the expensive part)
-            self.signals.progress.emit("Building geometry...")
-            t2 = time.perf_counter()
-            build_compound_and_triangles(asm)
-            t_cache = time.perf_counter() - t2
+    def _run_pipeline(self, thread_id: int) -> None:
+        if isinstance(self.fn, RemoteModel):
+            self._run_remote(thread_id)
+            return
 
-            if not asm.triangles:
-                raise TypeError('Model produced no triangles')
+        t_all = time.perf_counter()
+        budget = resolve_budget(self.mem_budget_mb)
+        mem = StageMemory(budget, use_tracemalloc=self.mem_tracemalloc)
 
+        # Step 1: Model execution
+        self.signals.progress.emit("Executing model...")
+        t0 = time.perf_counter()
+        with span('model'), mem.stage('model'):
+            result = self.fn(**self.kwargs)
+        t_model = time.perf_counter() - t0
+        self._checkpoint()
+
+        # Step 2: Normalize
+        self.signals.progress.emit("Normalizing assembly...")
+        t1 = time.perf_counter()
+        with span('normalize'), mem.stage('normalize'):
+            asm = normalize_assembly(result, dedupe=self.dedupe,
+                                     threads=self.tess_threads)
+        t_norm = time.perf_counter() - t1
+        self._checkpoint()
+
+        # Step 2b: Estimate cost and plan against the memory budget
+        self.signals.progress.emit("Estimating memory...")
+        with span('estimate'), mem.stage('estimate'):
+            est = estimate_assembly(asm)
+            lod = plan_run(est, budget, self.mem_policy)
+        # Coarsest quantization the smallest part tolerates
+        max_error = error_budget(est.smallest_part)
+        if lod != 'full':
+            logging.warning(
+                f'[worker] Estimated {est.bytes_full / 1024 ** 2:,.0f} MB '
+                f'exceeds budget {budget / 1024 ** 2:,.0f} MB, '
+                f'downgrading to {lod} LOD')
+
+        # Step 3: Build triangles (the expensive part)
+        self.signals.progress.emit("Building geometry...")
+        t2 = time.perf_counter()
+        t_first = None
+        t_vtk_prep = 0.0
+        instanced = None
+        with span('geometry', streamed=self.stream, lod=lod), \
+                mem.stage('geometry'):
+            if lod == 'instanced':
+                # Unique parts only: nothing placed is built or streamed
+                instanced = build_instanced_lod(asm)
+                asm.triangles = np.empty((0, 9), dtype=np.float32)
+                asm.compound = None
+                asm.dirty = False
+                batches = []
+            elif lod == 'bbox':
+                # Boxes only: the compound is built if the model is exported
+                asm.triangles = build_bbox_lod(asm, est)
+                asm.compound = None
+                asm.dirty = False
+                batches = [asm.triangles] if self.stream else []
+            elif self.stream:
+                batches = iter_triangle_batches(
+                    asm, threads=self.tess_threads)
+            else:
+                build_compound_and_triangles(asm, threads=self.tess_threads)
+                batches = []
+
+            # Weld and emit each chunk as it is tessellated
+            for tris in batches:
+                mem.check()
+                self._checkpoint()
+                t3 = time.perf_counter()
+                with span('weld', triangles=len(tris)):
+                    # Exact: the viewer quantizes the whole mesh once
+                    batch = self._weld_triangles(tris, exact=True)
+                t_vtk_prep += time.perf_counter() - t3
+                if batch is None:
+                    continue
+                if t_first is None:
+                    t_first = time.perf_counter() - t_all
+                self.signals.partial.emit(batch)
+            t_cache = time.perf_counter() - t2 - t_vtk_prep
+
+        n_tris = (sum(g.n_triangles for g in instanced)
+                  if instanced is not None else len(asm.triangles))
+        if n_tris == 0:
+            raise TypeError('Model produced no triangles')
+
+        streamed = self.stream and instanced is None
+        self._checkpoint()
+        if streamed or instanced is not None:
+            # Batches are already on their way to the viewer, or the
+            # instanced LOD is drawn from its groups
+            processed_triangles = None
+        else:
             # Step 4: Pre-process triangles for VTK (reduce main thread work)
             self.signals.progress.emit("Optimizing triangles for display...")
             t3 = time.perf_counter()
 
             # Pre-process triangles to reduce VTK work
-            processed_triangles = self._optimize_triangles_for_vtk(
-                asm.triangles)
+            with span('vtk_prep', triangles=len(asm.triangles)), \
+                    mem.stage('vtk_prep'):
+                processed_triangles = self._optimize_triangles_for_vtk(
+                    asm.triangles, max_error)
 
             t_vtk_prep = time.perf_counter() - t3
 
-            # Step 5: Count instances
-            self.signals.progress.emit("Counting instances...")
+        # Step 4b: Feature edges for the overlay (cached per distinct part)
+        edges = None
+        t_edges = 0.0
+        if self.edge_angle is not None and lod != 'bbox':
+            self._checkpoint()
+            self.signals.progress.emit("Extracting feature edges...")
+            t4 = time.perf_counter()
             try:
-                t_inst = self._count_solid_instances(asm.root)
+                with mem.stage('edges'):
+                    edges = assembly_edges(asm, self.edge_angle,
+                                           threads=self.tess_threads)
             except Exception as e:
-                logging.exception(f'[worker] instance count failed: {e}')
-                t_inst = 0
-
-            # Package everything for main thread
-            processed_data = {
-                'assembly': asm,
-                'triangles': processed_triangles,
-                'original_triangles': len(asm.triangles)
-            }
-
-            stats = {
-                't_model': t_model,
-                't_norm': t_norm,
-                't_cache': t_cache,
-                't_vtk_prep': t_vtk_prep,
-                't_inst': t_inst,
-                't_total': time.perf_counter() - t_all,
-                'tris': len(asm.triangles),
-            }
-
-            logging.info(
-                f"[worker] Full processing completed on thread {thread_id}")
-            logging.info(
-                f"[worker] Times: model={t_model:.3f}s norm={t_norm:.3f}s cache={t_cache:.3f}s prep={t_vtk_prep:.3f}s")
-
-            self.signals.result.emit(processed_data, stats)
+                logging.exception(f'[worker] feature edges failed: {e}')
+            t_edges = time.perf_counter() - t4
 
+        # Step 5: Count instances
+        self.signals.progress.emit("Counting instances...")
+        try:
+            with span('count_instances'):
+                t_inst = self._count_solid_instances(asm.root)
         except Exception as e:
-            error_msg = traceback.format_exc()
-            logging.error(
-                f'[worker] Exception on thread {thread_id}: {error_msg} - {e}')
-            self.signals.error.emit(error_msg)
-        finally:
-            self.signals.finished.emit()
+            logging.exception(f'[worker] instance count failed: {e}')
+            t_inst = 0
 
-    @staticmethod
-    def _optimize_triangles_for_vtk(triangles):
-        """Pre-process triangles to reduce VTK processing time"""
+        # Step 6: Global constraints declared by the model
+        report = None
+        if self.titan is not None and lod != 'bbox':
+            self.signals.progress.emit("Checking constraints...")
+            try:
+                report = self.titan.update(asm)
+            except Exception as e:
+                logging.exception(f'[worker] constraint check failed: {e}')
+
+        # Package everything for main thread
+        processed_data = {
+            'assembly': asm,
+            'triangles': processed_triangles,
+            'original_triangles': n_tris,
+            'streamed': streamed,
+            'instanced': instanced,
+            'constraints': report,
+            'edges': edges,
+            'max_error': max_error,
+        }
 
-        if len(triangles) < 5000:
-            return triangles  # Small models don't need optimization
+        stats = {
+            't_model': t_model,
+            't_norm': t_norm,
+            't_cache': t_cache,
+            't_vtk_prep': t_vtk_prep,
+            't_inst': t_inst,
+            't_total': time.perf_counter() - t_all,
+            'tris': n_tris,
+        }
+        if t_first is not None:
+            stats['t_first'] = t_first
+        if edges is not None:
+            stats['t_edges'] = t_edges
+            stats['edge_segments'] = edges.n_segments
+        stats.update(est.as_stats())
+        stats['lod'] = lod
+        if report is not None:
+            stats['constraints'] = report.summary()
+            stats['t_constraints'] = report.elapsed
+        stats['mem'] = mem.peaks_mb
+        if mem.py_peaks_mb:
+            stats['mem_py'] = mem.py_peaks_mb
+
+        counter('pipeline', instances=t_inst, triangles=n_tris)
+        counter('rss_mb', psutil.Process().memory_info().rss / (1024 ** 2))
 
+        logging.info(
+            f"[worker] Full processing completed on thread {thread_id}")
+        logging.info(
+            f"[worker] Times: model={t_model:.3f}s norm={t_norm:.3f}s cache={t_cache:.3f}s prep={t_vtk_prep:.3f}s")
+        logging.info(
+            f"[worker] Peak RSS per stage: " + ' '.join(
+                f'{k}={v:.0f}MB' for k, v in mem.peaks_mb.items()))
+
+        self.signals.result.emit(processed_data, stats)
+
+    def _run_remote(self, thread_id: int) -> None:
+        """ The same stages in the model process (see gui.model_host). """
+        self._checkpoint()
+        options = dict(stream=self.stream, mem_budget_mb=self.mem_budget_mb,
+                       mem_policy=self.mem_policy,
+                       mem_tracemalloc=self.mem_tracemalloc,
+                       tess_threads=self.tess_threads,
+                       dedupe=self.dedupe, edge_angle=self.edge_angle)
+        with span('model_process', model=self.fn.info['func']):
+            out = self.fn.host.run(self, self.fn.info, self.kwargs, options,
+                                   progress=self.signals.progress.emit,
+                                   partial=self.signals.partial.emit)
+        if out is None:
+            raise JobCancelled()
+        self._checkpoint()
+        processed_data, stats = out
+        counter('rss_mb', psutil.Process().memory_info().rss / (1024 ** 2))
+        logging.info(
+            f"[worker] Model process {stats.get('model_process')} finished "
+            f"for thread {thread_id}: tris={stats['tris']:,} "
+            f"handoff={stats['t_handoff']:.3f}s "
+            f"worker_rss={stats.get('worker_rss_mb', 0):,.0f}MB")
+        self.signals.result.emit(processed_data, stats)
+
+    @staticmethod
+    def _optimize_triangles_for_vtk(triangles, max_error: float | None = None
+                                    ) -> CompactMesh | None:
+        """Pre-process triangles to reduce VTK processing time"""
         logging.info(f"[worker] Optimizing {len(triangles):,} triangles")
 
-        # Convert to numpy early (in worker thread)
-        tris_np = np.array(triangles, dtype=np.float32).reshape(-1, 3, 3)
-
-        # Pre-deduplicate points (the expensive part of VTK processing)
-        points = []
-        faces = []
-        point_id_map = {}
-        next_id = 0
-
-        for i, tri in enumerate(tris_np):
-            if i > 0 and i % 20000 == 0:
-                logging.info(
-                    f"[worker] Optimized {i:,}/{len(tris_np):,} triangles")
-
-            face_ids = []
-            for vert in tri:
-                key = tuple(vert.round(6))  # Round to reduce duplicates
-                if key not in point_id_map:
-                    point_id_map[key] = next_id
-                    points.append(vert)
-                    next_id += 1
-                face_ids.append(point_id_map[key])
-            faces.append(face_ids)
-
-        faces_np = np.asarray(faces, dtype=np.int64)
-
-        n_tris = faces_np.shape[0]
-        connectivity = faces_np.reshape(-1)
-        offsets = np.arange(0, (n_tris + 1) * 3, 3, dtype=np.int64)
-
-        # Return pre-processed data
-        return {
-            'points': np.asarray(points, dtype=np.float32),
-            'faces': faces_np,
-            'connectivity': connectivity,
-            'offsets': offsets,
-            'original_count': len(triangles),
-            'optimized_points': len(points),
-        }
+        return ModelRunnable._weld_triangles(triangles, max_error)
+
+    @staticmethod
+    def _weld_triangles(triangles, max_error: float | None = None,
+                        exact: bool = False) -> CompactMesh | None:
+        """
+        Weld triangles into the compact resident mesh the viewer and the
+        workspace keep: 16-bit quantized points (float32 past `max_error`
+        or with `exact`), 32-bit indices, implicit offsets (see
+        atlas_runtime.compact_mesh).
+        """
+        return weld(triangles, max_error, exact)
 
 
 class ExportSignals(QObject):
@@ -174,11 +353,12 @@ class ExportSignals(QObject):
 
 
 class ExportWorker(QRunnable):
-    def __init__(self, atlas_occ, compound, path: str) -> None:
+    def __init__(self, atlas_occ, asm, path: str) -> None:
         super().__init__()
         self.atlas_occ = atlas_occ
-        self.compound = compound
+        self.asm = asm
         self.path = path
+        self.trace_run = tracer.begin_run('export')
         self.signals = ExportSignals()
         self.setAutoDelete(True)
 
@@ -190,7 +370,10 @@ class ExportWorker(QRunnable):
             self.signals.progress.emit('Exporting STEP file...')
             t0 = time.perf_counter()
 
-            self.atlas_occ.export_step(self.compound, self.path)
+            with tracer.attach(self.trace_run), span('export_step'):
+                # Bbox LOD runs leave it to be built here, off the GUI thread
+                compound = ensure_compound(self.asm)
+                self.atlas_occ.export_step(compound, self.path)
 
             dt = time.perf_counter() - t0
             logging.info(f'[worker] Export completed in {dt:.3f}s '
@@ -202,3 +385,135 @@ class ExportWorker(QRunnable):
             logging.error(
                 f'[export] Exception on thread {thread_id}: {error_msg} ({e})')
             self.signals.error.emit(str(error_msg))
+        finally:
+            tracer.end_run(self.trace_run)
+
+
+class BomSignals(QObject):
+    finished = Signal(object, float)  # BomColumns, dt
+    error = Signal(str)
+
+
+class BomWorker(QRunnable):
+    """ Flatten, roll up and columnize an assembly's BOM off the GUI thread. """
+
+    def __init__(self, asm) -> None:
+        super().__init__()
+        self.asm = asm
+        self.signals = BomSignals()
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        try:
+            t0 = time.perf_counter()
+            with span('bom'):
+                cols = BomColumns.from_lines(bom_rollup(bom_flat(self.asm)))
+            self.signals.finished.emit(cols, time.perf_counter() - t0)
+        except Exception as e:
+            logging.exception(f'[bom] build failed: {e}')
+            self.signals.error.emit(str(e))
+
+
+class SectionSignals(QObject):
+    finished = Signal(int, object, float)  # generation, sections, dt
+    error = Signal(int, str)
+
+
+class SectionWorker(QRunnable):
+    """ Cut a stack of parallel sections from a triangle buffer. """
+
+    def __init__(self, gen: int, tris, axis: str, step: float) -> None:
+        super().__init__()
+        self.gen = gen
+        self.tris = tris
+        self.axis = axis
+        self.step = step
+        self.signals = SectionSignals()
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        try:
+            t0 = time.perf_counter()
+            sections = sections_along(self.tris, self.axis, self.step)
+            self.signals.finished.emit(
+                self.gen, sections, time.perf_counter() - t0)
+        except Exception as e:
+            logging.exception(f'[section] failed: {e}')
+            self.signals.error.emit(self.gen, str(e))
+
+
+class ProjectionSignals(QObject):
+    finished = Signal(int, object, float)  # generation, {view: Drawing}, dt
+    error = Signal(int, str)
+
+
+class ProjectionWorker(QRunnable):
+    """ Hidden-line drawing views of an assembly (cached per part). """
+
+    def __init__(self, gen: int, asm, tris, views, threads: int = 0) -> None:
+        super().__init__()
+        self.gen = gen
+        self.asm = asm
+        self.tris = tris
+        self.views = tuple(views)
+        self.threads = threads
+        self.signals = ProjectionSignals()
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        try:
+            t0 = time.perf_counter()
+            # Parts hide each other once the model has been tessellated
+            occlude = self.tris is not None and len(self.tris) > 0
+            drawings = project_assembly(self.asm, self.views, occlude,
+                                        self.threads)
+            self.signals.finished.emit(
+                self.gen, drawings, time.perf_counter() - t0)
+        except Exception as e:
+            logging.exception(f'[projection] failed: {e}')
+            self.signals.error.emit(self.gen, str(e))
+
+
+class SimilaritySignals(QObject):
+    finished = Signal(int, float)  # parts described, dt
+    error = Signal(str)
+
+
+class SimilarityWorker(QRunnable):
+    """ Add an assembly's parts to the similarity index. """
+
+    def __init__(self, model: str, asm) -> None:
+        super().__init__()
+        self.model = model
+        self.asm = asm
+        self.signals = SimilaritySignals()
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        try:
+            t0 = time.perf_counter()
+            index = shared_index()
+            described = index.update_model(self.model, self.asm)
+            self.signals.finished.emit(described, time.perf_counter() - t0)
+        except Exception as e:
+            logging.exception(f'[similarity] indexing failed: {e}')
+            self.signals.error.emit(str(e))
+
+
+class SimilaritySaveWorker(QRunnable):
+    """ Write the similarity index to disk if it changed. """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.setAutoDelete(True)
+
+    def run(self) -> None:
+        try:
+            index = shared_index()
+            if index.dirty:
+                t0 = time.perf_counter()
+                path = index.save()
+                logging.info(f'[similarity] {len(index):,} parts saved in '
+                             f'{time.perf_counter() - t0:.3f}s ({path})')
+        except Exception as e:
+            logging.exception(f'[similarity] saving failed: {e}')
@@ -0,0 +1,229 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Hashable
+
+import numpy as np
+
+from atlas_runtime import AtlasAssembly
+from atlas_runtime.compact_mesh import CompactMesh
+from atlas_runtime.edges import EdgeOverlay
+from atlas_runtime.membudget import INSTANCE_BYTES
+from atlas.modules.titan import TitanReport
+
+log = logging.getLogger(__name__)
+
+# Eviction order: cheapest to rebuild first
+TIERS = ('vtk', 'triangles', 'assembly')
+
+
+def _nbytes(obj: Any) -> int:
+    """ Bytes held by NumPy buffers in a mesh (array, dict of arrays). """
+    if obj is None:
+        return 0
+    if isinstance(obj, (np.ndarray, CompactMesh)):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(v.nbytes for v in obj.values()
+                   if isinstance(v, np.ndarray))
+    if isinstance(obj, (list, tuple)) and obj:
+        return len(obj) * 9 * 8  # legacy list of 9 floats per triangle
+    return 0
+
+
+def _vtk_nbytes(polydata: Any) -> int:
+    if polydata is None:
+        return 0
+    try:
+        return int(polydata.GetActualMemorySize()) * 1024  # reported in KiB
+    except Exception:
+        return 0
+
+
+@dataclass
+class WorkspaceEntry:
+    """
+    One resident model: the normalized assembly, the processed mesh sent to
+    the viewer, the viewer's polydata, the feature-edge overlay and the
+    constraint report. Any of mesh/polydata/edges may be None after tiered
+    eviction.
+    """
+    key: Hashable
+    assembly: AtlasAssembly | None
+    mesh: Any = None
+    polydata: Any = None
+    stats: dict = field(default_factory=dict)
+    edges: EdgeOverlay | None = None
+    constraints: TitanReport | None = None
+    bytes_vtk: int = 0
+    bytes_triangles: int = 0
+    bytes_assembly: int = 0
+
+    def measure(self) -> None:
+        self.bytes_vtk = _vtk_nbytes(self.polydata)
+        if isinstance(self.mesh, CompactMesh) and self.polydata is not None:
+            # The viewer's polydata wraps the mesh arrays without copying
+            self.bytes_vtk = max(0, self.bytes_vtk - self.mesh.nbytes)
+        asm = self.assembly
+        self.bytes_triangles = _nbytes(self.mesh) + (
+            _nbytes(asm.triangles) if asm is not None else 0) + (
+            self.edges.nbytes if self.edges is not None else 0)
+        self.bytes_assembly = (INSTANCE_BYTES * int(
+            self.stats.get('t_inst', 0) or 0) if asm is not None else 0)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bytes_vtk + self.bytes_triangles + self.bytes_assembly
+
+    @property
+    def tier(self) -> str:
+        """ Richest level still resident: 'vtk', 'triangles' or 'assembly'. """
+        if self.polydata is not None:
+            return 'vtk'
+        if self.mesh is not None:
+            return 'triangles'
+        return 'assembly'
+
+    def drop(self, tier: str) -> int:
+        """ Release one tier, returns the bytes freed. """
+        freed = 0
+        if tier == 'vtk' and self.polydata is not None:
+            freed, self.polydata = self.bytes_vtk, None
+            self.bytes_vtk = 0
+        elif tier == 'triangles' and (self.mesh is not None or (
+                self.assembly is not None and
+                self.assembly.triangles is not None)):
+            freed, self.mesh = self.bytes_triangles, None
+            self.edges = None  # rebuilt with the triangles
+            if self.assembly is not None:
+                # Keeps the compound (export); the pipeline re-tessellates
+                self.assembly.triangles = None
+                self.assembly.dirty = True
+            self.bytes_triangles = 0
+        return freed
+
+
+class Workspace:
+    """
+    LRU of recently shown models under a byte budget.
+
+    Sizes are measured from the NumPy mesh buffers and the VTK polydata.
+    When over budget, entries are stripped tier by tier across the whole
+    LRU (VTK objects of all idle models first, then their triangles, then
+    whole assemblies), so a switch back usually only re-uploads a mesh
+    instead of regenerating. The pinned entry (on screen) is never evicted.
+    """
+
+    def __init__(self, budget_bytes: int, max_models: int = 8) -> None:
+        self.budget = int(budget_bytes)
+        self.max_models = max(1, int(max_models))
+        self._entries: OrderedDict[Hashable, WorkspaceEntry] = OrderedDict()
+        self._pinned: Hashable | None = None
+
+    @staticmethod
+    def key(module: str, kwargs: dict) -> tuple:
+        return module, tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values())
+
+    def get(self, key: Hashable) -> WorkspaceEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Hashable, assembly: AtlasAssembly, mesh: Any = None,
+            polydata: Any = None, stats: dict | None = None,
+            pin: bool = True, edges: EdgeOverlay | None = None,
+            constraints: TitanReport | None = None) -> WorkspaceEntry:
+        """
+        Store a model result. pin=False stores it as least recently used
+        (speculative results), so it is the first to be evicted.
+        """
+        entry = WorkspaceEntry(key, assembly, mesh, polydata, stats or {},
+                               edges, constraints)
+        entry.measure()
+        self._entries[key] = entry
+        if pin:
+            self._entries.move_to_end(key)
+            self.pin(key)
+        else:
+            self._entries.move_to_end(key, last=False)
+            self.enforce()
+        return entry
+
+    def update(self, key: Hashable, polydata: Any = None) -> None:
+        """ Re-measure an entry, e.g. after its polydata was rebuilt. """
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        if polydata is not None:
+            entry.polydata = polydata
+        entry.measure()
+        self.enforce()
+
+    def pin(self, key: Hashable | None) -> None:
+        """ Mark the on-screen entry and apply the budget to the rest. """
+        self._pinned = key
+        self.enforce()
+
+    def discard(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        if self._pinned == key:
+            self._pinned = None
+
+    def drop_module(self, module: str) -> int:
+        """ Forget every entry of a model package (it was reimported). """
+        stale = [k for k in self._entries
+                 if isinstance(k, tuple) and k and k[0] == module]
+        for k in stale:
+            self.discard(k)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._pinned = None
+
+    def enforce(self) -> None:
+        if not self.enabled:
+            for k in [k for k in self._entries if k != self._pinned]:
+                del self._entries[k]
+            return
+
+        idle = [k for k in self._entries if k != self._pinned]  # LRU first
+        while len(self._entries) > self.max_models and idle:
+            del self._entries[idle.pop(0)]
+
+        total = self.nbytes
+        for tier in TIERS:
+            for k in list(idle):
+                if total <= self.budget:
+                    return
+                entry = self._entries[k]
+                if tier == 'assembly':
+                    total -= entry.nbytes
+                    del self._entries[k]
+                    idle.remove(k)
+                    name = k[0] if isinstance(k, tuple) else k
+                    log.info(f'[workspace] evicted {name}')
+                else:
+                    total -= entry.drop(tier)
+
+    def summary(self) -> str:
+        tiers = [e.tier for e in self._entries.values()]
+        return (f'{len(tiers)} models '
+                f'({", ".join(f"{tiers.count(t)} {t}" for t in TIERS)}) '
+                f'{self.nbytes / 1024 ** 2:,.1f} MB / '
+                f'{self.budget / 1024 ** 2:,.0f} MB')
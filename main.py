@@ -1,36 +1,60 @@
 #!/usr/bin/env python3
+import time
+
+T0 = time.perf_counter()
+
 import sys
 import os
 from pathlib import Path
 
-from PySide6.QtGui import QIcon
-
 from atlas.logging_setup import configure_logging
+from atlas.startup_profile import profiler
 
 configure_logging()
 
-ICON_PATH = Path(__file__).resolve().parent / 'assets/icons/protox.png'
+APP_DIR = Path(__file__).resolve().parent
+ICON_PATH = APP_DIR / 'assets/icons/protox.png'
+THEME_PATH = APP_DIR / 'gui/theme.qss'
+
+# `python main.py --profile-startup` logs phase/import timings once the first
+# model is on screen
+if '--profile-startup' in sys.argv:
+    sys.argv.remove('--profile-startup')
+    profiler.enable(T0)
 
 # --- force Qt to use X11 when running on Wayland, works on Fedora ---
 if os.name == 'posix':
     if os.environ.get('XDG_SESSION_TYPE', '').lower() == 'wayland':
         os.environ.setdefault('QT_QPA_PLATFORM', 'xcb')
 
-from PySide6.QtWidgets import QApplication
-import qt_material
-
-from gui.main_window import MainWindow
+with profiler.phase('import PySide6'):
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QIcon
+    from PySide6.QtCore import QTimer
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    app.setWindowIcon(QIcon(str(ICON_PATH)))
-    qt_material.apply_stylesheet(app, theme='dark_blue.xml')
-
-    # Load theme
-    with open('gui/theme.qss', 'r', encoding='utf-8') as f:
-        app.setStyleSheet(app.styleSheet() + '\n' + f.read())
-
-    window = MainWindow()
-    window.setWindowIcon(QIcon(str(ICON_PATH)))
-    window.show()
+    with profiler.phase('QApplication'):
+        app = QApplication(sys.argv)
+        app.setWindowIcon(QIcon(str(ICON_PATH)))
+
+    with profiler.phase('stylesheet'):
+        import qt_material
+        qt_material.apply_stylesheet(app, theme='dark_blue.xml')
+
+        # Load theme
+        with open(THEME_PATH, 'r', encoding='utf-8') as f:
+            app.setStyleSheet(app.styleSheet() + '\n' + f.read())
+
+    with profiler.phase('import gui.main_window'):
+        from gui.main_window import MainWindow
+
+    with profiler.phase('MainWindow()'):
+        window = MainWindow()
+        window.setWindowIcon(QIcon(str(ICON_PATH)))
+
+    with profiler.phase('show'):
+        window.show()
+    profiler.mark('window shown')
+    QTimer.singleShot(
+        0, lambda: profiler.mark('event loop running (interactive)'))
     sys.exit(app.exec())
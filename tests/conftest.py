@@ -1,8 +1,61 @@
 import sys
 import os
 
+import numpy as np
+import pytest
+
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='session')
+def occ():
+    try:
+        from atlas_runtime import atlas_occ
+    except Exception as e:
+        pytest.skip(f'atlas_occ not available: {e}')
+
+    # noinspection PyUnboundLocalVariable
+    return atlas_occ
+
+
+@pytest.fixture
+def fresh_cache():
+    """ Empty memo cache around a test, budget restored afterwards. """
+    from atlas_runtime import memo
+    memo.cache.clear()
+    budget = memo.cache.budget_bytes
+    yield memo.cache
+    memo.cache.set_budget(budget)
+    memo.cache.clear()
+
+
+def box_mesh(x: float, y: float, z: float, at=(0.0, 0.0, 0.0)) -> np.ndarray:
+    """ (12, 3, 3) outward-facing triangles of an x*y*z box at `at`. """
+    v = np.array([[0, 0, 0], [x, 0, 0], [x, y, 0], [0, y, 0],
+                  [0, 0, z], [x, 0, z], [x, y, z], [0, y, z]], dtype=float)
+    faces = [(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7), (0, 1, 5),
+             (0, 5, 4), (1, 2, 6), (1, 6, 5), (2, 3, 7), (2, 7, 6),
+             (3, 0, 4), (3, 4, 7)]
+    return v[np.array(faces)] + np.asarray(at)
+
+
+class StandInShape:
+    """ Stand-in shape, meshed through register_mesh. """
+
+
+def stand_in(tris: np.ndarray) -> StandInShape:
+    from atlas_runtime.fingerprint import register_mesh
+    shape = StandInShape()
+    register_mesh(shape, tris)
+    return shape
+
+
+def stand_in_part(name: str, tris: np.ndarray, **kwargs):
+    """ AtlasPart named `name` (also its part_no unless given). """
+    from atlas_runtime import AtlasPart
+    kwargs.setdefault('part_no', name)
+    return AtlasPart(def_id=name, shape=stand_in(tris), **kwargs)
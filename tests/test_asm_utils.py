@@ -0,0 +1,239 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasAssembly, AtlasInstance, AtlasPart, \
+    build_compound_and_triangles, iter_triangle_batches, normalize_assembly
+from atlas_runtime.fingerprint import shape_fingerprint
+
+from conftest import box_mesh, stand_in, stand_in_part
+
+
+def _grid(occ, n: int) -> AtlasAssembly:
+    part = AtlasPart(def_id='BOX', shape=occ.make_box(1, 1, 1),
+                     part_no='BOX')
+    children = [AtlasInstance(ref=part, xform=(2.0 * i, 0.0, 0.0))
+                for i in range(n)]
+    root_part = AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT')
+    return AtlasAssembly(root=AtlasInstance(ref=root_part, children=children))
+
+
+def test_stream_batches_match_full_build(occ) -> None:
+    streamed = _grid(occ, 40)
+    batches = list(iter_triangle_batches(streamed, first_batch=4,
+                                         max_batch=16))
+    full = _grid(occ, 40)
+    build_compound_and_triangles(full)
+
+    assert len(batches) > 1
+    assert sum(len(b) for b in batches) == len(full.triangles)
+    assert len(streamed.triangles) == len(full.triangles)
+    assert streamed.compound is not None and not streamed.dirty
+
+
+def test_stream_first_batch_is_bounded(occ) -> None:
+    small = next(iter_triangle_batches(_grid(occ, 8), first_batch=2))
+    large = next(iter_triangle_batches(_grid(occ, 400), first_batch=2))
+    assert len(small) == len(large)
+
+
+def _sorted_rows(tris) -> np.ndarray:
+    arr = np.round(np.asarray(tris, dtype=np.float64).reshape(-1, 9), 4)
+    return arr[np.lexsort(arr.T[::-1])]
+
+
+def test_threaded_build_matches_serial(occ) -> None:
+    serial = _grid(occ, 12)
+    build_compound_and_triangles(serial)
+    threaded = _grid(occ, 12)
+    build_compound_and_triangles(threaded, threads=4)
+
+    assert isinstance(threaded.triangles, np.ndarray)
+    assert threaded.compound is not None and not threaded.dirty
+    np.testing.assert_allclose(_sorted_rows(threaded.triangles),
+                               _sorted_rows(serial.triangles), atol=1e-4)
+
+
+def test_parts_sharing_faces_mesh_concurrently(occ, monkeypatch) -> None:
+    import threading
+    from atlas_runtime import fingerprint
+
+    fingerprint.geometry.clear()
+    box = occ.make_box(1, 2, 3)
+    parts = [AtlasPart(def_id=f'B{i}', part_no=f'B{i}',
+                       shape=occ.xform_move(box, 0, 0, 5.0 * i))
+             for i in range(2)]
+    root = AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT')
+    asm = AtlasAssembly(root=AtlasInstance(ref=root, children=[
+        AtlasInstance(ref=p) for p in parts]))
+
+    copies = []
+    both = threading.Barrier(2, timeout=10)
+    xform_copy, get_triangles = occ.xform_copy, occ.get_triangles
+
+    def _copy(shape, *args):
+        copies.append(xform_copy(shape, *args))
+        return copies[-1]
+
+    def _mesh(shape):
+        assert any(shape is c for c in copies)
+        both.wait()  # fails if the other part is not meshing meanwhile
+        return get_triangles(shape)
+
+    monkeypatch.setattr(occ, 'xform_copy', _copy)
+    monkeypatch.setattr(occ, 'get_triangles', _mesh)
+    build_compound_and_triangles(asm, threads=2)
+    assert len(asm.triangles) == 24
+
+
+def test_threaded_stream_matches_threaded_build(occ) -> None:
+    streamed = _grid(occ, 40)
+    batches = list(iter_triangle_batches(streamed, first_batch=4,
+                                         max_batch=16, threads=3))
+    full = _grid(occ, 40)
+    build_compound_and_triangles(full, threads=3)
+
+    assert len(batches) > 1
+    np.testing.assert_array_equal(np.concatenate(batches), full.triangles)
+    np.testing.assert_array_equal(streamed.triangles, full.triangles)
+    assert streamed.compound is not None and not streamed.dirty
+
+
+def test_fingerprint_ignores_translation(occ) -> None:
+    box = occ.make_box(2, 3, 4)
+    moved = occ.xform_move(occ.make_box(2, 3, 4), 10.5, -3.25, 7)
+    a, b = shape_fingerprint(box), shape_fingerprint(moved)
+    assert a.key == b.key
+    np.testing.assert_allclose(np.subtract(b.origin, a.origin),
+                               (10.5, -3.25, 7), atol=1e-9)
+    assert shape_fingerprint(occ.make_box(2, 3, 4.01)).key != a.key
+
+
+def test_normalize_shares_identical_shapes(occ) -> None:
+    parts = [AtlasPart(def_id=f'B{i}', part_no=f'B-{i}',
+                       shape=occ.xform_move(occ.make_box(1, 2, 3), 4 * i, 0, 1))
+             for i in range(5)]
+    parts.append(AtlasPart(def_id='C', part_no='C',
+                           shape=occ.make_box(1, 1, 1)))
+    before = _sorted_rows(np.concatenate([
+        np.asarray(occ.get_triangles(p.shape)).reshape(-1, 9)
+        for p in parts]))
+
+    asm = normalize_assembly(parts, dedupe=True)
+    children = asm.root.children
+    assert len({id(ch.ref.shape) for ch in children}) == 2
+    assert [ch.ref.part_no for ch in children] == [p.part_no for p in parts]
+    np.testing.assert_allclose(children[3].xform, (12, 0, 0), atol=1e-9)
+
+    build_compound_and_triangles(asm, threads=2)
+    np.testing.assert_allclose(_sorted_rows(asm.triangles), before,
+                               atol=1e-4)
+    # Opt-in only
+    assert normalize_assembly(parts).root.children[3].ref is parts[3]
+
+
+def test_dedupe_needs_matching_brep(occ, monkeypatch) -> None:
+    from atlas_runtime import fingerprint
+    from atlas_runtime.asm_utils import dedupe_shapes
+
+    fingerprint.geometry.clear()
+    shapes = [occ.xform_move(occ.make_box(1, 2, 3), 4 * i, 0, 0)
+              for i in range(3)]
+    asm = normalize_assembly(shapes)
+    # The third solid differs below the mesh resolution
+    monkeypatch.setattr(occ, 'shape_volume', lambda s: 6.0, raising=False)
+    monkeypatch.setattr(occ, 'shape_area', lambda s: 22.0 + (
+        1e-4 if s is shapes[2] else 0.0), raising=False)
+    refs = [ch.ref.shape for ch in dedupe_shapes(asm).root.children]
+    assert refs == [shapes[0], shapes[0], shapes[2]]
+
+
+def test_instanced_triangles_follow_instance_order() -> None:
+    from atlas_runtime.asm_utils import _InstancedTessellation
+
+    meshes = [np.arange(18, dtype=np.float64).reshape(2, 3, 3),
+              np.zeros((0, 3, 3)),
+              np.ones((3, 3, 3))]
+    parts = [stand_in_part(f'P{k}', tris) for k, tris in enumerate(meshes)]
+    order = [2, 0, 1, 0, 2, 2, 0]
+    root = AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT')
+    asm = AtlasAssembly(root=AtlasInstance(ref=root, children=[
+        AtlasInstance(ref=parts[k], xform=(float(i), 0.0, 0.0))
+        for i, k in enumerate(order)]))
+
+    tess = _InstancedTessellation(asm, threads=2)
+    try:
+        expected = [(meshes[k] + (i, 0, 0)).reshape(-1, 9)
+                    for i, k in enumerate(order)]
+        np.testing.assert_array_equal(tess.triangles(),
+                                      np.concatenate(expected))
+        np.testing.assert_array_equal(tess.triangles(2, 5),
+                                      np.concatenate(expected[2:5]))
+        assert tess.triangles(2, 3).shape == (0, 9)
+    finally:
+        tess.close()
+
+
+def test_fingerprint_topology_counts() -> None:
+    one = shape_fingerprint(stand_in(box_mesh(1, 1, 1)))
+    assert one.topology == (8, 18, 1)
+    two = shape_fingerprint(stand_in(np.concatenate(
+        [box_mesh(1, 1, 1), box_mesh(1, 1, 1, (0, 0, 2))])))
+    assert two.topology == (16, 36, 2)
+    # Same extents and triangle count, split into two shells
+    split = box_mesh(1, 1, 3)
+    split[:, :, 2] = np.where(split[:, :, 2] > 0, 3.0, 0.0)
+    joined = shape_fingerprint(stand_in(np.concatenate([split, split])))
+    assert joined.size == two.size and joined.triangles == two.triangles
+    assert joined.key != two.key
+
+
+def test_dedupe_fingerprints_only_candidates() -> None:
+    from atlas_runtime.asm_utils import dedupe_shapes
+    from atlas_runtime.fingerprint import shape_geometry
+
+    shapes = [stand_in(box_mesh(1, 2, 3, (5, 0, 0))),
+              stand_in(box_mesh(1, 2, 3)),
+              stand_in(box_mesh(3, 2, 1))]
+    root = AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT')
+    asm = AtlasAssembly(root=AtlasInstance(ref=root, children=[
+        AtlasInstance(ref=AtlasPart(def_id=f'P{i}', shape=s,
+                                    part_no=f'P{i}'))
+        for i, s in enumerate(shapes)]))
+    out = dedupe_shapes(asm)
+    assert out.root.children[1].ref.shape is shapes[0]
+    np.testing.assert_allclose(out.root.children[1].xform, (-5, 0, 0))
+    assert out.root.children[0] is asm.root.children[0]
+    # The odd one out was never fingerprinted
+    assert 'fingerprint' not in vars(shape_geometry(shapes[2]))
+    odd = AtlasAssembly(root=AtlasInstance(
+        ref=root, children=[asm.root.children[2]]))
+    assert dedupe_shapes(odd) is odd
+
+
+def test_dedupe_leaves_the_input_alone() -> None:
+    from atlas_runtime.asm_utils import dedupe_shapes
+
+    a = stand_in_part('A', box_mesh(1, 2, 3, (5, 0, 0)))
+    b = stand_in_part('B', box_mesh(1, 2, 3))
+    leaf = AtlasInstance(ref=stand_in_part('L', box_mesh(1, 1, 1)),
+                         xform=(0.0, 0.0, 1.0))
+    b_node = AtlasInstance(ref=b, xform=(0.0, 10.0, 0.0), children=[leaf])
+    root = AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT')
+    asm = AtlasAssembly(root=AtlasInstance(
+        ref=root, children=[AtlasInstance(ref=a), b_node]))
+
+    once = dedupe_shapes(asm)
+    # The input (e.g. a memoized model result) is untouched
+    assert b_node.ref is b and b_node.xform == (0.0, 10.0, 0.0)
+    assert leaf.xform == (0.0, 0.0, 1.0)
+    moved = once.root.children[1]
+    assert moved.ref.shape is a.shape and moved.ref.part_no == 'B'
+    np.testing.assert_allclose(moved.xform, (-5, 10, 0))
+    np.testing.assert_allclose(moved.children[0].xform, (5, 0, 1))
+    # Deduping the same input again applies the offset only once
+    np.testing.assert_allclose(dedupe_shapes(asm).root.children[1].xform,
+                               (-5, 10, 0))
+    assert dedupe_shapes(once) is once
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasAssembly, AtlasInstance, AtlasPart, \
+    make_boxes, place_shape, make_compound_placed
+from atlas_runtime.asm_utils import collect_shapes, iter_placed_shapes
+from atlas_runtime.batch import rigid_parts
+
+
+def _rodrigues(axis: np.ndarray, deg: float) -> np.ndarray:
+    a = axis / np.linalg.norm(axis)
+    k = np.array([[0, -a[2], a[1]], [a[2], 0, -a[0]], [-a[1], a[0], 0]])
+    t = np.radians(deg)
+    return np.eye(3) + np.sin(t) * k + (1 - np.cos(t)) * k @ k
+
+
+def test_rigid_parts_round_trip() -> None:
+    rng = np.random.default_rng(0)
+    cases = [(rng.normal(size=3), d) for d in (0, 30, 90, 179.9, 180)]
+    cases.append((np.array([1.0, 1.0, 0.0]), 180))
+    mats = np.tile(np.eye(4), (len(cases), 1, 1))
+    for m, (ax, deg) in zip(mats, cases):
+        m[:3, :3] = _rodrigues(ax, deg)
+        m[:3, 3] = rng.normal(size=3)
+
+    angle, axis, t = rigid_parts(mats)
+    for m, a, ax, tt in zip(mats, angle, axis, t):
+        assert np.allclose(_rodrigues(ax, a), m[:3, :3], atol=1e-6)
+        assert np.allclose(tt, m[:3, 3])
+
+
+def test_rigid_parts_rejects_scaling() -> None:
+    m = np.eye(4)[None].copy()
+    m[0, 0, 0] = 2.0
+    with pytest.raises(ValueError):
+        rigid_parts(m)
+
+
+def test_boxes_share_identical_sizes(occ) -> None:
+    boxes = make_boxes([[1, 2, 3], [1, 2, 3], [2, 2, 2]])
+    assert boxes[0] is boxes[1] and boxes[0] is not boxes[2]
+
+
+def test_batched_placement_matches_per_call(occ) -> None:
+    box = occ.make_box(1, 1, 1)
+    offsets = np.array([[0, 0, 0], [5, 0, 0], [0, 7, 0]], dtype=float)
+    placed = place_shape(box, offsets)
+    for shp, off in zip(placed, offsets):
+        tris = np.asarray(occ.get_triangles(shp)).reshape(-1, 3)
+        assert np.allclose(tris.min(axis=0), off)
+
+    comp = make_compound_placed(box, offsets)
+    pts = np.asarray(occ.get_triangles(comp)).reshape(-1, 3)
+    assert np.allclose(pts.max(axis=0), [6, 8, 1])
+
+
+def test_collect_shapes_keeps_walk_order(occ) -> None:
+    a = AtlasPart(def_id='A', shape=occ.make_box(1, 1, 1), part_no='A')
+    b = AtlasPart(def_id='B', shape=occ.make_box(2, 2, 2), part_no='B')
+    children = [AtlasInstance(ref=p, xform=(10.0 * i, 0.0, 0.0), qty=1)
+                for i, p in enumerate([a, b, a, b, a])]
+    root = AtlasInstance(ref=AtlasPart(def_id='_ROOT', shape=None,
+                                       part_no='ASM-ROOT'), children=children)
+    asm = AtlasAssembly(root=root)
+
+    def _mins(shapes):
+        return [np.asarray(occ.get_triangles(s)).reshape(-1, 3).min(axis=0)[0]
+                for s in shapes]
+
+    assert _mins(collect_shapes(asm)) == _mins(iter_placed_shapes(asm))
@@ -0,0 +1,75 @@
+import time
+
+import numpy as np
+import pytest
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+
+from gui import bom_model
+from gui.bom_model import BomColumns, BomTableModel, compute_view
+
+
+def _cols(n: int, qty_scale: float = 1.0) -> BomColumns:
+    return BomColumns.from_lines([
+        {'part_no': f'P-{i:05d}', 'qty': float(i % 7) * qty_scale,
+         'unit': 'pcs', 'desc': 'Bolt' if i % 3 == 0 else 'Plate'}
+        for i in range(n)])
+
+
+@pytest.fixture(scope='module')
+def app():
+    # A widget application: later tests in the session create widgets
+    return QApplication.instance() or QApplication([])
+
+
+def test_compute_view_filters_and_sorts_stably() -> None:
+    cols = _cols(30)
+    rows = compute_view(cols, text='BOLT')
+    assert list(rows) == list(range(0, 30, 3))
+
+    rows = compute_view(cols, 'qty', descending=True)
+    qty = cols.qty[rows]
+    assert np.all(np.diff(qty) <= 0)
+    # Equal quantities keep their source order
+    for q in np.unique(qty):
+        same = rows[qty == q]
+        assert np.all(np.diff(same) > 0)
+
+
+def test_quantity_only_change_is_applied_in_place(app) -> None:
+    model = BomTableModel()
+    model.set_columns(_cols(100))
+    assert model.rowCount() == 100
+
+    resets, changes = [], []
+    model.modelReset.connect(lambda: resets.append(1))
+    model.dataChanged.connect(lambda a, b: changes.append((a.row(), b.row())))
+
+    cols = _cols(100)
+    cols.qty[[10, 40]] += 1
+    model.set_columns(cols)
+    assert not resets
+    assert changes == [(10, 40)]
+    assert model.data(model.index(40, 2)) == f'{cols.qty[40]:g}'
+
+    model.set_columns(_cols(50))
+    assert resets and model.rowCount() == 50
+
+
+def test_large_views_are_computed_off_thread(app, monkeypatch) -> None:
+    monkeypatch.setattr(bom_model, 'ASYNC_ROWS', 10)
+    model = BomTableModel()
+    model.set_columns(_cols(1000))
+    model.sort(0, Qt.SortOrder.DescendingOrder)
+    model.set_filter('plate')
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and model.rowCount() in (0, 1000):
+        app.processEvents()
+        time.sleep(0.005)
+
+    # Only the last request (sort + filter) is applied
+    assert model.rowCount() == 1000 - len(range(0, 1000, 3))
+    assert model.data(model.index(0, 0)) == 'P-00998'  # 999 is a Bolt
+    assert model.data(model.index(0, 1)) == 'Plate'
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import fuse_many, cut_many
+from atlas_runtime.boolean import overlap_groups, shape_bounds
+
+from conftest import StandInShape, stand_in
+
+
+def test_overlap_groups_are_connected_components() -> None:
+    unit = np.array([0, 0, 0, 1, 1, 1], dtype=float)
+    bounds = np.array([unit + [x, 0, 0] * 2 for x in
+                       (0.0, 0.5, 1.0, 5.0, 10.0, 10.5)])
+    # A chain 0-1-2 (2 only touches 1), 3 alone, 4-5
+    bounds[3] = [5, 5, 5, 6, 6, 6]
+    groups = overlap_groups(bounds)
+    assert [list(g) for g in groups] == [[0, 1, 2], [3], [4, 5]]
+
+    empty = np.vstack([bounds[:1], np.full((1, 6), np.nan)])
+    assert [list(g) for g in overlap_groups(empty)] == [[0], [1]]
+
+
+def test_overlap_groups_match_across_blocks(monkeypatch) -> None:
+    from atlas_runtime import boolean
+    rng = np.random.default_rng(1)
+    lo = rng.uniform(0, 50, size=(300, 3))
+    bounds = np.hstack([lo, lo + rng.uniform(0.5, 3, size=(300, 3))])
+    expected = overlap_groups(bounds)
+    monkeypatch.setattr(boolean, '_BLOCK', 7)
+    got = overlap_groups(bounds)
+    assert [list(g) for g in got] == [list(g) for g in expected]
+
+
+def test_placed_copies_reuse_the_source_mesh(monkeypatch) -> None:
+    from atlas_runtime import boolean
+    from atlas_runtime.fingerprint import register_placement, \
+        shape_geometry
+
+    # Mesh-derived bounds, as without a native shape_bounds
+    monkeypatch.setattr(boolean, '_native', lambda op: None)
+
+    source = stand_in(np.array([[[0, 0, 0], [2, 0, 0], [0, 1, 3]]],
+                               dtype=float))
+    copies = [StandInShape() for _ in range(4)]
+    for i, c in enumerate(copies):
+        register_placement(c, source, (10.0 * i, 0.0, 0.0))
+    twice = StandInShape()
+    register_placement(twice, copies[1], (0.0, 5.0, 0.0))
+
+    bounds = boolean._bounds(copies + [twice], None)
+    pad = 3 * boolean._MESH_PAD + boolean._TOL
+    np.testing.assert_allclose(bounds[:, :3] + pad,
+                               [[10 * i, 0, 0] for i in range(4)] +
+                               [[10, 5, 0]])
+    np.testing.assert_allclose(bounds[:, 3:] - bounds[:, :3],
+                               np.array([[2, 1, 3]] * 5) + 2 * pad)
+    assert shape_geometry(twice).local is shape_geometry(source).local
+
+
+def _volume(occ, shape) -> float:
+    if not hasattr(occ, 'shape_volume'):
+        pytest.skip('atlas_occ has no shape_volume')
+    return occ.shape_volume(shape)
+
+
+def test_cut_many_matches_left_fold(occ) -> None:
+    plate = occ.make_box(20, 20, 2)
+    holes = [occ.xform_move(occ.make_cylinder(0.5, 4), 2 + 4 * i,
+                            2 + 4 * j, -1)
+             for i in range(5) for j in range(5)]
+    far = occ.xform_move(occ.make_box(1, 1, 1), 100, 0, 0)
+
+    folded = plate
+    for h in holes:
+        folded = occ.bool_cut(folded, h)
+    cut = cut_many(plate, holes + [far], threads=4)
+    assert _volume(occ, cut) == pytest.approx(_volume(occ, folded), rel=1e-6)
+    # A fresh base is boxed too, so tools that miss it are dropped
+    fresh = occ.make_box(20, 20, 2)
+    assert cut_many(fresh, [far]) is fresh
+
+
+def test_batched_primitives_are_boxed_without_meshing(occ,
+                                                      monkeypatch) -> None:
+    from atlas_runtime import boolean, make_boxes, make_cylinders
+
+    monkeypatch.setattr(boolean, '_native', lambda op: None)
+    boxes = make_boxes([[2, 3, 4, 10, 0, 0], [2, 3, 4, 0, 10, 0]])
+    cylinders = make_cylinders([[1, 5, 0, 0, 20]])
+
+    def _mesh(shape):
+        raise AssertionError('meshed for its bounds')
+
+    monkeypatch.setattr(occ, 'get_triangles', _mesh)
+    np.testing.assert_allclose(
+        boolean._bounds(boxes + cylinders, None),
+        [[10, 0, 0, 12, 3, 4], [0, 10, 0, 2, 13, 4], [-1, -1, 20, 1, 1, 25]])
+
+
+def test_fuse_many_matches_left_fold(occ) -> None:
+    bars = [occ.xform_move(occ.make_box(3, 1, 1), 2 * i, 0, 0)
+            for i in range(9)]
+    lone = occ.xform_move(occ.make_box(1, 1, 1), 0, 50, 0)
+
+    folded = bars[0]
+    for b in bars[1:] + [lone]:
+        folded = occ.bool_fuse(folded, b)
+    fused = fuse_many(bars + [lone], threads=3)
+    assert _volume(occ, fused) == pytest.approx(_volume(occ, folded),
+                                                rel=1e-6)
+    bounds = shape_bounds(fused)
+    assert bounds[3] >= 19 - 1e-6 and bounds[4] >= 51 - 1e-6
@@ -0,0 +1,240 @@
+import io
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas.modules.colossus import GenerationService, ColossusServer, \
+    ServiceError, coerce_params, result_key
+
+SCHEMA = [
+    {'name': 'width', 'type': float, 'default': 100.0, 'min': 1},
+    {'name': 'count', 'type': 'int', 'default': 2},
+    {'name': 'hollow', 'type': bool, 'default': False},
+    {'name': 'finish', 'type': 'enum', 'default': 'raw',
+     'choices': ['raw', 'painted']},
+]
+
+MODEL = '''
+import time
+from atlas_runtime import AtlasAssembly, AtlasPart, AtlasInstance
+
+PARAMS = [{'name': 'width', 'type': float, 'default': 10.0},
+          {'name': 'fail', 'type': bool, 'default': False}]
+
+
+def assembly(width, fail):
+    if fail:
+        raise ValueError('asked to fail')
+    from atlas_runtime import atlas_occ
+    time.sleep(0.2)  # long enough for concurrent requests to overlap
+    part = AtlasPart(def_id=f'B{width:g}', part_no=f'BOX-{width:g}',
+                     shape=atlas_occ.make_box(width, 10, 10))
+    root = AtlasPart(def_id='ROOT', shape=None, part_no='ASM')
+    return AtlasAssembly(AtlasInstance(root, children=[
+        AtlasInstance(part), AtlasInstance(part, (20.0, 0.0, 0.0))]))
+'''
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch, request):
+    pkg = f'colossus_models_{request.node.name}'
+    model = tmp_path / pkg / 'box'
+    model.mkdir(parents=True)
+    (tmp_path / pkg / '__init__.py').write_text('')
+    (model / '__init__.py').write_text(MODEL)
+    (model / 'config.json').write_text(json.dumps({'name': 'Box'}))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    service = GenerationService(tmp_path / pkg, pkg,
+                                str(tmp_path / 'cache'), workers=2,
+                                processes=False)
+    srv = ColossusServer(service, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    service.close()
+
+
+def _call(srv, path, body=None):
+    data = None if body is None else json.dumps(body).encode()
+    req = urllib.request.Request(srv.url + path, data)
+    try:
+        with urllib.request.urlopen(req) as r:
+            raw = r.read()
+            status = r.status
+    except urllib.error.HTTPError as e:
+        raw, status = e.read(), e.code
+    try:
+        return status, json.loads(raw)
+    except ValueError:
+        return status, raw
+
+
+def test_coerce_params():
+    assert coerce_params(SCHEMA, {}) == \
+        {'width': 100.0, 'count': 2, 'hollow': False, 'finish': 'raw'}
+    got = coerce_params(SCHEMA, {'width': '12.5', 'count': '3',
+                                 'hollow': 'yes', 'finish': 'painted'})
+    assert got == {'width': 12.5, 'count': 3, 'hollow': True,
+                   'finish': 'painted'}
+    for bad in ({'widht': 1}, {'width': 'wide'}, {'width': 0},
+                {'finish': 'gold'}):
+        with pytest.raises(ServiceError) as e:
+            coerce_params(SCHEMA, bad)
+        assert e.value.status == 400
+
+
+def test_result_key():
+    info = {'module': 'models.box', 'func': 'assembly'}
+    sig = (('__init__.py', 'abc'),)
+    defaults = coerce_params(SCHEMA, {})
+    explicit = coerce_params(SCHEMA, {'width': 100, 'count': '2'})
+    assert result_key(info, sig, defaults) == result_key(info, sig, explicit)
+    assert result_key(info, sig, defaults) != \
+        result_key(info, (('__init__.py', 'abd'),), defaults)
+    assert result_key(info, sig, defaults) != \
+        result_key(info, sig, {**defaults, 'width': 101.0})
+
+
+def test_models_and_errors(server):
+    status, models = _call(server, '/models')
+    assert status == 200
+    assert models == [{'name': 'Box', 'params': [
+        {'name': 'width', 'type': 'float', 'default': 10.0},
+        {'name': 'fail', 'type': 'bool', 'default': False}]}]
+
+    assert _call(server, '/generate', {'model': 'Nope'})[0] == 404
+    assert _call(server, '/generate',
+                 {'model': 'Box', 'params': {'depth': 1}})[0] == 400
+    status, err = _call(server, '/generate',
+                        {'model': 'Box', 'params': {'fail': True}})
+    assert status == 422 and 'asked to fail' in err['error']
+    assert _call(server, '/results/' + '0' * 32)[0] == 404
+    assert _call(server, '/results/../../etc')[0] == 404
+
+
+def test_generate_coalesced_and_cached(server, occ):
+    replies = []
+
+    def request():
+        replies.append(_call(server, '/generate',
+                             {'model': 'Box', 'params': {'width': 12}}))
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [s for s, _r in replies] == [200] * 4
+    assert len({r['key'] for _s, r in replies}) == 1
+    sources = sorted(r['source'] for _s, r in replies)
+    assert sources.count('generated') == 1
+
+    status, again = _call(server, '/generate',
+                          {'model': 'Box', 'params': {'width': 12.0}})
+    assert status == 200 and again['source'] == 'cache'
+    assert again['parts'] == 1 and again['instances'] == 2
+    stats = _call(server, '/stats')[1]
+    assert stats['misses'] == 1 and stats['hits'] + stats['coalesced'] == 4
+
+    key = again['key']
+    _s, bom = _call(server, f'/results/{key}/bom')
+    assert bom == [{'part_no': 'BOX-12', 'qty': 2.0, 'unit': 'pcs',
+                    'desc': ''}]
+    with urllib.request.urlopen(f'{server.url}/results/{key}/mesh') as r:
+        tris = np.load(io.BytesIO(r.read()))
+    assert tris.dtype == np.float32 and tris.shape == (again['triangles'], 9)
+    with urllib.request.urlopen(f'{server.url}/results/{key}/mesh.stl') as r:
+        assert len(r.read()) == 84 + 50 * again['triangles']
+
+
+def _fake_result(service, params: dict) -> str:
+    import os
+    from atlas.modules.colossus import jobs
+    info = service.model_info('Box')
+    key = result_key(info, service.registry.signature(info['folder']),
+                     params)
+    out = service.result_dir(key)
+    os.makedirs(out)
+    with open(os.path.join(out, jobs.RESULT), 'w') as f:
+        json.dump({'key': key, 'model': 'Box', 'params': params}, f)
+    return key
+
+
+def test_step_only_exported_for_current_source(server, tmp_path,
+                                                monkeypatch):
+    from atlas.modules.colossus import jobs
+    service = server.service
+    exported = []
+
+    def export_step(info, params, out_dir):
+        exported.append(params)
+        path = tmp_path / 'exported.step'
+        path.write_text('ISO-10303-21;')
+        return str(path)
+
+    monkeypatch.setattr(jobs, 'export_step', export_step)
+    key = _fake_result(service, {'width': 10.0, 'fail': False})
+    assert _call(server, f'/results/{key}/step')[0] == 200
+    assert exported == [{'width': 10.0, 'fail': False}]
+
+    stale = _fake_result(service, {'width': 11.0, 'fail': False})
+    init = service.models_dir / 'box' / '__init__.py'
+    init.write_text(init.read_text() + '\n# edited\n')
+    status, err = _call(server, f'/results/{stale}/step')
+    assert status == 409 and 'changed' in err['error']
+    assert len(exported) == 1
+
+
+def test_broken_pool_restarted_once(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    made, closed = [], []
+
+    class _Pool(ThreadPoolExecutor):
+        def shutdown(self, *args, **kwargs):
+            closed.append(self)
+            super().shutdown(*args, **kwargs)
+
+    service = GenerationService(tmp_path, 'none', str(tmp_path / 'cache'),
+                                processes=False)
+    service._make_executor = lambda: made.append(_Pool(1)) or made[-1]
+    service._executor.shutdown()
+    service._executor = service._make_executor()
+    broken = service._executor
+    release = threading.Event()
+
+    def die():
+        release.wait(5.0)
+        raise BrokenProcessPool('worker died')
+
+    fut, _joined = service._submit('job', die)
+    errors = []
+
+    def wait():
+        try:
+            service._wait(fut, 5.0)
+        except ServiceError as e:
+            errors.append(e.status)
+
+    waiters = [threading.Thread(target=wait) for _ in range(4)]
+    for t in waiters:
+        t.start()
+    release.set()
+    for t in waiters:
+        t.join()
+    try:
+        assert errors == [500] * 4
+        assert closed == [broken] and len(made) == 2
+        assert service._executor is made[1]
+    finally:
+        service.close()
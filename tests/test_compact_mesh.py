@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime.compact_mesh import weld, compact, quantize
+
+from conftest import box_mesh
+
+
+def _grid(n: int) -> np.ndarray:
+    return np.concatenate([box_mesh(7.3, 11.1, 3.7, (i * 9.1, j * 13.3, 0))
+                           for i in range(n) for j in range(n)]
+                          ).reshape(-1, 9).astype(np.float32)
+
+
+def test_weld():
+    tris = _grid(10)
+    mesh = weld(tris)
+    assert mesh.n_points == 8 * 100 and mesh.n_triangles == len(tris)
+    assert mesh.original_count == len(tris)
+    assert mesh.qpoints.dtype == np.uint16 and mesh.indices.dtype == np.int32
+    # Within half a quantization step of the input, per corner
+    err = np.abs(mesh.triangles() - tris).max()
+    assert err <= mesh.max_error * 1.01
+    assert mesh.max_error < 1e-3 * np.ptp(tris)
+
+    # float32 points + int64 faces, connectivity and offsets before
+    legacy = mesh.n_points * 12 + mesh.n_triangles * (24 + 8)
+    assert mesh.nbytes < legacy / 2
+    assert weld([]) is None and weld(None) is None
+
+
+def test_compact_and_flat_axis():
+    tris = box_mesh(5, 5, 0).reshape(-1, 9).astype(np.float32)  # flat in z
+    q, origin, step = quantize(tris)
+    assert step[2] == 1.0 and not q[:, 2].any()
+    mesh = compact(tris.reshape(-1, 3), np.arange(len(tris) * 3))
+    assert mesh.n_points == len(tris) * 3
+    assert np.allclose(mesh.triangles(), tris, atol=mesh.max_error)
+
+
+def test_compact_polydata():
+    pytest.importorskip('vtkmodules')
+    from gui.vtk_viewer import compact_polydata, place_actor
+    from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper
+
+    mesh = weld(_grid(3))
+    polydata = compact_polydata(mesh)
+    cells = polydata.GetPolys()
+    assert polydata.GetNumberOfPoints() == mesh.n_points
+    assert cells.GetNumberOfCells() == mesh.n_triangles
+    assert cells.IsStorageFixedSize32Bit()  # no offsets array
+    # Points and indices are shared with the mesh, not copied
+    assert polydata.GetActualMemorySize() * 1024 < mesh.nbytes + 4096
+
+    mapper = vtkPolyDataMapper()
+    mapper.SetInputData(polydata)
+    actor = vtkActor()
+    actor.SetMapper(mapper)
+    place_actor(actor, polydata)
+    pts = mesh.points()
+    bounds = np.array(actor.GetBounds()).reshape(3, 2)
+    assert np.allclose(bounds[:, 0], pts.min(axis=0), atol=1e-4)
+    assert np.allclose(bounds[:, 1], pts.max(axis=0), atol=1e-3)
+
+
+def test_coarse_quantization_falls_back_to_float32():
+    from atlas_runtime.compact_mesh import error_budget
+    # A 50 m layout with 4 mm parts: one box gives ~0.76 mm steps
+    tris = np.concatenate([box_mesh(4, 4, 4, (i * 5000.0, 0, 0))
+                           for i in range(11)]
+                          ).reshape(-1, 9).astype(np.float32)
+    assert weld(tris).max_error > 0.3
+    budget = error_budget(4.0)
+    mesh = weld(tris, budget)
+    assert not mesh.quantized and mesh.max_error == 0.0
+    assert mesh.n_points == 8 * 11
+    np.testing.assert_array_equal(mesh.triangles(), tris)
+    # A fine enough box is still quantized
+    assert weld(_grid(3), budget).quantized
+    assert error_budget(0.0) is None
+
+
+def test_exact_batches_are_quantized_once():
+    tris = _grid(4)
+    batches = [weld(tris[k:k + 48], exact=True)
+               for k in range(0, len(tris), 48)]
+    assert all(not b.quantized for b in batches)
+    points = np.concatenate([b.points() for b in batches])
+    base = np.cumsum([0] + [b.n_points for b in batches[:-1]])
+    indices = np.concatenate([b.indices + o for b, o in zip(batches, base)])
+    streamed = compact(points, indices)
+    # Same rounding as welding the whole mesh in one go
+    np.testing.assert_array_equal(streamed.triangles(),
+                                  weld(tris).triangles())
+    fallback = compact(points, indices, max_error=1e-9)
+    assert not fallback.quantized
+    np.testing.assert_array_equal(fallback.triangles(), tris)
+
+
+def test_stream_compacts_exact_batches():
+    pytest.importorskip('vtkmodules')
+    from gui.vtk_viewer import _MeshStream
+
+    tris = _grid(4)
+    stream = _MeshStream(np.int64)
+    for k in range(0, len(tris), 48):
+        batch = weld(tris[k:k + 48], exact=True)
+        stream.append(batch.points(), batch.indices)
+    stream.compact()
+    np.testing.assert_array_equal(stream.mesh.triangles(),
+                                  weld(tris).triangles())
+
+    stream = _MeshStream(np.int64)
+    batch = weld(tris, exact=True)
+    stream.append(batch.points(), batch.indices)
+    stream.compact(max_error=1e-9)
+    assert not stream.mesh.quantized
+    assert stream.polydata.GetNumberOfPoints() == stream.mesh.n_points
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasPart, AtlasInstance, AtlasAssembly, memo
+from atlas_runtime.edges import assembly_edges
+
+from conftest import box_mesh, stand_in_part
+
+pytestmark = pytest.mark.usefixtures('fresh_cache')
+
+
+def _grid_assembly(n: int) -> AtlasAssembly:
+    box = stand_in_part('BOX', box_mesh(2, 3, 4, (1, 1, 1)))
+    plate = stand_in_part('PLATE', box_mesh(30, 30, 1, (0, 0, -1)))
+    root = AtlasPart(def_id='ROOT', shape=None, part_no='ROOT')
+    return AtlasAssembly(AtlasInstance(root, children=[AtlasInstance(plate)] + [
+        AtlasInstance(box, (5.0 * i, 0.0, 0.0)) for i in range(n)]))
+from conftest import box_mesh, stand_in_part
+
+pytestmark = pytest.mark.usefixtures('fresh_cache')
+
+
+def test_assembly_edges_grouped_and_cached():
+    overlay = assembly_edges(_grid_assembly(10), threads=2)
+    assert sorted(len(g.offsets) for g in overlay.groups) == [1, 10]
+    # Only the 12 box edges of each part, face diagonals are smooth
+    assert all(len(g.lines) == 12 and len(g.points) == 8
+               for g in overlay.groups)
+    assert overlay.n_segments == 11 * 12
+    assert len(overlay.segments()) == overlay.n_segments
+
+    box = next(g for g in overlay.groups if len(g.offsets) == 10)
+    placed = box.segments().reshape(-1, 3)
+    np.testing.assert_allclose(placed.min(axis=0), (1, 1, 1))
+    np.testing.assert_allclose(placed.max(axis=0), (48, 4, 5))
+
+    # Edge data is reused per part fingerprint
+    puts = len(memo.cache)
+    assembly_edges(_grid_assembly(20))
+    assert len(memo.cache) == puts
+    # Nothing is sharper than a right angle
+    assert assembly_edges(_grid_assembly(3), feature_angle=95).groups == []
+
+
+def test_edges_reuse_cached_geometry(monkeypatch):
+    from atlas_runtime import fingerprint
+    asm = _grid_assembly(3)
+    first = assembly_edges(asm)
+
+    def _fail(*_args):
+        raise AssertionError('part meshed again')
+
+    monkeypatch.setattr(fingerprint, 'shape_mesh', _fail)
+    monkeypatch.setattr(fingerprint, '_local_fingerprint', _fail)
+    assert assembly_edges(asm).n_segments == first.n_segments
+
+
+def test_edge_actors():
+    pytest.importorskip('vtkmodules')
+    from gui.vtk_viewer import merged_edges, instanced_edges, \
+        surface_mapper, SURFACE_OFFSET
+    from vtkmodules.vtkRenderingCore import vtkActor, vtkRenderer, \
+        vtkRenderWindow, vtkMapper
+    from vtkmodules.vtkCommonCore import reference
+
+    overlay = assembly_edges(_grid_assembly(4))
+    _plate, box = sorted(overlay.groups, key=lambda g: len(g.offsets))
+    merged = merged_edges(overlay.groups)
+    assert merged.GetNumberOfLines() == overlay.n_segments
+    assert merged.GetLines().IsStorageFixedSize32Bit()
+    placed = overlay.segments().reshape(-1, 3)
+    np.testing.assert_allclose(
+        np.array(merged.GetBounds()).reshape(3, 2).T,
+        [placed.min(axis=0), placed.max(axis=0)], atol=1e-5)
+
+    window = vtkRenderWindow()
+    window.SetOffScreenRendering(1)
+    window.SetSize(64, 48)
+    renderer = vtkRenderer()
+    window.AddRenderer(renderer)
+    actor = vtkActor()
+    actor.SetMapper(instanced_edges(box))
+    renderer.AddActor(actor)
+    window.Render()
+    # One copy of the lines, drawn at every offset
+    assert actor.GetMapper().GetSource().GetNumberOfLines() == len(box.lines)
+    np.testing.assert_allclose(
+        np.array(actor.GetBounds()).reshape(3, 2).T,
+        [(1, 1, 1), (18, 4, 5)], atol=1e-5)
+
+    # Only the model surface is pushed back, not every mapper in the process
+    def offset(mapper):
+        factor, units = reference(0.0), reference(0.0)
+        mapper.GetRelativeCoincidentTopologyPolygonOffsetParameters(
+            factor, units)
+        return factor.get(), units.get()
+
+    assert offset(surface_mapper(merged)) == SURFACE_OFFSET
+    assert offset(actor.GetMapper()) == (0, 0)
+    assert vtkMapper.GetResolveCoincidentTopology() == 0
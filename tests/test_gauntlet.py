@@ -0,0 +1,135 @@
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas.modules.gauntlet import run_case, run_suite, fit_exponent, \
+    to_series, load_baseline, save_baseline, compare, format_report
+from atlas.modules.gauntlet.bench import Sample, grid_counts
+
+NS = [10, 100, 1000, 10000, 100000]
+
+
+def _samples(stage, seconds, peak_mb=1.0):
+    return [Sample('pipeline', 'grid', stage, n, seconds(n), peak_mb)
+            for n in NS]
+
+
+def test_grid_counts():
+    for n in (1, 7, 10, 12, 1000, 10 ** 6):
+        nx, ny, nz = grid_counts(n)
+        assert nx * ny * nz == n
+    assert grid_counts(10 ** 6) == (100, 100, 100)
+
+
+def test_fit_exponent():
+    assert fit_exponent(NS, [2e-6 * n for n in NS]) == pytest.approx(1.0)
+    assert fit_exponent(NS, [1e-9 * n * n for n in NS]) == \
+        pytest.approx(2.0)
+    # Fitting the largest sizes only keeps fixed overhead at small n from
+    # flattening the curve
+    ts = [0.02 + 1e-5 * n for n in NS]
+    assert fit_exponent(NS, ts) > 0.7 > fit_exponent(NS, ts, points=5)
+    assert fit_exponent(NS, [1e-4] * len(NS)) is None
+
+
+def test_compare_and_baseline(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    assert load_baseline(path) == {}
+    linear = to_series(_samples('bom', lambda n: 1e-5 * n) +
+                       _samples('geometry', lambda n: 1e-5 * n))
+    save_baseline(path, linear)
+    save_baseline(path, {'render/grid/frame': linear['pipeline/grid/bom']})
+    base = load_baseline(path)
+    assert sorted(base) == ['pipeline/grid/bom', 'pipeline/grid/geometry',
+                            'render/grid/frame']
+    assert compare(linear, base) == []
+
+    # An O(n) stage turned O(n^2) at large n
+    current = to_series(
+        _samples('bom', lambda n: 1e-5 * n + 1e-8 * n * n) +
+        _samples('geometry', lambda n: 1e-5 * n, peak_mb=200.0))
+    found = {(r.key, r.kind) for r in compare(current, base)}
+    assert ('pipeline/grid/bom', 'exponent') in found
+    assert ('pipeline/grid/bom', 'time') in found
+    assert ('pipeline/grid/geometry', 'memory') in found
+    assert not any(k == 'pipeline/grid/geometry' and kind != 'memory'
+                   for k, kind in found)
+    assert compare(current, base, time_factor=0, mem_factor=0,
+                   exponent_slack=10) == []
+    report = format_report(current, base, compare(current, base))
+    assert 'pipeline/grid/bom' in report and 'REGRESSED' in report
+
+
+def test_run_case(occ):
+    samples = run_case('occ_test_2', 8, stages=('geometry', 'bom'))
+    assert [s.stage for s in samples] == ['geometry', 'bom']
+    assert all(s.n == 8 and s.seconds > 0 and s.peak_mb >= 0
+               for s in samples)
+
+    series = to_series(run_suite(['occ_test'], [2, 4], ('normalize',),
+                                 isolate=False))
+    assert series['pipeline/occ_test/normalize']['n'] == [2, 4]
+
+
+def test_render_case(occ):
+    pytest.importorskip('vtkmodules')
+    from atlas.modules.gauntlet.render import run_render_case, \
+        render_samples, format_render_report
+
+    results = run_render_case('occ_test_2', 8, frames=4, size=(160, 120))
+    assert [r.path for r in results] == ['monolithic', 'streamed']
+    for r in results:
+        assert r.triangles > 0 and len(r.frame_s) == 4
+        assert 0 < r.first_frame_s <= r.load_s
+        # At least the 32-bit index buffer and float32 vertices
+        assert r.gpu_bytes >= r.triangles * 3 * 4
+        assert r.host_bytes > 0
+    keys = {s.key for s in render_samples(results)}
+    assert 'render/occ_test_2/streamed/frame_p95' in keys
+    assert 'render/occ_test_2/streamed/gpu_mb' in keys
+    assert 'occ_test_2/monolithic' in format_render_report(results)
+
+
+def _flaky(model, n):
+    if n == 100:
+        raise MemoryError('out of memory')
+    return [Sample('pipeline', model, 'bom', n, 1e-5 * n, 1.0)]
+
+
+def test_failed_cases_are_recorded_and_missing():
+    from atlas.modules.gauntlet.bench import run_cases
+    failed = []
+    got = run_cases(_flaky, [('grid', n) for n in NS], isolate=False,
+                    failed=failed)
+    assert failed == ['grid n=100']
+    assert [s.n for s in got] == [n for n in NS if n != 100]
+
+    base = to_series(_samples('bom', lambda n: 1e-5 * n))
+    missing = [r for r in compare(to_series(got), base, sizes=NS)
+               if r.kind == 'missing']
+    assert [(r.key, r.n) for r in missing] == [('pipeline/grid/bom', 100)]
+    assert 'no result at n=100' in str(missing[0])
+    # Sizes the run did not cover are not missing
+    assert compare(to_series(got), base, sizes=[10, 1000]) == []
+
+
+def test_render_buffers_are_their_own_series():
+    from atlas.modules.gauntlet.render import RenderResult, render_samples
+
+    def run(gpu_mb):
+        return to_series(render_samples([RenderResult(
+            'grid', 'streamed', n, 1000, 0.01, 0.02, [0.004] * 4,
+            host_bytes=2 << 20, gpu_bytes=int(gpu_mb * 2 ** 20),
+            rss_mb=3.0) for n in NS]))
+
+    base = run(10.0)
+    assert base['render/grid/streamed/gpu_mb']['size_mb'] == [10.0] * 5
+    assert base['render/grid/streamed/host_mb']['size_mb'] == [2.0] * 5
+    assert base['render/grid/streamed/frame_p50']['mem_mb'] == [0.0] * 5
+    assert 'size_mb' not in base['render/grid/streamed/load']
+    assert compare(run(10.1), base) == []
+    # 10 % more GPU memory is far inside the RSS gate, not this one
+    found = {(r.key, r.kind) for r in compare(run(11.0), base)}
+    assert found == {('render/grid/streamed/gpu_mb', 'size')}
+    assert '11.0MB' in format_report(run(11.0), base)
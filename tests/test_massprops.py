@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasPart, assembly_mass_props, normalize_assembly
+from atlas_runtime.massprops import mesh_geometry, MATERIAL_DENSITY
+
+from conftest import box_mesh, stand_in_part
+
+
+def test_box_mesh_properties() -> None:
+    geo = mesh_geometry(box_mesh(2, 3, 4) + (10, 20, 30))
+    assert geo.volume == pytest.approx(24)
+    assert geo.area == pytest.approx(52)
+    np.testing.assert_allclose(geo.centroid, (1, 1.5, 2))
+    # Solid cuboid: Ixx = m (b² + c²) / 12 with m = volume
+    np.testing.assert_allclose(np.diag(geo.inertia),
+                               (24 * 25 / 12, 24 * 20 / 12, 24 * 13 / 12))
+    np.testing.assert_allclose(geo.inertia - np.diag(np.diag(geo.inertia)),
+                               0, atol=1e-9)
+
+    flipped = mesh_geometry(box_mesh(2, 3, 4)[:, ::-1])
+    assert flipped.volume == pytest.approx(24)
+
+
+def test_assembly_totals(occ) -> None:
+    steel = [AtlasPart(def_id=f'S{i}', part_no=f'S-{i}', material='Steel',
+                       shape=occ.xform_move(occ.make_box(10, 10, 10),
+                                            20 * i, 0, 0))
+             for i in range(3)]
+    foam = AtlasPart(def_id='F', part_no='F', material='unobtainium',
+                     shape=occ.xform_move(occ.make_box(10, 10, 10), 0, 50, 0))
+    asm = normalize_assembly(steel + [foam])
+
+    props = assembly_mass_props(asm)
+    assert props.instances == 4 and props.unknown_density == 1
+    assert props.volume == pytest.approx(4000, rel=1e-3)
+    assert props.mass == pytest.approx(3e-6 * MATERIAL_DENSITY['steel'],
+                                       rel=1e-3)
+    np.testing.assert_allclose(props.centroid, (25, 5, 5), atol=1e-3)
+    np.testing.assert_allclose(props.bbox_min, (0, 0, 0), atol=1e-6)
+    np.testing.assert_allclose(props.bbox_max, (50, 60, 10), atol=1e-6)
+    # Lazily computed once per part
+    assert steel[0].mass_props is steel[0].mass_props
+
+
+def test_part_props_cached_without_memo() -> None:
+    from atlas_runtime import memo, massprops
+    from atlas_runtime.massprops import part_mass_props
+
+    parts = [stand_in_part(f'B{i}', box_mesh(2, 3, 4, (10.0 * i, 0, 0)),
+                           part_no=f'B-{i}', material='steel')
+             for i in range(3)]
+
+    massprops._cache.clear()
+    hits = massprops._cache.hits
+    with memo.disabled():
+        props = [part_mass_props(p) for p in parts]
+    assert len(massprops._cache) == 1
+    assert massprops._cache.hits - hits == 2
+    assert props[2].volume == pytest.approx(24)
+    np.testing.assert_allclose(props[2].centroid, (21, 1.5, 2))
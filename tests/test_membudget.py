@@ -0,0 +1,163 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasAssembly, AtlasInstance, AtlasPart
+from atlas_runtime.membudget import MemoryBudgetError, MemoryEstimate, \
+    StageMemory, estimate_assembly, resolve_budget, plan_run, \
+    build_instanced_lod, build_bbox_lod
+
+from conftest import box_mesh, stand_in_part
+
+
+def _grid(occ, n: int) -> AtlasAssembly:
+    part = AtlasPart(def_id='BOX', shape=occ.make_box(1, 2, 3),
+                     part_no='BOX')
+    children = [AtlasInstance(ref=part, xform=(10.0 * i, 0.0, 0.0), qty=2)
+                for i in range(n)]
+    root_part = AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT')
+    return AtlasAssembly(root=AtlasInstance(ref=root_part, children=children))
+
+
+def _sorted_rows(tris) -> np.ndarray:
+    arr = np.round(np.asarray(tris, dtype=np.float64).reshape(-1, 9), 4)
+    return arr[np.lexsort(arr.T[::-1])]
+
+
+def test_estimate_scales_with_instances(occ) -> None:
+    single = len(occ.get_triangles(occ.make_box(1, 2, 3)))
+    est = estimate_assembly(_grid(occ, 50))
+    assert est.unique_parts == 1
+    assert est.instances == 100
+    assert est.triangles == 100 * single
+    assert est.unique_triangles == single
+    assert est.bytes_instanced < est.bytes_lod < est.bytes_full
+    assert est.smallest_part == pytest.approx(3.0)
+
+
+def test_plan_full_downgrade_refuse() -> None:
+    est = MemoryEstimate(bytes_full=300, bytes_instanced=200, bytes_lod=100)
+    assert plan_run(est, None) == 'full'
+    assert plan_run(est, 300) == 'full'
+    assert plan_run(est, 299) == 'instanced'
+    assert plan_run(est, 199) == 'bbox'
+    with pytest.raises(MemoryBudgetError):
+        plan_run(est, 299, policy='refuse')
+    with pytest.raises(MemoryBudgetError):
+        plan_run(est, 99)
+    # A part too heavy to instance can still be boxed
+    heavy = MemoryEstimate(bytes_full=300, bytes_instanced=250, bytes_lod=100)
+    assert plan_run(heavy, 200) == 'bbox'
+
+
+def test_no_budget_by_default() -> None:
+    assert resolve_budget() is None and resolve_budget(0) is None
+    assert resolve_budget(2) == 2 * 1024 ** 2
+
+
+def test_instanced_lod_matches_placements() -> None:
+    from atlas_runtime.asm_utils import _InstancedTessellation
+
+    parts = [stand_in_part('A', box_mesh(1, 2, 3, (5, 0, 0))),
+             stand_in_part('B', box_mesh(2, 1, 1))]
+    order = [0, 1, 0, 0]
+    root = AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT')
+    asm = AtlasAssembly(root=AtlasInstance(ref=root, children=[
+        AtlasInstance(ref=parts[k], xform=(0.0, 4.0 * i, 0.0))
+        for i, k in enumerate(order)]))
+
+    groups = build_instanced_lod(asm)
+    assert [len(g.offsets) for g in groups] == [3, 1]
+    assert sum(g.n_triangles for g in groups) == 4 * 12
+    assert all(g.mesh.n_points == 8 for g in groups)
+    tess = _InstancedTessellation(asm, threads=1)
+    try:
+        placed = tess.triangles()
+    finally:
+        tess.close()
+    np.testing.assert_allclose(
+        _sorted_rows(np.concatenate([g.triangles() for g in groups])),
+        _sorted_rows(placed), atol=1e-5)
+
+
+def test_instanced_mesh_actor() -> None:
+    pytest.importorskip('vtkmodules')
+    from gui.vtk_viewer import instanced_mesh
+    from vtkmodules.vtkRenderingCore import vtkActor, vtkRenderer, \
+        vtkRenderWindow
+
+    part = stand_in_part('A', box_mesh(1, 2, 3, (5, 0, 0)))
+    root = AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT')
+    asm = AtlasAssembly(root=AtlasInstance(ref=root, children=[
+        AtlasInstance(ref=part, xform=(0.0, 4.0 * i, 0.0), qty=2)
+        for i in range(3)]))
+    (group,) = build_instanced_lod(asm)
+    assert len(group.offsets) == 6
+
+    window = vtkRenderWindow()
+    window.SetOffScreenRendering(1)
+    window.SetSize(64, 48)
+    renderer = vtkRenderer()
+    window.AddRenderer(renderer)
+    actor = vtkActor()
+    actor.SetMapper(instanced_mesh(group))
+    renderer.AddActor(actor)
+    window.Render()
+    # One copy of the part, drawn at every offset
+    assert actor.GetMapper().GetSource().GetNumberOfPolys() == 12
+    np.testing.assert_allclose(
+        np.array(actor.GetBounds()).reshape(3, 2).T,
+        [(5, 0, 0), (6, 10, 3)], atol=1e-5)
+
+
+def test_bbox_lod_matches_placements(occ) -> None:
+    asm = _grid(occ, 3)
+    tris = build_bbox_lod(asm, estimate_assembly(asm))
+    assert tris.shape == (3 * 2 * 12, 9)
+    pts = tris.reshape(-1, 3)
+    assert np.allclose(pts.min(axis=0), [0, 0, 0], atol=1e-5)
+    assert np.allclose(pts.max(axis=0), [21, 2, 3], atol=1e-5)
+
+
+def test_stage_memory_records_peaks() -> None:
+    mem = StageMemory(budget=None, use_tracemalloc=True)
+    with mem.stage('alloc'):
+        buf = np.ones(2_000_000)
+    assert mem.peaks_mb['alloc'] > 0
+    assert mem.py_peaks_mb['alloc'] >= buf.nbytes / (1024 ** 2) * 0.9
+    mem.check()
+
+
+@pytest.mark.parametrize('threads', [None, 2])
+def test_each_shape_meshed_once_per_run(occ, monkeypatch, threads) -> None:
+    from atlas_runtime import fingerprint
+    from atlas_runtime.asm_utils import normalize_assembly, \
+        build_compound_and_triangles
+
+    fingerprint.geometry.clear()
+    meshed = []
+    get_triangles = occ.get_triangles
+    monkeypatch.setattr(occ, 'get_triangles',
+                        lambda s: meshed.append(s) or get_triangles(s))
+
+    asm = _grid(occ, 4)
+    other = AtlasPart(def_id='BOX2', shape=occ.make_box(1, 2, 3),
+                      part_no='BOX2')
+    asm.root.children.append(AtlasInstance(ref=other, xform=(0, 9, 0)))
+    estimate_assembly(asm)
+    asm = normalize_assembly(asm)
+    build_compound_and_triangles(asm, threads=threads)
+    assert len(meshed) == 2
+    assert len(asm.triangles) == 9 * len(get_triangles(other.shape))
+
+
+def test_bbox_lod_builds_compound_on_demand(occ) -> None:
+    from atlas_runtime.asm_utils import ensure_compound
+
+    asm = _grid(occ, 3)
+    asm.triangles = build_bbox_lod(asm, estimate_assembly(asm))
+    assert asm.compound is None
+    compound = ensure_compound(asm)
+    assert compound is not None and ensure_compound(asm) is compound
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import memo, memoize
+
+pytestmark = pytest.mark.usefixtures('fresh_cache')
+
+
+class _Shape:
+    """ Opaque result object, keyed by identity like an OCC shape. """
+
+    def __init__(self, *args) -> None:
+        self.args = args
+
+
+def test_only_dependent_calls_recompute() -> None:
+    calls = []
+
+    @memoize
+    def plate(w: float, h: float) -> _Shape:
+        calls.append('plate')
+        return _Shape(w, h)
+
+    @memoize
+    def drill(base: _Shape, holes: int) -> _Shape:
+        calls.append('drill')
+        return _Shape(base, holes)
+
+    a = drill(plate(100.0, 50.0), 4)
+    assert drill(plate(h=50.0, w=100.0), holes=4) is a
+    assert drill(plate(0.1 + 0.2 + 99.7, 50), 4) is a
+    calls.clear()
+
+    b = drill(plate(100.0, 50.0), 6)
+    assert b is not a and calls == ['drill']
+    calls.clear()
+    drill(plate(120.0, 50.0), 6)
+    assert calls == ['plate', 'drill']
+
+    # Objects the cache did not produce cannot be keyed
+    drill(_Shape(), 4)
+    drill(_Shape(), 4)
+    assert calls[-2:] == ['drill', 'drill']
+
+
+def test_array_arguments_are_keyed_by_content() -> None:
+    seen = []
+
+    @memoize
+    def total(values: np.ndarray) -> float:
+        seen.append(1)
+        return float(values.sum())
+
+    assert total(np.arange(5)) == total(np.arange(5)) == 10
+    total(np.arange(6))
+    assert len(seen) == 2
+
+
+def test_budget_evicts_least_recent(fresh_cache) -> None:
+    fresh_cache.set_budget(3 * memo.SHAPE_BYTES)
+
+    @memoize
+    def make(i: int) -> _Shape:
+        return _Shape(i)
+
+    first = make(0)
+    for i in range(1, 4):
+        make(i)
+    assert len(fresh_cache) == 3
+    assert fresh_cache.bytes <= fresh_cache.budget_bytes
+    assert make(0) is not first
+    assert fresh_cache.token(first) is None
+
+
+def test_switches_and_module_drop(fresh_cache) -> None:
+    @memoize
+    def make(i: int) -> _Shape:
+        return _Shape(i)
+
+    with memo.disabled():
+        assert make(1) is not make(1)
+    assert len(fresh_cache) == 0
+    assert make(1) is make(1)
+
+    assert fresh_cache.drop_module(__name__) == 1
+    assert len(fresh_cache) == 0
+
+    memo.set_enabled(False)
+    try:
+        assert make(2) is not make(2)
+    finally:
+        memo.set_enabled(True)
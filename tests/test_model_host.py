@@ -0,0 +1,214 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasAssembly, AtlasPart, AtlasInstance, bom_flat
+from gui.model_host import ModelHost, ModelProcessError, RemoteCompound, \
+    share_arrays, attach_arrays, pack_assembly, unpack_assembly
+from gui.model_registry import ModelRegistry
+
+MODEL = '''
+import os
+from atlas_runtime import AtlasAssembly, AtlasPart, AtlasInstance
+
+PARAMS = [{'name': 'count', 'type': int, 'default': 3},
+          {'name': 'fail', 'type': bool, 'default': False},
+          {'name': 'crash', 'type': bool, 'default': False}]
+
+
+def assembly(count, fail, crash):
+    if fail:
+        raise ValueError('asked to fail')
+    if crash:
+        os._exit(3)
+    from atlas_runtime import atlas_occ
+    part = AtlasPart(def_id='B', part_no='BOX', shape=atlas_occ.make_box(
+        10, 10, 10), props={'pid': os.getpid()})
+    root = AtlasPart(def_id='ROOT', shape=None, part_no='ASM')
+    return AtlasAssembly(AtlasInstance(root, children=[
+        AtlasInstance(part, (20.0 * i, 0.0, 0.0)) for i in range(count)]))
+'''
+
+
+@pytest.fixture
+def models(tmp_path):
+    pkg = 'host_models'
+    model = tmp_path / pkg / 'box'
+    model.mkdir(parents=True)
+    (tmp_path / pkg / '__init__.py').write_text('')
+    (model / '__init__.py').write_text(MODEL)
+    (model / 'config.json').write_text(json.dumps({'name': 'Box'}))
+    return tmp_path / pkg, pkg
+
+
+def test_share_arrays():
+    arrays = {'tris': np.arange(36, dtype=np.float32).reshape(-1, 9),
+              'ids': np.arange(5, dtype=np.int64),
+              'empty': np.zeros((0, 3), dtype=np.float64)}
+    name, spec, block = share_arrays(arrays)
+    block.close()
+    got = attach_arrays(name, spec)
+    for key, a in arrays.items():
+        assert got[key].dtype == a.dtype and np.array_equal(got[key], a)
+    # Unlinked on attach; the views keep the mapping alive
+    from multiprocessing.shared_memory import SharedMemory
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name)
+    tris = got.pop('tris')
+    del got
+    assert tris.sum() == arrays['tris'].sum()
+    assert share_arrays({}) == (None, [], None)
+
+
+def test_worker_unlinks_blocks_never_attached():
+    import threading
+    from multiprocessing import Pipe
+    from multiprocessing.shared_memory import SharedMemory
+    from gui.model_host import _Server
+
+    gui, conn = Pipe()
+    server = _Server(conn, threading.Event(), registry=None)
+    attached = server._share({'a': np.arange(4)})
+    lost = server._share({'b': np.arange(4)})  # its handler raised
+    got = attach_arrays(*attached)
+    gui.send(('export', 1, 'unused.step'))
+    gui.send(('stop',))
+    server.serve()
+    assert gui.recv()[0] == 'error'
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(lost[0])
+    assert not server.blocks and got['a'].tolist() == [0, 1, 2, 3]
+
+
+def test_instanced_groups_round_trip():
+    from gui.model_host import _instanced, _instanced_parts
+    from atlas_runtime.compact_mesh import weld
+    from atlas_runtime.membudget import MeshGroup
+    from conftest import box_mesh
+
+    groups = [MeshGroup(weld(box_mesh(1, 2, 3).reshape(-1, 9), exact=True),
+                        np.float32([[0, 0, 0], [5, 0, 0]])),
+              MeshGroup(weld(box_mesh(4, 4, 4).reshape(-1, 9), exact=True),
+                        np.float32([[0, 9, 0]]))]
+    arrays, meta = _instanced_parts(groups)
+    name, spec, block = share_arrays(arrays)
+    block.close()
+    back = _instanced(attach_arrays(name, spec), meta)
+    assert [len(g.offsets) for g in back] == [2, 1]
+    for g, h in zip(groups, back):
+        np.testing.assert_array_equal(h.triangles(), g.triangles())
+    assert _instanced_parts([]) == ({}, [])
+
+
+def test_pack_assembly():
+    leaf = AtlasPart(def_id='L', shape=None, part_no='LEAF',
+                     props={'f': lambda: 1})
+    sub = AtlasPart(def_id='S', shape=None, part_no='SUB')
+    root = AtlasPart(def_id='R', shape=None, part_no='ROOT')
+    asm = AtlasAssembly(AtlasInstance(root, children=[
+        AtlasInstance(sub, (1.0, 2.0, 3.0), qty=2, children=[
+            AtlasInstance(leaf, None, bom_role='purchased'),
+            AtlasInstance(leaf, (5.0, 0.0, 0.0), overrides={'desc': 'x'})]),
+        AtlasInstance(leaf, 'matrix')]))
+    parts, arrays, extra = pack_assembly(asm)
+    assert [p.part_no for p in parts] == ['ROOT', 'SUB', 'LEAF']
+    assert arrays['parent'].tolist() == [-1, 0, 1, 1, 0]
+    # Unpicklable props are kept as their repr()
+    assert isinstance(parts[2].props['f'], str)
+
+    back = unpack_assembly(parts, arrays, extra, dirty=False)
+    sub_i, leaf_i = back.root.children
+    assert sub_i.xform == (1.0, 2.0, 3.0) and sub_i.qty == 2
+    assert [c.xform for c in sub_i.children] == [None, (5.0, 0.0, 0.0)]
+    assert sub_i.children[0].bom_role == 'purchased'
+    assert sub_i.children[1].overrides == {'desc': 'x'}
+    assert leaf_i.xform == 'matrix' and leaf_i.ref is sub_i.children[0].ref
+    assert [(b['part_no'], b['qty']) for b in bom_flat(back)] == \
+        [(b['part_no'], b['qty']) for b in bom_flat(asm)]
+
+
+def test_model_host(models, tmp_path, occ):
+    models_dir, pkg = models
+    info = ModelRegistry(models_dir, pkg).scan()['Box']
+    host = ModelHost(models_dir, pkg, max_jobs=2)
+    options = {'stream': False}
+    try:
+        kwargs = {'count': 3, 'fail': False, 'crash': False}
+        messages = []
+        data, stats = host.run(object(), info, kwargs, options,
+                               progress=messages.append)
+        asm = data['assembly']
+        assert 'Building geometry...' in messages
+        assert stats['model_process'] == host.pid != os.getpid()
+        assert len(asm.root.children) == 3
+        assert asm.root.children[0].ref.shape is None
+        assert asm.root.children[0].ref.props['pid'] == host.pid
+        assert len(asm.triangles) == stats['tris'] == 36
+        assert data['original_triangles'] == 36
+        assert isinstance(asm.compound, RemoteCompound)
+
+        step = tmp_path / 'out.step'
+        host.export_step(asm.compound, str(step))
+        assert step.stat().st_size > 0
+
+        batches = []
+        data, stats = host.run(object(), info, kwargs,
+                               {'stream': True, 'edge_angle': 30.0},
+                               partial=batches.append)
+        assert data['streamed'] and data['triangles'] is None
+        assert sum(b.n_triangles for b in batches) == 36
+        # One box group of 12 feature edges at 3 offsets
+        assert stats['edge_segments'] == data['edges'].n_segments == 36
+
+        # max_jobs=2: the worker is recycled before the next job
+        pid = host.pid
+        with pytest.raises(ModelProcessError, match='asked to fail'):
+            host.run(object(), info, {**kwargs, 'fail': True}, options)
+        assert host.pid not in (pid, None)
+        with pytest.raises(ModelProcessError, match='restarted'):
+            host.export_step(asm.compound, str(step))
+
+        with pytest.raises(ModelProcessError, match='exit code 3'):
+            host.run(object(), info, {**kwargs, 'crash': True}, options)
+        data, stats = host.run(object(), info, kwargs, options)
+        assert len(data['assembly'].triangles) == 36
+    finally:
+        host.close()
+    assert not host.alive
+
+
+def test_cancel_before_the_job_starts():
+    import threading
+    import time
+    import types
+    from gui.model_host import _Server
+
+    mod = types.SimpleNamespace(__name__='early_cancel',
+                                assembly=lambda **kw: None)
+
+    class _Registry:
+        def load(self, info):
+            return mod, False
+
+    class _Conn:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, msg):
+            self.sent.append(msg)
+
+    cancel = threading.Event()
+    server = _Server(_Conn(), cancel, _Registry())
+    cancel.set()  # arrives while the worker is still between jobs
+    time.sleep(0.05)
+    assert cancel.is_set()
+    server._run(1, {'module': 'early_cancel', 'func': 'assembly'}, {},
+                {'stream': False})
+    # Stopped at the first stage boundary instead of failing on the result
+    assert server.conn.sent[-1] == ('cancelled',)
+    assert not cancel.is_set()
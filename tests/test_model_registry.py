@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pytest
+
+from gui.model_registry import ModelRegistry
+
+
+@pytest.fixture()
+def registry(tmp_path, monkeypatch):
+    pkg = tmp_path / 'reg_models'
+    pkg.mkdir()
+    (pkg / '__init__.py').write_text('')
+    for i in range(3):
+        d = pkg / f'm{i}'
+        d.mkdir()
+        (d / '__init__.py').write_text(f'X = {i}\n')
+        (d / 'config.json').write_text(f'{{"name": "Model {i}"}}')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield ModelRegistry(pkg, 'reg_models')
+    for name in [n for n in sys.modules if n.startswith('reg_models')]:
+        del sys.modules[name]
+
+
+def test_scan_reads_config(registry) -> None:
+    models = registry.scan()
+    assert sorted(models) == ['Model 0', 'Model 1', 'Model 2']
+    assert models['Model 1'] == {'module': 'reg_models.m1', 'folder': 'm1',
+                                 'func': 'assembly'}
+
+    cfg = registry.models_dir / 'm1' / 'config.json'
+    cfg.write_text('{"name": "Renamed", "entry": "build"}')
+    models = registry.scan()
+    assert models['Renamed']['func'] == 'build'
+    assert 'Model 1' not in models
+
+
+def test_unchanged_package_is_reused(registry) -> None:
+    info = registry.scan()['Model 0']
+    mod, reloaded = registry.load(info)
+    assert reloaded and mod.X == 0
+
+    again, reloaded = registry.load(info)
+    assert again is mod and not reloaded
+
+    # Touching without editing keeps the import
+    os.utime(registry.models_dir / 'm0' / '__init__.py')
+    assert not registry.is_stale(info)
+
+
+def test_edited_package_is_reimported(registry) -> None:
+    info = registry.scan()['Model 2']
+    mod, _ = registry.load(info)
+
+    (registry.models_dir / 'm2' / '__init__.py').write_text('X = 42\n')
+    assert registry.is_stale(info)
+
+    mod2, reloaded = registry.load(info)
+    assert reloaded and mod2 is not mod and mod2.X == 42
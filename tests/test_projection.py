@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasPart, AtlasInstance, AtlasAssembly
+from atlas_runtime.projection import mesh_edges, project_mesh, \
+    project_assembly, views_dxf_writer, export_views_dxf
+
+from conftest import box_mesh, stand_in_part
+
+pytestmark = pytest.mark.usefixtures('fresh_cache')
+
+
+def _assembly(*instances: AtlasInstance) -> AtlasAssembly:
+    root = AtlasPart(def_id='ROOT', shape=None, part_no='ROOT')
+    return AtlasAssembly(AtlasInstance(root, children=list(instances)))
+
+
+def test_box_edges_and_iso_view():
+    tris = box_mesh(1, 2, 3)
+    edges = mesh_edges(tris)
+    # Face diagonals are smooth, the 12 box edges are features
+    assert len(edges.edges) == 18 and edges.feature.sum() == 12
+
+    iso = project_mesh(tris, 'iso')
+    assert (len(iso.visible), len(iso.hidden)) == (9, 3)
+    # Back edges coincide with the front ones, which win
+    front = project_mesh(tris, 'front')
+    assert (len(front.visible), len(front.hidden)) == (4, 0)
+    with pytest.raises(ValueError):
+        project_mesh(tris, 'bottom')
+
+
+def test_assembly_views_are_cached_per_part():
+    big = stand_in_part('BIG', box_mesh(10, 10, 10))
+    small = stand_in_part('SMALL', box_mesh(4, 4, 4, (3, -10, 3)))
+    asm = _assembly(AtlasInstance(big), AtlasInstance(big, (20, 0, 0)),
+                    AtlasInstance(small))
+
+    first = project_assembly(asm, ('front', 'top'))
+    front = first['front']
+    assert (front.parts, front.projected) == (2, 2)
+    assert len(front.visible) == 3 * 4 and len(front.hidden) == 0
+    lo, hi = front.bounds()
+    np.testing.assert_allclose(lo, (0, 0))
+    np.testing.assert_allclose(hi, (30, 10))
+
+    again = project_assembly(asm, ('front', 'top'))
+    assert again['front'].projected == 0
+    np.testing.assert_array_equal(again['top'].visible, first['top'].visible)
+
+
+def test_lines_hidden_by_other_parts():
+    wall = box_mesh(10, 10, 10)
+    behind = box_mesh(4, 4, 4, (3, 20, 3))
+    asm = _assembly(AtlasInstance(stand_in_part('WALL', wall)),
+                    AtlasInstance(stand_in_part('BEHIND', behind)))
+
+    alone = project_assembly(asm, ('front',))['front']
+    assert (len(alone.visible), len(alone.hidden)) == (8, 0)
+    d = project_assembly(asm, ('front', 'top'), occlude=True)
+    assert (len(d['front'].visible), len(d['front'].hidden)) == (4, 4)
+    assert (len(d['top'].visible), len(d['top'].hidden)) == (8, 0)
+    assert d['front'].occluded == 1
+
+
+def test_occlusion_cached_per_instance_and_occluders():
+    wall = stand_in_part('WALL', box_mesh(10, 10, 10))
+    post = stand_in_part('POST', box_mesh(2, 2, 2, (4, 20, 4)))
+    asm = _assembly(AtlasInstance(wall), AtlasInstance(post),
+                    AtlasInstance(wall, (30, 0, 0)),
+                    AtlasInstance(post, (30, 0, 0)))
+    first = project_assembly(asm, ('front',), occlude=True)['front']
+    # The second post sits behind its wall like the first: a cache hit
+    assert first.occluded == 1 and len(first.hidden) == 8
+
+    # Moving an unrelated pair re-tests nothing: same part behind the
+    # same occluder, only placed elsewhere
+    asm.root.children[2].xform = asm.root.children[3].xform = (60, 0, 0)
+    moved = project_assembly(asm, ('front',), occlude=True)['front']
+    assert moved.occluded == 0 and len(moved.hidden) == 8
+    asm.root.children[1].xform = (0, 0, 20)  # clear of the wall
+    lifted = project_assembly(asm, ('front',), occlude=True)['front']
+    assert lifted.occluded == 0 and len(lifted.hidden) == 4
+
+
+def test_large_triangles_are_binned_coarsely():
+    from atlas_runtime import projection
+
+    rng = np.random.default_rng(3)
+    small = rng.uniform(0, 100, size=(2000, 1, 3)) + \
+        rng.uniform(0, 1, size=(2000, 3, 3))
+    big = np.array([[[0, 0, 50], [100, 0, 50], [0, 100, 50]]], dtype=float)
+    samples = rng.uniform(0, 100, size=(500, 3)) * (1, 1, 0.4)
+    got = projection._covered(samples, np.concatenate([small, big]))
+    # Everything below the big triangle's hypotenuse is hidden by it
+    under = samples[:, 0] + samples[:, 1] < 100
+    assert got[under].all()
+    np.testing.assert_array_equal(
+        got[~under], projection._covered(samples[~under], small))
+
+
+def test_views_dxf(tmp_path):
+    asm = _assembly(AtlasInstance(stand_in_part('BOX', box_mesh(10, 20, 30))))
+    drawings = list(project_assembly(asm).values())
+    text = views_dxf_writer(drawings).tostring()
+    assert '\nLAYER\n2\nVISIBLE\n' in text
+    assert '\nLAYER\n2\nHIDDEN\n70\n0\n62\n8\n6\nHIDDEN\n' in text
+    assert text.count('\nLINE\n') == \
+        sum(len(d.visible) + len(d.hidden) for d in drawings)
+
+    path = export_views_dxf(drawings, tmp_path / 'views.dxf')
+    assert path.read_text(encoding='ascii') == text
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime.section import sections_along, section_planes, \
+    slice_segments, dxf_text, export_dxf, plane_basis
+
+from conftest import box_mesh
+
+
+def _signed_area(xy: np.ndarray) -> float:
+    x, y = xy[:, 0], xy[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+
+def test_box_sections_are_closed_ccw_loops():
+    tris = box_mesh(10, 20, 30).reshape(-1, 9).astype(np.float32)
+    secs = sections_along(tris, 'z', 10.0)
+    assert [s.offset for s in secs] == [10.0, 20.0, 30.0]
+    for s in secs:
+        assert len(s.polylines) == 1 and s.polylines[0].closed
+        xy, _ = s.paths2d()[0]
+        assert _signed_area(xy) == pytest.approx(200.0)
+        lo, hi = s.bounds2d()
+        assert np.allclose(lo, [0, 0]) and np.allclose(hi, [10, 20])
+
+
+def test_sections_batch_many_parts_and_planes():
+    boxes = [box_mesh(4, 4, 4, at=(10 * i, 10 * j, 0))
+             for i in range(5) for j in range(4)]
+    tris = np.concatenate(boxes)
+    secs = section_planes(tris, (0, 0, 1), [3.0, 1.0, 2.0, 50.0])
+    assert [s.offset for s in secs] == [3.0, 1.0, 2.0, 50.0]
+    assert [len(s.closed) for s in secs] == [20, 20, 20, 0]
+    areas = [_signed_area(xy) for xy, _ in secs[0].paths2d()]
+    assert np.allclose(areas, 16.0)
+
+
+def test_plane_through_vertex_only_gives_no_segments():
+    tris = box_mesh(1, 1, 1)
+    plane, a, b = slice_segments(tris, 'z', [0.0, 2.0])
+    assert len(plane) == len(a) == len(b) == 0
+
+
+def test_oblique_section_of_a_box():
+    tris = box_mesh(10, 10, 10)
+    n = np.array([1.0, 1.0, 0.0]) / np.sqrt(2)
+    (sec,) = section_planes(tris, n, [10 / np.sqrt(2)])
+    assert len(sec.polylines) == 1 and sec.polylines[0].closed
+    # Diagonal rectangle 10·√2 by 10
+    assert abs(_signed_area(sec.paths2d()[0][0])) == \
+        pytest.approx(100 * np.sqrt(2))
+    u, v = plane_basis(n)
+    assert np.allclose(np.cross(u, v), n)
+
+
+def test_dxf_export(tmp_path):
+    tris = np.concatenate([box_mesh(4, 4, 4), box_mesh(4, 4, 4, (10, 0, 0))])
+    secs = sections_along(tris, 'z', 1.0)
+    text = dxf_text(secs)
+    assert text.startswith('0\nSECTION\n2\nHEADER\n')
+    assert '\nLAYER\n2\nSECTION_1\n' in text
+    assert text.endswith('0\nEOF\n')
+    assert text.count('\nPOLYLINE\n') == sum(len(s.polylines) for s in secs)
+    assert 'SECTION_1\n' in text and 'SECTION_4\n' in text
+
+    path = export_dxf(secs, tmp_path / 'sections.dxf')
+    assert path.read_text(encoding='ascii') == text
+
+
+def test_loops_join_along_mesh_edges_not_positions(monkeypatch):
+    from atlas_runtime import section
+
+    def _walk(*args):
+        raise AssertionError('regular loops need no walk')
+
+    monkeypatch.setattr(section, '_walk', _walk)
+    # The boxes' corner edges differ but cross z = 0.5 at the same point
+    tris = np.concatenate([box_mesh(1, 1, 1),
+                           box_mesh(1, 1, 2, at=(1, 1, -0.5))])
+    (sec,) = section_planes(tris, 'z', [0.5])
+    assert len(sec.polylines) == 2
+    assert all(p.closed for p in sec.polylines)
+    assert [_signed_area(xy) for xy, _ in sec.paths2d()] == \
+        pytest.approx([1.0, 1.0])
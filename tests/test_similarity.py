@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasPart, AtlasInstance, AtlasAssembly
+from atlas_runtime.similarity import SimilarityIndex, describe, DIMS, \
+    SIZE_DIMS
+
+from conftest import box_mesh, stand_in_part
+
+pytestmark = pytest.mark.usefixtures('fresh_cache')
+
+
+def _part(name: str, tris: np.ndarray) -> AtlasPart:
+    return stand_in_part(name, tris, part_no=f'P-{name}')
+
+
+def _assembly(*parts: AtlasPart) -> AtlasAssembly:
+    root = AtlasPart(def_id='ROOT', shape=None, part_no='ROOT')
+    return AtlasAssembly(AtlasInstance(
+        root, children=[AtlasInstance(p) for p in parts]))
+
+
+def test_descriptor_invariance():
+    d = describe(box_mesh(10, 20, 30))
+    assert d.shape == (DIMS,) and d.dtype == np.float32
+    np.testing.assert_allclose(np.exp(d[:3]), (30, 20, 10), rtol=1e-6)
+    np.testing.assert_allclose(np.exp(3 * d[3]), 6000, rtol=1e-5)
+    np.testing.assert_allclose(np.exp(2 * d[4]), 2200, rtol=1e-5)
+    assert d[SIZE_DIMS:].sum() == pytest.approx(1.0)
+    # Translated copy: same descriptor; turned copy: same size
+    np.testing.assert_array_equal(describe(box_mesh(10, 20, 30, (5, 6, 7))),
+                                  d)
+    turned = describe(box_mesh(30, 10, 20))
+    np.testing.assert_allclose(turned[:SIZE_DIMS], d[:SIZE_DIMS], atol=1e-6)
+
+
+def test_within_and_nearest():
+    index = SimilarityIndex('unused.npz')
+    asm = _assembly(_part('A', box_mesh(100, 50, 20)),
+                    _part('A1', box_mesh(101, 50.5, 20.2)),  # 1 % larger
+                    _part('A5', box_mesh(105, 52.5, 21)),  # 5 % larger
+                    _part('T', box_mesh(50, 20, 100)),  # A turned
+                    _part('C', box_mesh(300, 10, 10)))
+    assert index.update_model('lib', asm) == 5
+    assert len(index) == 5
+
+    near = index.within('lib/A', 0.02)
+    assert [m.key for m in near] == ['lib/T', 'lib/A1']
+    assert near[0].size_diff == pytest.approx(0.0, abs=1e-6)
+    assert near[1].size_diff == pytest.approx(0.01, abs=1e-4)
+    assert near[1].part_no == 'P-A1' and near[1].model == 'lib'
+    assert [m.key for m in index.within('lib/A', 0.06)][-1] == 'lib/A5'
+
+    ranked = [m.key for m in index.nearest('lib/A', 4)]
+    assert sorted(ranked[:2]) == ['lib/A1', 'lib/T']
+    assert ranked[2:] == ['lib/A5', 'lib/C']
+    assert index.find('P-A5') == ['lib/A5']
+
+
+def test_incremental_update_and_persistence(tmp_path):
+    path = str(tmp_path / 'index.npz')
+    index = SimilarityIndex(path)
+    a, b = _part('A', box_mesh(10, 10, 10)), _part('B', box_mesh(9, 9, 9))
+    index.update_model('m1', _assembly(a, b))
+    index.update_model('m2', _assembly(_part('X', box_mesh(10, 10, 10.1))))
+    # Regenerated m1 without B, A unchanged: nothing to describe
+    assert index.update_model('m1', _assembly(a)) == 0
+    assert sorted(index.keys()) == ['m1/A', 'm2/X']
+
+    index.save()
+    loaded = SimilarityIndex.load(path)
+    assert sorted(loaded.keys()) == ['m1/A', 'm2/X']
+    np.testing.assert_array_equal(loaded.vector('m2/X'),
+                                  index.vector('m2/X'))
+    assert loaded.meta('m1/A')['part_no'] == 'P-A'
+    assert [m.key for m in loaded.within('m1/A')] == ['m2/X']
+    # Known geometry is not described again after loading
+    assert loaded.update_model('m3', _assembly(
+        _part('Y', box_mesh(9, 9, 9)))) == 1
+
+    assert len(SimilarityIndex.load(str(tmp_path / 'missing.npz'))) == 0
+
+
+def test_update_reuses_cached_geometry(monkeypatch):
+    from atlas_runtime import fingerprint
+    a = _part('A', box_mesh(10, 10, 10))
+    index = SimilarityIndex('unused.npz')
+    index.update_model('m1', _assembly(a))
+
+    def _fail(*_args):
+        raise AssertionError('part meshed again')
+
+    monkeypatch.setattr(fingerprint, 'shape_mesh', _fail)
+    monkeypatch.setattr(fingerprint, '_local_fingerprint', _fail)
+    assert index.update_model('m1', _assembly(a)) == 0
+    assert index.keys() == ['m1/A']
+
+
+def test_save_writes_outside_the_lock(tmp_path, monkeypatch):
+    import threading
+    from atlas_runtime import similarity
+
+    index = SimilarityIndex(str(tmp_path / 'index.npz'))
+    index.update_model('m1', _assembly(_part('A', box_mesh(10, 10, 10))))
+    writing, queried = threading.Event(), threading.Event()
+    savez = np.savez
+
+    def _slow_savez(f, **arrays):
+        writing.set()
+        assert queried.wait(5.0), 'query blocked by the write'
+        savez(f, **arrays)
+
+    monkeypatch.setattr(similarity.np, 'savez', _slow_savez)
+    saver = threading.Thread(target=index.save)
+    saver.start()
+    assert writing.wait(5.0)
+    assert index.within('m1/A') == []
+    index.update_model('m2', _assembly(_part('B', box_mesh(9, 9, 9))))
+    queried.set()
+    saver.join()
+    # The edit made during the write is still to be saved
+    assert index.dirty
+    assert SimilarityIndex.load(index.path).keys() == ['m1/A']
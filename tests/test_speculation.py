@@ -0,0 +1,35 @@
+import numpy as np
+
+from atlas_runtime import AtlasAssembly, AtlasInstance, AtlasPart
+from gui.speculation import neighbour_values
+from gui.workspace import Workspace
+
+
+def test_neighbours_nearest_first_and_clipped() -> None:
+    assert neighbour_values(4, 1, 0, 100, 2) == [5, 3, 6, 2]
+    assert neighbour_values(1, 1, 0, 100, 2) == [2, 0, 3]
+    assert all(isinstance(v, int) for v in neighbour_values(4, 1, 0, 9, 2))
+
+
+def test_neighbours_match_spin_box_rounding() -> None:
+    vals = neighbour_values(1.2, 0.1, 0.0, 2.0, 2, decimals=2)
+    assert vals == [1.3, 1.1, 1.4, 1.0]
+    assert repr(vals[0]) == '1.3'
+
+
+def test_speculative_entries_are_evicted_first() -> None:
+    ws = Workspace(budget_bytes=10 ** 9, max_models=2)
+
+    def _asm() -> AtlasAssembly:
+        root = AtlasInstance(ref=AtlasPart(def_id='_ROOT', shape=None,
+                                           part_no='ASM-ROOT'))
+        asm = AtlasAssembly(root=root)
+        asm.triangles = np.zeros((4, 9), dtype=np.float32)
+        return asm
+
+    shown = ws.key('models.a', {'n': 1})
+    ws.put(shown, _asm())
+    ws.put(ws.key('models.a', {'n': 2}), _asm(), pin=False)
+    ws.put(ws.key('models.a', {'n': 0}), _asm(), pin=False)
+    assert len(ws) == 2 and shown in ws
+    assert ws.key('models.a', {'n': 2}) in ws
@@ -0,0 +1,35 @@
+import sys
+
+from atlas.startup_profile import StartupProfiler
+
+
+def test_profiler_records_phases_and_imports(tmp_path, monkeypatch) -> None:
+    (tmp_path / 'slow_startup_mod.py').write_text(
+        'import time\ntime.sleep(0.01)\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    prof = StartupProfiler()
+    prof.enable()
+    try:
+        with prof.phase('import slow'):
+            import slow_startup_mod  # noqa: F401
+        prof.mark('done')
+    finally:
+        prof.finish()
+        sys.modules.pop('slow_startup_mod', None)
+
+    assert prof._hook not in sys.meta_path
+    assert [p[0] for p in prof.phases] == ['import slow']
+    assert prof.phases[0][2] >= 0.01
+    names = {name: dur for name, dur, depth in prof.imports if depth == 0}
+    assert names['slow_startup_mod'] >= 0.01
+    assert 'import slow_startup_mod' in prof.report()
+
+
+def test_disabled_profiler_is_inert() -> None:
+    prof = StartupProfiler()
+    with prof.phase('x'):
+        pass
+    prof.mark('y')
+    prof.finish()
+    assert not prof.phases and not prof.marks
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasInstance, normalize_assembly, bom_flat, \
+    bom_rollup, stdparts
+from atlas_runtime.fingerprint import shape_mesh
+from atlas_runtime.stdparts import Catalog, MeshStore, Standard
+
+
+class _Shape:
+    pass
+
+
+def _pin_catalog(tmp_path, built: list) -> Catalog:
+    def build(dims, length):
+        built.append((dims['d'], length))
+        return _Shape()
+
+    cat = Catalog(MeshStore(str(tmp_path)))
+    cat.register(Standard(code='TST 1', kind='pin', title='Pin',
+                          sizes={'D2': {'d': 2.0}, 'D3': {'d': 3.0}},
+                          build=build,
+                          lengths={'D2': (10.0, 20.0), 'D3': (20.0,)}))
+    return cat
+
+
+def test_index_lookup() -> None:
+    rows = stdparts.find(standard='iso4017', size='M8')
+    assert [r.length for r in rows] == stdparts.catalog.lengths(
+        'ISO 4017', 'M8')
+    assert rows and all(r.designation.startswith('M8x') for r in rows)
+    assert [r.designation for r in stdparts.find('ISO 4032', 'M8')] == ['M8']
+    assert stdparts.find('EN 10219', 'SHS40x3', 1234)[0].length == 1234
+    assert 'ISO 7089' in stdparts.catalog.standards(kind='washer')
+
+    with pytest.raises(ValueError, match='nearest: 35, 40'):
+        stdparts.catalog.spec('ISO 4017', 'M8', 37)
+    with pytest.raises(KeyError):
+        stdparts.catalog.spec('ISO 4017', 'M7', 40)
+
+
+def test_persisted_mesh_skips_meshing(tmp_path) -> None:
+    built: list = []
+    cat = _pin_catalog(tmp_path, built)
+    spec = cat.spec('TST 1', 'D2', 10)
+    tris = np.arange(18, dtype=np.float32).reshape(2, 9)
+    cat.store.save(spec.key, tris, spec.as_dict())
+
+    shape = cat.shape(spec)
+    assert cat.shape(spec) is shape and built == [(2.0, 10.0)]
+    np.testing.assert_array_equal(shape_mesh(shape).reshape(-1, 9), tris)
+    assert MeshStore(str(tmp_path)).index[spec.key]['size'] == 'D2'
+    assert spec.key != cat.spec('TST 1', 'D2', 20).key
+
+
+def test_parts_are_shared_with_bom_lines(tmp_path) -> None:
+    built: list = []
+    cat = _pin_catalog(tmp_path, built)
+    for s in cat.find('TST 1'):
+        cat.store.save(s.key, np.zeros((1, 9), np.float32), s.as_dict())
+
+    pin = cat.part('TST 1', 'D3', 20)
+    assert cat.part('tst1', 'D3', 20.0) is pin
+    assert pin.def_id == 'STD/TST1/D3x20/steel'
+    assert pin.bom_line.part_no == pin.part_no == 'TST1-D3x20'
+    assert cat.part('TST 1', 'D3', 20, material='A4').part_no == \
+        'TST1-D3x20-A4'
+
+    asm = normalize_assembly([pin] * 3 + [cat.part('TST 1', 'D2', 10)],
+                             dedupe=False)
+    lines = {ln['part_no']: ln['qty'] for ln in bom_rollup(bom_flat(asm))}
+    assert lines == {'TST1-D3x20': 3.0, 'TST1-D2x10': 1.0}
+
+
+def test_fastener_and_profile_geometry(occ, tmp_path) -> None:
+    cat = Catalog(MeshStore(str(tmp_path)))
+    for std in stdparts.fasteners.STANDARDS + stdparts.profiles.STANDARDS:
+        cat.register(std)
+
+    bolt = cat.part('ISO 4017', 'M8', 40)
+    lo = shape_mesh(bolt.shape).reshape(-1, 3).min(axis=0)
+    hi = shape_mesh(bolt.shape).reshape(-1, 3).max(axis=0)
+    assert lo[2] == pytest.approx(-40, abs=1e-3)
+    assert hi[2] == pytest.approx(5.3, abs=1e-3)
+
+    rail = cat.part('EN 10219', 'SHS40x3', 500)
+    assert rail.bom_line.unit == 'm' and rail.bom_line.qty == 0.5
+    assert rail.bom_line.part_no == 'EN10219-SHS40x3'
+
+    again = Catalog(MeshStore(str(tmp_path)))
+    again.register(stdparts.fasteners.STANDARDS[0])
+    spec = again.spec('ISO 4017', 'M8', 40)
+    assert again.store.load(spec.key) is not None
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+atlas_runtime = pytest.importorskip('atlas_runtime',
+                                    reason='Atlas runtime is not importable')
+
+from atlas_runtime import AtlasAssembly, AtlasInstance, AtlasPart
+from atlas_runtime.massprops import MassProps
+from atlas.modules import titan
+
+
+def _block(name: str, size: float, kg: float) -> AtlasPart:
+    part = AtlasPart(def_id=name, shape=object(), part_no=name)
+    # Preset the lazily computed properties (no OCC needed)
+    part.__dict__['mass_props'] = MassProps(
+        volume=size ** 3, area=6 * size ** 2, bbox_min=np.zeros(3),
+        bbox_max=np.full(3, size), centroid=np.full(3, size / 2),
+        inertia=np.zeros((3, 3)), density=kg / (size ** 3 * 1e-9))
+    return part
+
+
+def _asm(rail_x: float = 300.0) -> AtlasAssembly:
+    rail_l, rail_r = _block('RAIL-L', 10, 2.0), _block('RAIL-R', 10, 2.0)
+    box = _block('BOX', 100, 50.0)
+    cooling = AtlasInstance(
+        ref=AtlasPart(def_id='COOLING', shape=None, part_no='COOLING'),
+        xform=(0.0, 0.0, 100.0),
+        children=[AtlasInstance(ref=box, xform=(0.0, 0.0, 0.0)),
+                  AtlasInstance(ref=box, xform=(150.0, 0.0, 0.0))])
+    root = AtlasInstance(
+        ref=AtlasPart(def_id='_ROOT', shape=None, part_no='ASM-ROOT'),
+        children=[AtlasInstance(ref=rail_l, xform=(0.0, 0.0, 0.0)),
+                  AtlasInstance(ref=rail_r, xform=(rail_x, 0.0, 0.0)),
+                  cooling])
+    return AtlasAssembly(root=root)
+
+
+def _engine() -> titan.TitanEngine:
+    return titan.TitanEngine([
+        titan.Envelope('cooling box', titan.subtree('COOLING'),
+                       lo=(0, 0, 0), hi=(300, 120, 250)),
+        titan.MassBudget('weight', max_kg=110),
+        titan.Interface('rail spacing', titan.part('RAIL-L'),
+                        other=titan.part('RAIL-R'), nominal=300, tol=0.5),
+        titan.Clearance('rail to cooling', titan.part('RAIL-R'),
+                        other=titan.subtree('COOLING'), gap=5),
+    ])
+
+
+def test_table_subtrees_and_offsets() -> None:
+    table = titan.InstanceTable.from_assembly(_asm())
+    assert list(table.key[:3]) == ['_ROOT', '_ROOT/RAIL-L#0',
+                                   '_ROOT/RAIL-R#0']
+    rows = table.subtree_rows('COOLING')
+    assert list(table.key[rows]) == ['_ROOT/COOLING#0',
+                                     '_ROOT/COOLING#0/BOX#0',
+                                     '_ROOT/COOLING#0/BOX#1']
+    np.testing.assert_allclose(table.hi[rows[-1]], (250, 100, 200))
+
+
+def test_all_constraints_evaluate() -> None:
+    report = _engine().update(_asm())
+    by_name = {r.name: r for r in report.results}
+    assert report.evaluated == 4 and report.ok, report.summary()
+    assert by_name['weight'].value == pytest.approx(104)
+    assert by_name['rail spacing'].value == pytest.approx(300)
+    assert by_name['rail to cooling'].value == pytest.approx(
+        np.sqrt(50 ** 2 + 90 ** 2))
+
+
+def test_edit_reevaluates_only_dependants() -> None:
+    engine = _engine()
+    engine.update(_asm())
+    assert engine.update(_asm()).evaluated == 0
+
+    report = engine.update(_asm(rail_x=310.0))
+    assert report.changed_rows == 1
+    # RAIL-R feeds the weight, spacing and clearance checks, not the envelope
+    assert report.evaluated == 3
+    assert [r.name for r in report.violations] == ['rail spacing']
+
+
+def test_structure_change_resolves_scopes() -> None:
+    engine = _engine()
+    engine.update(_asm())
+    asm = _asm()
+    cooling = asm.root.children[2]
+    cooling.children.append(AtlasInstance(ref=cooling.children[0].ref,
+                                          xform=(250.0, 0.0, 0.0)))
+    report = engine.update(asm)
+    assert report.evaluated == 4
+    assert {r.name for r in report.violations} == {'cooling box', 'weight'}
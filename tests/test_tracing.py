@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import threading
+
+import pytest
+
+tracing = pytest.importorskip('atlas_runtime.tracing',
+                              reason='Atlas runtime is not importable')
+
+
+def test_spans_nest_and_aggregate() -> None:
+    t = tracing.Tracer(max_runs=4)
+    with t.run('regen test') as run:
+        with t.span('model'):
+            with t.span('inner', triangles=12):
+                pass
+        with t.span('model'):
+            pass
+        t.counter('pipeline', instances=3, triangles=12)
+
+    names = [(e.name, e.depth) for e in run.events if e.ph == 'X']
+    assert ('inner', 1) in names and ('model', 0) in names
+    assert set(run.stage_times()) == {'model'}
+    assert run.counters()['pipeline.instances'] == 3
+    assert list(t.runs) == [run]
+
+
+def test_worker_thread_records_into_attached_run() -> None:
+    t = tracing.Tracer()
+    run = t.begin_run('regen threaded')
+
+    def work() -> None:
+        with t.attach(run), t.span('geometry'):
+            pass
+
+    th = threading.Thread(target=work)
+    th.start()
+    th.join()
+    with t.span('unbound'):
+        pass
+    t.end_run(run)
+
+    assert [e.name for e in run.events] == ['geometry']
+    assert run.events[0].tid == th.ident
+
+
+def test_ring_buffer_and_chrome_export() -> None:
+    t = tracing.Tracer(max_runs=2)
+    for i in range(3):
+        with t.run(f'regen {i}'), t.span('model'):
+            pass
+    assert [r.label for r in t.runs] == ['regen 1', 'regen 2']
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'trace.json')
+        t.export_chrome_trace(path)
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+    spans = [e for e in data['traceEvents'] if e['ph'] == 'X']
+    assert {e['name'] for e in spans} == {'regen 1', 'regen 2', 'model'}
+    assert all(e['dur'] >= 0 for e in spans)
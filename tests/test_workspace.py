@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from atlas_runtime import AtlasAssembly, AtlasInstance, AtlasPart
+from gui.workspace import Workspace
+
+from conftest import box_mesh
+
+MB = 1024 ** 2
+
+
+class _FakePolyData:
+    def __init__(self, kib: int) -> None:
+        self.kib = kib
+
+    def GetActualMemorySize(self) -> int:
+        return self.kib
+
+
+def _put(ws: Workspace, name: str, mb: int = 1) -> tuple:
+    root = AtlasInstance(ref=AtlasPart(def_id='_ROOT', shape=None,
+                                       part_no='ASM-ROOT'))
+    asm = AtlasAssembly(root=root)
+    asm.triangles = np.zeros((mb * MB // 36, 9), dtype=np.float32)
+    asm.dirty = False
+    mesh = {'points': np.zeros(mb * MB // 4, dtype=np.float32)}
+    key = ws.key(f'models.{name}', {'n': 1})
+    ws.put(key, asm, mesh, _FakePolyData(mb * 1024), {'t_inst': 10})
+    return key
+
+
+def test_entries_are_measured_and_reused() -> None:
+    ws = Workspace(budget_bytes=100 * MB)
+    key = _put(ws, 'a')
+    entry = ws.get(key)
+    assert entry.tier == 'vtk'
+    assert entry.bytes_vtk == MB
+    assert abs(entry.bytes_triangles - 2 * MB) < 64
+    assert ws.get(ws.key('models.a', {'n': 2})) is None
+
+
+def test_eviction_is_tiered_and_lru() -> None:
+    budget = int(8.5 * MB)
+    ws = Workspace(budget_bytes=budget)
+    a = _put(ws, 'a')
+    b = _put(ws, 'b')
+    c = _put(ws, 'c')  # ~9 MB: oldest idle entry drops its VTK first
+    assert [ws.get(k).tier for k in (a, b, c)] == ['triangles', 'vtk', 'vtk']
+
+    ws.get(a)  # LRU order is now b, c, a
+    _put(ws, 'd')  # all idle VTK goes before b loses its triangles
+    assert [ws.get(k).tier for k in (b, c, a)] == [
+        'assembly', 'triangles', 'triangles']
+    assert ws.get(b).assembly.triangles is None
+    assert ws.get(b).assembly.dirty
+    assert ws.nbytes <= budget
+
+
+def test_pinned_entry_survives_and_assemblies_go_last() -> None:
+    ws = Workspace(budget_bytes=3 * MB)
+    a = _put(ws, 'a')
+    b = _put(ws, 'b')
+    assert b in ws and ws.get(b).tier == 'vtk'
+    assert a not in ws
+
+
+def test_drop_module_and_max_models() -> None:
+    ws = Workspace(budget_bytes=100 * MB, max_models=2)
+    _put(ws, 'a')
+    _put(ws, 'b')
+    c = _put(ws, 'c')
+    assert len(ws) == 2
+    assert ws.drop_module('models.c') == 1
+    assert c not in ws
+
+
+def test_edges_go_with_the_triangles() -> None:
+    from atlas_runtime.edges import EdgeGroup, EdgeOverlay
+
+    ws = Workspace(budget_bytes=100 * MB)
+    group = EdgeGroup(np.zeros((MB // 12, 3), np.float32),
+                      np.zeros((8, 2), np.int32),
+                      np.zeros((4, 3), np.float32))
+    key = ws.key('models.a', {'n': 1})
+    ws.put(key, None, {'points': np.zeros(MB // 4, dtype=np.float32)},
+           edges=EdgeOverlay([group]))
+    entry = ws.get(key)
+    assert abs(entry.bytes_triangles - 2 * MB) < 256
+    assert abs(entry.drop('triangles') - 2 * MB) < 256
+    assert entry.edges is None and entry.tier == 'assembly'
+
+
+def test_constraint_report_survives_eviction() -> None:
+    ws = Workspace(budget_bytes=100 * MB)
+    key = ws.key('models.a', {'n': 1})
+    report = object()  # a TitanReport in the app
+    ws.put(key, None, {'points': np.zeros(16, dtype=np.float32)},
+           constraints=report)
+    entry = ws.get(key)
+    entry.drop('vtk')
+    entry.drop('triangles')
+    assert entry.constraints is report
+
+
+def test_streamed_mesh_fills_the_triangles_tier() -> None:
+    pytest.importorskip('vtkmodules')
+    from atlas_runtime.compact_mesh import weld
+    from gui.vtk_viewer import _MeshStream
+
+    # What VTKQtViewer.end_stream hands back for the workspace
+    stream = _MeshStream(np.int64)
+    for at in range(4):
+        batch = weld(box_mesh(1, 1, 1, (2.0 * at, 0, 0)).reshape(-1, 9),
+                     exact=True)
+        stream.append(batch.points(), batch.indices)
+    stream.compact()
+
+    ws = Workspace(budget_bytes=100 * MB)
+    key = ws.key('models.a', {'n': 1})
+    ws.put(key, None, stream.mesh, stream.polydata)
+    entry = ws.get(key)
+    assert entry.bytes_triangles == stream.mesh.nbytes
+    entry.drop('vtk')
+    assert entry.tier == 'triangles' and entry.mesh is stream.mesh
@@ -9,17 +9,6 @@ atlas_runtime = pytest.importorskip('atlas_runtime',
 WRAPPER_API_VERSION = '0.2.1'  # Update as new versions are released
 
 
-@pytest.fixture(scope='session')
-def occ():
-    try:
-        from atlas_runtime import atlas_occ
-    except Exception as e:
-        pytest.skip(f'atlas_occ not available: {e}')
-
-    # noinspection PyUnboundLocalVariable
-    return atlas_occ
-
-
 def test_import_wrapper(occ) -> None:
     for name in ('EXT_API_VERSION', 'TopoDS_Shape', 'bool_cut', 'bool_fuse',
                  'export_step', 'export_stl', 'extrude_shape', 'get_triangles',